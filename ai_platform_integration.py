@@ -83,10 +83,12 @@ class AIPlatformCrawlerClient:
         response.raise_for_status()
         return response.json()
     
-    async def get_task_status(self, task_id: str) -> Dict[str, Any]:
-        """获取任务状态"""
+    async def get_task_status(self, task_id: str, wait: float = 0,
+                              since: Optional[str] = None) -> Dict[str, Any]:
+        """获取任务状态，wait 大于 0 时长轮询等待状态变化"""
         url = f"{self.base_url}/api/v1/crawler/status/{task_id}"
-        response = await self.client.get(url)
+        params = {"wait": wait, "since": since} if wait > 0 and since else None
+        response = await self.client.get(url, params=params)
         response.raise_for_status()
         return response.json()
     
@@ -290,9 +292,12 @@ class AIPlatformIntegration:
         """监控任务进度"""
         print(f"[AI平台] 监控任务进度: {task_id}")
         
+        since = None
         while True:
             try:
-                status = await self.crawler_client.get_task_status(task_id)
+                # 长轮询，任务状态变化时立即返回，最长等待 check_interval 秒
+                status = await self.crawler_client.get_task_status(task_id, wait=check_interval, since=since)
+                since = status.get("updated_at")
                 
                 if status["status"] == "completed":
                     print(f"[AI平台] 任务完成")
@@ -324,8 +329,7 @@ class AIPlatformIntegration:
                         "session_id": status.get("session_id")
                     }
                 else:
-                    print(f"[AI平台] 任务状态: {status['status']}")
-                    await asyncio.sleep(check_interval)
+                    print(f"[AI平台] 任务状态: {status['status']}, 进度: {status.get('progress')}")
                     
             except Exception as e:
                 print(f"[AI平台] 监控任务异常: {e}")
@@ -10,29 +10,27 @@
 
 import asyncio
 import json
-import os
+import shutil
 import sys
+import time
 import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 import config
-import db
-from base.base_crawler import AbstractCrawler
-from media_platform.bilibili import BilibiliCrawler
-from media_platform.douyin import DouYinCrawler
-from media_platform.kuaishou import KuaishouCrawler
-from media_platform.tieba import TieBaCrawler
-from media_platform.weibo import WeiboCrawler
-from media_platform.xhs import XiaoHongShuCrawler
-from media_platform.zhihu import ZhihuCrawler
 from proxy import proxy_router, ProxyManager
 from login_api import login_router
+from tools import utils, words
+from tools.browser_pool import browser_pool
+from tools.metrics import metrics, render_with_snapshots
+from tools.task_progress import get_task_records_dir, get_task_records_file, iter_task_records, read_task_records
+from worker import (TASK_FINISHED_STATUSES, CrawlerWorkerPool, JobQueueFactory, SqliteTaskRegistry,
+                    execute_crawl_job)
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -47,8 +45,86 @@ app.include_router(proxy_router)
 # 注册登录管理路由
 app.include_router(login_router)
 
-# 任务状态存储
-task_status = {}
+# 任务状态登记表，启动时创建
+task_registry: Optional[SqliteTaskRegistry] = None
+
+# 长轮询和 SSE 检查任务状态变化的间隔，单位秒
+TASK_STATUS_POLL_INTERVAL = 0.5
+# 长轮询最长等待时间，单位秒
+MAX_STATUS_WAIT_SEC = 60
+# SSE 心跳间隔，单位秒
+SSE_HEARTBEAT_SEC = 15
+
+# 多进程 worker 模式下的任务队列和 worker 池
+job_queue = None
+worker_pool: Optional[CrawlerWorkerPool] = None
+
+@app.on_event("startup")
+async def start_worker_pool():
+    """创建任务登记表，API_WORKER_NUM 大于 0 时启动多进程 worker 池"""
+    global task_registry, job_queue, worker_pool
+    task_registry = SqliteTaskRegistry()
+    metrics.register_gauge("running_tasks", lambda: task_registry.count(status="running"))
+    asyncio.create_task(evict_expired_tasks())
+    if config.API_WORKER_NUM <= 0:
+        # 进程内执行的任务随上次进程退出而中断
+        task_registry.fail_unfinished("服务重启，任务中断")
+        return
+    job_queue = JobQueueFactory.create_queue()
+    metrics.register_gauge("job_queue_depth", job_queue.pending_count)
+    worker_pool = CrawlerWorkerPool(num_workers=config.API_WORKER_NUM)
+    worker_pool.start()
+    metrics.register_gauge("alive_workers", lambda: worker_pool.alive_count)
+
+@app.on_event("shutdown")
+async def stop_worker_pool():
+    if worker_pool is not None:
+        worker_pool.stop()
+    await browser_pool.close()
+    words.get_word_frequency_engine().close()
+
+def remove_task_data(task_id: str) -> None:
+    """删除任务的抓取记录和队列中的任务"""
+    shutil.rmtree(get_task_records_dir(task_id), ignore_errors=True)
+    if job_queue is not None:
+        job_queue.delete(task_id)
+
+async def evict_expired_tasks():
+    """定期从任务队列同步未结束任务的状态，并淘汰过期的已结束任务"""
+    while True:
+        try:
+            if job_queue is not None:
+                # 没有人查询的任务也要同步 worker 回写的状态，否则一直停留在未结束状态，不会被淘汰
+                for task_id in task_registry.unfinished_task_ids():
+                    get_task(task_id)
+            for task_id in task_registry.evict(config.TASK_REGISTRY_TTL_SEC, config.TASK_REGISTRY_MAX_TASKS):
+                remove_task_data(task_id)
+        except Exception as e:
+            utils.logger.error(f"[api_server.evict_expired_tasks] evict tasks error: {e}")
+        await asyncio.sleep(config.TASK_REGISTRY_EVICT_INTERVAL_SEC)
+
+def get_task(task_id: str) -> Optional[Dict]:
+    """获取任务状态，worker 模式下先从任务队列同步 worker 回写的状态"""
+    task = task_registry.get(task_id)
+    if task is None or job_queue is None or task["status"] in TASK_FINISHED_STATUSES:
+        return task
+    job = job_queue.get(task_id)
+    if job is None or job["updated_at"] == task["updated_at"]:
+        return task
+    fields = {key: job.get(key) for key in ("status", "progress", "result", "error", "session_id")}
+    task_registry.update(task_id, updated_at=job["updated_at"], **fields)
+    task.update(fields, updated_at=job["updated_at"])
+    return task
+
+async def wait_task_update(task_id: str, since: Optional[str], timeout: float) -> Optional[Dict]:
+    """等待任务状态的 updated_at 变化，任务已结束或超时后返回最新的任务状态"""
+    deadline = time.monotonic() + timeout
+    while True:
+        task = get_task(task_id)
+        if (task is None or task["updated_at"] != since or task["status"] in TASK_FINISHED_STATUSES
+                or time.monotonic() >= deadline):
+            return task
+        await asyncio.sleep(TASK_STATUS_POLL_INTERVAL)
 
 class CrawlerRequest(BaseModel):
     platform: str = Field(..., description="平台: xhs, dy, ks, bili, wb, tieba, zhihu")
@@ -58,7 +134,7 @@ class CrawlerRequest(BaseModel):
     start_page: int = Field(default=1, description="开始页数")
     get_comments: bool = Field(default=True, description="是否爬取评论")
     get_sub_comments: bool = Field(default=False, description="是否爬取二级评论")
-    save_data_option: str = Field(default="json", description="数据保存方式: csv, db, json")
+    save_data_option: str = Field(default="json", description="数据保存方式: csv, db, json, parquet, sqlite")
     cookies: Optional[str] = Field(default="", description="Cookie字符串")
     specified_ids: Optional[List[str]] = Field(default=None, description="指定ID列表")
     max_notes_count: int = Field(default=200, description="最大爬取数量")
@@ -84,142 +160,17 @@ class TaskStatusResponse(BaseModel):
     created_at: str
     updated_at: str
 
-class CrawlerFactory:
-    CRAWLERS = {
-        "xhs": XiaoHongShuCrawler,
-        "dy": DouYinCrawler,
-        "ks": KuaishouCrawler,
-        "bili": BilibiliCrawler,
-        "wb": WeiboCrawler,
-        "tieba": TieBaCrawler,
-        "zhihu": ZhihuCrawler
-    }
-
-    @staticmethod
-    def create_crawler(platform: str) -> AbstractCrawler:
-        crawler_class = CrawlerFactory.CRAWLERS.get(platform)
-        if not crawler_class:
-            raise ValueError(f"不支持的平台: {platform}")
-        return crawler_class()
+def update_task_status(task_id: str, **fields) -> None:
+    """更新任务登记表中的任务状态"""
+    task_registry.update(task_id, **fields)
 
 async def run_crawler_task(task_id: str, request: CrawlerRequest):
     """后台运行爬虫任务"""
-    try:
-        # 更新任务状态
-        task_status[task_id]["status"] = "running"
-        task_status[task_id]["updated_at"] = datetime.now().isoformat()
-        
-        # 检查登录状态
-        from login_manager import login_manager
-        
-        if request.session_id:
-            # 使用指定的会话ID
-            session = await login_manager.check_login_status(request.platform, request.session_id)
-            if session.status.value == "not_logged_in" or session.status.value == "expired":
-                # 需要重新登录
-                task_status[task_id]["status"] = "need_login"
-                task_status[task_id]["error"] = "需要重新登录"
-                task_status[task_id]["updated_at"] = datetime.now().isoformat()
-                return
-            elif session.status.value == "need_verification":
-                # 需要验证
-                task_status[task_id]["status"] = "need_verification"
-                task_status[task_id]["error"] = "需要手动验证"
-                task_status[task_id]["updated_at"] = datetime.now().isoformat()
-                return
-            elif session.status.value == "logged_in":
-                # 已登录，获取cookies
-                cookies = await login_manager.get_session_cookies(request.session_id)
-                if cookies:
-                    # 将cookies转换为字符串格式
-                    cookie_str = "; ".join([f"{k}={v}" for k, v in cookies.items()])
-                    config.COOKIES = cookie_str
-        else:
-            # 查找平台的最新会话
-            session = await login_manager.check_login_status(request.platform)
-            if session.status.value == "logged_in":
-                # 已登录，获取cookies
-                cookies = await login_manager.get_session_cookies(session.session_id)
-                if cookies:
-                    cookie_str = "; ".join([f"{k}={v}" for k, v in cookies.items()])
-                    config.COOKIES = cookie_str
-            elif session.status.value in ["not_logged_in", "expired", "need_verification"]:
-                # 需要登录或验证
-                task_status[task_id]["status"] = "need_login"
-                task_status[task_id]["error"] = "需要登录"
-                task_status[task_id]["session_id"] = session.session_id
-                task_status[task_id]["updated_at"] = datetime.now().isoformat()
-                return
-        
-        # 配置爬虫参数
-        config.PLATFORM = request.platform
-        config.LOGIN_TYPE = request.login_type
-        config.CRAWLER_TYPE = request.crawler_type
-        config.KEYWORDS = request.keywords
-        config.START_PAGE = request.start_page
-        config.ENABLE_GET_COMMENTS = request.get_comments
-        config.ENABLE_GET_SUB_COMMENTS = request.get_sub_comments
-        config.SAVE_DATA_OPTION = request.save_data_option
-        config.CRAWLER_MAX_NOTES_COUNT = request.max_notes_count
-        config.ENABLE_GET_IMAGES = request.enable_images
-        
-        # 配置代理设置
-        if request.use_proxy:
-            config.ENABLE_IP_PROXY = True
-            # 这里可以设置代理策略，具体实现需要在爬虫基类中支持
-            # 暂时通过环境变量传递
-            os.environ["PROXY_STRATEGY"] = request.proxy_strategy
-        else:
-            config.ENABLE_IP_PROXY = False
-        
-        # 设置指定ID列表
-        if request.specified_ids:
-            if request.platform == "xhs":
-                config.XHS_SPECIFIED_NOTE_URL_LIST = request.specified_ids
-            elif request.platform == "dy":
-                config.DY_SPECIFIED_ID_LIST = request.specified_ids
-            elif request.platform == "ks":
-                config.KS_SPECIFIED_ID_LIST = request.specified_ids
-            elif request.platform == "bili":
-                config.BILI_SPECIFIED_ID_LIST = request.specified_ids
-            elif request.platform == "wb":
-                config.WEIBO_SPECIFIED_ID_LIST = request.specified_ids
-            elif request.platform == "tieba":
-                config.TIEBA_SPECIFIED_ID_LIST = request.specified_ids
-            elif request.platform == "zhihu":
-                config.ZHIHU_SPECIFIED_ID_LIST = request.specified_ids
-
-        # 初始化数据库
-        if config.SAVE_DATA_OPTION == "db":
-            await db.init_db()
-
-        # 创建爬虫实例并运行
-        crawler = CrawlerFactory.create_crawler(platform=request.platform)
-        await crawler.start()
-
-        # 获取结果数据
-        result_data = {}
-        if config.SAVE_DATA_OPTION == "json":
-            # 读取JSON文件
-            data_file = f"data/{request.platform}_data.json"
-            if os.path.exists(data_file):
-                with open(data_file, 'r', encoding='utf-8') as f:
-                    result_data = json.load(f)
-
-        # 更新任务状态为完成
-        task_status[task_id]["status"] = "completed"
-        task_status[task_id]["result"] = result_data
-        task_status[task_id]["updated_at"] = datetime.now().isoformat()
-
-        # 关闭数据库连接
-        if config.SAVE_DATA_OPTION == "db":
-            await db.close()
-
-    except Exception as e:
-        # 更新任务状态为失败
-        task_status[task_id]["status"] = "failed"
-        task_status[task_id]["error"] = str(e)
-        task_status[task_id]["updated_at"] = datetime.now().isoformat()
+    await execute_crawl_job(
+        request.model_dump(),
+        lambda **fields: update_task_status(task_id, **fields),
+        task_id=task_id,
+    )
 
 @app.post("/api/v1/crawler/start", response_model=CrawlerResponse)
 async def start_crawler(request: CrawlerRequest, background_tasks: BackgroundTasks):
@@ -229,18 +180,14 @@ async def start_crawler(request: CrawlerRequest, background_tasks: BackgroundTas
         task_id = str(uuid.uuid4())
         
         # 初始化任务状态
-        task_status[task_id] = {
-            "task_id": task_id,
-            "status": "pending",
-            "progress": 0.0,
-            "result": None,
-            "error": None,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
+        task_registry.create(task_id, platform=request.platform)
         
-        # 在后台运行爬虫任务
-        background_tasks.add_task(run_crawler_task, task_id, request)
+        if job_queue is not None:
+            # 投递到持久化队列，由 worker 进程执行
+            job_queue.put(task_id, request.model_dump())
+        else:
+            # 在后台运行爬虫任务
+            background_tasks.add_task(run_crawler_task, task_id, request)
         
         return CrawlerResponse(
             task_id=task_id,
@@ -252,28 +199,100 @@ async def start_crawler(request: CrawlerRequest, background_tasks: BackgroundTas
         raise HTTPException(status_code=500, detail=f"启动爬虫失败: {str(e)}")
 
 @app.get("/api/v1/crawler/status/{task_id}", response_model=TaskStatusResponse)
-async def get_task_status(task_id: str):
-    """获取任务状态"""
-    if task_id not in task_status:
+async def get_task_status(task_id: str, wait: float = 0, since: Optional[str] = None):
+    """
+    获取任务状态
+    wait 大于 0 时为长轮询：任务状态的 updated_at 与 since 相同时最多等待 wait 秒，状态变化后立即返回
+    """
+    if wait > 0:
+        task = await wait_task_update(task_id, since, min(wait, MAX_STATUS_WAIT_SEC))
+    else:
+        task = get_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="任务不存在")
-    
-    return TaskStatusResponse(**task_status[task_id])
+    return TaskStatusResponse(**task)
+
+@app.get("/api/v1/crawler/status/{task_id}/events")
+async def stream_task_status(task_id: str):
+    """通过 Server-Sent Events 推送任务状态，每次状态变化推送一条，任务结束后关闭连接"""
+    if task_registry.get(task_id) is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    async def event_stream():
+        since = None
+        last_sent = time.monotonic()
+        while True:
+            task = await wait_task_update(task_id, since, SSE_HEARTBEAT_SEC)
+            if task is None:
+                yield "event: deleted\ndata: {}\n\n"
+                return
+            if task["updated_at"] != since:
+                since = task["updated_at"]
+                last_sent = time.monotonic()
+                yield f"data: {json.dumps(TaskStatusResponse(**task).model_dump(), ensure_ascii=False)}\n\n"
+            elif time.monotonic() - last_sent >= SSE_HEARTBEAT_SEC:
+                last_sent = time.monotonic()
+                yield ": heartbeat\n\n"
+            if task["status"] in TASK_FINISHED_STATUSES:
+                return
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/v1/crawler/tasks/{task_id}/records")
+async def get_task_records(task_id: str, kind: str = "contents", cursor: int = 0, limit: int = 100):
+    """
+    按游标分页获取任务抓取的数据
+    kind 为数据类型: contents, comments, creators ...；cursor 传上一页返回的 next_cursor，首页为 0
+    """
+    if task_registry.get(task_id) is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if cursor < 0 or not 0 < limit <= 1000:
+        raise HTTPException(status_code=400, detail="cursor 或 limit 参数错误")
+    try:
+        records, next_cursor, has_more = read_task_records(task_id, kind, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "task_id": task_id,
+        "kind": kind,
+        "records": records,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+@app.get("/api/v1/crawler/tasks/{task_id}/records.ndjson")
+async def stream_task_records(task_id: str, kind: str = "contents"):
+    """以 NDJSON 流式输出任务抓取的全部数据，每行一条"""
+    if task_registry.get(task_id) is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    try:
+        get_task_records_file(task_id, kind)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(iter_task_records(task_id, kind), media_type="application/x-ndjson")
 
 @app.get("/api/v1/crawler/tasks")
-async def list_tasks():
-    """获取所有任务列表"""
+async def list_tasks(status: Optional[str] = None, cursor: Optional[str] = None, limit: int = 20):
+    """
+    按创建时间倒序分页获取任务列表
+    cursor 传上一页返回的 next_cursor，首页不传
+    """
+    if not 0 < limit <= 100:
+        raise HTTPException(status_code=400, detail="limit 参数错误")
+    tasks, next_cursor = task_registry.list(status=status, cursor=cursor, limit=limit)
     return {
-        "tasks": list(task_status.values()),
-        "total": len(task_status)
+        "tasks": [get_task(task["task_id"]) or task for task in tasks],
+        "total": task_registry.count(status=status),
+        "next_cursor": next_cursor,
     }
 
 @app.delete("/api/v1/crawler/tasks/{task_id}")
 async def delete_task(task_id: str):
     """删除任务"""
-    if task_id not in task_status:
+    if not task_registry.delete(task_id):
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    del task_status[task_id]
+    remove_task_data(task_id)
     return {"message": "任务已删除", "task_id": task_id}
 
 @app.get("/api/v1/health")
@@ -285,6 +304,11 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus 格式的爬虫指标，worker 模式下汇总各 worker 进程的指标"""
+    return PlainTextResponse(render_with_snapshots(config.METRICS_SNAPSHOT_DIR), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/v1/platforms")
 async def get_supported_platforms():
     """获取支持的平台列表"""
@@ -87,6 +87,11 @@ class AbstractStoreImage(ABC):
 
 
 class AbstractApiClient(ABC):
+    # 爬虫设置后 request/get/post 在登录态守护下执行，见 tools.session_guard.SessionGuard
+    session_guard = None
+    # 爬虫设置后 request/get/post 分摊到多个登录账号执行，见 tools.account_pool.AccountPool
+    account_pool = None
+
     @abstractmethod
     async def request(self, method, url, **kwargs):
         pass
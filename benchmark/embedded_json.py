@@ -0,0 +1,118 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 页面内嵌状态解析基准，对比整页 json.loads 后取值与 tools.embedded_json 只解析所需子对象的耗时和内存分配
+#            用法: python -m benchmark.embedded_json --iterations 500
+
+import argparse
+import json
+import os
+import re
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, List
+
+from tools.embedded_json import extract_embedded_json
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def _xhs_note_id(html: str) -> str:
+    return re.search(r'"noteDetailMap":\{"(\w+)"', html).group(1)
+
+
+@dataclass
+class PageCase:
+    name: str
+    html: str
+    # 旧实现: 整页解析后取值
+    full_parse: Callable[[str], Any]
+    # 新实现: 只解析需要的子对象
+    targeted: Callable[[str], Any]
+
+
+def build_cases() -> List[PageCase]:
+    note_html = _read_fixture("xhs_note_page.html")
+    note_id = _xhs_note_id(note_html)
+    return [
+        PageCase(
+            name="xhs_note",
+            html=note_html,
+            full_parse=lambda html: json.loads(
+                re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[0].replace("undefined", '""')
+            )["note"]["noteDetailMap"][note_id]["note"],
+            targeted=lambda html: extract_embedded_json(
+                html, "window.__INITIAL_STATE__=", ("noteDetailMap", note_id, "note"), undefined='""'
+            ),
+        ),
+        PageCase(
+            name="xhs_creator",
+            html=_read_fixture("xhs_creator_page.html"),
+            full_parse=lambda html: json.loads(
+                re.search(r"<script>window.__INITIAL_STATE__=(.+)<\/script>", html, re.M).group(1)
+                .replace(":undefined", ":null"), strict=False
+            ).get("user").get("userPageData"),
+            targeted=lambda html: extract_embedded_json(html, "window.__INITIAL_STATE__=", ("userPageData",)),
+        ),
+        PageCase(
+            name="weibo_detail",
+            html=_read_fixture("weibo_detail_page.html"),
+            full_parse=lambda html: json.loads(
+                re.search(r'var \$render_data = (\[.*?\])\[0\]', html, re.DOTALL).group(1)
+            )[0].get("status"),
+            targeted=lambda html: extract_embedded_json(html, "var $render_data = ", ("status",)),
+        ),
+    ]
+
+
+def cpu_us(parse: Callable[[str], Any], html: str, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        parse(html)
+    return (time.process_time() - start) * 1e6 / iterations
+
+
+def peak_kb(parse: Callable[[str], Any], html: str) -> float:
+    """单次解析过程中的内存分配峰值"""
+    tracemalloc.start()
+    try:
+        parse(html)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="页面内嵌状态解析基准")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'page':<14}{'size KB':>9}{'full us':>10}{'target us':>11}{'full peak KB':>14}{'target peak KB':>16}")
+    for case in build_cases():
+        # 两种实现的结果必须一致
+        assert case.full_parse(case.html) == case.targeted(case.html), case.name
+        full_cpu = cpu_us(case.full_parse, case.html, args.iterations)
+        targeted_cpu = cpu_us(case.targeted, case.html, args.iterations)
+        full_peak = peak_kb(case.full_parse, case.html)
+        targeted_peak = peak_kb(case.targeted, case.html)
+        print(f"{case.name:<14}{len(case.html) / 1024:>9.1f}{full_cpu:>10.1f}{targeted_cpu:>11.1f}"
+              f"{full_peak:>14.1f}{targeted_peak:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
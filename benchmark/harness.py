@@ -0,0 +1,339 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 离线基准测试的执行框架
+#            - 替换 httpx.AsyncClient 的 transport，把各平台客户端的请求改写到本地模拟服务，并记录每个请求的耗时
+#            - 用离线的 BrowserContext / Page 代替 playwright，只提供客户端创建和签名时用到的 cookies、localStorage
+#            - 跳过登录，直接用爬虫自己的 create_xxx_client 创建客户端，端到端执行 search / detail / creator 流程
+#            - 统计吞吐(存储层写入条数/秒)、请求延迟 p50/p99 和进程内存峰值
+
+import os
+import resource
+import sys
+import time
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
+from unittest import mock
+
+import httpx
+
+from benchmark.mock_server import BILI_WBI_IMG_URL, BILI_WBI_SUB_URL, PROJECT_ROOT
+
+# 各平台签名、登录态检查用到的cookie，值本身不会被模拟服务校验
+OFFLINE_COOKIES = {
+    "a1": "18f0c2a7b1dmockbenchmarka1000000000000000000000",
+    "webId": "mockbenchmarkwebid",
+    "web_session": "mockbenchmarksession",
+    "SESSDATA": "mockbenchmarksessdata",
+    "bili_jct": "mockbenchmarkbilijct",
+    "d_c0": "AMockBenchmarkD_c0|1717171717",
+    "SUB": "mockbenchmarksub",
+    "kpf": "PC_WEB",
+    "did": "web_mockbenchmarkdid",
+    "BDUSS": "mockbenchmarkbduss",
+}
+
+OFFLINE_LOCAL_STORAGE = {
+    "b1": "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSBMDKutRI3KsYorWHPtGrbV0PgpAI7mock",
+    "wbi_img_urls": f"{BILI_WBI_IMG_URL}-{BILI_WBI_SUB_URL}",
+}
+
+OFFLINE_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+
+_ORIGINAL_ASYNC_CLIENT = httpx.AsyncClient
+
+
+class OfflineBrowserContext:
+    """代替 playwright 的 BrowserContext，只实现客户端创建和刷新cookie时调用的 cookies()"""
+
+    def __init__(self, cookies: Dict[str, str]) -> None:
+        self._cookies = cookies
+
+    async def cookies(self, urls: Any = None) -> List[Dict[str, str]]:
+        return [{"name": name, "value": value} for name, value in self._cookies.items()]
+
+    async def add_cookies(self, cookies: List[Dict]) -> None:
+        for cookie in cookies:
+            self._cookies[cookie["name"]] = cookie["value"]
+
+    async def close(self) -> None:
+        pass
+
+
+class OfflinePage:
+    """代替 playwright 的 Page，签名函数和 localStorage 返回固定值"""
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        if "_webmsxyw" in expression:
+            return {"X-s": "XYW_mockbenchmark", "X-t": int(time.time() * 1000)}
+        if "localStorage" in expression:
+            return dict(OFFLINE_LOCAL_STORAGE)
+        if "navigator.userAgent" in expression:
+            return OFFLINE_USER_AGENT
+        return None
+
+    async def goto(self, url: str, **kwargs: Any) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class MockRoutedTransport(httpx.AsyncHTTPTransport):
+    """
+    把 https://{host}{path} 改写为 {mock_url}/{host}{path} 后再发送，并记录请求耗时(包含读取响应体)
+    """
+
+    def __init__(self, mock_url: str, latencies: List[float]) -> None:
+        super().__init__()
+        mock = httpx.URL(mock_url)
+        self._mock_host = mock.host
+        self._mock_port = mock.port
+        self._latencies = latencies
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(
+            scheme="http",
+            host=self._mock_host,
+            port=self._mock_port,
+            raw_path=f"/{request.url.host}".encode() + request.url.raw_path,
+        )
+        start = time.perf_counter()
+        response = await super().handle_async_request(request)
+        await response.aread()
+        self._latencies.append(time.perf_counter() - start)
+        return response
+
+
+def routed_async_client(mock_url: str, latencies: List[float]) -> type:
+    """
+    生成替换 httpx.AsyncClient 的类，各平台客户端每次请求都会新建 AsyncClient，这里每次也新建 transport，和真实请求的连接行为一致
+    """
+
+    class RoutedAsyncClient(_ORIGINAL_ASYNC_CLIENT):
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            kwargs.pop("proxies", None)
+            kwargs["transport"] = MockRoutedTransport(mock_url, latencies)
+            super().__init__(*args, **kwargs)
+
+    return RoutedAsyncClient
+
+
+class NoPacingRandom:
+    """
+    替换爬虫模块里的 random，抓取间隔全部为0，只测量抓取本身的开销
+    """
+
+    @staticmethod
+    def random() -> float:
+        return 0.0
+
+    @staticmethod
+    def uniform(a: float, b: float) -> float:
+        return 0.0
+
+    @staticmethod
+    def randint(a: int, b: int) -> int:
+        return 0
+
+
+@dataclass
+class Scenario:
+    platform: str
+    crawler_type: str
+    # 覆盖 CrawlSettings 的字段
+    settings: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return f"{self.platform}-{self.crawler_type}"
+
+
+@dataclass
+class BenchmarkResult:
+    scenario: str
+    elapsed_sec: float
+    items: int
+    items_by_kind: Dict[str, int]
+    requests: int
+    request_errors: int
+    retries: int
+    p50_ms: float
+    p99_ms: float
+    peak_rss_mb: float
+
+    @property
+    def items_per_sec(self) -> float:
+        return self.items / self.elapsed_sec if self.elapsed_sec else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "items_per_sec": round(self.items_per_sec, 2)}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近秩法计算分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(q * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def peak_rss_mb() -> float:
+    # linux 上 ru_maxrss 的单位是KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _bili_creator_flow(crawler: Any) -> None:
+    from config.settings import crawl_settings
+
+    for creator_id in crawl_settings.bili_creator_id_list:
+        await crawler.get_creator_videos(int(creator_id))
+
+
+async def _bili_detail_flow(crawler: Any) -> None:
+    from config.settings import crawl_settings
+
+    await crawler.get_specified_videos(crawl_settings.bili_specified_id_list)
+
+
+# 平台 -> (客户端属性名, 创建客户端的方法名)，贴吧不依赖浏览器，直接执行 start
+CLIENT_FACTORIES: Dict[str, tuple] = {
+    "xhs": ("xhs_client", "create_xhs_client"),
+    "bili": ("bili_client", "create_bilibili_client"),
+    "wb": ("wb_client", "create_weibo_client"),
+    "ks": ("ks_client", "create_ks_client"),
+    "zhihu": ("zhihu_client", "create_zhihu_client"),
+}
+
+# 平台 -> 爬虫类型 -> 流程，与各平台 start() 中按 crawler_type 的分发一致
+FLOWS: Dict[str, Dict[str, Callable[[Any], Awaitable[None]]]] = {
+    "xhs": {
+        "search": lambda crawler: crawler.search(),
+        "detail": lambda crawler: crawler.get_specified_notes(),
+        "creator": lambda crawler: crawler.get_creators_and_notes(),
+    },
+    "bili": {
+        "search": lambda crawler: crawler.search(),
+        "detail": _bili_detail_flow,
+        "creator": _bili_creator_flow,
+    },
+    "wb": {
+        "search": lambda crawler: crawler.search(),
+        "detail": lambda crawler: crawler.get_specified_notes(),
+        "creator": lambda crawler: crawler.get_creators_and_notes(),
+    },
+    "ks": {
+        "search": lambda crawler: crawler.search(),
+        "detail": lambda crawler: crawler.get_specified_videos(),
+        "creator": lambda crawler: crawler.get_creators_and_videos(),
+    },
+    "zhihu": {
+        "search": lambda crawler: crawler.search(),
+        "detail": lambda crawler: crawler.get_specified_notes(),
+        "creator": lambda crawler: crawler.get_creators_and_notes(),
+    },
+    "tieba": {
+        "search": lambda crawler: crawler.start(),
+        "detail": lambda crawler: crawler.start(),
+    },
+}
+
+
+async def run_scenario(scenario: Scenario, mock_url: str, keep_pacing: bool = False,
+                       save_data_option: str = "json") -> BenchmarkResult:
+    """
+    在当前进程中对模拟服务执行一个场景，存储层的文件写在当前工作目录的 data 目录下
+    Args:
+        scenario: 平台、爬虫类型和配置
+        mock_url: 模拟服务地址
+        keep_pacing: 是否保留爬虫自带的随机抓取间隔，默认去掉
+        save_data_option: 存储方式
+
+    Returns:
+
+    """
+    from config.settings import CrawlSettings, set_crawl_settings
+    from main import CrawlerFactory
+    from store import close_store_sinks
+    from tools.metrics import metrics
+    from var import crawler_type_var
+
+    flow = FLOWS.get(scenario.platform, {}).get(scenario.crawler_type)
+    if flow is None:
+        raise ValueError(f"unsupported scenario: {scenario.name}")
+
+    settings = CrawlSettings.from_config(**{
+        "save_data_option": save_data_option,
+        "enable_ip_proxy": False,
+        "enable_get_images": False,
+        "enable_get_wordcloud": False,
+        **scenario.settings,
+        "platform": scenario.platform,
+        "crawler_type": scenario.crawler_type,
+    })
+    set_crawl_settings(settings)
+    crawler_type_var.set(scenario.crawler_type)
+
+    latencies: List[float] = []
+    metrics.reset()
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch("httpx.AsyncClient", routed_async_client(mock_url, latencies)))
+        crawler = CrawlerFactory.create_crawler(scenario.platform)
+        if not keep_pacing:
+            stack.enter_context(mock.patch.object(sys.modules[type(crawler).__module__], "random", NoPacingRandom))
+        if scenario.platform in CLIENT_FACTORIES:
+            client_attr, factory_name = CLIENT_FACTORIES[scenario.platform]
+            crawler.browser_context = OfflineBrowserContext(dict(OFFLINE_COOKIES))
+            crawler.context_page = OfflinePage()
+            setattr(crawler, client_attr, await getattr(crawler, factory_name)(None))
+
+        start = time.perf_counter()
+        await flow(crawler)
+        await close_store_sinks(save_data_option)
+        elapsed = time.perf_counter() - start
+
+    snapshot = metrics.snapshot()
+    items_by_kind: Dict[str, int] = {}
+    for labels, _, _, count in snapshot["histograms"].get("store_write_seconds", []):
+        kind = dict(labels).get("kind", "unknown")
+        items_by_kind[kind] = items_by_kind.get(kind, 0) + count
+    request_errors = sum(
+        count for labels, _, _, count in snapshot["histograms"].get("request_seconds", [])
+        if dict(labels).get("outcome") != "ok"
+    )
+    return BenchmarkResult(
+        scenario=scenario.name,
+        elapsed_sec=round(elapsed, 3),
+        items=sum(items_by_kind.values()),
+        items_by_kind=items_by_kind,
+        requests=len(latencies),
+        request_errors=int(request_errors),
+        retries=int(sum(value for _, value in snapshot["counters"].get("retries_total", []))),
+        p50_ms=round(percentile(latencies, 0.5) * 1000, 2),
+        p99_ms=round(percentile(latencies, 0.99) * 1000, 2),
+        peak_rss_mb=round(peak_rss_mb(), 1),
+    )
+
+
+def prepare_run_dir(run_dir: str) -> None:
+    """
+    基准测试在单独的目录运行，存储层写入的 data 目录不会混进项目目录；
+    知乎签名的js、快手的graphql查询按相对路径读取，这里链接过去
+    """
+    os.makedirs(run_dir, exist_ok=True)
+    for name in ("libs", "media_platform"):
+        link = os.path.join(run_dir, name)
+        if not os.path.exists(link):
+            os.symlink(os.path.join(PROJECT_ROOT, name), link)
+    os.chdir(run_dir)
@@ -0,0 +1,100 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 基于 python -X importtime 的导入耗时基准
+#            用法: python -m benchmark.import_time main api_server --top 15
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动时不应该被导入的重依赖，只在对应功能开启时按需导入
+HEAVY_MODULES = ("pandas", "cv2", "numpy", "matplotlib", "wordcloud", "jieba")
+
+
+@dataclass
+class ImportTimeReport:
+    module: str
+    # 顶层模块的累计导入耗时，单位微秒
+    total_us: int
+    # 每个被导入模块的累计耗时，单位微秒
+    cumulative_us: Dict[str, int]
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_us / 1000
+
+    def imported(self, package: str) -> bool:
+        return any(name == package or name.startswith(package + ".") for name in self.cumulative_us)
+
+    def top(self, n: int = 10) -> List[tuple]:
+        return sorted(self.cumulative_us.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    解析 -X importtime 的输出，格式: import time: self [us] | cumulative | imported package
+    """
+    cumulative_us: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        cumulative_us[parts[2].strip()] = int(parts[1].strip())
+    return cumulative_us
+
+
+def measure_import(module: str) -> ImportTimeReport:
+    """
+    在全新的解释器中导入模块并统计导入耗时
+    Args:
+        module: 模块名，如 main、api_server
+
+    Returns:
+
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {proc.stderr.strip().splitlines()[-1:]}")
+    cumulative_us = parse_importtime(proc.stderr)
+    return ImportTimeReport(module=module, total_us=cumulative_us.get(module, 0), cumulative_us=cumulative_us)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time benchmark.")
+    parser.add_argument("modules", nargs="*", default=["main", "api_server"])
+    parser.add_argument("--top", type=int, default=15, help="show the slowest N imports")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        report = measure_import(module)
+        print(f"== import {module}: {report.total_ms:.1f} ms")
+        heavy = [name for name in HEAVY_MODULES if report.imported(name)]
+        print(f"   heavy modules imported: {heavy or 'none'}")
+        for name, cumulative in report.top(args.top):
+            print(f"   {cumulative / 1000:>9.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : json 编解码基准，用 benchmark/fixtures 中各平台的数据构造响应和存储内容，
+#            对比标准库 json 和 tools.json_codec 每处理 1 万条数据的 CPU 耗时
+#            用法: python -m benchmark.json_codec --items 10000 --rounds 5
+
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+from tools import json_codec
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PLATFORMS = ["xhs", "bilibili", "weibo", "kuaishou", "zhihu"]
+
+# 每页响应中的数据条数
+PAGE_SIZE = 20
+
+
+def load_items() -> List[Dict]:
+    """各平台 fixture 中的所有对象，作为单条数据的样本"""
+    items = []
+    for platform in PLATFORMS:
+        with open(os.path.join(FIXTURES_DIR, f"{platform}.json"), encoding="utf-8") as f:
+            items.extend(json.load(f).values())
+    return items
+
+
+@dataclass
+class Case:
+    name: str
+    # 处理次数，和每次处理的数据条数相乘得到总条数
+    repeat: int
+    stdlib: Callable[[], Any]
+    codec: Callable[[], Any]
+
+
+def build_cases(item_count: int) -> List[Case]:
+    samples = load_items()
+    items = [samples[index % len(samples)] for index in range(item_count)]
+    pages = [items[index:index + PAGE_SIZE] for index in range(0, item_count, PAGE_SIZE)]
+    responses = [
+        httpx.Response(200, content=json.dumps({"code": 0, "data": {"items": page}}, ensure_ascii=False).encode("utf-8"))
+        for page in pages
+    ]
+    # 签名的请求体
+    body = {"keyword": "网球", "page": 1, "page_size": PAGE_SIZE, "search_id": "2eqgibbqu7q0bbl3ubl6l", "sort": "general",
+            "note_type": 0, "ext_flags": [], "image_formats": ["jpg", "webp", "avif"]}
+    store_file = json.dumps(items, ensure_ascii=False)
+    return [
+        Case("response decode", 1,
+             lambda: [response.json() for response in responses],
+             lambda: [json_codec.response_json(response) for response in responses]),
+        Case("signed body", item_count,
+             lambda: json.dumps(body, separators=(",", ":"), ensure_ascii=False),
+             lambda: json_codec.dumps_compact(body)),
+        Case("jsonl record", 1,
+             lambda: [json.dumps(item, ensure_ascii=False, default=str) for item in items],
+             lambda: [json_codec.dumps(item, default=str) for item in items]),
+        Case("json store read", 1,
+             lambda: json.loads(store_file),
+             lambda: json_codec.loads(store_file)),
+        Case("json store write", 1,
+             lambda: json.dumps(items, ensure_ascii=False, indent=4),
+             lambda: json_codec.dumps(items, indent=True)),
+    ]
+
+
+def cpu_ms(func: Callable[[], Any], repeat: int, rounds: int) -> float:
+    """多轮中最快一轮的耗时，减少 gc 等干扰"""
+    costs = []
+    for _ in range(rounds):
+        start = time.process_time()
+        for _ in range(repeat):
+            func()
+        costs.append((time.process_time() - start) * 1000)
+    return min(costs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="json 编解码基准")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"orjson: {'on' if json_codec.orjson is not None else 'off'}")
+    print(f"{'case':<18}{'stdlib ms':>11}{'codec ms':>10}{'saved ms':>10}")
+    total_saved = 0.0
+    for case in build_cases(args.items):
+        stdlib_ms = cpu_ms(case.stdlib, case.repeat, args.rounds)
+        codec_ms = cpu_ms(case.codec, case.repeat, args.rounds)
+        total_saved += stdlib_ms - codec_ms
+        print(f"{case.name:<18}{stdlib_ms:>11.1f}{codec_ms:>10.1f}{stdlib_ms - codec_ms:>10.1f}")
+    print(f"CPU saved per {args.items} items: {total_saved:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
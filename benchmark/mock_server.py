@@ -0,0 +1,624 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 离线基准测试用的本地模拟平台服务，按各平台客户端实际请求的接口回放 benchmark/fixtures 下录制的响应模板，
+#            贴吧直接回放 media_platform/tieba/test_data 下的页面
+#            请求路径为 /{原始域名}{原始路径}，由基准测试的 httpx transport 改写
+#            用法: python -m benchmark.mock_server --port 8765 --latency-ms 50 --jitter-ms 20 --error-rate 0.01
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, quote
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(PROJECT_ROOT, "benchmark", "fixtures")
+TIEBA_FIXTURES_DIR = os.path.join(PROJECT_ROOT, "media_platform", "tieba", "test_data")
+
+# bilibili wbi 签名用的 img_key 和 sub_key，取自 BilibiliClient.pre_request_data 注释里的示例
+BILI_WBI_IMG_URL = "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png"
+BILI_WBI_SUB_URL = "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png"
+
+
+@dataclass
+class MockOptions:
+    # 每个请求的基础延迟和随机抖动，单位毫秒
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    # 返回 503 的请求比例
+    error_rate: float = 0
+    # 每页条数
+    page_size: int = 20
+    # 每条内容的一级评论页数，每页10条
+    comment_pages: int = 2
+    # 每页一级评论中带子评论的评论数，每条带 10 条子评论
+    sub_comment_roots: int = 1
+    # 创作者作品列表的页数
+    creator_pages: int = 2
+    seed: Optional[int] = None
+
+
+def load_fixture(platform: str) -> Dict:
+    with open(os.path.join(FIXTURES_DIR, f"{platform}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_tieba_page(name: str) -> str:
+    with open(os.path.join(TIEBA_FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def render(template: Any, **values: Any) -> Any:
+    """
+    用 values 替换模板中形如 "$name" 的字符串值，保持替换值原本的类型
+    """
+    if isinstance(template, dict):
+        return {key: render(value, **values) for key, value in template.items()}
+    if isinstance(template, list):
+        return [render(item, **values) for item in template]
+    if isinstance(template, str) and "$" in template:
+        if template.startswith("$") and template[1:] in values:
+            return values[template[1:]]
+        # 长的名字先替换，避免 $note 替换掉 $note_id 的前缀
+        for key in sorted(values, key=len, reverse=True):
+            template = template.replace(f"${key}", str(values[key]))
+    return template
+
+
+def mock_id(*parts: Any, length: int = 24) -> str:
+    """由请求参数确定性地生成ID，同一个请求总是拿到同样的数据"""
+    return hashlib.md5("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:length]
+
+
+def mock_int_id(*parts: Any) -> int:
+    return int(mock_id(*parts, length=12), 16) % 10 ** 12 + 10 ** 11
+
+
+def _page_index(value: Any) -> int:
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_snake(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower(): _to_snake(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_to_snake(item) for item in data]
+    return data
+
+
+def _html(body: str) -> str:
+    return f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"></head><body>{body}</body></html>"
+
+
+class MockResponse:
+    """与web框架无关的响应，由 create_app 转换为 starlette 的 Response"""
+
+    def __init__(self, content: Any, status_code: int = 200, media_type: str = "application/json",
+                 cookies: Optional[Dict[str, str]] = None) -> None:
+        self.content = content
+        self.status_code = status_code
+        self.media_type = media_type
+        self.cookies = cookies or {}
+
+    @classmethod
+    def json(cls, data: Any, **kwargs: Any) -> "MockResponse":
+        return cls(json.dumps(data, ensure_ascii=False), **kwargs)
+
+    @classmethod
+    def html(cls, text: str, **kwargs: Any) -> "MockResponse":
+        return cls(text, media_type="text/html", **kwargs)
+
+
+Handler = Callable[[str, Dict[str, str], bytes], Awaitable[MockResponse]]
+
+
+class MockPlatforms:
+    """
+    各平台接口的模拟实现，按域名分发
+    分页接口按 MockOptions 返回固定页数，之后返回没有更多数据，保证每个流程都会结束
+    """
+
+    def __init__(self, options: MockOptions) -> None:
+        self.options = options
+        self.fixtures = {platform: load_fixture(platform) for platform in ("xhs", "bilibili", "weibo", "kuaishou", "zhihu")}
+        self.tieba_pages = {
+            name: load_tieba_page(f"{name}.html")
+            for name in ("search_keyword_notes", "tieba_note_list", "note_detail", "note_comments", "note_sub_comments")
+        }
+        self.hosts: Dict[str, Handler] = {
+            "edith.xiaohongshu.com": self.xhs_api,
+            "www.xiaohongshu.com": self.xhs_web,
+            "api.bilibili.com": self.bilibili_api,
+            "m.weibo.cn": self.weibo,
+            "www.kuaishou.com": self.kuaishou_graphql,
+            "www.zhihu.com": self.zhihu,
+            "zhuanlan.zhihu.com": self.zhihu,
+            "tieba.baidu.com": self.tieba,
+        }
+
+    async def dispatch(self, host: str, path: str, params: Dict[str, str], body: bytes) -> MockResponse:
+        handler = self.hosts.get(host)
+        if handler is None:
+            return MockResponse.json({"error": f"unknown host: {host}"}, status_code=404)
+        return await handler(path, params, body)
+
+    def _has_more(self, page: int, pages: int) -> bool:
+        return page + 1 < pages
+
+    # ---------------- 小红书 ----------------
+
+    @staticmethod
+    def _xhs_ok(data: Dict) -> MockResponse:
+        return MockResponse.json({"success": True, "code": 0, "msg": "成功", "data": data})
+
+    def _xhs_note_detail(self, note_id: str) -> Dict:
+        return render(self.fixtures["xhs"]["note_detail"], note_id=note_id, xsec_token=mock_id("xsec", note_id),
+                      title=f"离线笔记 {note_id[:6]}", user_id=mock_id("xhs_user", note_id))
+
+    def _xhs_comments(self, note_id: str, page: int, count: int, root_id: str = "") -> List[Dict]:
+        comments = []
+        for index in range(count):
+            comment_id = mock_id("xhs_comment", note_id, root_id, page, index)
+            comment = render(self.fixtures["xhs"]["comment"], comment_id=comment_id, note_id=note_id,
+                             user_id=mock_id("xhs_user", comment_id))
+            if not root_id and index < self.options.sub_comment_roots:
+                comment.update({"sub_comment_count": "10", "sub_comment_has_more": True, "sub_comment_cursor": ""})
+            if root_id:
+                comment["target_comment"] = {"id": root_id}
+            comments.append(comment)
+        return comments
+
+    async def xhs_api(self, path: str, params: Dict[str, str], body: bytes) -> MockResponse:
+        xhs = self.fixtures["xhs"]
+        if path == "/api/sns/web/v1/search/notes":
+            data = json.loads(body or b"{}")
+            keyword, page = data.get("keyword", ""), _page_index(data.get("page", 1))
+            items = []
+            for index in range(data.get("page_size", self.options.page_size)):
+                note_id = mock_id("xhs_note", keyword, page, index)
+                items.append(render(xhs["search_item"], note_id=note_id, xsec_token=mock_id("xsec", note_id),
+                                    title=f"{keyword} {page}-{index}", user_id=mock_id("xhs_user", note_id)))
+            return self._xhs_ok({"has_more": True, "items": items})
+        if path == "/api/sns/web/v1/feed":
+            note_id = json.loads(body or b"{}").get("source_note_id", "")
+            return self._xhs_ok({"items": [{"id": note_id, "model_type": "note",
+                                            "note_card": _to_snake(self._xhs_note_detail(note_id))}]})
+        if path == "/api/sns/web/v2/comment/page":
+            page = _page_index(params.get("cursor"))
+            has_more = self._has_more(page, self.options.comment_pages)
+            return self._xhs_ok({
+                "comments": self._xhs_comments(params.get("note_id", ""), page, 10),
+                "has_more": has_more,
+                "cursor": str(page + 1) if has_more else "",
+            })
+        if path == "/api/sns/web/v2/comment/sub/page":
+            note_id, root_id = params.get("note_id", ""), params.get("root_comment_id", "")
+            return self._xhs_ok({
+                "comments": self._xhs_comments(note_id, 0, 10, root_id=root_id),
+                "has_more": False,
+                "cursor": "",
+            })
+        if path == "/api/sns/web/v1/user_posted":
+            user_id, page = params.get("user_id", ""), _page_index(params.get("cursor"))
+            has_more = self._has_more(page, self.options.creator_pages)
+            notes = []
+            for index in range(self.options.page_size):
+                note_id = mock_id("xhs_creator_note", user_id, page, index)
+                notes.append(render(xhs["creator_note"], note_id=note_id, xsec_token=mock_id("xsec", note_id),
+                                    title=f"创作者笔记 {page}-{index}", user_id=user_id))
+            return self._xhs_ok({"notes": notes, "has_more": has_more, "cursor": str(page + 1) if has_more else ""})
+        return MockResponse.json({"success": False, "code": -1, "msg": f"unknown path: {path}"})
+
+    async def xhs_web(self, path: str, params: Dict[str, str], body: bytes) -> MockResponse:
+        if path.startswith("/explore/"):
+            note_id = path.rsplit("/", 1)[-1]
+            state = {"note": {"noteDetailMap": {note_id: {"note": self._xhs_note_detail(note_id)}}}}
+        elif path.startswith("/user/profile/"):
+            user_id = path.rsplit("/", 1)[-1]
+            state = {"user": {"userPageData": render(self.fixtures["xhs"]["creator"], user_id=user_id)}}
+        else:
+            return MockResponse.html(_html(""), status_code=404)
+        state_json = json.dumps(state, ensure_ascii=False)
+        return MockResponse.html(_html(f"<div id=\"app\"></div><script>window.__INITIAL_STATE__={state_json}</script>"))
+
+    # ---------------- bilibili ----------------
+
+    @staticmethod
+    def _bili_ok(data: Dict) -> MockResponse:
+        return MockResponse.json({"code": 0, "message": "0", "ttl": 1, "data": data})
+
+    @staticmethod
+    def _bili_bvid(aid: int) -> str:
+        return f"BV{aid}"
+
+    def _bili_video(self, aid: int) -> Dict:
+        return render(self.fixtures["bilibili"]["video_detail"], aid=aid, bvid=self._bili_bvid(aid),
+                      cid=mock_int_id("cid", aid), title=f"离线视频 {aid}", mid=mock_int_id("bili_up", aid))
+
+    def _bili_comments(self, oid: str, page: int, count: int, root: int = 0) -> List[Dict]:
+        comments = []
+        for index in range(count):
+            rpid = mock_int_id("bili_comment", oid, root, page, index)
+            comment = render(self.fixtures["bilibili"]["comment"], rpid=rpid, aid=oid, mid=mock_int_id("bili_user", rpid))
+            if not root and index < self.options.sub_comment_roots:
+                comment["rcount"] = 10
+            if root:
+                comment.update({"parent": root, "root": root})
+            comments.append(comment)
+        return comments
+
+    async def bilibili_api(self, path: str, params: Dict[str, str], body: bytes) -> MockResponse:
+        bilibili = self.fixtures["bilibili"]
+        if path == "/x/web-interface/nav":
+            return self._bili_ok({"isLogin": True, "wbi_img": {"img_url": BILI_WBI_IMG_URL, "sub_url": BILI_WBI_SUB_URL}})
+        if path == "/x/web-interface/wbi/search/type":
+            keyword, page = params.get("keyword", ""), _page_index(params.get("page", 1))
+            page_size = _page_index(params.get("page_size")) or self.options.page_size
+            result = []
+            for index in range(page_size):
+                aid = mock_int_id("bili_video", keyword, params.get("pubtime_begin_s", 0), page, index)
+                result.append(render(bilibili["search_item"], aid=aid, bvid=self._bili_bvid(aid),
+                                     title=f"{keyword} {page}-{index}", mid=mock_int_id("bili_up", aid)))
+            return self._bili_ok({"page": page, "pagesize": page_size, "numPages": 50, "result": result})
+        if path == "/x/web-interface/view/detail":
+            bvid = params.get("bvid", "")
+            aid = _page_index(params.get("aid")) or _page_index(bvid[2:]) or mock_int_id("bvid", bvid)
+            return self._bili_ok(self._bili_video(aid))
+        if path == "/x/v2/reply/wbi/main":
+            page = _page_index(params.get("next"))
+            is_end = not self._has_more(page, self.options.comment_pages)
+            return self._bili_ok({
+                "cursor": {"is_begin": page == 0, "is_end": is_end, "next": page + 1},
+                "replies": self._bili_comments(params.get("oid", ""), page, 20),
+            })
+        if path == "/x/v2/reply/reply":
+            root, ps = _page_index(params.get("root")), _page_index(params.get("ps")) or 10
+            return self._bili_ok({
+                "page": {"count": 10, "num": _page_index(params.get("pn")), "size": ps},
+                "replies": self._bili_comments(params.get("oid", ""), _page_index(params.get("pn")), min(ps, 10), root=root),
+            })
+        if path == "/x/space/wbi/arc/search":
+            mid, pn = params.get("mid", ""), _page_index(params.get("pn")) or 1
+            ps = _page_index(params.get("ps")) or 30
+            vlist = []
+            for index in range(ps):
+                aid = mock_int_id("bili_creator_video", mid, pn, index)
+                vlist.append(render(bilibili["creator_video"], aid=aid, bvid=self._bili_bvid(aid), title=f"创作者视频 {pn}-{index}",
+                                    mid=mid))
+            return self._bili_ok({"list": {"vlist": vlist}, "page": {"pn": pn, "ps": ps, "count": self.options.creator_pages * ps}})
+        return MockResponse.json({"code": -404, "message": f"unknown path: {path}"})
+
+    # ---------------- 微博 ----------------
+
+    @staticmethod
+    def _weibo_ok(data: Dict) -> MockResponse:
+        return MockResponse.json({"ok": 1, "data": data})
+
+    def _weibo_card(self, note_id: str) -> Dict:
+        return {"card_type": 9, "mblog": render(self.fixtures["weibo"]["mblog"], note_id=note_id,
+                                                user_id=mock_int_id("wb_user", note_id))}
+
+    async def weibo(self, path: str, params: Dict[str, str], body: bytes) -> MockResponse:
+        weibo = self.fixtures["weibo"]
+        if path == "/api/config":
+            return self._weibo_ok({"login": True})
+        if path == "/api/container/getIndex":
+            container_id = params.get("containerid", "")
+            if container_id.startswith("100103"):
+                page = _page_index(params.get("page", 1))
+                cards = [self._weibo_card(str(mock_int_id("wb_note", container_id, page, index))) for index in range(10)]
+                return self._weibo_ok({"cardlistInfo": {"page": page + 1}, "cards": cards})
+            if container_id.startswith("100505"):
+                user_id = container_id[len("100505"):]
+                return self._weibo_ok({
+                    "userInfo": render(weibo["user_info"], user_id=user_id),
+                    "tabsInfo": {"tabs": [{"tabKey": "weibo", "containerid": f"107603{user_id}"}]},
+                })
+            if container_id.startswith("107603"):
+                page = _page_index(params.get("since_id"))
+                cards = [self._weibo_card(str(mock_int_id("wb_creator_note", container_id, page, index))) for index in range(10)]
+                return self._weibo_ok({
+                    "cardlistInfo": {"since_id": str(page + 1), "total": self.options.creator_pages * 10},
+                    "cards": cards,
+                })
+            return MockResponse.json({"ok": 0, "msg": f"unknown containerid: {container_id}"})
+        if path == "/comments/hotflow":
+            note_id, page = params.get("id", ""), _page_index(params.get("max_id"))
+            has_more = self._has_more(page, self.options.comment_pages)
+            comments = []
+            for index in range(10):
+                comment_id = str(mock_int_id("wb_comment", note_id, page, index))
+                comment = render(weibo["comment"], comment_id=comment_id, user_id=mock_int_id("wb_user", comment_id))
+                if index < self.options.sub_comment_roots:
+                    comment["comments"] = [
+                        render(weibo["comment"], comment_id=str(mock_int_id("wb_sub_comment", comment_id, sub_index)),
+                               user_id=mock_int_id("wb_user", comment_id, sub_index))
+                        for sub_index in range(10)
+                    ]
+                comments.append(comment)
+            return self._weibo_ok({"data": comments, "max_id": page + 1 if has_more else 0, "max_id_type": 0})
+        if path.startswith("/detail/"):
+            render_data = json.dumps([{"status": self._weibo_card(path.rsplit("/", 1)[-1])["mblog"]}], ensure_ascii=False)
+            return MockResponse.html(_html(f"<script>var $render_data = {render_data}[0] || {{}};</script>"))
+        if path.startswith("/u/"):
+            user_id = path.rsplit("/", 1)[-1]
+            m_weibocn_params = quote(f"fid=100505{user_id}&lfid=107603{user_id}&uicode=10000011")
+            return MockResponse.html(_html(""), cookies={"M_WEIBOCN_PARAMS": m_weibocn_params})
+        return MockResponse.json({"ok": 0, "msg": f"unknown path: {path}"})
+
+    # ---------------- 快手 ----------------
+
+    def _ks_feed(self, photo_id: str) -> Dict:
+        return render(self.fixtures["kuaishou"]["feed"], photo_id=photo_id, user_id=mock_id("ks_user", photo_id, length=15))
+
+    def _ks_comments(self, photo_id: str, page: int, root_id: str = "") -> List[Dict]:
+        comments = []
+        for index in range(10):
+            comment_id = str(mock_int_id("ks_comment", photo_id, root_id, page, index))
+            comment = render(self.fixtures["kuaishou"]["comment"], comment_id=comment_id,
+                             user_id=mock_id("ks_user", comment_id, length=15))
+            if not root_id and index < self.options.sub_comment_roots:
+                comment.update({"subCommentCount": 10, "subCommentsPcursor": ""})
+            comments.append(comment)
+        return comments
+
+    async def kuaishou_graphql(self, path: str, params: Dict[str, str], body: bytes) -> MockResponse:
+        request = json.loads(body or b"{}")
+        operation, variables = request.get("operationName"), request.get("variables", {})
+        if operation == "visionSearchPhoto":
+            keyword, page = variables.get("keyword", ""), _page_index(variables.get("pcursor"))
+            feeds = [self._ks_feed(mock_id("ks_photo", keyword, page, index, length=15)) for index in range(self.options.page_size)]
+            data = {"visionSearchPhoto": {"result": 1, "llsid": mock_id("llsid", keyword), "searchSessionId": mock_id("session", keyword),
+                                          "pcursor": str(page + 1), "feeds": feeds}}
+        elif operation == "visionVideoDetail":
+            data = {"visionVideoDetail": {"status": 1, **self._ks_feed(variables.get("photoId", ""))}}
+        elif operation == "commentListQuery":
+            photo_id, page = variables.get("photoId", ""), _page_index(variables.get("pcursor"))
+            has_more = self._has_more(page, self.options.comment_pages)
+            data = {"visionCommentList": {"commentCount": self.options.comment_pages * 10,
+                                          "pcursor": str(page + 1) if has_more else "no_more",
+                                          "rootComments": self._ks_comments(photo_id, page)}}
+        elif operation == "visionSubCommentList":
+            photo_id, root_id = variables.get("photoId", ""), variables.get("rootCommentId", "")
+            data = {"visionSubCommentList": {"pcursor": "no_more", "subComments": self._ks_comments(photo_id, 0, root_id=root_id)}}
+        elif operation == "visionProfile":
+            user_id = variables.get("userId", "")
+            data = {"visionProfile": {"result": 1, "userProfile": render(self.fixtures["kuaishou"]["user_profile"], user_id=user_id)}}
+        elif operation == "visionProfilePhotoList":
+            user_id, page = variables.get("userId", ""), _page_index(variables.get("pcursor"))
+            has_more = self._has_more(page, self.options.creator_pages)
+            feeds = [self._ks_feed(mock_id("ks_creator_photo", user_id, page, index, length=15)) for index in range(self.options.page_size)]
+            data = {"visionProfilePhotoList": {"result": 1, "pcursor": str(page + 1) if has_more else "no_more", "feeds": feeds}}
+        elif operation == "visionProfileUserList":
+            data = {"visionProfileUserList": {"result": 1, "fols": []}}
+        else:
+            return MockResponse.json({"errors": [{"message": f"unknown operation: {operation}"}]})
+        return MockResponse.json({"data": data})
+
+    # ---------------- 知乎 ----------------
+
+    def _zhihu_answer(self, answer_id: str, question_id: str = "") -> Dict:
+        return render(self.fixtures["zhihu"]["answer"], answer_id=answer_id, question_id=question_id or mock_id("zhihu_q", answer_id, length=9),
+                      title=f"离线问题 {answer_id}", user_id=mock_id("zhihu_user", answer_id, length=32),
+                      url_token=mock_id("zhihu_token", answer_id, length=10))
+
+    def _zhihu_comments(self, content_id: str, page: int, root_id: str = "") -> List[Dict]:
+        comments = []
+        for index in range(10):
+            comment_id = str(mock_int_id("zhihu_comment", content_id, root_id, page, index))
+            comment = render(self.fixtures["zhihu"]["comment"], comment_id=comment_id,
+                             user_id=mock_id("zhihu_user", comment_id, length=32), url_token=mock_id("zhihu_token", comment_id, length=10))
+            if not root_id and index < self.options.sub_comment_roots:
+                comment["child_comment_count"] = 10
+            if root_id:
+                comment["reply_comment_id"] = root_id
+            comments.append(comment)
+        return comments
+
+    @staticmethod
+    def _zhihu_initial_data(entities: Dict) -> MockResponse:
+        initial_data = json.dumps({"initialState": {"entities": entities}}, ensure_ascii=False)
+        return MockResponse.html(_html(f"<script id=\"js-initialData\" type=\"text/json\">{initial_data}</script>"))
+
+    async def zhihu(self, path: str, params: Dict[str, str], body: bytes) -> MockResponse:
+        if path == "/api/v4/search_v3":
+            keyword, offset = params.get("q", ""), _page_index(params.get("offset"))
+            limit = _page_index(params.get("limit")) or self.options.page_size
+            data = [{"type": "search_result", "object": self._zhihu_answer(str(mock_int_id("zhihu_answer", keyword, offset, index)))}
+                    for index in range(limit)]
+            return MockResponse.json({"data": data, "paging": {"is_end": False}})
+        match = re.match(r"^/api/v4/comment_v5/(\w+)s/(\w+)/root_comment$", path)
+        if match:
+            content_type, content_id = match.groups()
+            page = _page_index(params.get("offset"))
+            has_more = self._has_more(page, self.options.comment_pages)
+            next_url = (f"https://www.zhihu.com/api/v4/comment_v5/{content_type}s/{content_id}/root_comment"
+                        f"?limit=10&offset={page + 1}&order_by=score") if has_more else ""
+            return MockResponse.json({"data": self._zhihu_comments(content_id, page),
+                                      "paging": {"is_end": not has_more, "next": next_url}})
+        match = re.match(r"^/api/v4/comment_v5/comment/(\w+)/child_comment$", path)
+        if match:
+            return MockResponse.json({"data": self._zhihu_comments(match.group(1), 0, root_id=match.group(1)),
+                                      "paging": {"is_end": True, "next": ""}})
+        match = re.match(r"^/api/v4/members/([\w-]+)/answers$", path)
+        if match:
+            url_token, offset = match.group(1), _page_index(params.get("offset"))
+            limit = _page_index(params.get("limit")) or self.options.page_size
+            data = [self._zhihu_answer(str(mock_int_id("zhihu_creator_answer", url_token, offset, index))) for index in range(limit)]
+            return MockResponse.json({"data": data, "paging": {"is_end": offset // limit + 1 >= self.options.creator_pages}})
+        match = re.match(r"^/people/([\w-]+)$", path)
+        if match:
+            url_token = match.group(1)
+            creator = render(self.fixtures["zhihu"]["creator"], url_token=url_token, user_id=mock_id("zhihu_user", url_token, length=32))
+            return self._zhihu_initial_data({"users": {url_token: creator}})
+        match = re.match(r"^/question/(\w+)/answer/(\w+)$", path)
+        if match:
+            question_id, answer_id = match.groups()
+            return self._zhihu_initial_data({"answers": {answer_id: self._zhihu_answer(answer_id, question_id)}})
+        return MockResponse.json({"error": {"message": f"unknown path: {path}"}}, status_code=404)
+
+    # ---------------- 贴吧 ----------------
+
+    async def tieba(self, path: str, params: Dict[str, str], body: bytes) -> MockResponse:
+        if path == "/f/search/res":
+            return MockResponse.html(self.tieba_pages["search_keyword_notes"])
+        if path == "/f":
+            return MockResponse.html(self.tieba_pages["tieba_note_list"])
+        if path == "/p/comment":
+            return MockResponse.html(self.tieba_pages["note_sub_comments"])
+        if path.startswith("/p/"):
+            return MockResponse.html(self.tieba_pages["note_comments" if "pn" in params else "note_detail"])
+        return MockResponse.html("", status_code=404)
+
+
+def create_app(options: MockOptions):
+    """
+    创建模拟服务的 FastAPI 应用
+    Args:
+        options: 延迟、错误注入和分页配置
+
+    Returns:
+
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import Response
+
+    app = FastAPI(title="MediaCrawler Mock Platforms")
+    platforms = MockPlatforms(options)
+    rng = random.Random(options.seed)
+
+    @app.api_route("/{host}/{path:path}", methods=["GET", "POST"])
+    async def handle(host: str, path: str, request: Request):
+        delay_ms = options.latency_ms + rng.uniform(-options.jitter_ms, options.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if options.error_rate and rng.random() < options.error_rate:
+            return Response("mock injected error", status_code=503, media_type="text/plain")
+        params = {key: values[-1] for key, values in parse_qs(request.url.query, keep_blank_values=True).items()}
+        mock_response = await platforms.dispatch(host, f"/{path}", params, await request.body())
+        response = Response(mock_response.content, status_code=mock_response.status_code,
+                            media_type=mock_response.media_type)
+        for name, value in mock_response.cookies.items():
+            response.set_cookie(name, value)
+        return response
+
+    return app
+
+
+def get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MockServerProcess:
+    """
+    在子进程中运行模拟服务，避免服务端占用被测爬虫进程的事件循环、CPU和内存
+    用法:
+        with MockServerProcess(MockOptions(latency_ms=50)) as server:
+            server.base_url
+    """
+
+    def __init__(self, options: MockOptions, host: str = "127.0.0.1", port: int = 0, startup_timeout: float = 30) -> None:
+        self.options = options
+        self.host = host
+        self.port = port or get_free_port()
+        self.startup_timeout = startup_timeout
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> None:
+        command = [sys.executable, "-m", "benchmark.mock_server", "--host", self.host, "--port", str(self.port)]
+        for key, value in asdict(self.options).items():
+            if value is not None:
+                command.extend([f"--{key.replace('_', '-')}", str(value)])
+        self._process = subprocess.Popen(command, cwd=PROJECT_ROOT)
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"mock server exited with code {self._process.returncode}")
+            try:
+                with socket.create_connection((self.host, self.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        self.stop()
+        raise TimeoutError(f"mock server did not start on {self.base_url} in {self.startup_timeout}s")
+
+    def stop(self) -> None:
+        if self._process is None:
+            return
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        self._process = None
+
+    def __enter__(self) -> "MockServerProcess":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="离线基准测试用的模拟平台服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--page-size", type=int, default=MockOptions.page_size)
+    parser.add_argument("--comment-pages", type=int, default=MockOptions.comment_pages)
+    parser.add_argument("--sub-comment-roots", type=int, default=MockOptions.sub_comment_roots)
+    parser.add_argument("--creator-pages", type=int, default=MockOptions.creator_pages)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    args = parse_args(argv)
+    options = MockOptions(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        page_size=args.page_size,
+        comment_pages=args.comment_pages,
+        sub_comment_roots=args.sub_comment_roots,
+        creator_pages=args.creator_pages,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(options), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
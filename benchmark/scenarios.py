@@ -0,0 +1,176 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 离线基准测试场景，启动本地模拟服务后逐个场景在独立子进程中执行，输出 items/s、请求延迟 p50/p99 和内存峰值
+#            用法: python -m benchmark.scenarios --platform xhs bili --type search detail --latency-ms 50 --error-rate 0.01
+#            知乎的请求签名依赖 node 运行 libs/zhihu.js
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+from benchmark.harness import BenchmarkResult, Scenario, prepare_run_dir, run_scenario
+from benchmark.mock_server import PROJECT_ROOT, MockOptions, MockServerProcess, mock_id
+
+# 子进程把结果打印在以该前缀开头的一行
+RESULT_PREFIX = "BENCHMARK_RESULT "
+
+# 所有场景共用的配置
+COMMON_SETTINGS = {
+    "crawler_max_notes_count": 40,
+    "max_concurrency_num": 4,
+    "enable_get_comments": True,
+    "enable_get_sub_comments": False,
+    "crawler_max_comments_count_singlenotes": 20,
+}
+
+KEYWORDS = "离线基准测试"
+
+
+def _scenario(platform: str, crawler_type: str, settings: Dict) -> Scenario:
+    return Scenario(platform, crawler_type, {**COMMON_SETTINGS, **settings})
+
+
+SCENARIOS: Dict[str, Scenario] = {scenario.name: scenario for scenario in [
+    _scenario("xhs", "search", {"keywords": KEYWORDS}),
+    _scenario("xhs", "detail", {"xhs_specified_note_url_list": [
+        f"https://www.xiaohongshu.com/explore/{mock_id('detail', index)}?xsec_token={mock_id('xsec', index)}&xsec_source=pc_search"
+        for index in range(20)
+    ]}),
+    _scenario("xhs", "creator", {"xhs_creator_id_list": ["5f58bd990000000001003753", "63e36c9a000000002703502b"]}),
+    _scenario("bili", "search", {"keywords": KEYWORDS, "all_day": False}),
+    _scenario("bili", "detail", {"bili_specified_id_list": [f"BV1{index:09d}" for index in range(20)]}),
+    _scenario("bili", "creator", {"bili_creator_id_list": ["20813884", "434377496"], "creator_mode": True}),
+    _scenario("wb", "search", {"keywords": KEYWORDS}),
+    _scenario("wb", "detail", {"weibo_specified_id_list": [str(4982041758140155 + index) for index in range(20)]}),
+    _scenario("wb", "creator", {"weibo_creator_id_list": ["5533390220", "6482852298"]}),
+    _scenario("ks", "search", {"keywords": KEYWORDS}),
+    _scenario("ks", "detail", {"ks_specified_id_list": [mock_id("ks_detail", index, length=15) for index in range(20)]}),
+    _scenario("ks", "creator", {"ks_creator_id_list": ["3x4sm73aye7jq7i", "3xf8enb8dbj6uig"]}),
+    _scenario("zhihu", "search", {"keywords": KEYWORDS}),
+    _scenario("zhihu", "detail", {"zhihu_specified_id_list": [
+        f"https://www.zhihu.com/question/{826896610 + index}/answer/{4885821440 + index}" for index in range(20)
+    ]}),
+    _scenario("zhihu", "creator", {"zhihu_creator_url_list": ["https://www.zhihu.com/people/yd1234567", "https://www.zhihu.com/people/mock-creator"]}),
+    _scenario("tieba", "search", {"keywords": KEYWORDS, "tieba_name_list": []}),
+    _scenario("tieba", "detail", {"tieba_specified_id_list": [str(9117888152 + index) for index in range(20)]}),
+]}
+
+
+def run_in_subprocess(scenario: Scenario, mock_url: str, run_dir: str, keep_pacing: bool,
+                      save_data_option: str, sub_comments: bool) -> BenchmarkResult:
+    """每个场景在独立的子进程中执行，内存峰值互不影响"""
+    command = [
+        sys.executable, "-m", "benchmark.scenarios", "--worker",
+        "--platform", scenario.platform, "--type", scenario.crawler_type,
+        "--mock-url", mock_url, "--run-dir", run_dir, "--save-data-option", save_data_option,
+    ]
+    if keep_pacing:
+        command.append("--keep-pacing")
+    if sub_comments:
+        command.append("--sub-comments")
+    completed = subprocess.run(command, cwd=PROJECT_ROOT, stdout=subprocess.PIPE, text=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+            result.pop("items_per_sec", None)
+            return BenchmarkResult(**result)
+    raise RuntimeError(f"scenario {scenario.name} failed with exit code {completed.returncode}")
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    header = f"{'scenario':<16}{'items':>8}{'items/s':>10}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'rss MB':>10}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(
+            f"{result.scenario:<16}{result.items:>8}{result.items_per_sec:>10.1f}{result.requests:>10}"
+            f"{result.request_errors:>8}{result.p50_ms:>10.1f}{result.p99_ms:>10.1f}{result.peak_rss_mb:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="MediaCrawler 离线基准测试")
+    parser.add_argument("--platform", nargs="+", default=None, help="xhs bili wb ks zhihu tieba，默认全部")
+    parser.add_argument("--type", nargs="+", default=None, dest="crawler_types", help="search detail creator，默认全部")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=5)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--comment-pages", type=int, default=MockOptions.comment_pages)
+    parser.add_argument("--creator-pages", type=int, default=MockOptions.creator_pages)
+    parser.add_argument("--sub-comment-roots", type=int, default=MockOptions.sub_comment_roots,
+                        help="每页一级评论中有二级评论的条数")
+    parser.add_argument("--sub-comments", action="store_true", help="开启爬二级评论")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep-pacing", action="store_true", help="保留爬虫自带的随机抓取间隔")
+    parser.add_argument("--save-data-option", default="json", choices=["json", "csv", "parquet", "sqlite"], help="存储方式")
+    parser.add_argument("--run-dir", default=None, help="存储层数据的写入目录，默认为临时目录")
+    parser.add_argument("--json", default=None, help="把结果写入该 json 文件")
+    # 以下参数只在子进程中使用
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mock-url", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    run_dir = os.path.abspath(args.run_dir or tempfile.mkdtemp(prefix="mediacrawler_benchmark_"))
+
+    if args.worker:
+        prepare_run_dir(run_dir)
+        scenario = SCENARIOS[f"{args.platform[0]}-{args.crawler_types[0]}"]
+        if args.sub_comments:
+            scenario = Scenario(scenario.platform, scenario.crawler_type,
+                                {**scenario.settings, "enable_get_sub_comments": True})
+        result = asyncio.run(run_scenario(scenario, args.mock_url, keep_pacing=args.keep_pacing,
+                                          save_data_option=args.save_data_option))
+        print(RESULT_PREFIX + json.dumps(result.to_dict(), ensure_ascii=False), flush=True)
+        return
+
+    scenarios = [
+        scenario for scenario in SCENARIOS.values()
+        if (not args.platform or scenario.platform in args.platform)
+        and (not args.crawler_types or scenario.crawler_type in args.crawler_types)
+    ]
+    options = MockOptions(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        comment_pages=args.comment_pages,
+        creator_pages=args.creator_pages,
+        sub_comment_roots=args.sub_comment_roots,
+        seed=args.seed,
+    )
+    results: List[BenchmarkResult] = []
+    with MockServerProcess(options) as server:
+        for scenario in scenarios:
+            print(f"running {scenario.name} ...", file=sys.stderr, flush=True)
+            try:
+                results.append(run_in_subprocess(scenario, server.base_url, run_dir, args.keep_pacing,
+                                                args.save_data_option, args.sub_comments))
+            except RuntimeError as e:
+                print(e, file=sys.stderr, flush=True)
+
+    print(format_results(results))
+    print(f"data written to {run_dir}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([result.to_dict() for result in results], f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
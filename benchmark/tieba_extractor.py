@@ -0,0 +1,72 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 贴吧HTML解析基准，对 media_platform/tieba/test_data 中保存的页面逐个执行 TieBaExtractor 的解析方法
+#            用法: python -m benchmark.tieba_extractor --iterations 50
+
+import argparse
+import os
+import time
+from typing import Any, Callable, List, Tuple
+
+from media_platform.tieba.help import TieBaExtractor
+from model.m_baidu_tieba import TiebaComment
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "media_platform", "tieba", "test_data")
+
+# 二级评论解析需要的一级评论
+PARENT_COMMENT = TiebaComment(comment_id="150726491800", content="content", user_link="user_link",
+                              user_nickname="user_nickname", user_avatar="user_avatar", publish_time="publish_time",
+                              parent_comment_id="", note_id="9117888152", note_url="https://tieba.baidu.com/p/9117888152",
+                              tieba_id="4513750", tieba_name="网球风云吧", tieba_link="https://tieba.baidu.com/f?kw=网球风云吧")
+
+
+def read_page(name: str) -> str:
+    with open(os.path.join(TEST_DATA_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def build_cases(extractor: TieBaExtractor) -> List[Tuple[str, str, Callable[[str], Any]]]:
+    """(名称, 页面HTML, 解析函数)"""
+    return [
+        ("search_note_list", read_page("search_keyword_notes.html"), extractor.extract_search_note_list),
+        ("tieba_note_list", read_page("tieba_note_list.html"), extractor.extract_tieba_note_list),
+        ("note_detail", read_page("note_detail.html"), extractor.extract_note_detail),
+        ("note_comments", read_page("note_comments.html"),
+         lambda page: extractor.extract_tieba_note_parment_comments(page, PARENT_COMMENT.note_id)),
+        ("note_sub_comments", read_page("note_sub_comments.html"),
+         lambda page: extractor.extract_tieba_note_sub_comments(page, PARENT_COMMENT)),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="贴吧HTML解析基准")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    total_ms = 0.0
+    print(f"{'page':<20}{'size KB':>9}{'items':>7}{'ms/page':>10}")
+    for name, page, parse in build_cases(TieBaExtractor()):
+        result = parse(page)
+        items = len(result) if isinstance(result, list) else 1
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            parse(page)
+        cost_ms = (time.perf_counter() - start) * 1000 / args.iterations
+        total_ms += cost_ms
+        print(f"{name:<20}{len(page) / 1024:>9.1f}{items:>7}{cost_ms:>10.2f}")
+    print(f"{'total':<36}{total_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
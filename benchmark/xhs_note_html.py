@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 小红书笔记详情页HTML解析基准，对比逐层 json.dumps/json.loads 的旧实现与一次遍历的字段名转换
+#            用法: python -m benchmark.xhs_note_html --iterations 500 [page.html ...]
+
+import argparse
+import json
+import os
+import re
+import time
+from typing import Callable, Dict, List
+
+from media_platform.xhs.help import parse_note_detail_from_html
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_PAGES = [os.path.join(FIXTURES_DIR, "xhs_note_page.html")]
+
+
+def legacy_parse_note_detail_from_html(html: str, note_id: str) -> Dict:
+    """旧实现：整个页面状态逐层 json.dumps 再 json.loads，每个字段名执行一次正则替换"""
+
+    def camel_to_underscore(key):
+        return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
+
+    def transform_json_keys(json_data):
+        data_dict = json.loads(json_data)
+        dict_new = {}
+        for key, value in data_dict.items():
+            new_key = camel_to_underscore(key)
+            if not value:
+                dict_new[new_key] = value
+            elif isinstance(value, dict):
+                dict_new[new_key] = transform_json_keys(json.dumps(value))
+            elif isinstance(value, list):
+                dict_new[new_key] = [
+                    transform_json_keys(json.dumps(item)) if (item and isinstance(item, dict)) else item
+                    for item in value
+                ]
+            else:
+                dict_new[new_key] = value
+        return dict_new
+
+    state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[0].replace("undefined", '""')
+    if state == "{}":
+        return {}
+    return transform_json_keys(state)["note"]["note_detail_map"][note_id]["note"]
+
+
+def first_note_id(html: str) -> str:
+    return re.search(r'"noteDetailMap":\{"(\w+)"', html).group(1)
+
+
+def measure(parse: Callable[[str, str], Dict], pages: List[tuple], iterations: int) -> float:
+    """返回单个页面的平均解析耗时，单位毫秒"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html, note_id in pages:
+            parse(html, note_id)
+    return (time.perf_counter() - start) * 1000 / (iterations * len(pages))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="小红书笔记详情页HTML解析基准")
+    parser.add_argument("pages", nargs="*", default=DEFAULT_PAGES, help="保存的笔记详情页HTML文件")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.pages:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        note_id = first_note_id(html)
+        # 两种实现的解析结果必须一致
+        assert parse_note_detail_from_html(html, note_id) == legacy_parse_note_detail_from_html(html, note_id), path
+        pages.append((html, note_id))
+
+    legacy_ms = measure(legacy_parse_note_detail_from_html, pages, args.iterations)
+    current_ms = measure(parse_note_detail_from_html, pages, args.iterations)
+    print(f"pages: {len(pages)}, iterations: {args.iterations}")
+    print(f"legacy : {legacy_ms:.3f} ms/page")
+    print(f"current: {current_ms:.3f} ms/page ({legacy_ms / current_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
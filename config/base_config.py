@@ -45,8 +45,22 @@ HEADLESS = False
 # 是否保存登录状态
 SAVE_LOGIN_STATE = True
 
-# 数据保存类型选项配置,支持三种类型：csv、db、json, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json
+# 数据保存类型选项配置,支持五种类型：csv、db、json、parquet、sqlite, 最好保存到DB或sqlite，有排重的功能。
+# parquet 需要额外安装 pyarrow: pip install pyarrow
+SAVE_DATA_OPTION = "json"  # csv or db or json or parquet or sqlite
+
+# csv 存储先缓冲在内存中，缓冲条数达到该值或距上次写入超过指定秒数时写入文件，爬虫结束时写入剩余数据
+CSV_FLUSH_ROWS = 500
+CSV_FLUSH_INTERVAL_SEC = 5
+
+# parquet 存储每缓冲多少条数据写入一个 row group，文件在爬虫结束时才写完整，中途无法读取
+PARQUET_ROW_GROUP_ROWS = 5000
+
+# sqlite 存储攒够该条数或距第一条数据超过指定秒数时在一个事务中提交，爬虫结束时提交剩余数据
+SQLITE_BATCH_ROWS = 500
+SQLITE_COMMIT_INTERVAL_SEC = 1
+# sqlite 写入队列最多缓冲的条数，写入跟不上时爬虫等待队列有空位后再继续
+SQLITE_MAX_QUEUE_ROWS = 5000
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -60,6 +74,23 @@ CRAWLER_MAX_NOTES_COUNT = 200
 # 并发爬虫数量控制
 MAX_CONCURRENCY_NUM = 1
 
+# 单个帖子的评论页数已知时(如贴吧)，同时请求的评论页数
+MAX_PAGE_CONCURRENCY_NUM = 3
+
+# 开启爬二级评论时，同时展开二级评论的一级评论数
+MAX_SUB_COMMENT_CONCURRENCY_NUM = 3
+
+# 搜索模式下同时搜索的关键词数、创作者模式下同时爬取的创作者数
+MAX_SOURCE_CONCURRENCY_NUM = 2
+
+# 多账号池，开启后除当前登录账号外，还使用 login_manager 中该平台所有已登录会话的 cookies，请求分摊到各个账号
+# 吞吐随账号数增加，需要相应调大上面的并发数
+ENABLE_ACCOUNT_POOL = False
+# 每个账号每秒最多发出的请求数，0 表示不限速
+ACCOUNT_MAX_REQUESTS_PER_SEC = 2
+# 账号出现验证码、IP被封等风控后的隔离时间，单位秒
+ACCOUNT_QUARANTINE_SEC = 600
+
 # 是否开启爬图片模式, 默认不开启爬图片
 ENABLE_GET_IMAGES = False
 
@@ -178,6 +209,13 @@ CUSTOM_WORDS = {
     "高频词": "专业术语",  # 示例自定义词
 }
 
+# 分词进程数，词频按评论增量统计，<=0 时在线程中分词
+WORDCLOUD_TOKENIZE_WORKERS = 2
+
+# 词频每累计多少条评论或间隔多少秒写一次 checkpoint，词云图只在爬取结束时生成
+WORDCLOUD_CHECKPOINT_ITEMS = 200
+WORDCLOUD_CHECKPOINT_INTERVAL_SEC = 30
+
 # 停用(禁用)词文件路径
 STOP_WORDS_FILE = "./docs/hit_stopwords.txt"
 
@@ -195,6 +233,12 @@ END_DAY = '2024-01-01'
 # 若为 True，则按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下的所有视频
 ALL_DAY = False
 
+# 按每一天爬取时同时爬取的天数
+ALL_DAY_CONCURRENCY_NUM = 3
+
+# 按每一天爬取时记录已完成日期的文件，中断后重新运行会跳过已完成的日期，删除该文件即可重新爬取
+ALL_DAY_PROGRESS_FILE = "data/bilibili/all_day_progress.json"
+
 #!!! 下面仅支持 bilibili creator搜索
 # 爬取评论creator主页还是爬取creator动态和关系列表(True为前者)
 CREATOR_MODE = True
@@ -206,4 +250,69 @@ START_CONTACTS_PAGE = 1
 CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES = 100
 
 # 爬取作者动态数量控制(单作者)
-CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES = 50
\ No newline at end of file
+CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES = 50
+
+# api_server 的爬虫 worker 进程数量
+# 0 表示在 api 进程内通过 BackgroundTasks 执行任务；大于 0 时任务会进入持久化队列，由独立的 worker 进程执行
+API_WORKER_NUM = 0
+
+# api_server 任务的抓取记录目录，每个任务按数据类型追加写入 {TASK_RECORDS_DIR}/{task_id}/{contents|comments|...}.jsonl，供结果分页和流式接口读取
+TASK_RECORDS_DIR = "data/tasks"
+
+# 已结束的 api 任务保留时间，单位秒，超过后连同任务记录一起删除
+TASK_REGISTRY_TTL_SEC = 7 * 24 * 3600
+# api 任务登记表最多保留的任务数，超过时从最早的已结束任务开始删除，0 表示不限制
+TASK_REGISTRY_MAX_TASKS = 10000
+# 检查过期任务的间隔，单位秒
+TASK_REGISTRY_EVICT_INTERVAL_SEC = 600
+
+# worker 进程定期把指标快照写入该目录，api_server 的 /metrics 汇总输出
+METRICS_SNAPSHOT_DIR = "data/metrics"
+METRICS_SNAPSHOT_INTERVAL_SEC = 10
+
+# 任务进度回写的最小间隔，单位秒，避免每条数据都写一次任务状态
+TASK_PROGRESS_REPORT_INTERVAL_SEC = 1.0
+
+# 免浏览器模式，只对贴吧、微博、B站、知乎生效：先用保存的登录态(没有时用 COOKIES)直接创建 API 客户端，
+# pong 检查登录态失效时才启动浏览器登录，登录后保存登录态供下次使用(贴吧本来就不启动浏览器)
+BROWSER_FREE_MODE = False
+# 保存登录态的文件，%s 会被替换为平台名
+STORAGE_STATE_FILE = "browser_data/%s_storage_state.json"
+
+# 浏览器请求拦截，通过 BrowserContext.route 中止图片、视频、字体和统计埋点请求，只放行页面、脚本、XHR 等签名和登录需要的资源
+ENABLE_RESOURCE_BLOCKING = True
+# 中止的资源类型，取值为 Playwright 的 request.resource_type
+BLOCK_RESOURCE_TYPES = ["image", "media", "font"]
+# 按平台覆盖中止的资源类型，抖音滑块验证码需要加载验证码图片
+PLATFORM_BLOCK_RESOURCE_TYPES = {
+    "dy": ["media", "font"],
+}
+# 统计、埋点、监控请求的域名，包括子域名，任何资源类型都会被中止
+BLOCK_TRACKER_DOMAINS = [
+    "hm.baidu.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "cnzz.com",
+    "umeng.com",
+    "mcs.zijieapi.com",
+    "mon.zijieapi.com",
+    "t2.xiaohongshu.com",
+    "apm-fe.xiaohongshu.com",
+    "data.bilibili.com",
+    "beacon.sina.com.cn",
+    "datahub.zhihu.com",
+]
+
+# 浏览器上下文池配置，开启后同一进程内的多个爬虫任务复用已启动、已登录的浏览器上下文
+# 命令行单次运行默认不开启，api_server 触发的任务默认开启
+USE_BROWSER_POOL = False
+API_USE_BROWSER_POOL = True
+# 每个平台最多保留的空闲上下文数量
+BROWSER_POOL_MAX_IDLE_PER_KEY = 2
+# 上下文最大存活时间，单位秒，超过后回收重建
+BROWSER_POOL_CONTEXT_MAX_AGE_SEC = 30 * 60
+# 上下文最大租用次数，0 表示不限制
+BROWSER_POOL_CONTEXT_MAX_LEASES = 50
+# 页面 JS 堆内存上限，单位MB，超过后回收重建，0 表示不限制
+BROWSER_POOL_MAX_JS_HEAP_MB = 512
@@ -25,6 +25,16 @@ REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
 REDIS_DB_PORT = os.getenv("REDIS_DB_PORT", 6379)  # your redis port
 REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
 
+# sqlite 存储(SAVE_DATA_OPTION = "sqlite")的数据库文件，不需要部署 mysql
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "data/media_crawler.db")
+
 # cache type
 CACHE_TYPE_REDIS = "redis"
-CACHE_TYPE_MEMORY = "memory"
\ No newline at end of file
+CACHE_TYPE_MEMORY = "memory"
+# 爬虫任务队列配置，api_server 多进程 worker 模式下使用
+# sqlite: 本地持久化队列(默认)，redis: 使用上面的redis配置
+TASK_QUEUE_TYPE = os.getenv("TASK_QUEUE_TYPE", "sqlite")
+TASK_QUEUE_SQLITE_PATH = os.getenv("TASK_QUEUE_SQLITE_PATH", "data/task_queue.db")
+
+# api_server 任务登记表，保存任务状态，重启后不丢失
+TASK_REGISTRY_SQLITE_PATH = os.getenv("TASK_REGISTRY_SQLITE_PATH", "data/task_registry.db")
@@ -0,0 +1,146 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 单次爬虫任务的配置对象，通过上下文变量在爬虫、客户端、存储之间传递，避免并发任务互相覆盖全局config
+
+import copy
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, List, Optional
+
+import config
+
+
+@dataclass
+class CrawlSettings:
+    """
+    单次爬虫任务的配置，字段名与 config/base_config.py 中的同名大写配置一一对应
+    静态配置（数据库、缓存、词云字体等）仍然从全局config读取
+    """
+    platform: str = "xhs"
+    keywords: str = ""
+    login_type: str = "qrcode"
+    cookies: str = ""
+    sort_type: str = ""
+    publish_time_type: int = 0
+    crawler_type: str = "search"
+    ua: str = ""
+    enable_ip_proxy: bool = False
+    proxy_strategy: str = "round_robin"
+    crawler_max_sleep_sec: int = 2
+    ip_proxy_pool_count: int = 2
+    ip_proxy_provider_name: str = "kuaidaili"
+    headless: bool = False
+    use_browser_pool: bool = False
+    browser_free_mode: bool = False
+    storage_state_file: str = "browser_data/%s_storage_state.json"
+    save_login_state: bool = True
+    save_data_option: str = "json"
+    user_data_dir: str = "%s_user_data_dir"
+    start_page: int = 1
+    crawler_max_notes_count: int = 200
+    max_concurrency_num: int = 1
+    max_page_concurrency_num: int = 3
+    max_sub_comment_concurrency_num: int = 3
+    max_source_concurrency_num: int = 2
+    enable_account_pool: bool = False
+    account_max_requests_per_sec: float = 2
+    account_quarantine_sec: float = 600
+    enable_get_images: bool = False
+    enable_get_comments: bool = True
+    crawler_max_comments_count_singlenotes: int = 10
+    enable_get_sub_comments: bool = False
+    enable_get_wordcloud: bool = False
+    xhs_specified_note_url_list: List[str] = field(default_factory=list)
+    dy_specified_id_list: List[str] = field(default_factory=list)
+    ks_specified_id_list: List[str] = field(default_factory=list)
+    bili_specified_id_list: List[str] = field(default_factory=list)
+    weibo_specified_id_list: List[str] = field(default_factory=list)
+    weibo_creator_id_list: List[str] = field(default_factory=list)
+    tieba_specified_id_list: List[str] = field(default_factory=list)
+    tieba_name_list: List[str] = field(default_factory=list)
+    tieba_creator_url_list: List[str] = field(default_factory=list)
+    xhs_creator_id_list: List[str] = field(default_factory=list)
+    dy_creator_id_list: List[str] = field(default_factory=list)
+    bili_creator_id_list: List[str] = field(default_factory=list)
+    ks_creator_id_list: List[str] = field(default_factory=list)
+    zhihu_creator_url_list: List[str] = field(default_factory=list)
+    zhihu_specified_id_list: List[str] = field(default_factory=list)
+    start_day: Optional[str] = None
+    end_day: Optional[str] = None
+    all_day: bool = False
+    all_day_concurrency_num: int = 3
+    all_day_progress_file: str = "data/bilibili/all_day_progress.json"
+    creator_mode: bool = True
+    start_contacts_page: int = 1
+    crawler_max_contacts_count_singlenotes: int = 100
+    crawler_max_dynamics_count_singlenotes: int = 50
+
+    @classmethod
+    def from_config(cls, **overrides: Any) -> "CrawlSettings":
+        """
+        以当前全局config为基础生成一份独立的配置快照，列表类配置会被深拷贝
+        Args:
+            **overrides: 需要覆盖的字段
+
+        Returns:
+
+        """
+        values: Dict[str, Any] = {}
+        for f in fields(cls):
+            config_name = f.name.upper()
+            if hasattr(config, config_name):
+                values[f.name] = copy.deepcopy(getattr(config, config_name))
+        values.update(overrides)
+        return cls(**values)
+
+    def copy(self, **overrides: Any) -> "CrawlSettings":
+        return replace(copy.deepcopy(self), **overrides)
+
+
+crawl_settings_var: ContextVar[CrawlSettings] = ContextVar("crawl_settings")
+
+
+def get_crawl_settings() -> CrawlSettings:
+    """
+    获取当前上下文的爬虫任务配置，未设置时以全局config生成一份并绑定到当前上下文
+    Returns:
+
+    """
+    settings = crawl_settings_var.get(None)
+    if settings is None:
+        settings = CrawlSettings.from_config()
+        crawl_settings_var.set(settings)
+    return settings
+
+
+def set_crawl_settings(settings: CrawlSettings) -> None:
+    crawl_settings_var.set(settings)
+
+
+class _CrawlSettingsProxy:
+    """
+    模块级的配置代理，读写都会转发到当前上下文的 CrawlSettings，
+    这样各个模块可以像读取config一样使用 crawl_settings.xxx
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_crawl_settings(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_crawl_settings(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(get_crawl_settings())
+
+
+crawl_settings = _CrawlSettingsProxy()
@@ -24,13 +24,14 @@ from enum import Enum
 from dataclasses import dataclass
 
 import aiofiles
-from playwright.async_api import BrowserContext, Page, async_playwright
+from playwright.async_api import BrowserContext, Page
 import httpx
 
 from base.base_crawler import AbstractLogin
 from media_platform.xhs.login import XiaoHongShuLogin
 from media_platform.douyin.login import DouYinLogin
 from tools import utils
+from tools.browser_pool import browser_pool
 
 
 class LoginStatus(Enum):
@@ -304,31 +305,32 @@ class LoginManager:
         if session_id in self.browser_contexts:
             return
         
-        async with async_playwright() as playwright:
-            browser = await playwright.chromium.launch_persistent_context(
-                user_data_dir=f"{self.data_dir}/browser_{session_id}",
-                headless=False,  # 显示浏览器窗口，方便手动验证
-                args=[
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-dev-shm-usage",
-                    "--disable-accelerated-2d-canvas",
-                    "--no-first-run",
-                    "--no-zygote",
-                    "--disable-gpu"
-                ]
-            )
-            
-            self.browser_contexts[session_id] = browser
-            page = await browser.new_page()
-            self.pages[session_id] = page
-            
-            # 根据平台导航到相应网站
-            if platform == "xhs":
-                await page.goto("https://www.xiaohongshu.com")
-            elif platform == "dy":
-                await page.goto("https://www.douyin.com")
-    
+        # 复用浏览器池中常驻的 Playwright 驱动，浏览器在会话关闭前保持存活
+        chromium = await browser_pool.get_chromium()
+        browser = await chromium.launch_persistent_context(
+            user_data_dir=f"{self.data_dir}/browser_{session_id}",
+            headless=False,  # 显示浏览器窗口，方便手动验证
+            args=[
+                "--no-sandbox",
+                "--disable-setuid-sandbox",
+                "--disable-dev-shm-usage",
+                "--disable-accelerated-2d-canvas",
+                "--no-first-run",
+                "--no-zygote",
+                "--disable-gpu"
+            ]
+        )
+        
+        self.browser_contexts[session_id] = browser
+        page = await browser.new_page()
+        self.pages[session_id] = page
+        
+        # 根据平台导航到相应网站
+        if platform == "xhs":
+            await page.goto("https://www.xiaohongshu.com")
+        elif platform == "dy":
+            await page.goto("https://www.douyin.com")
+
     async def _start_xhs_login(self, session: LoginSession, login_type: str) -> Dict[str, Any]:
         """启动小红书登录流程"""
         page = self.pages[session.session_id]
@@ -10,54 +10,69 @@
 
 
 import asyncio
+import importlib
 import sys
 
 import cmd_arg
-import config
 import db
+from config.settings import set_crawl_settings
 from base.base_crawler import AbstractCrawler
-from media_platform.bilibili import BilibiliCrawler
-from media_platform.douyin import DouYinCrawler
-from media_platform.kuaishou import KuaishouCrawler
-from media_platform.tieba import TieBaCrawler
-from media_platform.weibo import WeiboCrawler
-from media_platform.xhs import XiaoHongShuCrawler
-from media_platform.zhihu import ZhihuCrawler
+from store import check_store_dependencies, close_store_sinks
+from tools import utils, words
+from tools.metrics import metrics
 
 
 class CrawlerFactory:
+    # 平台爬虫按需导入，避免启动时加载全部平台及其依赖
     CRAWLERS = {
-        "xhs": XiaoHongShuCrawler,
-        "dy": DouYinCrawler,
-        "ks": KuaishouCrawler,
-        "bili": BilibiliCrawler,
-        "wb": WeiboCrawler,
-        "tieba": TieBaCrawler,
-        "zhihu": ZhihuCrawler
+        "xhs": "media_platform.xhs:XiaoHongShuCrawler",
+        "dy": "media_platform.douyin:DouYinCrawler",
+        "ks": "media_platform.kuaishou:KuaishouCrawler",
+        "bili": "media_platform.bilibili:BilibiliCrawler",
+        "wb": "media_platform.weibo:WeiboCrawler",
+        "tieba": "media_platform.tieba:TieBaCrawler",
+        "zhihu": "media_platform.zhihu:ZhihuCrawler"
     }
 
     @staticmethod
-    def create_crawler(platform: str) -> AbstractCrawler:
-        crawler_class = CrawlerFactory.CRAWLERS.get(platform)
-        if not crawler_class:
+    def get_crawler_class(platform: str):
+        crawler_path = CrawlerFactory.CRAWLERS.get(platform)
+        if not crawler_path:
             raise ValueError("Invalid Media Platform Currently only supported xhs or dy or ks or bili ...")
-        return crawler_class()
+        module_name, class_name = crawler_path.split(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
+    @staticmethod
+    def create_crawler(platform: str) -> AbstractCrawler:
+        return CrawlerFactory.get_crawler_class(platform)()
 
 
 async def main():
     # parse cmd
-    await cmd_arg.parse_cmd()
+    settings = await cmd_arg.parse_cmd()
+    set_crawl_settings(settings)
+    check_store_dependencies(settings.save_data_option)
 
     # init db
-    if config.SAVE_DATA_OPTION == "db":
+    if settings.save_data_option == "db":
         await db.init_db()
 
-    crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
+    crawler = CrawlerFactory.create_crawler(platform=settings.platform)
+    try:
+        await crawler.start()
+    finally:
+        # csv、parquet、sqlite 存储中还在缓冲的数据写入文件
+        await close_store_sinks(settings.save_data_option)
+
+    # 词频在爬取过程中增量统计，结束时统一生成词云图
+    if settings.enable_get_wordcloud:
+        await words.get_word_frequency_engine().finalize()
+        words.get_word_frequency_engine().close()
 
-    if config.SAVE_DATA_OPTION == "db":
+    if settings.save_data_option == "db":
         await db.close()
 
+    utils.logger.info(metrics.format_summary())
     
 
 if __name__ == '__main__':
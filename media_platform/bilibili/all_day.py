@@ -0,0 +1,82 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : bilibili 按天搜索(ALL_DAY)的日期分片和完成进度
+
+import os
+import pathlib
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from tools import json_codec, utils
+
+# 同一进程内不同任务的进度对象可能写同一个文件，读取合并和写回需要互斥
+_write_lock = threading.Lock()
+
+
+def iter_days(start_day: str, end_day: str) -> List[str]:
+    """
+    START_DAY 至 END_DAY 的每一天(包含首尾)
+    Args:
+        start_day: YYYY-MM-DD
+        end_day: YYYY-MM-DD
+
+    Returns:
+        YYYY-MM-DD 列表
+
+    """
+    start = datetime.strptime(start_day, '%Y-%m-%d')
+    end = datetime.strptime(end_day, '%Y-%m-%d')
+    return [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range((end - start).days + 1)]
+
+
+class AllDayProgress:
+    """
+    按天搜索的完成进度，格式为 {关键词: [已完成的日期]}
+    - 一天的所有页都爬取完成(或当天没有数据)后才记为完成，出错的天不记录，下次运行时重新爬取
+    - 每次记录都整体写回文件(先写临时文件再替换)，中途退出不会损坏进度文件
+    - 写回前重新读取文件并合并，其他关键词或其他任务已写入的进度不会被覆盖
+    - 需要重新爬取已完成的日期时删除进度文件即可
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self._done: Dict[str, List[str]] = self._read()
+
+    def _read(self) -> Dict[str, List[str]]:
+        if not os.path.exists(self.file_path):
+            return {}
+        try:
+            with open(self.file_path, encoding="utf-8") as f:
+                return json_codec.loads(f.read())
+        except ValueError as e:
+            utils.logger.warning(f"[AllDayProgress] invalid progress file {self.file_path}, ignored: {e}")
+            return {}
+
+    def is_done(self, keyword: str, day: str) -> bool:
+        return day in self._done.get(keyword, [])
+
+    def mark_done(self, keyword: str, day: str) -> None:
+        if self.is_done(keyword, day):
+            return
+        with _write_lock:
+            done = self._read()
+            for done_keyword, days in self._done.items():
+                done[done_keyword] = sorted(set(done.get(done_keyword, [])) | set(days))
+            done[keyword] = sorted(set(done.get(keyword, [])) | {day})
+            self._done = done
+            pathlib.Path(self.file_path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json_codec.dumps(done, indent=True))
+            os.replace(tmp_path, self.file_path)
@@ -14,16 +14,19 @@
 # @Time    : 2023/12/2 18:44
 # @Desc    : bilibili 请求客户端
 import asyncio
-import json
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
 import httpx
 from playwright.async_api import BrowserContext, Page
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.concurrency import expand_sub_comments
+from tools.json_codec import dumps_compact, response_json
+from tools.metrics import instrument_request
+from tools.session_guard import session_guarded
 
 from .exception import DataFetchError
 from .field import CommentOrderType, SearchOrderType
@@ -37,7 +40,7 @@ class BilibiliClient(AbstractApiClient):
             proxies=None,
             *,
             headers: Dict[str, str],
-            playwright_page: Page,
+            playwright_page: Optional[Page],
             cookie_dict: Dict[str, str],
     ):
         self.proxies = proxies
@@ -45,15 +48,18 @@ class BilibiliClient(AbstractApiClient):
         self.headers = headers
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
+        self._nav_wbi_img_urls = ""
         self.cookie_dict = cookie_dict
 
+    @session_guarded
+    @instrument_request("bili")
     async def request(self, method, url, **kwargs) -> Any:
         async with httpx.AsyncClient(proxies=self.proxies) as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
                 **kwargs
             )
-        data: Dict = response.json()
+        data: Dict = response_json(response)
         if data.get("code") != 0:
             raise DataFetchError(data.get("message", "unkonw error"))
         else:
@@ -77,19 +83,25 @@ class BilibiliClient(AbstractApiClient):
         获取最新的 img_key 和 sub_key
         :return:
         """
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
-        wbi_img_urls = local_storage.get("wbi_img_urls", "") or local_storage.get(
-            "wbi_img_url") + "-" + local_storage.get("wbi_sub_url")
+        if self.playwright_page is not None:
+            local_storage = await self.playwright_page.evaluate("() => window.localStorage")
+            wbi_img_urls = local_storage.get("wbi_img_urls", "") or local_storage.get(
+                "wbi_img_url") + "-" + local_storage.get("wbi_sub_url")
+        else:
+            # 免浏览器模式没有页面的 localStorage，使用 nav 接口返回的地址，只请求一次
+            wbi_img_urls = self._nav_wbi_img_urls
         if wbi_img_urls and "-" in wbi_img_urls:
             img_url, sub_url = wbi_img_urls.split("-")
         else:
             resp = await self.request(method="GET", url=self._host + "/x/web-interface/nav")
             img_url: str = resp['wbi_img']['img_url']
             sub_url: str = resp['wbi_img']['sub_url']
+            self._nav_wbi_img_urls = f"{img_url}-{sub_url}"
         img_key = img_url.rsplit('/', 1)[1].split('.')[0]
         sub_key = sub_url.rsplit('/', 1)[1].split('.')[0]
         return img_key, sub_key
 
+    @session_guarded
     async def get(self, uri: str, params=None, enable_params_sign: bool = True) -> Dict:
         final_uri = uri
         if enable_params_sign:
@@ -99,9 +111,10 @@ class BilibiliClient(AbstractApiClient):
                          f"{urlencode(params)}")
         return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=self.headers)
 
+    @session_guarded
     async def post(self, uri: str, data: dict) -> Dict:
         data = await self.pre_request_data(data)
-        json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        json_str = dumps_compact(data)
         return await self.request(method="POST", url=f"{self._host}{uri}",
                                   data=json_str, headers=self.headers)
 
@@ -236,6 +249,10 @@ class BilibiliClient(AbstractApiClient):
         :return:
         """
 
+        async def on_sub_comments(level_one_comment_id: int, comment_list: List[Dict]) -> None:
+            if callback:  # 如果有回调函数，就执行回调函数
+                await callback(video_id, comment_list)
+
         result = []
         is_end = False
         next_page = 0
@@ -245,22 +262,22 @@ class BilibiliClient(AbstractApiClient):
             comment_list: List[Dict] = comments_res.get("replies", [])
             is_end = cursor_info.get("is_end")
             next_page = cursor_info.get("next")
-            if is_fetch_sub_comments:
-                for comment in comment_list:
-                    comment_id = comment['rpid']
-                    if (comment.get("rcount", 0) > 0):
-                        {
-                            await self.get_video_all_level_two_comments(
-                                video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval,  callback)
-                        }
             if len(result) + len(comment_list) > max_count:
                 comment_list = comment_list[:max_count - len(result)]
+            if is_fetch_sub_comments:
+                # 不同一级评论的二级评论并发展开，回调顺序和逐条展开时一致
+                await expand_sub_comments(
+                    [comment["rpid"] for comment in comment_list if comment.get("rcount", 0) > 0],
+                    lambda comment_id: self.iter_video_level_two_comments(video_id, comment_id,
+                                                                          CommentOrderType.DEFAULT),
+                    concurrency=crawl_settings.max_sub_comment_concurrency_num,
+                    crawl_interval=crawl_interval,
+                    callback=on_sub_comments,
+                )
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(video_id, comment_list)
             await asyncio.sleep(crawl_interval)
-            if not is_fetch_sub_comments:
-                result.extend(comment_list)
-                continue
+            result.extend(comment_list)
         return result
 
     async def get_video_all_level_two_comments(self,
@@ -270,7 +287,7 @@ class BilibiliClient(AbstractApiClient):
                                                ps: int = 10,
                                                crawl_interval: float = 1.0,
                                                callback: Optional[Callable] = None,
-                                               ) -> Dict:
+                                               ) -> List[Dict]:
         """
         get video all level two comments for a level one comment
         :param video_id: 视频 ID
@@ -282,14 +299,36 @@ class BilibiliClient(AbstractApiClient):
         :return:
         """
 
+        async def on_page(comment_id: int, comment_list: List[Dict]) -> None:
+            if callback:  # 如果有回调函数，就执行回调函数
+                await callback(video_id, comment_list)
+
+        return await expand_sub_comments(
+            [level_one_comment_id],
+            lambda comment_id: self.iter_video_level_two_comments(video_id, comment_id, order_mode, ps),
+            crawl_interval=crawl_interval,
+            callback=on_page,
+        )
+
+    async def iter_video_level_two_comments(self,
+                                            video_id: str,
+                                            level_one_comment_id: int,
+                                            order_mode: CommentOrderType,
+                                            ps: int = 10,
+                                            ) -> AsyncIterator[List[Dict]]:
+        """
+        逐页返回一条一级评论下的二级评论
+        :param video_id: 视频 ID
+        :param level_one_comment_id: 一级评论 ID
+        :param order_mode:
+        :param ps: 一页评论数
+        :return:
+        """
         pn = 1
         while True:
             result = await self.get_video_level_two_comments(
                 video_id, level_one_comment_id, pn, ps, order_mode)
-            comment_list: List[Dict] = result.get("replies", [])
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
+            yield result.get("replies") or []
             if (int(result["page"]["count"]) <= pn * ps):
                 break
 
@@ -423,7 +462,7 @@ class BilibiliClient(AbstractApiClient):
         """
         creator_id = creator_info["id"]
         result = []
-        pn = config.START_CONTACTS_PAGE
+        pn = crawl_settings.start_contacts_page
         while len(result) < max_count:
             fans_res: Dict = await self.get_creator_fans(creator_id, pn=pn)
             fans_list: List[Dict] = fans_res.get("list", [])
@@ -453,7 +492,7 @@ class BilibiliClient(AbstractApiClient):
         """
         creator_id = creator_info["id"]
         result = []
-        pn = config.START_CONTACTS_PAGE
+        pn = crawl_settings.start_contacts_page
         while len(result) < max_count:
             followings_res: Dict = await self.get_creator_followings(creator_id, pn=pn)
             followings_list: List[Dict] = followings_res.get("list", [])
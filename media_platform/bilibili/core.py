@@ -17,20 +17,24 @@
 import asyncio
 import os
 import random
-from asyncio import Task
 from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
-import pandas as pd
 
-from playwright.async_api import (BrowserContext, BrowserType, Page, async_playwright)
+from playwright.async_api import BrowserContext, BrowserType, Page
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
+from tools.account_pool import AccountPool
+from tools.browser_pool import open_browser
+from tools.concurrency import map_bounded, run_sources
+from tools.session_guard import SessionGuard
+from tools.storage_state import load_storage_state, save_storage_state
 from var import crawler_type_var, source_keyword_var
 
+from .all_day import AllDayProgress, iter_days
 from .client import BilibiliClient
 from .exception import DataFetchError
 from .field import SearchOrderType
@@ -48,64 +52,59 @@ class BilibiliCrawler(AbstractCrawler):
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
-        if config.ENABLE_IP_PROXY:
-            ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
+        if crawl_settings.enable_ip_proxy:
+            ip_proxy_pool = await create_ip_pool(crawl_settings.ip_proxy_pool_count, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
                 ip_proxy_info)
 
-        async with async_playwright() as playwright:
-            # Launch a browser context.
-            chromium = playwright.chromium
-            self.browser_context = await self.launch_browser(
-                chromium,
-                None,
-                self.user_agent,
-                headless=config.HEADLESS
-            )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
+        if crawl_settings.browser_free_mode and await self.create_client_from_storage_state(httpx_proxy_format):
+            await self.crawl()
+            utils.logger.info(
+                "[BilibiliCrawler.start] Bilibili Crawler finished ...")
+            return
+
+        async with open_browser(
+            platform=crawl_settings.platform,
+            launcher=self.launch_browser,
+            user_agent=self.user_agent,
+            headless=crawl_settings.headless,
+            index_url=self.index_url,
+            use_pool=crawl_settings.use_browser_pool,
+            persistent=crawl_settings.save_login_state,
+        ) as lease:
+            self.browser_context = lease.browser_context
+            self.context_page = lease.page
 
             # Create a client to interact with the xiaohongshu website.
             self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
             if not await self.bili_client.pong():
                 login_obj = BilibiliLogin(
-                    login_type=config.LOGIN_TYPE,
+                    login_type=crawl_settings.login_type,
                     login_phone="",  # your phone number
                     browser_context=self.browser_context,
                     context_page=self.context_page,
-                    cookie_str=config.COOKIES
+                    cookie_str=crawl_settings.cookies
                 )
                 await login_obj.begin()
                 await self.bili_client.update_cookies(browser_context=self.browser_context)
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for video and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
-            elif config.CRAWLER_TYPE == "creator":
-                if config.CREATOR_MODE:
-                    for creator_id in config.BILI_CREATOR_ID_LIST:
-                        await self.get_creator_videos(int(creator_id))
-                else:
-                    await self.get_all_creator_details(config.BILI_CREATOR_ID_LIST)
-            else:
-                pass
+            # 之后的请求被风控时由 refresh_session 统一刷新登录态，并发的请求等待刷新完成后重试
+            self.bili_client.session_guard = SessionGuard("bili", self.refresh_session)
+            if crawl_settings.browser_free_mode:
+                # 保存登录态，下次运行时先尝试不启动浏览器
+                await save_storage_state(crawl_settings.platform, self.browser_context)
+            await self.crawl()
             utils.logger.info(
                 "[BilibiliCrawler.start] Bilibili Crawler finished ...")
 
     @staticmethod
-    async def get_pubtime_datetime(start: str = config.START_DAY, end: str = config.END_DAY) -> Tuple[str, str]:
+    async def get_pubtime_datetime(start: Optional[str] = None, end: Optional[str] = None) -> Tuple[str, str]:
         """
         获取 bilibili 作品发布日期起始时间戳 pubtime_begin_s 与发布日期结束时间戳 pubtime_end_s
         ---
-        :param start: 发布日期起始时间，YYYY-MM-DD
-        :param end: 发布日期结束时间，YYYY-MM-DD
+        :param start: 发布日期起始时间，YYYY-MM-DD，默认取当前任务配置的 start_day
+        :param end: 发布日期结束时间，YYYY-MM-DD，默认取当前任务配置的 end_day
         
         Note
         ---
@@ -117,6 +116,8 @@ class BilibiliCrawler(AbstractCrawler):
             - 如搜索 2024-01-05 - 2024-01-06 的内容，pubtime_begin_s = 1704384000，pubtime_end_s = 1704556799
               转换为可读的 datetime 对象：pubtime_begin_s = datetime.datetime(2024, 1, 5, 0, 0)，pubtime_end_s = datetime.datetime(2024, 1, 6, 23, 59, 59)
         """
+        start = start or crawl_settings.start_day
+        end = end or crawl_settings.end_day
         # 转换 start 与 end 为 datetime 对象
         start_day: datetime = datetime.strptime(start, '%Y-%m-%d')
         end_day: datetime = datetime.strptime(end, '%Y-%m-%d')
@@ -129,6 +130,69 @@ class BilibiliCrawler(AbstractCrawler):
         # 将其重新转换为时间戳
         return str(int(start_day.timestamp())), str(int(end_day.timestamp()))
 
+    async def create_client_from_storage_state(self, httpx_proxy: Optional[str]) -> bool:
+        """
+        免浏览器模式：用保存的登录态(或配置的 COOKIES)直接创建 API 客户端，不启动浏览器
+        Returns:
+            登录态是否有效，无效时需要启动浏览器登录
+
+        """
+        stored_state = load_storage_state(crawl_settings.platform, crawl_settings.cookies)
+        if stored_state is None:
+            return False
+        self.browser_context = stored_state
+        self.context_page = None
+        self.bili_client = await self.create_bilibili_client(httpx_proxy)
+        if await self.bili_client.pong():
+            utils.logger.info("[BilibiliCrawler.create_client_from_storage_state] use stored login state, skip launching browser")
+            return True
+        utils.logger.info("[BilibiliCrawler.create_client_from_storage_state] stored login state expired, launch browser to login")
+        return False
+
+    async def crawl(self):
+        """按爬虫类型爬取数据，需要先创建好 API 客户端"""
+        if crawl_settings.enable_account_pool:
+            self.bili_client.account_pool = await AccountPool.from_login_sessions(
+                crawl_settings.platform, self.bili_client,
+                max_requests_per_sec=crawl_settings.account_max_requests_per_sec,
+                quarantine_sec=crawl_settings.account_quarantine_sec,
+            )
+        crawler_type_var.set(crawl_settings.crawler_type)
+        if crawl_settings.crawler_type == "search":
+            # Search for video and retrieve their comment information.
+            await self.search()
+        elif crawl_settings.crawler_type == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_videos(crawl_settings.bili_specified_id_list)
+        elif crawl_settings.crawler_type == "creator":
+            if crawl_settings.creator_mode:
+                # 不同创作者的爬取互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+                await run_sources([int(creator_id) for creator_id in crawl_settings.bili_creator_id_list],
+                                  self.get_creator_videos,
+                                  concurrency=crawl_settings.max_source_concurrency_num)
+            else:
+                await self.get_all_creator_details(crawl_settings.bili_creator_id_list)
+        else:
+            pass
+
+    async def refresh_session(self) -> None:
+        """
+        请求被风控时由 SessionGuard 调用(同一时间只有一次)：重新打开页面更新 cookies，登录态失效时重新登录
+        """
+        await self.context_page.goto(self.index_url)
+        await self.bili_client.update_cookies(browser_context=self.browser_context)
+        if await self.bili_client.pong():
+            return
+        login_obj = BilibiliLogin(
+            login_type=crawl_settings.login_type,
+            login_phone="",
+            browser_context=self.browser_context,
+            context_page=self.context_page,
+            cookie_str=crawl_settings.cookies,
+        )
+        await login_obj.begin()
+        await self.bili_client.update_cookies(browser_context=self.browser_context)
+
     async def search(self):
         """
         search bilibili video with keywords
@@ -136,93 +200,124 @@ class BilibiliCrawler(AbstractCrawler):
         """
         utils.logger.info("[BilibiliCrawler.search] Begin search bilibli keywords")
         bili_limit_count = 20  # bilibili limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
-        start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[BilibiliCrawler.search] Current search keyword: {keyword}")
-            # 每个关键词最多返回 1000 条数据
-            if not config.ALL_DAY:
-                page = 1
-                while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                    if page < start_page:
-                        utils.logger.info(f"[BilibiliCrawler.search] Skip page: {page}")
-                        page += 1
-                        continue
-
-                    utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, page: {page}")
-                    video_id_list: List[str] = []
-                    videos_res = await self.bili_client.search_video_by_keyword(
-                        keyword=keyword,
-                        page=page,
-                        page_size=bili_limit_count,
-                        order=SearchOrderType.DEFAULT,
-                        pubtime_begin_s=0,  # 作品发布日期起始时间戳
-                        pubtime_end_s=0  # 作品发布日期结束日期时间戳
-                    )
-                    video_list: List[Dict] = videos_res.get("result")
-
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = []
-                    try:
-                        task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                    except Exception as e:
-                        utils.logger.warning(f"[BilibiliCrawler.search] error in the task list. The video for this page will not be included. {e}")
-                    video_items = await asyncio.gather(*task_list)
-                    for video_item in video_items:
-                        if video_item:
-                            video_id_list.append(video_item.get("View").get("aid"))
-                            await bilibili_store.update_bilibili_video(video_item)
-                            await bilibili_store.update_up_info(video_item)
-                            await self.get_bilibili_video(video_item, semaphore)
+        if crawl_settings.crawler_max_notes_count < bili_limit_count:
+            crawl_settings.crawler_max_notes_count = bili_limit_count
+        # 不同关键词的搜索互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.keywords.split(","), self.search_keyword,
+                          concurrency=crawl_settings.max_source_concurrency_num)
+
+    async def search_keyword(self, keyword: str):
+        """
+        search bilibili video with one keyword
+        :param keyword: 搜索关键词
+        :return:
+        """
+        bili_limit_count = 20  # bilibili limit page fixed value
+        start_page = crawl_settings.start_page  # start page number
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[BilibiliCrawler.search_keyword] Current search keyword: {keyword}")
+        # 每个关键词最多返回 1000 条数据
+        if not crawl_settings.all_day:
+            page = 1
+            while (page - start_page + 1) * bili_limit_count <= crawl_settings.crawler_max_notes_count:
+                if page < start_page:
+                    utils.logger.info(f"[BilibiliCrawler.search_keyword] Skip page: {page}")
                     page += 1
-                    await self.batch_get_video_comments(video_id_list)
-            # 按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下每一天的所有视频
-            else:
-                for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq='D'):
-                    # 按照每一天进行爬取的时间戳参数
-                    pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime('%Y-%m-%d'), end=day.strftime('%Y-%m-%d'))
-                    page = 1
-                    #!该段 while 语句在发生异常时（通常情况下为当天数据为空时）会自动跳转到下一天，以实现最大程度爬取该关键词下当天的所有视频
-                    #!除了仅保留现在原有的 try, except Exception 语句外，不要再添加其他的异常处理！！！否则将使该段代码失效，使其仅能爬取当天一天数据而无法跳转到下一天
-                    #!除非将该段代码的逻辑进行重构以实现相同的功能，否则不要进行修改！！！
-                    while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                        #! Catch any error if response return nothing, go to next day
-                        try:
-                            #! Don't skip any page, to make sure gather all video in one day
-                            # if page < start_page:
-                            #     utils.logger.info(f"[BilibiliCrawler.search] Skip page: {page}")
-                            #     page += 1
-                            #     continue
-
-                            utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, date: {day.ctime()}, page: {page}")
-                            video_id_list: List[str] = []
-                            videos_res = await self.bili_client.search_video_by_keyword(
-                                keyword=keyword,
-                                page=page,
-                                page_size=bili_limit_count,
-                                order=SearchOrderType.DEFAULT,
-                                pubtime_begin_s=pubtime_begin_s,  # 作品发布日期起始时间戳
-                                pubtime_end_s=pubtime_end_s  # 作品发布日期结束日期时间戳
-                            )
-                            video_list: List[Dict] = videos_res.get("result")
-
-                            semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                            task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                            video_items = await asyncio.gather(*task_list)
-                            for video_item in video_items:
-                                if video_item:
-                                    video_id_list.append(video_item.get("View").get("aid"))
-                                    await bilibili_store.update_bilibili_video(video_item)
-                                    await bilibili_store.update_up_info(video_item)
-                                    await self.get_bilibili_video(video_item, semaphore)
-                            page += 1
-                            await self.batch_get_video_comments(video_id_list)
-                        # go to next day
-                        except Exception as e:
-                            print(e)
-                            break
+                    continue
+
+                utils.logger.info(f"[BilibiliCrawler.search_keyword] search bilibili keyword: {keyword}, page: {page}")
+                videos_res = await self.bili_client.search_video_by_keyword(
+                    keyword=keyword,
+                    page=page,
+                    page_size=bili_limit_count,
+                    order=SearchOrderType.DEFAULT,
+                    pubtime_begin_s=0,  # 作品发布日期起始时间戳
+                    pubtime_end_s=0  # 作品发布日期结束日期时间戳
+                )
+                video_list: List[Dict] = videos_res.get("result")
+                await self.handle_search_videos(video_list)
+                page += 1
+        # 按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下每一天的所有视频
+        else:
+            await self.search_all_day(keyword)
+
+    async def handle_search_videos(self, video_list: List[Dict]) -> None:
+        """
+        获取一页搜索结果中视频的详情并保存，然后获取评论
+        :param video_list: 搜索结果中的视频
+        :return:
+        """
+        video_id_list: List[str] = []
+        video_items = []
+        try:
+            video_items = await map_bounded(
+                lambda video_item: self.get_video_info_task(aid=video_item.get("aid"), bvid=""),
+                video_list, concurrency=crawl_settings.max_concurrency_num, name="bili_video_detail")
+        except Exception as e:
+            utils.logger.warning(f"[BilibiliCrawler.search] error in the task list. The video for this page will not be included. {e}")
+        for video_item in video_items:
+            if video_item:
+                video_id_list.append(video_item.get("View").get("aid"))
+                await bilibili_store.update_bilibili_video(video_item)
+                await bilibili_store.update_up_info(video_item)
+                await self.get_bilibili_video(video_item)
+        await self.batch_get_video_comments(video_id_list)
+
+    async def search_all_day(self, keyword: str) -> None:
+        """
+        按照 START_DAY 至 END_DAY 的每一天分片搜索关键词，最多同时搜索 ALL_DAY_CONCURRENCY_NUM 天
+        完成的日期记录在 ALL_DAY_PROGRESS_FILE 中，中断后重新运行时跳过
+        :param keyword: 搜索关键词
+        :return:
+        """
+        progress = AllDayProgress(crawl_settings.all_day_progress_file)
+        days = iter_days(crawl_settings.start_day, crawl_settings.end_day)
+        pending_days = [day for day in days if not progress.is_done(keyword, day)]
+        utils.logger.info(
+            f"[BilibiliCrawler.search_all_day] keyword: {keyword}, {len(days)} days, "
+            f"{len(days) - len(pending_days)} already done, {len(pending_days)} to crawl")
+
+        async def crawl_day(day: str) -> None:
+            try:
+                await self.search_one_day(keyword, day)
+            except Exception as e:
+                # 出错的日期不记为完成，下次运行时重新爬取
+                utils.logger.error(f"[BilibiliCrawler.search_all_day] keyword: {keyword}, date: {day} error: {e}")
+                return
+            progress.mark_done(keyword, day)
+
+        await map_bounded(crawl_day, pending_days,
+                          concurrency=crawl_settings.all_day_concurrency_num, name="bili_search_day")
+
+    async def search_one_day(self, keyword: str, day: str) -> None:
+        """
+        搜索关键词在某一天发布的视频，当天没有数据或已经是最后一页时结束
+        :param keyword: 搜索关键词
+        :param day: YYYY-MM-DD
+        :return:
+        """
+        bili_limit_count = 20  # bilibili limit page fixed value
+        pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day, end=day)
+        page = 1
+        # 不跳过任何页，保证爬取到当天的所有视频
+        while page * bili_limit_count <= crawl_settings.crawler_max_notes_count:
+            utils.logger.info(f"[BilibiliCrawler.search_one_day] search bilibili keyword: {keyword}, date: {day}, page: {page}")
+            videos_res = await self.bili_client.search_video_by_keyword(
+                keyword=keyword,
+                page=page,
+                page_size=bili_limit_count,
+                order=SearchOrderType.DEFAULT,
+                pubtime_begin_s=pubtime_begin_s,  # 作品发布日期起始时间戳
+                pubtime_end_s=pubtime_end_s  # 作品发布日期结束日期时间戳
+            )
+            video_list: List[Dict] = videos_res.get("result")
+            if not video_list:
+                utils.logger.info(f"[BilibiliCrawler.search_one_day] keyword: {keyword}, date: {day} has no more videos at page {page}")
+                break
+            await self.handle_search_videos(video_list)
+            if page >= videos_res.get("numPages", page):
+                break
+            page += 1
 
     async def batch_get_video_comments(self, video_id_list: List[str]):
         """
@@ -230,46 +325,39 @@ class BilibiliCrawler(AbstractCrawler):
         :param video_id_list:
         :return:
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not crawl_settings.enable_get_comments:
             utils.logger.info(
                 f"[BilibiliCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
 
         utils.logger.info(
             f"[BilibiliCrawler.batch_get_video_comments] video ids:{video_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for video_id in video_id_list:
-            task = asyncio.create_task(self.get_comments(
-                video_id, semaphore), name=video_id)
-            task_list.append(task)
-        await asyncio.gather(*task_list)
+        await map_bounded(self.get_comments, video_id_list,
+                          concurrency=crawl_settings.max_concurrency_num, name="bili_video_comments")
 
-    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, video_id: str):
         """
         get comment for video id
         :param video_id:
-        :param semaphore:
         :return:
         """
-        async with semaphore:
-            try:
-                utils.logger.info(
-                    f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
-                await self.bili_client.get_video_all_comments(
-                    video_id=video_id,
-                    crawl_interval=random.random(),
-                    is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
-                    callback=bilibili_store.batch_update_bilibili_video_comments,
-                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-                )
+        try:
+            utils.logger.info(
+                f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
+            await self.bili_client.get_video_all_comments(
+                video_id=video_id,
+                crawl_interval=random.random(),
+                is_fetch_sub_comments=crawl_settings.enable_get_sub_comments,
+                callback=bilibili_store.batch_update_bilibili_video_comments,
+                max_count=crawl_settings.crawler_max_comments_count_singlenotes,
+            )
 
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_comments] get video_id: {video_id} comment error: {ex}")
-            except Exception as e:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_comments] may be been blocked, err:{e}")
+        except DataFetchError as ex:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_comments] get video_id: {video_id} comment error: {ex}")
+        except Exception as e:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_comments] may be been blocked, err:{e}")
 
     async def get_creator_videos(self, creator_id: int):
         """
@@ -294,12 +382,8 @@ class BilibiliCrawler(AbstractCrawler):
         get specified videos info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list = [
-            self.get_video_info_task(aid=0, bvid=video_id, semaphore=semaphore) for video_id in
-            bvids_list
-        ]
-        video_details = await asyncio.gather(*task_list)
+        video_details = await map_bounded(lambda video_id: self.get_video_info_task(aid=0, bvid=video_id), bvids_list,
+                                          concurrency=crawl_settings.max_concurrency_num, name="bili_video_detail")
         video_aids_list = []
         for video_detail in video_details:
             if video_detail is not None:
@@ -309,50 +393,46 @@ class BilibiliCrawler(AbstractCrawler):
                     video_aids_list.append(video_aid)
                 await bilibili_store.update_bilibili_video(video_detail)
                 await bilibili_store.update_up_info(video_detail)
-                await self.get_bilibili_video(video_detail, semaphore)
+                await self.get_bilibili_video(video_detail)
         await self.batch_get_video_comments(video_aids_list)
 
-    async def get_video_info_task(self, aid: int, bvid: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    async def get_video_info_task(self, aid: int, bvid: str) -> Optional[Dict]:
         """
         Get video detail task
         :param aid:
         :param bvid:
-        :param semaphore:
         :return:
         """
-        async with semaphore:
-            try:
-                result = await self.bili_client.get_video_info(aid=aid, bvid=bvid)
-                return result
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_video_info_task] Get video detail error: {ex}")
-                return None
-            except KeyError as ex:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_video_info_task] have not fund note detail video_id:{bvid}, err: {ex}")
-                return None
-
-    async def get_video_play_url_task(self, aid: int, cid: int, semaphore: asyncio.Semaphore) -> Union[Dict, None]:
+        try:
+            result = await self.bili_client.get_video_info(aid=aid, bvid=bvid)
+            return result
+        except DataFetchError as ex:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_video_info_task] Get video detail error: {ex}")
+            return None
+        except KeyError as ex:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_video_info_task] have not fund note detail video_id:{bvid}, err: {ex}")
+            return None
+
+    async def get_video_play_url_task(self, aid: int, cid: int) -> Union[Dict, None]:
         """
                 Get video play url
                 :param aid:
                 :param cid:
-                :param semaphore:
                 :return:
                 """
-        async with semaphore:
-            try:
-                result = await self.bili_client.get_video_play_url(aid=aid, cid=cid)
-                return result
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_video_play_url_task] Get video play url error: {ex}")
-                return None
-            except KeyError as ex:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_video_play_url_task] have not fund play url from :{aid}|{cid}, err: {ex}")
-                return None
+        try:
+            result = await self.bili_client.get_video_play_url(aid=aid, cid=cid)
+            return result
+        except DataFetchError as ex:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_video_play_url_task] Get video play url error: {ex}")
+            return None
+        except KeyError as ex:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_video_play_url_task] have not fund play url from :{aid}|{cid}, err: {ex}")
+            return None
 
     async def create_bilibili_client(self, httpx_proxy: Optional[str]) -> BilibiliClient:
         """
@@ -411,11 +491,11 @@ class BilibiliCrawler(AbstractCrawler):
         """
         utils.logger.info(
             "[BilibiliCrawler.launch_browser] Begin create browser context ...")
-        if config.SAVE_LOGIN_STATE:
+        if crawl_settings.save_login_state:
             # feat issue #14
             # we will save login state to avoid login every time
             user_data_dir = os.path.join(os.getcwd(), "browser_data",
-                                         config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+                                         crawl_settings.user_data_dir % crawl_settings.platform)  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -434,20 +514,19 @@ class BilibiliCrawler(AbstractCrawler):
             )
             return browser_context
 
-    async def get_bilibili_video(self, video_item: Dict, semaphore: asyncio.Semaphore):
+    async def get_bilibili_video(self, video_item: Dict):
         """
         download bilibili video
         :param video_item:
-        :param semaphore:
         :return:
         """
-        if not config.ENABLE_GET_IMAGES:
+        if not crawl_settings.enable_get_images:
             utils.logger.info(f"[BilibiliCrawler.get_bilibili_video] Crawling image mode is not enabled")
             return
         video_item_view: Dict = video_item.get("View")
         aid = video_item_view.get("aid")
         cid = video_item_view.get("cid")
-        result = await self.get_video_play_url_task(aid, cid, semaphore)
+        result = await self.get_video_play_url_task(aid, cid)
         if result is None:
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video play url failed")
             return
@@ -478,112 +557,94 @@ class BilibiliCrawler(AbstractCrawler):
         utils.logger.info(
             f"[BilibiliCrawler.get_creator_details] creator ids:{creator_id_list}")
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        try:
-            for creator_id in creator_id_list:
-                task = asyncio.create_task(self.get_creator_details(
-                    creator_id, semaphore), name=creator_id)
-                task_list.append(task)
-        except Exception as e:
-            utils.logger.warning(
-                f"[BilibiliCrawler.get_all_creator_details] error in the task list. The creator will not be included. {e}")
-
-        await asyncio.gather(*task_list)
+        await map_bounded(self.get_creator_details, creator_id_list,
+                          concurrency=crawl_settings.max_concurrency_num, name="bili_creator_detail")
 
-    async def get_creator_details(self, creator_id: int, semaphore: asyncio.Semaphore):
+    async def get_creator_details(self, creator_id: int):
         """
         get details for creator id
         :param creator_id:
-        :param semaphore:
         :return:
         """
-        async with semaphore:
-            creator_unhandled_info: Dict = await self.bili_client.get_creator_info(creator_id)
-            creator_info: Dict = {
-                "id": creator_id,
-                "name": creator_unhandled_info.get("name"),
-                "sign": creator_unhandled_info.get("sign"),
-                "avatar": creator_unhandled_info.get("face"),
-            }
-        await self.get_fans(creator_info, semaphore)
-        await self.get_followings(creator_info, semaphore)
-        await self.get_dynamics(creator_info, semaphore)
+        creator_unhandled_info: Dict = await self.bili_client.get_creator_info(creator_id)
+        creator_info: Dict = {
+            "id": creator_id,
+            "name": creator_unhandled_info.get("name"),
+            "sign": creator_unhandled_info.get("sign"),
+            "avatar": creator_unhandled_info.get("face"),
+        }
+        await self.get_fans(creator_info)
+        await self.get_followings(creator_info)
+        await self.get_dynamics(creator_info)
 
-    async def get_fans(self, creator_info: Dict, semaphore: asyncio.Semaphore):
+    async def get_fans(self, creator_info: Dict):
         """
         get fans for creator id
         :param creator_info:
-        :param semaphore:
         :return:
         """
         creator_id = creator_info["id"]
-        async with semaphore:
-            try:
-                utils.logger.info(
-                    f"[BilibiliCrawler.get_fans] begin get creator_id: {creator_id} fans ...")
-                await self.bili_client.get_creator_all_fans(
-                    creator_info=creator_info,
-                    crawl_interval=random.random(),
-                    callback=bilibili_store.batch_update_bilibili_creator_fans,
-                    max_count=config.CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES,
-                )
+        try:
+            utils.logger.info(
+                f"[BilibiliCrawler.get_fans] begin get creator_id: {creator_id} fans ...")
+            await self.bili_client.get_creator_all_fans(
+                creator_info=creator_info,
+                crawl_interval=random.random(),
+                callback=bilibili_store.batch_update_bilibili_creator_fans,
+                max_count=crawl_settings.crawler_max_contacts_count_singlenotes,
+            )
 
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_fans] get creator_id: {creator_id} fans error: {ex}")
-            except Exception as e:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_fans] may be been blocked, err:{e}")
+        except DataFetchError as ex:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_fans] get creator_id: {creator_id} fans error: {ex}")
+        except Exception as e:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_fans] may be been blocked, err:{e}")
 
-    async def get_followings(self, creator_info: Dict, semaphore: asyncio.Semaphore):
+    async def get_followings(self, creator_info: Dict):
         """
         get followings for creator id
         :param creator_info:
-        :param semaphore:
         :return:
         """
         creator_id = creator_info["id"]
-        async with semaphore:
-            try:
-                utils.logger.info(
-                    f"[BilibiliCrawler.get_followings] begin get creator_id: {creator_id} followings ...")
-                await self.bili_client.get_creator_all_followings(
-                    creator_info=creator_info,
-                    crawl_interval=random.random(),
-                    callback=bilibili_store.batch_update_bilibili_creator_followings,
-                    max_count=config.CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES,
-                )
+        try:
+            utils.logger.info(
+                f"[BilibiliCrawler.get_followings] begin get creator_id: {creator_id} followings ...")
+            await self.bili_client.get_creator_all_followings(
+                creator_info=creator_info,
+                crawl_interval=random.random(),
+                callback=bilibili_store.batch_update_bilibili_creator_followings,
+                max_count=crawl_settings.crawler_max_contacts_count_singlenotes,
+            )
 
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_followings] get creator_id: {creator_id} followings error: {ex}")
-            except Exception as e:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_followings] may be been blocked, err:{e}")
+        except DataFetchError as ex:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_followings] get creator_id: {creator_id} followings error: {ex}")
+        except Exception as e:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_followings] may be been blocked, err:{e}")
 
-    async def get_dynamics(self, creator_info: Dict, semaphore: asyncio.Semaphore):
+    async def get_dynamics(self, creator_info: Dict):
         """
         get dynamics for creator id
         :param creator_info:
-        :param semaphore:
         :return:
         """
         creator_id = creator_info["id"]
-        async with semaphore:
-            try:
-                utils.logger.info(
-                    f"[BilibiliCrawler.get_dynamics] begin get creator_id: {creator_id} dynamics ...")
-                await self.bili_client.get_creator_all_dynamics(
-                    creator_info=creator_info,
-                    crawl_interval=random.random(),
-                    callback=bilibili_store.batch_update_bilibili_creator_dynamics,
-                    max_count=config.CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES,
-                )
+        try:
+            utils.logger.info(
+                f"[BilibiliCrawler.get_dynamics] begin get creator_id: {creator_id} dynamics ...")
+            await self.bili_client.get_creator_all_dynamics(
+                creator_info=creator_info,
+                crawl_interval=random.random(),
+                callback=bilibili_store.batch_update_bilibili_creator_dynamics,
+                max_count=crawl_settings.crawler_max_dynamics_count_singlenotes,
+            )
 
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_dynamics] get creator_id: {creator_id} dynamics error: {ex}")
-            except Exception as e:
-                utils.logger.error(
-                    f"[BilibiliCrawler.get_dynamics] may be been blocked, err:{e}")
+        except DataFetchError as ex:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_dynamics] get creator_id: {creator_id} dynamics error: {ex}")
+        except Exception as e:
+            utils.logger.error(
+                f"[BilibiliCrawler.get_dynamics] may be been blocked, err:{e}")
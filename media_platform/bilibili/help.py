@@ -19,6 +19,7 @@ from hashlib import md5
 from typing import Dict
 
 from tools import utils
+from tools.metrics import timed
 
 
 class BilibiliSign:
@@ -43,6 +44,7 @@ class BilibiliSign:
             salt += mixin_key[mt]
         return salt[:32]
 
+    @timed("sign_seconds", platform="bili", method="BilibiliSign.sign")
     def sign(self, req_data: Dict) -> Dict:
         """
         请求参数中加上当前时间戳对请求参数中的key进行字典序排序
@@ -20,6 +20,9 @@ from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.json_codec import response_json
+from tools.metrics import instrument_request, record_block_event
+from tools.session_guard import AccountBlockedError, session_guarded
 from var import request_keyword_var
 
 from .exception import *
@@ -91,6 +94,8 @@ class DOUYINClient(AbstractApiClient):
         a_bogus = await get_a_bogus(uri, query_string, post_data, headers["User-Agent"], self.playwright_page)
         params["a_bogus"] = a_bogus
 
+    @session_guarded
+    @instrument_request("dy")
     async def request(self, method, url, **kwargs):
         response = None
         if method == "GET":
@@ -100,11 +105,13 @@ class DOUYINClient(AbstractApiClient):
         try:
             if response.text == "" or response.text == "blocked":
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
-                raise Exception("account blocked")
-            return response.json()
+                record_block_event("dy", "account_blocked")
+                raise AccountBlockedError("account blocked")
+            return response_json(response)
         except Exception as e:
             raise DataFetchError(f"{e}, {response.text}")
 
+    @session_guarded
     async def get(self, uri: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
         """
         GET请求
@@ -113,6 +120,7 @@ class DOUYINClient(AbstractApiClient):
         headers = headers or self.headers
         return await self.request(method="GET", url=f"{self._host}{uri}", params=params, headers=headers)
 
+    @session_guarded
     async def post(self, uri: str, data: dict, headers: Optional[Dict] = None):
         await self.__process_req_params(uri, data, headers)
         headers = headers or self.headers
@@ -9,20 +9,21 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
-import asyncio
 import os
 import random
-from asyncio import Task
 from typing import Any, Dict, List, Optional, Tuple
 
-from playwright.async_api import (BrowserContext, BrowserType, Page,
-                                  async_playwright)
+from playwright.async_api import BrowserContext, BrowserType, Page
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
+from tools.account_pool import AccountPool
+from tools.browser_pool import open_browser
+from tools.concurrency import map_bounded, run_sources
+from tools.session_guard import SessionGuard
 from var import crawler_type_var, source_keyword_var
 
 from .client import DOUYINClient
@@ -41,184 +42,207 @@ class DouYinCrawler(AbstractCrawler):
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
-        if config.ENABLE_IP_PROXY:
-            ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
+        if crawl_settings.enable_ip_proxy:
+            ip_proxy_pool = await create_ip_pool(crawl_settings.ip_proxy_pool_count, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(ip_proxy_info)
 
-        async with async_playwright() as playwright:
-            # Launch a browser context.
-            chromium = playwright.chromium
-            self.browser_context = await self.launch_browser(
-                chromium,
-                None,
-                user_agent=None,
-                headless=config.HEADLESS
-            )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
+        async with open_browser(
+            platform=crawl_settings.platform,
+            launcher=self.launch_browser,
+            user_agent=None,
+            headless=crawl_settings.headless,
+            index_url=self.index_url,
+            use_pool=crawl_settings.use_browser_pool,
+            persistent=crawl_settings.save_login_state,
+        ) as lease:
+            self.browser_context = lease.browser_context
+            self.context_page = lease.page
 
             self.dy_client = await self.create_douyin_client(httpx_proxy_format)
             if not await self.dy_client.pong(browser_context=self.browser_context):
                 login_obj = DouYinLogin(
-                    login_type=config.LOGIN_TYPE,
+                    login_type=crawl_settings.login_type,
                     login_phone="",  # you phone number
                     browser_context=self.browser_context,
                     context_page=self.context_page,
-                    cookie_str=config.COOKIES
+                    cookie_str=crawl_settings.cookies
                 )
                 await login_obj.begin()
                 await self.dy_client.update_cookies(browser_context=self.browser_context)
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
+            # 之后的请求被风控时由 refresh_session 统一刷新登录态，并发的请求等待刷新完成后重试
+            self.dy_client.session_guard = SessionGuard("dy", self.refresh_session)
+            if crawl_settings.enable_account_pool:
+                self.dy_client.account_pool = await AccountPool.from_login_sessions(
+                    crawl_settings.platform, self.dy_client,
+                    max_requests_per_sec=crawl_settings.account_max_requests_per_sec,
+                    quarantine_sec=crawl_settings.account_quarantine_sec,
+                )
+            crawler_type_var.set(crawl_settings.crawler_type)
+            if crawl_settings.crawler_type == "search":
                 # Search for notes and retrieve their comment information.
                 await self.search()
-            elif config.CRAWLER_TYPE == "detail":
+            elif crawl_settings.crawler_type == "detail":
                 # Get the information and comments of the specified post
                 await self.get_specified_awemes()
-            elif config.CRAWLER_TYPE == "creator":
+            elif crawl_settings.crawler_type == "creator":
                 # Get the information and comments of the specified creator
                 await self.get_creators_and_videos()
 
             utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
 
+    async def refresh_session(self) -> None:
+        """
+        请求被风控时由 SessionGuard 调用(同一时间只有一次)：重新打开页面更新 cookies，登录态失效时重新登录
+        """
+        await self.context_page.goto(self.index_url)
+        await self.dy_client.update_cookies(browser_context=self.browser_context)
+        if await self.dy_client.pong(browser_context=self.browser_context):
+            return
+        login_obj = DouYinLogin(
+            login_type=crawl_settings.login_type,
+            login_phone="",
+            browser_context=self.browser_context,
+            context_page=self.context_page,
+            cookie_str=crawl_settings.cookies,
+        )
+        await login_obj.begin()
+        await self.dy_client.update_cookies(browser_context=self.browser_context)
+
     async def search(self) -> None:
         utils.logger.info("[DouYinCrawler.search] Begin search douyin keywords")
         dy_limit_count = 10  # douyin limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < dy_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = dy_limit_count
-        start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
-            aweme_list: List[str] = []
-            page = 0
-            dy_search_id = ""
-            while (page - start_page + 1) * dy_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
-                    page += 1
-                    continue
-                try:
-                    utils.logger.info(f"[DouYinCrawler.search] search douyin keyword: {keyword}, page: {page}")
-                    posts_res = await self.dy_client.search_info_by_keyword(keyword=keyword,
-                                                                            offset=page * dy_limit_count - dy_limit_count,
-                                                                            publish_time=PublishTimeType(config.PUBLISH_TIME_TYPE),
-                                                                            search_id=dy_search_id
-                                                                            )
-                    if posts_res.get("data") is None or posts_res.get("data") == []:
-                        utils.logger.info(f"[DouYinCrawler.search] search douyin keyword: {keyword}, page: {page} is empty,{posts_res.get('data')}`")
-                        break
-                except DataFetchError:
-                    utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed")
-                    break
+        if crawl_settings.crawler_max_notes_count < dy_limit_count:
+            crawl_settings.crawler_max_notes_count = dy_limit_count
+        # 不同关键词的搜索互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.keywords.split(","), self.search_keyword,
+                          concurrency=crawl_settings.max_source_concurrency_num)
 
+    async def search_keyword(self, keyword: str) -> None:
+        """Search videos of one keyword and retrieve their comments"""
+        dy_limit_count = 10  # douyin limit page fixed value
+        start_page = crawl_settings.start_page  # start page number
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[DouYinCrawler.search_keyword] Current keyword: {keyword}")
+        aweme_list: List[str] = []
+        page = 0
+        dy_search_id = ""
+        while (page - start_page + 1) * dy_limit_count <= crawl_settings.crawler_max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[DouYinCrawler.search_keyword] Skip {page}")
                 page += 1
-                if "data" not in posts_res:
-                    utils.logger.error(
-                        f"[DouYinCrawler.search] search douyin keyword: {keyword} failed，账号也许被风控了。")
+                continue
+            try:
+                utils.logger.info(f"[DouYinCrawler.search_keyword] search douyin keyword: {keyword}, page: {page}")
+                posts_res = await self.dy_client.search_info_by_keyword(keyword=keyword,
+                                                                        offset=page * dy_limit_count - dy_limit_count,
+                                                                        publish_time=PublishTimeType(crawl_settings.publish_time_type),
+                                                                        search_id=dy_search_id
+                                                                        )
+                if posts_res.get("data") is None or posts_res.get("data") == []:
+                    utils.logger.info(f"[DouYinCrawler.search_keyword] search douyin keyword: {keyword}, page: {page} is empty,{posts_res.get('data')}`")
                     break
-                dy_search_id = posts_res.get("extra", {}).get("logid", "")
-                for post_item in posts_res.get("data"):
-                    try:
-                        aweme_info: Dict = post_item.get("aweme_info") or \
-                                           post_item.get("aweme_mix_info", {}).get("mix_items")[0]
-                    except TypeError:
-                        continue
-                    aweme_list.append(aweme_info.get("aweme_id", ""))
-                    await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
-            utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
-            await self.batch_get_note_comments(aweme_list)
+            except DataFetchError:
+                utils.logger.error(f"[DouYinCrawler.search_keyword] search douyin keyword: {keyword} failed")
+                break
+
+            page += 1
+            if "data" not in posts_res:
+                utils.logger.error(
+                    f"[DouYinCrawler.search_keyword] search douyin keyword: {keyword} failed，账号也许被风控了。")
+                break
+            dy_search_id = posts_res.get("extra", {}).get("logid", "")
+            for post_item in posts_res.get("data"):
+                try:
+                    aweme_info: Dict = post_item.get("aweme_info") or \
+                                       post_item.get("aweme_mix_info", {}).get("mix_items")[0]
+                except TypeError:
+                    continue
+                aweme_list.append(aweme_info.get("aweme_id", ""))
+                await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
+        utils.logger.info(f"[DouYinCrawler.search_keyword] keyword:{keyword}, aweme_list:{aweme_list}")
+        await self.batch_get_note_comments(aweme_list)
 
     async def get_specified_awemes(self):
         """Get the information and comments of the specified post"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list = [
-            self.get_aweme_detail(aweme_id=aweme_id, semaphore=semaphore) for aweme_id in config.DY_SPECIFIED_ID_LIST
-        ]
-        aweme_details = await asyncio.gather(*task_list)
+        aweme_details = await map_bounded(self.get_aweme_detail, crawl_settings.dy_specified_id_list,
+                                          concurrency=crawl_settings.max_concurrency_num, name="dy_aweme_detail")
         for aweme_detail in aweme_details:
             if aweme_detail is not None:
                 await douyin_store.update_douyin_aweme(aweme_detail)
-        await self.batch_get_note_comments(config.DY_SPECIFIED_ID_LIST)
+        await self.batch_get_note_comments(crawl_settings.dy_specified_id_list)
 
-    async def get_aweme_detail(self, aweme_id: str, semaphore: asyncio.Semaphore) -> Any:
+    async def get_aweme_detail(self, aweme_id: str) -> Any:
         """Get note detail"""
-        async with semaphore:
-            try:
-                return await self.dy_client.get_video_by_id(aweme_id)
-            except DataFetchError as ex:
-                utils.logger.error(f"[DouYinCrawler.get_aweme_detail] Get aweme detail error: {ex}")
-                return None
-            except KeyError as ex:
-                utils.logger.error(
-                    f"[DouYinCrawler.get_aweme_detail] have not fund note detail aweme_id:{aweme_id}, err: {ex}")
-                return None
+        try:
+            return await self.dy_client.get_video_by_id(aweme_id)
+        except DataFetchError as ex:
+            utils.logger.error(f"[DouYinCrawler.get_aweme_detail] Get aweme detail error: {ex}")
+            return None
+        except KeyError as ex:
+            utils.logger.error(
+                f"[DouYinCrawler.get_aweme_detail] have not fund note detail aweme_id:{aweme_id}, err: {ex}")
+            return None
 
     async def batch_get_note_comments(self, aweme_list: List[str]) -> None:
         """
         Batch get note comments
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not crawl_settings.enable_get_comments:
             utils.logger.info(f"[DouYinCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
 
-        task_list: List[Task] = []
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        for aweme_id in aweme_list:
-            task = asyncio.create_task(
-                self.get_comments(aweme_id, semaphore), name=aweme_id)
-            task_list.append(task)
-        if len(task_list) > 0:
-            await asyncio.wait(task_list)
+        await map_bounded(self.get_comments, aweme_list,
+                          concurrency=crawl_settings.max_concurrency_num, name="dy_aweme_comments")
 
-    async def get_comments(self, aweme_id: str, semaphore: asyncio.Semaphore) -> None:
-        async with semaphore:
-            try:
-                # 将关键词列表传递给 get_aweme_all_comments 方法
-                await self.dy_client.get_aweme_all_comments(
-                    aweme_id=aweme_id,
-                    crawl_interval=random.random(),
-                    is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
-                    callback=douyin_store.batch_update_dy_aweme_comments,
-                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
-                )
-                utils.logger.info(
-                    f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} comments have all been obtained and filtered ...")
-            except DataFetchError as e:
-                utils.logger.error(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} get comments failed, error: {e}")
+    async def get_comments(self, aweme_id: str) -> None:
+        try:
+            # 将关键词列表传递给 get_aweme_all_comments 方法
+            await self.dy_client.get_aweme_all_comments(
+                aweme_id=aweme_id,
+                crawl_interval=random.random(),
+                is_fetch_sub_comments=crawl_settings.enable_get_sub_comments,
+                callback=douyin_store.batch_update_dy_aweme_comments,
+                max_count=crawl_settings.crawler_max_comments_count_singlenotes
+            )
+            utils.logger.info(
+                f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} comments have all been obtained and filtered ...")
+        except DataFetchError as e:
+            utils.logger.error(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} get comments failed, error: {e}")
 
     async def get_creators_and_videos(self) -> None:
         """
         Get the information and videos of the specified creator
         """
         utils.logger.info("[DouYinCrawler.get_creators_and_videos] Begin get douyin creators")
-        for user_id in config.DY_CREATOR_ID_LIST:
-            creator_info: Dict = await self.dy_client.get_user_info(user_id)
-            if creator_info:
-                await douyin_store.save_creator(user_id, creator=creator_info)
+        # 不同创作者的爬取互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.dy_creator_id_list, self.get_creator_and_videos,
+                          concurrency=crawl_settings.max_source_concurrency_num)
 
-            # Get all video information of the creator
-            all_video_list = await self.dy_client.get_all_user_aweme_posts(
-                sec_user_id=user_id,
-                callback=self.fetch_creator_video_detail
-            )
+    async def get_creator_and_videos(self, user_id: str) -> None:
+        """
+        Get the information and videos of one creator
+        """
+        creator_info: Dict = await self.dy_client.get_user_info(user_id)
+        if creator_info:
+            await douyin_store.save_creator(user_id, creator=creator_info)
 
-            video_ids = [video_item.get("aweme_id") for video_item in all_video_list]
-            await self.batch_get_note_comments(video_ids)
+        # Get all video information of the creator
+        all_video_list = await self.dy_client.get_all_user_aweme_posts(
+            sec_user_id=user_id,
+            callback=self.fetch_creator_video_detail
+        )
+
+        video_ids = [video_item.get("aweme_id") for video_item in all_video_list]
+        await self.batch_get_note_comments(video_ids)
 
     async def fetch_creator_video_detail(self, video_list: List[Dict]):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list = [
-            self.get_aweme_detail(post_item.get("aweme_id"), semaphore) for post_item in video_list
-        ]
-
-        note_details = await asyncio.gather(*task_list)
+        note_details = await map_bounded(self.get_aweme_detail,
+                                         [post_item.get("aweme_id") for post_item in video_list],
+                                         concurrency=crawl_settings.max_concurrency_num, name="dy_aweme_detail")
         for aweme_item in note_details:
             if aweme_item is not None:
                 await douyin_store.update_douyin_aweme(aweme_item)
@@ -262,9 +286,9 @@ class DouYinCrawler(AbstractCrawler):
             headless: bool = True
     ) -> BrowserContext:
         """Launch browser and create browser context"""
-        if config.SAVE_LOGIN_STATE:
+        if crawl_settings.save_login_state:
             user_data_dir = os.path.join(os.getcwd(), "browser_data",
-                                         config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+                                         crawl_settings.user_data_dir % crawl_settings.platform)  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -20,7 +20,18 @@ import random
 import execjs
 from playwright.async_api import Page
 
-douyin_sign_obj = execjs.compile(open('libs/douyin.js', encoding='utf-8-sig').read())
+from tools.metrics import timed
+
+# libs/douyin.js 编译较慢，首次签名时再编译
+douyin_sign_obj = None
+
+
+def get_douyin_sign_obj():
+    global douyin_sign_obj
+    if douyin_sign_obj is None:
+        with open('libs/douyin.js', encoding='utf-8-sig') as f:
+            douyin_sign_obj = execjs.compile(f.read())
+    return douyin_sign_obj
 
 def get_web_id():
     """
@@ -44,6 +55,7 @@ def get_web_id():
 
 
 
+@timed("sign_seconds", platform="dy", method="get_a_bogus")
 async def get_a_bogus(url: str, params: str, post_data: dict, user_agent: str, page: Page = None):
     """
     获取 a_bogus 参数, 目前不支持post请求类型的签名
@@ -64,7 +76,7 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     sign_js_name = "sign_datail"
     if "/reply" in url:
         sign_js_name = "sign_reply"
-    return douyin_sign_obj.call(sign_js_name, params, user_agent)
+    return get_douyin_sign_obj().call(sign_js_name, params, user_agent)
 
 
 
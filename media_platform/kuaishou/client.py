@@ -11,16 +11,19 @@
 
 # -*- coding: utf-8 -*-
 import asyncio
-import json
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
 import httpx
 from playwright.async_api import BrowserContext, Page
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.concurrency import expand_sub_comments
+from tools.json_codec import dumps_compact, response_json
+from tools.metrics import instrument_request
+from tools.session_guard import session_guarded
 
 from .exception import DataFetchError
 from .graphql import KuaiShouGraphQL
@@ -44,15 +47,18 @@ class KuaiShouClient(AbstractApiClient):
         self.cookie_dict = cookie_dict
         self.graphql = KuaiShouGraphQL()
 
+    @session_guarded
+    @instrument_request("ks")
     async def request(self, method, url, **kwargs) -> Any:
         async with httpx.AsyncClient(proxies=self.proxies) as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
-        data: Dict = response.json()
+        data: Dict = response_json(response)
         if data.get("errors"):
             raise DataFetchError(data.get("errors", "unkonw error"))
         else:
             return data.get("data", {})
 
+    @session_guarded
     async def get(self, uri: str, params=None) -> Dict:
         final_uri = uri
         if isinstance(params, dict):
@@ -61,8 +67,9 @@ class KuaiShouClient(AbstractApiClient):
             method="GET", url=f"{self._host}{final_uri}", headers=self.headers
         )
 
+    @session_guarded
     async def post(self, uri: str, data: dict) -> Dict:
-        json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        json_str = dumps_compact(data)
         return await self.request(
             method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers
         )
@@ -230,38 +237,39 @@ class KuaiShouClient(AbstractApiClient):
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
+        if not crawl_settings.enable_get_sub_comments:
             utils.logger.info(
                 f"[KuaiShouClient.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
             )
             return []
 
-        result = []
-        for comment in comments:
-            sub_comments = comment.get("subComments")
-            if sub_comments and callback:
-                await callback(photo_id, sub_comments)
-
-            sub_comment_pcursor = comment.get("subCommentsPcursor")
-            if sub_comment_pcursor == "no_more":
-                continue
-
+        async def walk(comment: Dict) -> AsyncIterator[List[Dict]]:
+            # 一级评论里自带的前几条二级评论，还有更多时从头按游标翻页
+            if comment.get("subComments"):
+                yield comment["subComments"]
+            if comment.get("subCommentsPcursor") == "no_more":
+                return
             root_comment_id = comment.get("commentId")
             sub_comment_pcursor = ""
-
             while sub_comment_pcursor != "no_more":
                 comments_res = await self.get_video_sub_comments(
                     photo_id, root_comment_id, sub_comment_pcursor
                 )
                 vision_sub_comment_list = comments_res.get("visionSubCommentList", {})
                 sub_comment_pcursor = vision_sub_comment_list.get("pcursor", "no_more")
+                yield vision_sub_comment_list.get("subComments", [])
 
-                comments = vision_sub_comment_list.get("subComments", {})
-                if callback:
-                    await callback(photo_id, comments)
-                await asyncio.sleep(crawl_interval)
-                result.extend(comments)
-        return result
+        async def on_sub_comments(comment: Dict, sub_comments: List[Dict]) -> None:
+            if callback:
+                await callback(photo_id, sub_comments)
+
+        # 不同一级评论的二级评论并发展开，回调顺序和逐条展开时一致
+        return await expand_sub_comments(
+            comments, walk,
+            concurrency=crawl_settings.max_sub_comment_concurrency_num,
+            crawl_interval=crawl_interval,
+            callback=on_sub_comments,
+        )
 
     async def get_creator_info(self, user_id: str) -> Dict:
         """
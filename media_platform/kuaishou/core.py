@@ -12,18 +12,20 @@
 import asyncio
 import os
 import random
-import time
-from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
-from playwright.async_api import BrowserContext, BrowserType, Page, async_playwright
+from playwright.async_api import BrowserContext, BrowserType, Page
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
-from var import comment_tasks_var, crawler_type_var, source_keyword_var
+from tools.account_pool import AccountPool
+from tools.browser_pool import open_browser
+from tools.concurrency import map_bounded, run_sources
+from tools.session_guard import SessionGuard
+from var import crawler_type_var, source_keyword_var
 
 from .client import KuaiShouClient
 from .exception import DataFetchError
@@ -41,49 +43,58 @@ class KuaishouCrawler(AbstractCrawler):
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
-        if config.ENABLE_IP_PROXY:
+        if crawl_settings.enable_ip_proxy:
             ip_proxy_pool = await create_ip_pool(
-                config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
+                crawl_settings.ip_proxy_pool_count, enable_validate_ip=True
             )
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
                 ip_proxy_info
             )
 
-        async with async_playwright() as playwright:
-            # Launch a browser context.
-            chromium = playwright.chromium
-            self.browser_context = await self.launch_browser(
-                chromium, None, self.user_agent, headless=config.HEADLESS
-            )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(f"{self.index_url}?isHome=1")
+        async with open_browser(
+            platform=crawl_settings.platform,
+            launcher=self.launch_browser,
+            user_agent=self.user_agent,
+            headless=crawl_settings.headless,
+            index_url=f"{self.index_url}?isHome=1",
+            use_pool=crawl_settings.use_browser_pool,
+            persistent=crawl_settings.save_login_state,
+        ) as lease:
+            self.browser_context = lease.browser_context
+            self.context_page = lease.page
 
             # Create a client to interact with the kuaishou website.
             self.ks_client = await self.create_ks_client(httpx_proxy_format)
             if not await self.ks_client.pong():
                 login_obj = KuaishouLogin(
-                    login_type=config.LOGIN_TYPE,
+                    login_type=crawl_settings.login_type,
                     login_phone=httpx_proxy_format,
                     browser_context=self.browser_context,
                     context_page=self.context_page,
-                    cookie_str=config.COOKIES,
+                    cookie_str=crawl_settings.cookies,
                 )
                 await login_obj.begin()
                 await self.ks_client.update_cookies(
                     browser_context=self.browser_context
                 )
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
+            # 之后的请求被风控时由 refresh_session 统一刷新登录态，并发的请求等待刷新完成后重试
+            self.ks_client.session_guard = SessionGuard("ks", self.refresh_session, is_session_error=self.is_session_blocked)
+            if crawl_settings.enable_account_pool:
+                self.ks_client.account_pool = await AccountPool.from_login_sessions(
+                    crawl_settings.platform, self.ks_client,
+                    max_requests_per_sec=crawl_settings.account_max_requests_per_sec,
+                    quarantine_sec=crawl_settings.account_quarantine_sec,
+                )
+            crawler_type_var.set(crawl_settings.crawler_type)
+            if crawl_settings.crawler_type == "search":
                 # Search for videos and retrieve their comment information.
                 await self.search()
-            elif config.CRAWLER_TYPE == "detail":
+            elif crawl_settings.crawler_type == "detail":
                 # Get the information and comments of the specified post
                 await self.get_specified_videos()
-            elif config.CRAWLER_TYPE == "creator":
+            elif crawl_settings.crawler_type == "creator":
                 # Get creator's information and their videos and comments
                 await self.get_creators_and_videos()
             else:
@@ -91,90 +102,118 @@ class KuaishouCrawler(AbstractCrawler):
 
             utils.logger.info("[KuaishouCrawler.start] Kuaishou Crawler finished ...")
 
+    async def refresh_session(self) -> None:
+        """
+        请求被风控时由 SessionGuard 调用(同一时间只有一次)：重新打开页面更新 cookies，登录态失效时重新登录
+        """
+        # 快手的风控一般是暂时的，先等待一段时间再刷新(只阻塞等待刷新的请求，不阻塞事件循环)
+        await asyncio.sleep(20)
+        await self.context_page.goto(f"{self.index_url}?isHome=1")
+        await self.ks_client.update_cookies(browser_context=self.browser_context)
+        if await self.ks_client.pong():
+            return
+        login_obj = KuaishouLogin(
+            login_type=crawl_settings.login_type,
+            login_phone="",
+            browser_context=self.browser_context,
+            context_page=self.context_page,
+            cookie_str=crawl_settings.cookies,
+        )
+        await login_obj.begin()
+        await self.ks_client.update_cookies(browser_context=self.browser_context)
+
+    @staticmethod
+    def is_session_blocked(e: BaseException) -> bool:
+        """快手接口返回的业务错误抛出 DataFetchError，其余异常(返回非JSON、请求失败等)视为被风控"""
+        return not isinstance(e, DataFetchError)
+
     async def search(self):
         utils.logger.info("[KuaishouCrawler.search] Begin search kuaishou keywords")
         ks_limit_count = 20  # kuaishou limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < ks_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
-        start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            search_session_id = ""
-            source_keyword_var.set(keyword)
+        if crawl_settings.crawler_max_notes_count < ks_limit_count:
+            crawl_settings.crawler_max_notes_count = ks_limit_count
+        # 不同关键词的搜索互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.keywords.split(","), self.search_keyword,
+                          concurrency=crawl_settings.max_source_concurrency_num)
+
+    async def search_keyword(self, keyword: str):
+        """Search videos of one keyword and retrieve their comments"""
+        ks_limit_count = 20  # kuaishou limit page fixed value
+        start_page = crawl_settings.start_page
+        search_session_id = ""
+        source_keyword_var.set(keyword)
+        utils.logger.info(
+            f"[KuaishouCrawler.search_keyword] Current search keyword: {keyword}"
+        )
+        page = 1
+        while (
+            page - start_page + 1
+        ) * ks_limit_count <= crawl_settings.crawler_max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[KuaishouCrawler.search_keyword] Skip page: {page}")
+                page += 1
+                continue
             utils.logger.info(
-                f"[KuaishouCrawler.search] Current search keyword: {keyword}"
+                f"[KuaishouCrawler.search_keyword] search kuaishou keyword: {keyword}, page: {page}"
+            )
+            video_id_list: List[str] = []
+            videos_res = await self.ks_client.search_info_by_keyword(
+                keyword=keyword,
+                pcursor=str(page),
+                search_session_id=search_session_id,
             )
-            page = 1
-            while (
-                page - start_page + 1
-            ) * ks_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[KuaishouCrawler.search] Skip page: {page}")
-                    page += 1
-                    continue
-                utils.logger.info(
-                    f"[KuaishouCrawler.search] search kuaishou keyword: {keyword}, page: {page}"
+            if not videos_res:
+                utils.logger.error(
+                    f"[KuaishouCrawler.search_keyword] search info by keyword:{keyword} not found data"
                 )
-                video_id_list: List[str] = []
-                videos_res = await self.ks_client.search_info_by_keyword(
-                    keyword=keyword,
-                    pcursor=str(page),
-                    search_session_id=search_session_id,
+                continue
+
+            vision_search_photo: Dict = videos_res.get("visionSearchPhoto")
+            if vision_search_photo.get("result") != 1:
+                utils.logger.error(
+                    f"[KuaishouCrawler.search_keyword] search info by keyword:{keyword} not found data "
                 )
-                if not videos_res:
-                    utils.logger.error(
-                        f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data"
-                    )
-                    continue
-
-                vision_search_photo: Dict = videos_res.get("visionSearchPhoto")
-                if vision_search_photo.get("result") != 1:
-                    utils.logger.error(
-                        f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data "
-                    )
-                    continue
-                search_session_id = vision_search_photo.get("searchSessionId", "")
-                for video_detail in vision_search_photo.get("feeds"):
-                    video_id_list.append(video_detail.get("photo", {}).get("id"))
-                    await kuaishou_store.update_kuaishou_video(video_item=video_detail)
-
-                # batch fetch video comments
-                page += 1
-                await self.batch_get_video_comments(video_id_list)
+                continue
+            search_session_id = vision_search_photo.get("searchSessionId", "")
+            for video_detail in vision_search_photo.get("feeds"):
+                video_id_list.append(video_detail.get("photo", {}).get("id"))
+                await kuaishou_store.update_kuaishou_video(video_item=video_detail)
+
+            # batch fetch video comments
+            page += 1
+            await self.batch_get_video_comments(video_id_list)
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list = [
-            self.get_video_info_task(video_id=video_id, semaphore=semaphore)
-            for video_id in config.KS_SPECIFIED_ID_LIST
-        ]
-        video_details = await asyncio.gather(*task_list)
+        video_details = await map_bounded(
+            self.get_video_info_task,
+            crawl_settings.ks_specified_id_list,
+            concurrency=crawl_settings.max_concurrency_num,
+            name="ks_video_detail",
+        )
         for video_detail in video_details:
             if video_detail is not None:
                 await kuaishou_store.update_kuaishou_video(video_detail)
-        await self.batch_get_video_comments(config.KS_SPECIFIED_ID_LIST)
+        await self.batch_get_video_comments(crawl_settings.ks_specified_id_list)
 
-    async def get_video_info_task(
-        self, video_id: str, semaphore: asyncio.Semaphore
-    ) -> Optional[Dict]:
+    async def get_video_info_task(self, video_id: str) -> Optional[Dict]:
         """Get video detail task"""
-        async with semaphore:
-            try:
-                result = await self.ks_client.get_video_info(video_id)
-                utils.logger.info(
-                    f"[KuaishouCrawler.get_video_info_task] Get video_id:{video_id} info result: {result} ..."
-                )
-                return result.get("visionVideoDetail")
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[KuaishouCrawler.get_video_info_task] Get video detail error: {ex}"
-                )
-                return None
-            except KeyError as ex:
-                utils.logger.error(
-                    f"[KuaishouCrawler.get_video_info_task] have not fund video detail video_id:{video_id}, err: {ex}"
-                )
-                return None
+        try:
+            result = await self.ks_client.get_video_info(video_id)
+            utils.logger.info(
+                f"[KuaishouCrawler.get_video_info_task] Get video_id:{video_id} info result: {result} ..."
+            )
+            return result.get("visionVideoDetail")
+        except DataFetchError as ex:
+            utils.logger.error(
+                f"[KuaishouCrawler.get_video_info_task] Get video detail error: {ex}"
+            )
+            return None
+        except KeyError as ex:
+            utils.logger.error(
+                f"[KuaishouCrawler.get_video_info_task] have not fund video detail video_id:{video_id}, err: {ex}"
+            )
+            return None
 
     async def batch_get_video_comments(self, video_id_list: List[str]):
         """
@@ -182,7 +221,7 @@ class KuaishouCrawler(AbstractCrawler):
         :param video_id_list:
         :return:
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not crawl_settings.enable_get_comments:
             utils.logger.info(
                 f"[KuaishouCrawler.batch_get_video_comments] Crawling comment mode is not enabled"
             )
@@ -191,53 +230,33 @@ class KuaishouCrawler(AbstractCrawler):
         utils.logger.info(
             f"[KuaishouCrawler.batch_get_video_comments] video ids:{video_id_list}"
         )
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for video_id in video_id_list:
-            task = asyncio.create_task(
-                self.get_comments(video_id, semaphore), name=video_id
-            )
-            task_list.append(task)
-
-        comment_tasks_var.set(task_list)
-        await asyncio.gather(*task_list)
+        await map_bounded(
+            self.get_comments,
+            video_id_list,
+            concurrency=crawl_settings.max_concurrency_num,
+            name="ks_video_comments",
+        )
 
-    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, video_id: str):
         """
         get comment for video id
         :param video_id:
-        :param semaphore:
         :return:
         """
-        async with semaphore:
-            try:
-                utils.logger.info(
-                    f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ..."
-                )
-                await self.ks_client.get_video_all_comments(
-                    photo_id=video_id,
-                    crawl_interval=random.random(),
-                    callback=kuaishou_store.batch_update_ks_video_comments,
-                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-                )
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {ex}"
-                )
-            except Exception as e:
-                utils.logger.error(
-                    f"[KuaishouCrawler.get_comments] may be been blocked, err:{e}"
-                )
-                # use time.sleeep block main coroutine instead of asyncio.sleep and cacel running comment task
-                # maybe kuaishou block our request, we will take a nap and update the cookie again
-                current_running_tasks = comment_tasks_var.get()
-                for task in current_running_tasks:
-                    task.cancel()
-                time.sleep(20)
-                await self.context_page.goto(f"{self.index_url}?isHome=1")
-                await self.ks_client.update_cookies(
-                    browser_context=self.browser_context
-                )
+        try:
+            utils.logger.info(
+                f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ..."
+            )
+            await self.ks_client.get_video_all_comments(
+                photo_id=video_id,
+                crawl_interval=random.random(),
+                callback=kuaishou_store.batch_update_ks_video_comments,
+                max_count=crawl_settings.crawler_max_comments_count_singlenotes,
+            )
+        except DataFetchError as ex:
+            utils.logger.error(
+                f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {ex}"
+            )
 
     @staticmethod
     def format_proxy_info(
@@ -287,9 +306,9 @@ class KuaishouCrawler(AbstractCrawler):
         utils.logger.info(
             "[KuaishouCrawler.launch_browser] Begin create browser context ..."
         )
-        if config.SAVE_LOGIN_STATE:
+        if crawl_settings.save_login_state:
             user_data_dir = os.path.join(
-                os.getcwd(), "browser_data", config.USER_DATA_DIR % config.PLATFORM
+                os.getcwd(), "browser_data", crawl_settings.user_data_dir % crawl_settings.platform
             )  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
@@ -312,35 +331,39 @@ class KuaishouCrawler(AbstractCrawler):
         utils.logger.info(
             "[KuaiShouCrawler.get_creators_and_videos] Begin get kuaishou creators"
         )
-        for user_id in config.KS_CREATOR_ID_LIST:
-            # get creator detail info from web html content
-            createor_info: Dict = await self.ks_client.get_creator_info(user_id=user_id)
-            if createor_info:
-                await kuaishou_store.save_creator(user_id, creator=createor_info)
-
-            # Get all video information of the creator
-            all_video_list = await self.ks_client.get_all_videos_by_creator(
-                user_id=user_id,
-                crawl_interval=random.random(),
-                callback=self.fetch_creator_video_detail,
-            )
+        # 不同创作者的爬取互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.ks_creator_id_list, self.get_creator_and_videos,
+                          concurrency=crawl_settings.max_source_concurrency_num)
 
-            video_ids = [
-                video_item.get("photo", {}).get("id") for video_item in all_video_list
-            ]
-            await self.batch_get_video_comments(video_ids)
+    async def get_creator_and_videos(self, user_id: str) -> None:
+        """Get one creator's videos and retrieve their comment information."""
+        # get creator detail info from web html content
+        createor_info: Dict = await self.ks_client.get_creator_info(user_id=user_id)
+        if createor_info:
+            await kuaishou_store.save_creator(user_id, creator=createor_info)
+
+        # Get all video information of the creator
+        all_video_list = await self.ks_client.get_all_videos_by_creator(
+            user_id=user_id,
+            crawl_interval=random.random(),
+            callback=self.fetch_creator_video_detail,
+        )
+
+        video_ids = [
+            video_item.get("photo", {}).get("id") for video_item in all_video_list
+        ]
+        await self.batch_get_video_comments(video_ids)
 
     async def fetch_creator_video_detail(self, video_list: List[Dict]):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list = [
-            self.get_video_info_task(post_item.get("photo", {}).get("id"), semaphore)
-            for post_item in video_list
-        ]
-
-        video_details = await asyncio.gather(*task_list)
+        video_details = await map_bounded(
+            self.get_video_info_task,
+            [post_item.get("photo", {}).get("id") for post_item in video_list],
+            concurrency=crawl_settings.max_concurrency_num,
+            name="ks_video_detail",
+        )
         for video_detail in video_details:
             if video_detail is not None:
                 await kuaishou_store.update_kuaishou_video(video_detail)
@@ -10,7 +10,6 @@
 
 
 import asyncio
-import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
@@ -18,11 +17,14 @@ import httpx
 from playwright.async_api import BrowserContext
 from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
 from tools import utils
+from tools.concurrency import fetch_pages
+from tools.json_codec import dumps_compact, response_json
+from tools.metrics import instrument_request, record_block_event, record_retry
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
@@ -45,7 +47,8 @@ class BaiduTieBaClient(AbstractApiClient):
         self._page_extractor = TieBaExtractor()
         self.default_ip_proxy = default_ip_proxy
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1), before_sleep=record_retry)
+    @instrument_request("tieba")
     async def request(self, method, url, return_ori_content=False, proxies=None, **kwargs) -> Union[str, Any]:
         """
         封装httpx的公共请求方法，对请求响应做一些处理
@@ -73,12 +76,13 @@ class BaiduTieBaClient(AbstractApiClient):
 
         if response.text == "" or response.text == "blocked":
             utils.logger.error(f"request params incrr, response.text: {response.text}")
+            record_block_event("tieba", "account_blocked")
             raise Exception("account blocked")
 
         if return_ori_content:
             return response.text
 
-        return response.json()
+        return response_json(response)
 
     async def get(self, uri: str, params=None, return_ori_content=False, **kwargs) -> Any:
         """
@@ -124,7 +128,7 @@ class BaiduTieBaClient(AbstractApiClient):
         Returns:
 
         """
-        json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        json_str = dumps_compact(data)
         return await self.request(method="POST", url=f"{self._host}{uri}",
                                   data=json_str, **kwargs)
 
@@ -218,27 +222,22 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         uri = f"/p/{note_detail.note_id}"
-        result: List[TiebaComment] = []
-        current_page = 1
-        while note_detail.total_replay_page >= current_page and len(result) < max_count:
-            params = {
-                "pn": current_page
-            }
-            page_content = await self.get(uri, params=params, return_ori_content=True)
-            comments = self._page_extractor.extract_tieba_note_parment_comments(page_content,
-                                                                                note_id=note_detail.note_id)
-            if not comments:
-                break
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
+
+        async def fetch_page(page: int) -> List[TiebaComment]:
+            page_content = await self.get(uri, params={"pn": page}, return_ori_content=True)
+            return self._page_extractor.extract_tieba_note_parment_comments(page_content,
+                                                                            note_id=note_detail.note_id)
+
+        async def on_page(page: int, comments: List[TiebaComment]) -> None:
             if callback:
                 await callback(note_detail.note_id, comments)
-            result.extend(comments)
             # 获取所有子评论
             await self.get_comments_all_sub_comments(comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
-            current_page += 1
-        return result
+
+        # 评论总页数已知，多页同时请求，按页码顺序回调
+        return await fetch_pages(fetch_page, range(1, note_detail.total_replay_page + 1),
+                                 concurrency=crawl_settings.max_page_concurrency_num, max_count=max_count,
+                                 crawl_interval=crawl_interval, on_page=on_page)
 
     async def get_comments_all_sub_comments(self, comments: List[TiebaComment], crawl_interval: float = 1.0,
                                             callback: Optional[Callable] = None) -> List[TiebaComment]:
@@ -253,7 +252,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         uri = "/p/comment"
-        if not config.ENABLE_GET_SUB_COMMENTS:
+        if not crawl_settings.enable_get_sub_comments:
             return []
 
         # # 贴吧获取所有子评论需要登录态
@@ -265,26 +264,25 @@ class BaiduTieBaClient(AbstractApiClient):
             if parment_comment.sub_comment_count == 0:
                 continue
 
-            current_page = 1
-            max_sub_page_num = parment_comment.sub_comment_count // 10 + 1
-            while max_sub_page_num >= current_page:
+            async def fetch_page(page: int) -> List[TiebaComment]:
                 params = {
                     "tid": parment_comment.note_id,  # 帖子ID
                     "pid": parment_comment.comment_id,  # 父级评论ID
                     "fid": parment_comment.tieba_id,  # 贴吧ID
-                    "pn": current_page  # 页码
+                    "pn": page  # 页码
                 }
                 page_content = await self.get(uri, params=params, return_ori_content=True)
-                sub_comments = self._page_extractor.extract_tieba_note_sub_comments(page_content,
-                                                                                    parent_comment=parment_comment)
+                return self._page_extractor.extract_tieba_note_sub_comments(page_content,
+                                                                            parent_comment=parment_comment)
 
-                if not sub_comments:
-                    break
+            async def on_page(page: int, sub_comments: List[TiebaComment]) -> None:
                 if callback:
                     await callback(parment_comment.note_id, sub_comments)
-                all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
-                current_page += 1
+
+            max_sub_page_num = parment_comment.sub_comment_count // 10 + 1
+            all_sub_comments.extend(await fetch_pages(fetch_page, range(1, max_sub_page_num + 1),
+                                                      concurrency=crawl_settings.max_page_concurrency_num,
+                                                      crawl_interval=crawl_interval, on_page=on_page))
         return all_sub_comments
 
     async def get_notes_by_tieba_name(self, tieba_name: str, page_num: int) -> List[TiebaNote]:
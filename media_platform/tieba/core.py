@@ -9,21 +9,20 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
-import asyncio
 import os
 import random
-from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
 from playwright.async_api import (BrowserContext, BrowserType, Page,
                                   async_playwright)
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractCrawler
 from model.m_baidu_tieba import TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
+from tools.concurrency import map_bounded, run_sources
 from tools.crawler_util import format_proxy_info
 from var import crawler_type_var, source_keyword_var
 
@@ -50,9 +49,9 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         ip_proxy_pool, httpx_proxy_format = None, None
-        if config.ENABLE_IP_PROXY:
+        if crawl_settings.enable_ip_proxy:
             utils.logger.info("[BaiduTieBaCrawler.start] Begin create ip proxy pool ...")
-            ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
+            ip_proxy_pool = await create_ip_pool(crawl_settings.ip_proxy_pool_count, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
             _, httpx_proxy_format = format_proxy_info(ip_proxy_info)
             utils.logger.info(f"[BaiduTieBaCrawler.start] Init default ip proxy, value: {httpx_proxy_format}")
@@ -62,15 +61,15 @@ class TieBaCrawler(AbstractCrawler):
             ip_pool=ip_proxy_pool,
             default_ip_proxy=httpx_proxy_format,
         )
-        crawler_type_var.set(config.CRAWLER_TYPE)
-        if config.CRAWLER_TYPE == "search":
+        crawler_type_var.set(crawl_settings.crawler_type)
+        if crawl_settings.crawler_type == "search":
             # Search for notes and retrieve their comment information.
             await self.search()
             await self.get_specified_tieba_notes()
-        elif config.CRAWLER_TYPE == "detail":
+        elif crawl_settings.crawler_type == "detail":
             # Get the information and comments of the specified post
             await self.get_specified_notes()
-        elif config.CRAWLER_TYPE == "creator":
+        elif crawl_settings.crawler_type == "creator":
             # Get creator's information and their notes and comments
             await self.get_creators_and_notes()
         else:
@@ -86,37 +85,50 @@ class TieBaCrawler(AbstractCrawler):
         """
         utils.logger.info("[BaiduTieBaCrawler.search] Begin search baidu tieba keywords")
         tieba_limit_count = 10  # tieba limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
-        start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * tieba_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[BaiduTieBaCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
-                try:
-                    utils.logger.info(f"[BaiduTieBaCrawler.search] search tieba keyword: {keyword}, page: {page}")
-                    notes_list: List[TiebaNote] = await self.tieba_client.get_notes_by_keyword(
-                        keyword=keyword,
-                        page=page,
-                        page_size=tieba_limit_count,
-                        sort=SearchSortType.TIME_DESC,
-                        note_type=SearchNoteType.FIXED_THREAD
-                    )
-                    if not notes_list:
-                        utils.logger.info(f"[BaiduTieBaCrawler.search] Search note list is empty")
-                        break
-                    utils.logger.info(f"[BaiduTieBaCrawler.search] Note list len: {len(notes_list)}")
-                    await self.get_specified_notes(note_id_list=[note_detail.note_id for note_detail in notes_list])
-                    page += 1
-                except Exception as ex:
-                    utils.logger.error(
-                        f"[BaiduTieBaCrawler.search] Search keywords error, current page: {page}, current keyword: {keyword}, err: {ex}")
+        if crawl_settings.crawler_max_notes_count < tieba_limit_count:
+            crawl_settings.crawler_max_notes_count = tieba_limit_count
+        # 不同关键词的搜索互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.keywords.split(","), self.search_keyword,
+                          concurrency=crawl_settings.max_source_concurrency_num)
+
+    async def search_keyword(self, keyword: str) -> None:
+        """
+        Search for notes of one keyword and retrieve their comment information.
+        Args:
+            keyword: search keyword
+
+        Returns:
+
+        """
+        tieba_limit_count = 10  # tieba limit page fixed value
+        start_page = crawl_settings.start_page
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[BaiduTieBaCrawler.search_keyword] Current search keyword: {keyword}")
+        page = 1
+        while (page - start_page + 1) * tieba_limit_count <= crawl_settings.crawler_max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[BaiduTieBaCrawler.search_keyword] Skip page {page}")
+                page += 1
+                continue
+            try:
+                utils.logger.info(f"[BaiduTieBaCrawler.search_keyword] search tieba keyword: {keyword}, page: {page}")
+                notes_list: List[TiebaNote] = await self.tieba_client.get_notes_by_keyword(
+                    keyword=keyword,
+                    page=page,
+                    page_size=tieba_limit_count,
+                    sort=SearchSortType.TIME_DESC,
+                    note_type=SearchNoteType.FIXED_THREAD
+                )
+                if not notes_list:
+                    utils.logger.info(f"[BaiduTieBaCrawler.search_keyword] Search note list is empty")
                     break
+                utils.logger.info(f"[BaiduTieBaCrawler.search_keyword] Note list len: {len(notes_list)}")
+                await self.get_specified_notes(note_id_list=[note_detail.note_id for note_detail in notes_list])
+                page += 1
+            except Exception as ex:
+                utils.logger.error(
+                    f"[BaiduTieBaCrawler.search_keyword] Search keywords error, current page: {page}, current keyword: {keyword}, err: {ex}")
+                break
 
     async def get_specified_tieba_notes(self):
         """
@@ -125,41 +137,53 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         tieba_limit_count = 50
-        if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
-        for tieba_name in config.TIEBA_NAME_LIST:
-            utils.logger.info(
-                f"[BaiduTieBaCrawler.get_specified_tieba_notes] Begin get tieba name: {tieba_name}")
-            page_number = 0
-            while page_number <= config.CRAWLER_MAX_NOTES_COUNT:
-                note_list: List[TiebaNote] = await self.tieba_client.get_notes_by_tieba_name(
-                    tieba_name=tieba_name,
-                    page_num=page_number
-                )
-                if not note_list:
-                    utils.logger.info(
-                        f"[BaiduTieBaCrawler.get_specified_tieba_notes] Get note list is empty")
-                    break
+        if crawl_settings.crawler_max_notes_count < tieba_limit_count:
+            crawl_settings.crawler_max_notes_count = tieba_limit_count
+        # 不同贴吧的爬取互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.tieba_name_list, self.get_tieba_name_notes,
+                          concurrency=crawl_settings.max_source_concurrency_num)
+
+    async def get_tieba_name_notes(self, tieba_name: str):
+        """
+        Get the information and comments of the posts in one tieba
+        Args:
+            tieba_name: tieba name
 
+        Returns:
+
+        """
+        tieba_limit_count = 50
+        utils.logger.info(
+            f"[BaiduTieBaCrawler.get_tieba_name_notes] Begin get tieba name: {tieba_name}")
+        page_number = 0
+        while page_number <= crawl_settings.crawler_max_notes_count:
+            note_list: List[TiebaNote] = await self.tieba_client.get_notes_by_tieba_name(
+                tieba_name=tieba_name,
+                page_num=page_number
+            )
+            if not note_list:
                 utils.logger.info(
-                    f"[BaiduTieBaCrawler.get_specified_tieba_notes] tieba name: {tieba_name} note list len: {len(note_list)}")
-                await self.get_specified_notes([note.note_id for note in note_list])
-                page_number += tieba_limit_count
+                    f"[BaiduTieBaCrawler.get_tieba_name_notes] Get note list is empty")
+                break
 
-    async def get_specified_notes(self, note_id_list: List[str] = config.TIEBA_SPECIFIED_ID_LIST):
+            utils.logger.info(
+                f"[BaiduTieBaCrawler.get_tieba_name_notes] tieba name: {tieba_name} note list len: {len(note_list)}")
+            await self.get_specified_notes([note.note_id for note in note_list])
+            page_number += tieba_limit_count
+
+    async def get_specified_notes(self, note_id_list: Optional[List[str]] = None):
         """
         Get the information and comments of the specified post
         Args:
-            note_id_list:
+            note_id_list: 默认取当前任务配置的 tieba_specified_id_list
 
         Returns:
 
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list = [
-            self.get_note_detail_async_task(note_id=note_id, semaphore=semaphore) for note_id in note_id_list
-        ]
-        note_details = await asyncio.gather(*task_list)
+        if note_id_list is None:
+            note_id_list = crawl_settings.tieba_specified_id_list
+        note_details = await map_bounded(self.get_note_detail_async_task, note_id_list,
+                                         concurrency=crawl_settings.max_concurrency_num, name="tieba_note_detail")
         note_details_model: List[TiebaNote] = []
         for note_detail in note_details:
             if note_detail is not None:
@@ -167,32 +191,30 @@ class TieBaCrawler(AbstractCrawler):
                 await tieba_store.update_tieba_note(note_detail)
         await self.batch_get_note_comments(note_details_model)
 
-    async def get_note_detail_async_task(self, note_id: str, semaphore: asyncio.Semaphore) -> Optional[TiebaNote]:
+    async def get_note_detail_async_task(self, note_id: str) -> Optional[TiebaNote]:
         """
         Get note detail
         Args:
             note_id: baidu tieba note id
-            semaphore: asyncio semaphore
 
         Returns:
 
         """
-        async with semaphore:
-            try:
-                utils.logger.info(f"[BaiduTieBaCrawler.get_note_detail] Begin get note detail, note_id: {note_id}")
-                note_detail: TiebaNote = await self.tieba_client.get_note_by_id(note_id)
-                if not note_detail:
-                    utils.logger.error(
-                        f"[BaiduTieBaCrawler.get_note_detail] Get note detail error, note_id: {note_id}")
-                    return None
-                return note_detail
-            except Exception as ex:
-                utils.logger.error(f"[BaiduTieBaCrawler.get_note_detail] Get note detail error: {ex}")
-                return None
-            except KeyError as ex:
+        try:
+            utils.logger.info(f"[BaiduTieBaCrawler.get_note_detail] Begin get note detail, note_id: {note_id}")
+            note_detail: TiebaNote = await self.tieba_client.get_note_by_id(note_id)
+            if not note_detail:
                 utils.logger.error(
-                    f"[BaiduTieBaCrawler.get_note_detail] have not fund note detail note_id:{note_id}, err: {ex}")
+                    f"[BaiduTieBaCrawler.get_note_detail] Get note detail error, note_id: {note_id}")
                 return None
+            return note_detail
+        except Exception as ex:
+            utils.logger.error(f"[BaiduTieBaCrawler.get_note_detail] Get note detail error: {ex}")
+            return None
+        except KeyError as ex:
+            utils.logger.error(
+                f"[BaiduTieBaCrawler.get_note_detail] have not fund note detail note_id:{note_id}, err: {ex}")
+            return None
 
     async def batch_get_note_comments(self, note_detail_list: List[TiebaNote]):
         """
@@ -203,34 +225,28 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not crawl_settings.enable_get_comments:
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for note_detail in note_detail_list:
-            task = asyncio.create_task(self.get_comments_async_task(note_detail, semaphore), name=note_detail.note_id)
-            task_list.append(task)
-        await asyncio.gather(*task_list)
+        await map_bounded(self.get_comments_async_task, note_detail_list,
+                          concurrency=crawl_settings.max_concurrency_num, name="tieba_note_comments")
 
-    async def get_comments_async_task(self, note_detail: TiebaNote, semaphore: asyncio.Semaphore):
+    async def get_comments_async_task(self, note_detail: TiebaNote):
         """
         Get comments async task
         Args:
             note_detail:
-            semaphore:
 
         Returns:
 
         """
-        async with semaphore:
-            utils.logger.info(f"[BaiduTieBaCrawler.get_comments] Begin get note id comments {note_detail.note_id}")
-            await self.tieba_client.get_note_all_comments(
-                note_detail=note_detail,
-                crawl_interval=random.random(),
-                callback=tieba_store.batch_update_tieba_note_comments,
-                max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
-            )
+        utils.logger.info(f"[BaiduTieBaCrawler.get_comments] Begin get note id comments {note_detail.note_id}")
+        await self.tieba_client.get_note_all_comments(
+            note_detail=note_detail,
+            crawl_interval=random.random(),
+            callback=tieba_store.batch_update_tieba_note_comments,
+            max_count=crawl_settings.crawler_max_comments_count_singlenotes
+        )
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -239,30 +255,42 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         utils.logger.info("[WeiboCrawler.get_creators_and_notes] Begin get weibo creators")
-        for creator_url in config.TIEBA_CREATOR_URL_LIST:
-            creator_page_html_content = await self.tieba_client.get_creator_info_by_url(creator_url=creator_url)
-            creator_info: TiebaCreator = self._page_extractor.extract_creator_info(creator_page_html_content)
-            if creator_info:
-                utils.logger.info(f"[WeiboCrawler.get_creators_and_notes] creator info: {creator_info}")
-                if not creator_info:
-                    raise Exception("Get creator info error")
-
-                await tieba_store.save_creator(user_info=creator_info)
-
-                # Get all note information of the creator
-                all_notes_list = await self.tieba_client.get_all_notes_by_creator_user_name(
-                    user_name=creator_info.user_name,
-                    crawl_interval=0,
-                    callback=tieba_store.batch_update_tieba_notes,
-                    max_note_count=config.CRAWLER_MAX_NOTES_COUNT,
-                    creator_page_html_content=creator_page_html_content,
-                )
+        # 不同创作者的爬取互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.tieba_creator_url_list, self.get_creator_and_notes,
+                          concurrency=crawl_settings.max_source_concurrency_num)
 
-                await self.batch_get_note_comments(all_notes_list)
+    async def get_creator_and_notes(self, creator_url: str) -> None:
+        """
+        Get one creator's information and their notes and comments
+        Args:
+            creator_url: creator home page url
 
-            else:
-                utils.logger.error(
-                    f"[WeiboCrawler.get_creators_and_notes] get creator info error, creator_url:{creator_url}")
+        Returns:
+
+        """
+        creator_page_html_content = await self.tieba_client.get_creator_info_by_url(creator_url=creator_url)
+        creator_info: TiebaCreator = self._page_extractor.extract_creator_info(creator_page_html_content)
+        if creator_info:
+            utils.logger.info(f"[BaiduTieBaCrawler.get_creator_and_notes] creator info: {creator_info}")
+            if not creator_info:
+                raise Exception("Get creator info error")
+
+            await tieba_store.save_creator(user_info=creator_info)
+
+            # Get all note information of the creator
+            all_notes_list = await self.tieba_client.get_all_notes_by_creator_user_name(
+                user_name=creator_info.user_name,
+                crawl_interval=0,
+                callback=tieba_store.batch_update_tieba_notes,
+                max_note_count=crawl_settings.crawler_max_notes_count,
+                creator_page_html_content=creator_page_html_content,
+            )
+
+            await self.batch_get_note_comments(all_notes_list)
+
+        else:
+            utils.logger.error(
+                f"[BaiduTieBaCrawler.get_creator_and_notes] get creator info error, creator_url:{creator_url}")
 
     async def launch_browser(
             self,
@@ -283,11 +311,11 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         utils.logger.info("[BaiduTieBaCrawler.launch_browser] Begin create browser context ...")
-        if config.SAVE_LOGIN_STATE:
+        if crawl_settings.save_login_state:
             # feat issue #14
             # we will save login state to avoid login every time
             user_data_dir = os.path.join(os.getcwd(), "browser_data",
-                                         config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+                                         crawl_settings.user_data_dir % crawl_settings.platform)  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
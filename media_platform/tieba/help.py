@@ -11,21 +11,107 @@
 
 # -*- coding: utf-8 -*-
 import html
-import json
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import parse_qs, unquote
 
-from parsel import Selector
+from lxml import etree
+from lxml.html import HTMLParser
 
 from constant import baidu_tieba as const
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
-from tools import utils
+from tools import json_codec, utils
 
 GENDER_MALE = "sex_male"
 GENDER_FEMALE = "sex_female"
 
 
+def _xpath(expression: str) -> etree.XPath:
+    # smart_strings=False 返回普通字符串，不持有对文档树的引用
+    return etree.XPath(expression, smart_strings=False)
+
+
+# 关键词搜索结果页
+_SEARCH_POSTS = _xpath("//div[@class='s_post']")
+_SEARCH_NOTE_ID = _xpath(".//span[@class='p_title']/a/@data-tid")
+_SEARCH_TITLE = _xpath(".//span[@class='p_title']/a/text()")
+_SEARCH_NOTE_HREF = _xpath(".//span[@class='p_title']/a/@href")
+_SEARCH_DESC = _xpath(".//div[@class='p_content']/text()")
+_SEARCH_USER_NICKNAME = _xpath(".//a[starts-with(@href, '/home/main')]/font/text()")
+_SEARCH_USER_HREF = _xpath(".//a[starts-with(@href, '/home/main')]/@href")
+_SEARCH_TIEBA_NAME = _xpath(".//a[@class='p_forum']/font/text()")
+_SEARCH_TIEBA_HREF = _xpath(".//a[@class='p_forum']/@href")
+_SEARCH_PUBLISH_TIME = _xpath(".//font[@class='p_green p_date']/text()")
+
+# 贴吧帖子列表页
+_THREAD_LIST_POSTS = _xpath("//ul[@id='thread_list']/li")
+_THREAD_TITLE = _xpath(".//a[@class='j_th_tit ']/text()")
+_THREAD_DESC = _xpath(".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()")
+_THREAD_USER_HREF = _xpath(".//a[@class='frs-author-name j_user_card ']/@href")
+
+# 每个页面都有的贴吧名称和链接
+_TIEBA_NAME = _xpath("//a[@class='card_title_fname']/text()")
+_TIEBA_HREF = _xpath("//a[@class='card_title_fname']/@href")
+
+# 帖子详情页
+_FIRST_FLOOR = _xpath("//div[@class='p_postlist'][1]")
+_ONLY_VIEW_AUTHOR_HREF = _xpath("//*[@id='lzonly_cntn']/@href")
+_THREAD_NUM_INFOS = _xpath("//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+_PAGE_TITLE = _xpath("//title/text()")
+_PAGE_DESCRIPTION = _xpath("//meta[@name='description']/@content")
+_POST_TAIL_WRAP = _xpath(".//div[@class='post-tail-wrap']")
+_AUTHOR_HREF = _xpath(".//a[@class='p_author_face ']/@href")
+_AUTHOR_NICKNAME = _xpath(".//a[@class='p_author_name j_user_card']/text()")
+_AUTHOR_AVATAR = _xpath(".//a[@class='p_author_face ']/img/@src")
+_TEXT = _xpath("./text()")
+
+# 一级评论
+_PARENT_COMMENTS = _xpath("//div[@class='l_post l_post_bright j_l_post clearfix  ']")
+
+# 二级评论
+_SUB_COMMENTS_FIRST = _xpath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
+_SUB_COMMENTS_OTHERS = _xpath("//li[@class='lzl_single_post j_lzl_s_p ']")
+_SUB_COMMENT_USER = _xpath("./a[@class='j_user_card lzl_p_p']")
+_SUB_COMMENT_CONTENT = _xpath(".//span[@class='lzl_content_main']")
+_SUB_COMMENT_TIME = _xpath(".//span[@class='lzl_time']/text()")
+_IMG_SRC = _xpath("./img/@src")
+
+# 创作者主页
+_CREATOR_SPACE_HREF = _xpath("//p[@class='space']/a/@href")
+_CREATOR_USERDATA = _xpath("//div[@class='userinfo_userdata']")
+_CREATOR_CONCERN_NUM = _xpath("//span[@class='concern_num']")
+_CREATOR_NICKNAME = _xpath(".//span[@class='userinfo_username ']/text()")
+_CREATOR_AVATAR = _xpath(".//div[@class='userinfo_left_head']//img/@src")
+_CREATOR_THREAD_HREFS = _xpath("//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href")
+
+# 评论尾部信息中的IP属地和发布时间
+_TAIL_SPANS = _xpath(".//span")
+_PUB_TIME_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}')
+_IP_PREFIX = "IP属地:"
+
+
+def _parse_html(page_content: str) -> etree._Element:
+    """
+    每个页面只解析一次，解析方式与 parsel.Selector(text=page_content) 相同
+    """
+    body = page_content.strip().replace("\x00", "").encode("utf8") or b"<html/>"
+    parser = HTMLParser(recover=True, encoding="utf8", huge_tree=True)
+    root = etree.fromstring(body, parser=parser)
+    if root is None:
+        root = etree.fromstring(b"<html/>", parser=parser)
+    return root
+
+
+def _first(values: List, default: str = '') -> str:
+    return values[0] if values else default
+
+
+def _outer_html(element: Optional[etree._Element]) -> str:
+    if element is None:
+        return ""
+    return etree.tostring(element, method="html", encoding="unicode", with_tail=False)
+
+
 class TieBaExtractor:
     def __init__(self):
         pass
@@ -40,23 +126,17 @@ class TieBaExtractor:
         Returns:
             包含帖子信息的字典列表
         """
-        xpath_selector = "//div[@class='s_post']"
-        post_list = Selector(text=page_content).xpath(xpath_selector)
         result: List[TiebaNote] = []
-        for post in post_list:
-            tieba_note = TiebaNote(note_id=post.xpath(".//span[@class='p_title']/a/@data-tid").get(default='').strip(),
-                                   title=post.xpath(".//span[@class='p_title']/a/text()").get(default='').strip(),
-                                   desc=post.xpath(".//div[@class='p_content']/text()").get(default='').strip(),
-                                   note_url=const.TIEBA_URL + post.xpath(".//span[@class='p_title']/a/@href").get(
-                                       default=''),
-                                   user_nickname=post.xpath(".//a[starts-with(@href, '/home/main')]/font/text()").get(
-                                       default='').strip(), user_link=const.TIEBA_URL + post.xpath(
-                    ".//a[starts-with(@href, '/home/main')]/@href").get(default=''),
-                                   tieba_name=post.xpath(".//a[@class='p_forum']/font/text()").get(default='').strip(),
-                                   tieba_link=const.TIEBA_URL + post.xpath(".//a[@class='p_forum']/@href").get(
-                                       default=''),
-                                   publish_time=post.xpath(".//font[@class='p_green p_date']/text()").get(
-                                       default='').strip(), )
+        for post in _SEARCH_POSTS(_parse_html(page_content)):
+            tieba_note = TiebaNote(note_id=_first(_SEARCH_NOTE_ID(post)).strip(),
+                                   title=_first(_SEARCH_TITLE(post)).strip(),
+                                   desc=_first(_SEARCH_DESC(post)).strip(),
+                                   note_url=const.TIEBA_URL + _first(_SEARCH_NOTE_HREF(post)),
+                                   user_nickname=_first(_SEARCH_USER_NICKNAME(post)).strip(),
+                                   user_link=const.TIEBA_URL + _first(_SEARCH_USER_HREF(post)),
+                                   tieba_name=_first(_SEARCH_TIEBA_NAME(post)).strip(),
+                                   tieba_link=const.TIEBA_URL + _first(_SEARCH_TIEBA_HREF(post)),
+                                   publish_time=_first(_SEARCH_PUBLISH_TIME(post)).strip(), )
             result.append(tieba_note)
         return result
 
@@ -70,27 +150,24 @@ class TieBaExtractor:
 
         """
         page_content = page_content.replace('<!--', "")
-        content_selector = Selector(text=page_content)
-        xpath_selector = "//ul[@id='thread_list']/li"
-        post_list = content_selector.xpath(xpath_selector)
+        root = _parse_html(page_content)
+        # 贴吧名称和链接整页只有一份，不需要每个帖子都查一次
+        tieba_name = _first(_TIEBA_NAME(root)).strip()
+        tieba_link = const.TIEBA_URL + _first(_TIEBA_HREF(root))
         result: List[TiebaNote] = []
-        for post_selector in post_list:
-            post_field_value: Dict = self.extract_data_field_value(post_selector)
+        for post in _THREAD_LIST_POSTS(root):
+            post_field_value: Dict = self.extract_data_field_value(post)
             if not post_field_value:
                 continue
             note_id = str(post_field_value.get("id"))
             tieba_note = TiebaNote(note_id=note_id,
-                                   title=post_selector.xpath(".//a[@class='j_th_tit ']/text()").get(default='').strip(),
-                                   desc=post_selector.xpath(
-                                       ".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()").get(
-                                       default='').strip(), note_url=const.TIEBA_URL + f"/p/{note_id}",
-                                   user_link=const.TIEBA_URL + post_selector.xpath(
-                                       ".//a[@class='frs-author-name j_user_card ']/@href").get(default='').strip(),
+                                   title=_first(_THREAD_TITLE(post)).strip(),
+                                   desc=_first(_THREAD_DESC(post)).strip(),
+                                   note_url=const.TIEBA_URL + f"/p/{note_id}",
+                                   user_link=const.TIEBA_URL + _first(_THREAD_USER_HREF(post)).strip(),
                                    user_nickname=post_field_value.get("authoer_nickname") or post_field_value.get(
                                        "author_name"),
-                                   tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
-                                       default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
-                    "//a[@class='card_title_fname']/@href").get(default=''),
+                                   tieba_name=tieba_name, tieba_link=tieba_link,
                                    total_replay_num=post_field_value.get("reply_num", 0))
             result.append(tieba_note)
         return result
@@ -104,31 +181,25 @@ class TieBaExtractor:
         Returns:
 
         """
-        content_selector = Selector(text=page_content)
-        first_floor_selector = content_selector.xpath("//div[@class='p_postlist'][1]")
-        only_view_author_link = content_selector.xpath("//*[@id='lzonly_cntn']/@href").get(default='').strip()
+        root = _parse_html(page_content)
+        first_floor = _FIRST_FLOOR(root)
+        only_view_author_link = _first(_ONLY_VIEW_AUTHOR_HREF(root)).strip()
         note_id = only_view_author_link.split("?")[0].split("/")[-1]
         # 帖子回复数、回复页数
-        thread_num_infos = content_selector.xpath(
-            "//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+        thread_num_infos = _THREAD_NUM_INFOS(root)
         # IP地理位置、发表时间
-        other_info_content = content_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
-        ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
-        note = TiebaNote(note_id=note_id, title=content_selector.xpath("//title/text()").get(default='').strip(),
-                         desc=content_selector.xpath("//meta[@name='description']/@content").get(default='').strip(),
+        ip_location, publish_time = self._extract_ip_and_pub_time_from_tail(_first(_POST_TAIL_WRAP(root), None))
+        note = TiebaNote(note_id=note_id, title=_first(_PAGE_TITLE(root)).strip(),
+                         desc=_first(_PAGE_DESCRIPTION(root)).strip(),
                          note_url=const.TIEBA_URL + f"/p/{note_id}",
-                         user_link=const.TIEBA_URL + first_floor_selector.xpath(
-                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
-                         user_nickname=first_floor_selector.xpath(
-                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
-                         user_avatar=first_floor_selector.xpath(".//a[@class='p_author_face ']/img/@src").get(
-                             default='').strip(),
-                         tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
-                             default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
-                "//a[@class='card_title_fname']/@href").get(default=''), ip_location=ip_location,
+                         user_link=const.TIEBA_URL + self._first_of(first_floor, _AUTHOR_HREF).strip(),
+                         user_nickname=self._first_of(first_floor, _AUTHOR_NICKNAME).strip(),
+                         user_avatar=self._first_of(first_floor, _AUTHOR_AVATAR).strip(),
+                         tieba_name=_first(_TIEBA_NAME(root)).strip(),
+                         tieba_link=const.TIEBA_URL + _first(_TIEBA_HREF(root)), ip_location=ip_location,
                          publish_time=publish_time,
-                         total_replay_num=thread_num_infos[0].xpath("./text()").get(default='').strip(),
-                         total_replay_page=thread_num_infos[1].xpath("./text()").get(default='').strip(), )
+                         total_replay_num=_first(_TEXT(thread_num_infos[0])).strip(),
+                         total_replay_page=_first(_TEXT(thread_num_infos[1])).strip(), )
         note.title = note.title.replace(f"【{note.tieba_name}】_百度贴吧", "")
         return note
 
@@ -142,27 +213,23 @@ class TieBaExtractor:
         Returns:
 
         """
-        xpath_selector = "//div[@class='l_post l_post_bright j_l_post clearfix  ']"
-        comment_list = Selector(text=page_content).xpath(xpath_selector)
+        root = _parse_html(page_content)
+        tieba_name = _first(_TIEBA_NAME(root)).strip()
         result: List[TiebaComment] = []
-        for comment_selector in comment_list:
-            comment_field_value: Dict = self.extract_data_field_value(comment_selector)
+        for comment_ele in _PARENT_COMMENTS(root):
+            comment_field_value: Dict = self.extract_data_field_value(comment_ele)
             if not comment_field_value:
                 continue
-            tieba_name = comment_selector.xpath("//a[@class='card_title_fname']/text()").get(default='').strip()
-            other_info_content = comment_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
-            ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
+            ip_location, publish_time = self._extract_ip_and_pub_time_from_tail(
+                _first(_POST_TAIL_WRAP(comment_ele), None))
             tieba_comment = TiebaComment(comment_id=str(comment_field_value.get("content").get("post_id")),
                                          sub_comment_count=comment_field_value.get("content").get("comment_num"),
                                          content=utils.extract_text_from_html(
                                              comment_field_value.get("content").get("content")),
                                          note_url=const.TIEBA_URL + f"/p/{note_id}",
-                                         user_link=const.TIEBA_URL + comment_selector.xpath(
-                                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
-                                         user_nickname=comment_selector.xpath(
-                                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
-                                         user_avatar=comment_selector.xpath(
-                                             ".//a[@class='p_author_face ']/img/@src").get(default='').strip(),
+                                         user_link=const.TIEBA_URL + _first(_AUTHOR_HREF(comment_ele)).strip(),
+                                         user_nickname=_first(_AUTHOR_NICKNAME(comment_ele)).strip(),
+                                         user_avatar=_first(_AUTHOR_AVATAR(comment_ele)).strip(),
                                          tieba_id=str(comment_field_value.get("content").get("forum_id", "")),
                                          tieba_name=tieba_name, tieba_link=f"https://tieba.baidu.com/f?kw={tieba_name}",
                                          ip_location=ip_location, publish_time=publish_time, note_id=note_id, )
@@ -179,23 +246,21 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(page_content)
+        root = _parse_html(page_content)
         comments = []
-        comment_ele_list = selector.xpath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
-        comment_ele_list.extend(selector.xpath("//li[@class='lzl_single_post j_lzl_s_p ']"))
+        comment_ele_list = _SUB_COMMENTS_FIRST(root) + _SUB_COMMENTS_OTHERS(root)
         for comment_ele in comment_ele_list:
             comment_value = self.extract_data_field_value(comment_ele)
             if not comment_value:
                 continue
-            comment_user_a_selector = comment_ele.xpath("./a[@class='j_user_card lzl_p_p']")[0]
-            content = utils.extract_text_from_html(
-                comment_ele.xpath(".//span[@class='lzl_content_main']").get(default=""))
+            comment_user_a_ele = _SUB_COMMENT_USER(comment_ele)[0]
+            content = utils.extract_text_from_html(_outer_html(_first(_SUB_COMMENT_CONTENT(comment_ele), None)))
             comment = TiebaComment(
                 comment_id=str(comment_value.get("spid")), content=content,
-                user_link=comment_user_a_selector.xpath("./@href").get(default=""),
+                user_link=comment_user_a_ele.get("href", ""),
                 user_nickname=comment_value.get("showname"),
-                user_avatar=comment_user_a_selector.xpath("./img/@src").get(default=""),
-                publish_time=comment_ele.xpath(".//span[@class='lzl_time']/text()").get(default="").strip(),
+                user_avatar=_first(_IMG_SRC(comment_user_a_ele)),
+                publish_time=_first(_SUB_COMMENT_TIME(comment_ele)).strip(),
                 parent_comment_id=parent_comment.comment_id,
                 note_id=parent_comment.note_id, note_url=parent_comment.note_url,
                 tieba_id=parent_comment.tieba_id, tieba_name=parent_comment.tieba_name,
@@ -213,23 +278,19 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(text=html_content)
-        user_link_selector = selector.xpath("//p[@class='space']/a")
-        user_link: str = user_link_selector.xpath("./@href").get(default='')
+        root = _parse_html(html_content)
+        user_link: str = _first(_CREATOR_SPACE_HREF(root))
         user_link_params: Dict = parse_qs(unquote(user_link.split("?")[-1]))
         user_name = user_link_params.get("un")[0] if user_link_params.get("un") else ""
         user_id = user_link_params.get("id")[0] if user_link_params.get("id") else ""
-        userinfo_userdata_selector = selector.xpath("//div[@class='userinfo_userdata']")
-        follow_fans_selector = selector.xpath("//span[@class='concern_num']")
+        follow_fans_elements = _CREATOR_CONCERN_NUM(root)
         follows, fans = 0, 0
-        if len(follow_fans_selector) == 2:
-            follows, fans = self.extract_follow_and_fans(follow_fans_selector)
-        user_content = userinfo_userdata_selector.get(default='')
+        if len(follow_fans_elements) == 2:
+            follows, fans = self.extract_follow_and_fans(follow_fans_elements)
+        user_content = _outer_html(_first(_CREATOR_USERDATA(root), None))
         return TiebaCreator(user_id=user_id, user_name=user_name,
-                            nickname=selector.xpath(".//span[@class='userinfo_username ']/text()").get(
-                                default='').strip(),
-                            avatar=selector.xpath(".//div[@class='userinfo_left_head']//img/@src").get(
-                                default='').strip(),
+                            nickname=_first(_CREATOR_NICKNAME(root)).strip(),
+                            avatar=_first(_CREATOR_AVATAR(root)).strip(),
                             gender=self.extract_gender(user_content),
                             ip_location=self.extract_ip(user_content),
                             follows=follows,
@@ -249,17 +310,47 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(text=html_content)
         thread_id_list = []
-        xpath_selector = (
-            "//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href"
-        )
-        thread_url_list = selector.xpath(xpath_selector).getall()
-        for thread_url in thread_url_list:
+        for thread_url in _CREATOR_THREAD_HREFS(_parse_html(html_content)):
             thread_id = thread_url.split("?")[0].split("/")[-1]
             thread_id_list.append(thread_id)
         return thread_id_list
 
+    @staticmethod
+    def _first_of(elements: List[etree._Element], xpath: etree.XPath) -> str:
+        """依次在多个元素上执行 xpath，返回第一个结果"""
+        for element in elements:
+            values = xpath(element)
+            if values:
+                return values[0]
+        return ''
+
+    @staticmethod
+    def _extract_ip_and_pub_time_from_tail(tail_wrap: Optional[etree._Element]) -> Tuple[str, str]:
+        """
+        从评论尾部信息(post-tail-wrap)的 span 中提取IP位置和发布时间
+        如: <span>IP属地:福建</span> ... <span class="tail-info">2024-08-06 22:09</span>
+        Args:
+            tail_wrap: post-tail-wrap 元素
+
+        Returns:
+
+        """
+        ip, pub_time = "", ""
+        if tail_wrap is None:
+            return ip, pub_time
+        for span in _TAIL_SPANS(tail_wrap):
+            # 只看没有子元素的 span
+            if len(span) or not span.text:
+                continue
+            text = span.text
+            if not ip and text.startswith(_IP_PREFIX) and len(text) > len(_IP_PREFIX) and not any(
+                    char.isspace() for char in text):
+                ip = text[len(_IP_PREFIX):]
+            elif not pub_time and span.get("class") == "tail-info" and _PUB_TIME_PATTERN.fullmatch(text):
+                pub_time = text
+        return ip, pub_time
+
     def extract_ip_and_pub_time(self, html_content: str) -> Tuple[str, str]:
         """
         提取IP位置和发布时间
@@ -306,18 +397,18 @@ class TieBaExtractor:
         return '未知'
 
     @staticmethod
-    def extract_follow_and_fans(selectors: List[Selector]) -> Tuple[str, str]:
+    def extract_follow_and_fans(elements: List[etree._Element]) -> Tuple[str, str]:
         """
         提取关注数和粉丝数
         Args:
-            selectors:
+            elements: 关注数和粉丝数的 span 元素
 
         Returns:
 
         """
         pattern = re.compile(r'<span class="concern_num">\(<a[^>]*>(\d+)</a>\)</span>')
-        follow_match = pattern.findall(selectors[0].get())
-        fans_match = pattern.findall(selectors[1].get())
+        follow_match = pattern.findall(_outer_html(elements[0]))
+        fans_match = pattern.findall(_outer_html(elements[1]))
         follows = follow_match[0] if follow_match else 0
         fans = fans_match[0] if fans_match else 0
         return follows, fans
@@ -334,22 +425,22 @@ class TieBaExtractor:
         return match.group(1) if match else ""
 
     @staticmethod
-    def extract_data_field_value(selector: Selector) -> Dict:
+    def extract_data_field_value(element: etree._Element) -> Dict:
         """
         提取data-field的值
         Args:
-            selector:
+            element:
 
         Returns:
 
         """
-        data_field_value = selector.xpath("./@data-field").get(default='').strip()
+        data_field_value = element.get("data-field", '').strip()
         if not data_field_value or data_field_value == "{}":
             return {}
         try:
-            # 先使用 html.unescape 处理转义字符 再json.loads 将 JSON 字符串转换为 Python 字典
+            # 先使用 html.unescape 处理转义字符 再将 JSON 字符串转换为 Python 字典
             unescaped_json_str = html.unescape(data_field_value)
-            data_field_dict_value = json.loads(unescaped_json_str)
+            data_field_dict_value = json_codec.loads(unescaped_json_str)
         except Exception as ex:
             print(f"extract_data_field_value，错误信息：{ex}, 尝试使用其他方式解析")
             data_field_dict_value = {}
@@ -16,8 +16,6 @@
 
 import asyncio
 import copy
-import json
-import re
 from typing import Callable, Dict, List, Optional, Union
 from urllib.parse import parse_qs, unquote, urlencode
 
@@ -25,21 +23,26 @@ import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 
-import config
+from base.base_crawler import AbstractApiClient
+from config.settings import crawl_settings
 from tools import utils
+from tools.embedded_json import extract_embedded_json
+from tools.json_codec import dumps_compact, response_json
+from tools.metrics import instrument_request
+from tools.session_guard import session_guarded
 
 from .exception import DataFetchError
 from .field import SearchType
 
 
-class WeiboClient:
+class WeiboClient(AbstractApiClient):
     def __init__(
             self,
             timeout=10,
             proxies=None,
             *,
             headers: Dict[str, str],
-            playwright_page: Page,
+            playwright_page: Optional[Page],
             cookie_dict: Dict[str, str],
     ):
         self.proxies = proxies
@@ -50,6 +53,8 @@ class WeiboClient:
         self.cookie_dict = cookie_dict
         self._image_agent_host = "https://i1.wp.com/"
 
+    @session_guarded
+    @instrument_request("wb")
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
         async with httpx.AsyncClient(proxies=self.proxies) as client:
@@ -61,7 +66,7 @@ class WeiboClient:
         if enable_return_response:
             return response
 
-        data: Dict = response.json()
+        data: Dict = response_json(response)
         ok_code = data.get("ok")
         if ok_code == 0:  # response error
             utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
@@ -72,6 +77,7 @@ class WeiboClient:
         else:  # response right
             return data.get("data", {})
 
+    @session_guarded
     async def get(self, uri: str, params=None, headers=None, **kwargs) -> Union[Response, Dict]:
         final_uri = uri
         if isinstance(params, dict):
@@ -82,8 +88,9 @@ class WeiboClient:
             headers = self.headers
         return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=headers, **kwargs)
 
+    @session_guarded
     async def post(self, uri: str, data: dict) -> Dict:
-        json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        json_str = dumps_compact(data)
         return await self.request(method="POST", url=f"{self._host}{uri}",
                                   data=json_str, headers=self.headers)
 
@@ -199,7 +206,7 @@ class WeiboClient:
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
+        if not crawl_settings.enable_get_sub_comments:
             utils.logger.info(
                 f"[WeiboClient.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled")
             return []
@@ -225,11 +232,8 @@ class WeiboClient:
             )
             if response.status_code != 200:
                 raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
+            note_detail = extract_embedded_json(response.text, "var $render_data = ", ("status",))
+            if note_detail is not None:
                 note_item = {
                     "mblog": note_detail
                 }
@@ -18,17 +18,20 @@
 import asyncio
 import os
 import random
-from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
-from playwright.async_api import (BrowserContext, BrowserType, Page,
-                                  async_playwright)
+from playwright.async_api import BrowserContext, BrowserType, Page
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
+from tools.account_pool import AccountPool
+from tools.browser_pool import open_browser
+from tools.concurrency import map_bounded, run_sources
+from tools.session_guard import SessionGuard
+from tools.storage_state import load_storage_state, save_storage_state
 from var import crawler_type_var, source_keyword_var
 
 from .client import WeiboClient
@@ -51,34 +54,37 @@ class WeiboCrawler(AbstractCrawler):
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
-        if config.ENABLE_IP_PROXY:
-            ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
+        if crawl_settings.enable_ip_proxy:
+            ip_proxy_pool = await create_ip_pool(crawl_settings.ip_proxy_pool_count, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(ip_proxy_info)
 
-        async with async_playwright() as playwright:
-            # Launch a browser context.
-            chromium = playwright.chromium
-            self.browser_context = await self.launch_browser(
-                chromium,
-                None,
-                self.mobile_user_agent,
-                headless=config.HEADLESS
-            )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.mobile_index_url)
+        if crawl_settings.browser_free_mode and await self.create_client_from_storage_state(httpx_proxy_format):
+            await self.crawl()
+            utils.logger.info("[WeiboCrawler.start] Weibo Crawler finished ...")
+            return
+
+        async with open_browser(
+            platform=crawl_settings.platform,
+            launcher=self.launch_browser,
+            user_agent=self.mobile_user_agent,
+            headless=crawl_settings.headless,
+            index_url=self.mobile_index_url,
+            use_pool=crawl_settings.use_browser_pool,
+            persistent=crawl_settings.save_login_state,
+        ) as lease:
+            self.browser_context = lease.browser_context
+            self.context_page = lease.page
 
             # Create a client to interact with the xiaohongshu website.
             self.wb_client = await self.create_weibo_client(httpx_proxy_format)
             if not await self.wb_client.pong():
                 login_obj = WeiboLogin(
-                    login_type=config.LOGIN_TYPE,
+                    login_type=crawl_settings.login_type,
                     login_phone="",  # your phone number
                     browser_context=self.browser_context,
                     context_page=self.context_page,
-                    cookie_str=config.COOKIES
+                    cookie_str=crawl_settings.cookies
                 )
                 await login_obj.begin()
 
@@ -88,20 +94,74 @@ class WeiboCrawler(AbstractCrawler):
                 await asyncio.sleep(2)
                 await self.wb_client.update_cookies(browser_context=self.browser_context)
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for video and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+            # 之后的请求被风控时由 refresh_session 统一刷新登录态，并发的请求等待刷新完成后重试
+            self.wb_client.session_guard = SessionGuard("wb", self.refresh_session)
+            if crawl_settings.browser_free_mode:
+                # 保存登录态，下次运行时先尝试不启动浏览器
+                await save_storage_state(crawl_settings.platform, self.browser_context)
+            await self.crawl()
             utils.logger.info("[WeiboCrawler.start] Weibo Crawler finished ...")
 
+    async def create_client_from_storage_state(self, httpx_proxy: Optional[str]) -> bool:
+        """
+        免浏览器模式：用保存的登录态(或配置的 COOKIES)直接创建 API 客户端，不启动浏览器
+        Returns:
+            登录态是否有效，无效时需要启动浏览器登录
+
+        """
+        stored_state = load_storage_state(crawl_settings.platform, crawl_settings.cookies)
+        if stored_state is None:
+            return False
+        self.browser_context = stored_state
+        self.context_page = None
+        self.wb_client = await self.create_weibo_client(httpx_proxy)
+        if await self.wb_client.pong():
+            utils.logger.info("[WeiboCrawler.create_client_from_storage_state] use stored login state, skip launching browser")
+            return True
+        utils.logger.info("[WeiboCrawler.create_client_from_storage_state] stored login state expired, launch browser to login")
+        return False
+
+    async def crawl(self):
+        """按爬虫类型爬取数据，需要先创建好 API 客户端"""
+        if crawl_settings.enable_account_pool:
+            self.wb_client.account_pool = await AccountPool.from_login_sessions(
+                crawl_settings.platform, self.wb_client,
+                max_requests_per_sec=crawl_settings.account_max_requests_per_sec,
+                quarantine_sec=crawl_settings.account_quarantine_sec,
+            )
+        crawler_type_var.set(crawl_settings.crawler_type)
+        if crawl_settings.crawler_type == "search":
+            # Search for video and retrieve their comment information.
+            await self.search()
+        elif crawl_settings.crawler_type == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_notes()
+        elif crawl_settings.crawler_type == "creator":
+            # Get creator's information and their notes and comments
+            await self.get_creators_and_notes()
+        else:
+            pass
+
+    async def refresh_session(self) -> None:
+        """
+        请求被风控时由 SessionGuard 调用(同一时间只有一次)：重新打开页面更新 cookies，登录态失效时重新登录
+        """
+        await self.context_page.goto(self.mobile_index_url)
+        await self.wb_client.update_cookies(browser_context=self.browser_context)
+        if await self.wb_client.pong():
+            return
+        login_obj = WeiboLogin(
+            login_type=crawl_settings.login_type,
+            login_phone="",
+            browser_context=self.browser_context,
+            context_page=self.context_page,
+            cookie_str=crawl_settings.cookies,
+        )
+        await login_obj.begin()
+        await self.context_page.goto(self.mobile_index_url)
+        await asyncio.sleep(2)
+        await self.wb_client.update_cookies(browser_context=self.browser_context)
+
     async def search(self):
         """
         search weibo note with keywords
@@ -109,71 +169,75 @@ class WeiboCrawler(AbstractCrawler):
         """
         utils.logger.info("[WeiboCrawler.search] Begin search weibo keywords")
         weibo_limit_count = 10  # weibo limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < weibo_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = weibo_limit_count
-        start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
-                    page += 1
-                    continue
-                utils.logger.info(f"[WeiboCrawler.search] search weibo keyword: {keyword}, page: {page}")
-                search_res = await self.wb_client.get_note_by_keyword(
-                    keyword=keyword,
-                    page=page,
-                    search_type=SearchType.DEFAULT
-                )
-                note_id_list: List[str] = []
-                note_list = filter_search_result_card(search_res.get("cards"))
-                for note_item in note_list:
-                    if note_item:
-                        mblog: Dict = note_item.get("mblog")
-                        if mblog:
-                            note_id_list.append(mblog.get("id"))
-                            await weibo_store.update_weibo_note(note_item)
-                            await self.get_note_images(mblog)
+        if crawl_settings.crawler_max_notes_count < weibo_limit_count:
+            crawl_settings.crawler_max_notes_count = weibo_limit_count
+        # 不同关键词的搜索互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.keywords.split(","), self.search_keyword,
+                          concurrency=crawl_settings.max_source_concurrency_num)
 
+    async def search_keyword(self, keyword: str):
+        """
+        search weibo note with one keyword
+        :param keyword:
+        :return:
+        """
+        weibo_limit_count = 10  # weibo limit page fixed value
+        start_page = crawl_settings.start_page
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[WeiboCrawler.search_keyword] Current search keyword: {keyword}")
+        page = 1
+        while (page - start_page + 1) * weibo_limit_count <= crawl_settings.crawler_max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[WeiboCrawler.search_keyword] Skip page: {page}")
                 page += 1
-                await self.batch_get_notes_comments(note_id_list)
+                continue
+            utils.logger.info(f"[WeiboCrawler.search_keyword] search weibo keyword: {keyword}, page: {page}")
+            search_res = await self.wb_client.get_note_by_keyword(
+                keyword=keyword,
+                page=page,
+                search_type=SearchType.DEFAULT
+            )
+            note_id_list: List[str] = []
+            note_list = filter_search_result_card(search_res.get("cards"))
+            for note_item in note_list:
+                if note_item:
+                    mblog: Dict = note_item.get("mblog")
+                    if mblog:
+                        note_id_list.append(mblog.get("id"))
+                        await weibo_store.update_weibo_note(note_item)
+                        await self.get_note_images(mblog)
+
+            page += 1
+            await self.batch_get_notes_comments(note_id_list)
 
     async def get_specified_notes(self):
         """
         get specified notes info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list = [
-            self.get_note_info_task(note_id=note_id, semaphore=semaphore) for note_id in
-            config.WEIBO_SPECIFIED_ID_LIST
-        ]
-        video_details = await asyncio.gather(*task_list)
+        video_details = await map_bounded(self.get_note_info_task, crawl_settings.weibo_specified_id_list,
+                                          concurrency=crawl_settings.max_concurrency_num, name="weibo_note_detail")
         for note_item in video_details:
             if note_item:
                 await weibo_store.update_weibo_note(note_item)
-        await self.batch_get_notes_comments(config.WEIBO_SPECIFIED_ID_LIST)
+        await self.batch_get_notes_comments(crawl_settings.weibo_specified_id_list)
 
-    async def get_note_info_task(self, note_id: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    async def get_note_info_task(self, note_id: str) -> Optional[Dict]:
         """
         Get note detail task
         :param note_id:
-        :param semaphore:
         :return:
         """
-        async with semaphore:
-            try:
-                result = await self.wb_client.get_note_info_by_id(note_id)
-                return result
-            except DataFetchError as ex:
-                utils.logger.error(f"[WeiboCrawler.get_note_info_task] Get note detail error: {ex}")
-                return None
-            except KeyError as ex:
-                utils.logger.error(
-                    f"[WeiboCrawler.get_note_info_task] have not fund note detail note_id:{note_id}, err: {ex}")
-                return None
+        try:
+            result = await self.wb_client.get_note_info_by_id(note_id)
+            return result
+        except DataFetchError as ex:
+            utils.logger.error(f"[WeiboCrawler.get_note_info_task] Get note detail error: {ex}")
+            return None
+        except KeyError as ex:
+            utils.logger.error(
+                f"[WeiboCrawler.get_note_info_task] have not fund note detail note_id:{note_id}, err: {ex}")
+            return None
 
     async def batch_get_notes_comments(self, note_id_list: List[str]):
         """
@@ -181,38 +245,32 @@ class WeiboCrawler(AbstractCrawler):
         :param note_id_list:
         :return:
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not crawl_settings.enable_get_comments:
             utils.logger.info(f"[WeiboCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for note_id in note_id_list:
-            task = asyncio.create_task(self.get_note_comments(note_id, semaphore), name=note_id)
-            task_list.append(task)
-        await asyncio.gather(*task_list)
-
-    async def get_note_comments(self, note_id: str, semaphore: asyncio.Semaphore):
+        await map_bounded(self.get_note_comments, note_id_list,
+                          concurrency=crawl_settings.max_concurrency_num, name="weibo_note_comments")
+
+    async def get_note_comments(self, note_id: str):
         """
         get comment for note id
         :param note_id:
-        :param semaphore:
         :return:
         """
-        async with semaphore:
-            try:
-                utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
-                await self.wb_client.get_note_all_comments(
-                    note_id=note_id,
-                    crawl_interval=random.randint(1,3), # 微博对API的限流比较严重，所以延时提高一些
-                    callback=weibo_store.batch_update_weibo_note_comments,
-                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
-                )
-            except DataFetchError as ex:
-                utils.logger.error(f"[WeiboCrawler.get_note_comments] get note_id: {note_id} comment error: {ex}")
-            except Exception as e:
-                utils.logger.error(f"[WeiboCrawler.get_note_comments] may be been blocked, err:{e}")
+        try:
+            utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
+            await self.wb_client.get_note_all_comments(
+                note_id=note_id,
+                crawl_interval=random.randint(1,3), # 微博对API的限流比较严重，所以延时提高一些
+                callback=weibo_store.batch_update_weibo_note_comments,
+                max_count=crawl_settings.crawler_max_comments_count_singlenotes
+            )
+        except DataFetchError as ex:
+            utils.logger.error(f"[WeiboCrawler.get_note_comments] get note_id: {note_id} comment error: {ex}")
+        except Exception as e:
+            utils.logger.error(f"[WeiboCrawler.get_note_comments] may be been blocked, err:{e}")
 
     async def get_note_images(self, mblog: Dict):
         """
@@ -220,7 +278,7 @@ class WeiboCrawler(AbstractCrawler):
         :param mblog:
         :return:
         """
-        if not config.ENABLE_GET_IMAGES:
+        if not crawl_settings.enable_get_images:
             utils.logger.info(f"[WeiboCrawler.get_note_images] Crawling image mode is not enabled")
             return
         
@@ -244,30 +302,42 @@ class WeiboCrawler(AbstractCrawler):
 
         """
         utils.logger.info("[WeiboCrawler.get_creators_and_notes] Begin get weibo creators")
-        for user_id in config.WEIBO_CREATOR_ID_LIST:
-            createor_info_res: Dict = await self.wb_client.get_creator_info_by_id(creator_id=user_id)
-            if createor_info_res:
-                createor_info: Dict = createor_info_res.get("userInfo", {})
-                utils.logger.info(f"[WeiboCrawler.get_creators_and_notes] creator info: {createor_info}")
-                if not createor_info:
-                    raise DataFetchError("Get creator info error")
-                await weibo_store.save_creator(user_id, user_info=createor_info)
-
-                # Get all note information of the creator
-                all_notes_list = await self.wb_client.get_all_notes_by_creator_id(
-                    creator_id=user_id,
-                    container_id=createor_info_res.get("lfid_container_id"),
-                    crawl_interval=0,
-                    callback=weibo_store.batch_update_weibo_notes
-                )
+        # 不同创作者的爬取互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.weibo_creator_id_list, self.get_creator_and_notes,
+                          concurrency=crawl_settings.max_source_concurrency_num)
 
-                note_ids = [note_item.get("mblog", {}).get("id") for note_item in all_notes_list if
-                            note_item.get("mblog", {}).get("id")]
-                await self.batch_get_notes_comments(note_ids)
+    async def get_creator_and_notes(self, user_id: str) -> None:
+        """
+        Get one creator's information and their notes and comments
+        Args:
+            user_id: creator id
+
+        Returns:
+
+        """
+        createor_info_res: Dict = await self.wb_client.get_creator_info_by_id(creator_id=user_id)
+        if createor_info_res:
+            createor_info: Dict = createor_info_res.get("userInfo", {})
+            utils.logger.info(f"[WeiboCrawler.get_creator_and_notes] creator info: {createor_info}")
+            if not createor_info:
+                raise DataFetchError("Get creator info error")
+            await weibo_store.save_creator(user_id, user_info=createor_info)
+
+            # Get all note information of the creator
+            all_notes_list = await self.wb_client.get_all_notes_by_creator_id(
+                creator_id=user_id,
+                container_id=createor_info_res.get("lfid_container_id"),
+                crawl_interval=0,
+                callback=weibo_store.batch_update_weibo_notes
+            )
 
-            else:
-                utils.logger.error(
-                    f"[WeiboCrawler.get_creators_and_notes] get creator info error, creator_id:{user_id}")
+            note_ids = [note_item.get("mblog", {}).get("id") for note_item in all_notes_list if
+                        note_item.get("mblog", {}).get("id")]
+            await self.batch_get_notes_comments(note_ids)
+
+        else:
+            utils.logger.error(
+                f"[WeiboCrawler.get_creator_and_notes] get creator info error, creator_id:{user_id}")
 
 
 
@@ -311,9 +381,9 @@ class WeiboCrawler(AbstractCrawler):
     ) -> BrowserContext:
         """Launch browser and create browser context"""
         utils.logger.info("[WeiboCrawler.launch_browser] Begin create browser context ...")
-        if config.SAVE_LOGIN_STATE:
+        if crawl_settings.save_login_state:
             user_data_dir = os.path.join(os.getcwd(), "browser_data",
-                                         config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+                                         crawl_settings.user_data_dir % crawl_settings.platform)  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -10,23 +10,26 @@
 
 
 import asyncio
-import json
-import re
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
 import httpx
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.concurrency import expand_sub_comments
+from tools.embedded_json import extract_embedded_json
+from tools.json_codec import dumps_compact, response_json
+from tools.metrics import instrument_request, record_block_event, record_retry, timed
+from tools.session_guard import AccountBlockedError, session_guarded
 from html import unescape
 
 from .exception import DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
-from .help import get_search_id, sign
+from .help import get_search_id, parse_note_detail_from_html, sign
 
 
 class XiaoHongShuClient(AbstractApiClient):
@@ -51,6 +54,7 @@ class XiaoHongShuClient(AbstractApiClient):
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
 
+    @timed("sign_seconds", platform="xhs", method="_pre_headers")
     async def _pre_headers(self, url: str, data=None) -> Dict:
         """
         请求头参数签名
@@ -81,7 +85,9 @@ class XiaoHongShuClient(AbstractApiClient):
         self.headers.update(headers)
         return self.headers
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @session_guarded
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1), before_sleep=record_retry)
+    @instrument_request("xhs")
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
         封装httpx的公共请求方法，对请求响应做一些处理
@@ -103,13 +109,14 @@ class XiaoHongShuClient(AbstractApiClient):
             # someday someone maybe will bypass captcha
             verify_type = response.headers["Verifytype"]
             verify_uuid = response.headers["Verifyuuid"]
-            raise Exception(
+            record_block_event("xhs", "captcha")
+            raise AccountBlockedError(
                 f"出现验证码，请求失败，Verifytype: {verify_type}，Verifyuuid: {verify_uuid}, Response: {response}"
             )
 
         if return_response:
             return response.text
-        data: Dict = response.json()
+        data: Dict = response_json(response)
         if data["success"]:
             return data.get("data", data.get("success", {}))
         elif data["code"] == self.IP_ERROR_CODE:
@@ -117,6 +124,7 @@ class XiaoHongShuClient(AbstractApiClient):
         else:
             raise DataFetchError(data.get("msg", None))
 
+    @session_guarded
     async def get(self, uri: str, params=None) -> Dict:
         """
         GET请求，对请求头签名
@@ -135,6 +143,7 @@ class XiaoHongShuClient(AbstractApiClient):
             method="GET", url=f"{self._host}{final_uri}", headers=headers
         )
 
+    @session_guarded
     async def post(self, uri: str, data: dict, **kwargs) -> Dict:
         """
         POST请求，对请求头签名
@@ -146,7 +155,7 @@ class XiaoHongShuClient(AbstractApiClient):
 
         """
         headers = await self._pre_headers(uri, data)
-        json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        json_str = dumps_compact(data)
         return await self.request(
             method="POST",
             url=f"{self._host}{uri}",
@@ -387,26 +396,20 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
+        if not crawl_settings.enable_get_sub_comments:
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
             )
             return []
 
-        result = []
-        for comment in comments:
+        async def walk(comment: Dict) -> AsyncIterator[List[Dict]]:
+            # 一级评论里自带的前几条二级评论，之后按游标翻页
+            if comment.get("sub_comments"):
+                yield comment["sub_comments"]
             note_id = comment.get("note_id")
-            sub_comments = comment.get("sub_comments")
-            if sub_comments and callback:
-                await callback(note_id, sub_comments)
-
-            sub_comment_has_more = comment.get("sub_comment_has_more")
-            if not sub_comment_has_more:
-                continue
-
             root_comment_id = comment.get("id")
+            sub_comment_has_more = comment.get("sub_comment_has_more")
             sub_comment_cursor = comment.get("sub_comment_cursor")
-
             while sub_comment_has_more:
                 comments_res = await self.get_note_sub_comments(
                     note_id=note_id,
@@ -415,7 +418,7 @@ class XiaoHongShuClient(AbstractApiClient):
                     num=10,
                     cursor=sub_comment_cursor,
                 )
-                
+
                 if comments_res is None:
                     utils.logger.info(
                         f"[XiaoHongShuClient.get_comments_all_sub_comments] No response found for note_id: {note_id}"
@@ -428,12 +431,19 @@ class XiaoHongShuClient(AbstractApiClient):
                         f"[XiaoHongShuClient.get_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
                     )
                     break
-                comments = comments_res["comments"]
-                if callback:
-                    await callback(note_id, comments)
-                await asyncio.sleep(crawl_interval)
-                result.extend(comments)
-        return result
+                yield comments_res["comments"]
+
+        async def on_sub_comments(comment: Dict, sub_comments: List[Dict]) -> None:
+            if callback:
+                await callback(comment.get("note_id"), sub_comments)
+
+        # 不同一级评论的二级评论并发展开，回调顺序和逐条展开时一致
+        return await expand_sub_comments(
+            comments, walk,
+            concurrency=crawl_settings.max_sub_comment_concurrency_num,
+            crawl_interval=crawl_interval,
+            callback=on_sub_comments,
+        )
 
     async def get_creator_info(self, user_id: str) -> Dict:
         """
@@ -445,17 +455,8 @@ class XiaoHongShuClient(AbstractApiClient):
         html_content = await self.request(
             "GET", self._domain + uri, return_response=True, headers=self.headers
         )
-        match = re.search(
-            r"<script>window.__INITIAL_STATE__=(.+)<\/script>", html_content, re.M
-        )
-
-        if match is None:
-            return {}
-
-        info = json.loads(match.group(1).replace(":undefined", ":null"), strict=False)
-        if info is None:
-            return {}
-        return info.get("user").get("userPageData")
+        user_page_data = extract_embedded_json(html_content, "window.__INITIAL_STATE__=", ("userPageData",))
+        return user_page_data or {}
 
     async def get_notes_by_creator(
         self, creator: str, cursor: str, page_size: int = 30
@@ -498,7 +499,7 @@ class XiaoHongShuClient(AbstractApiClient):
         result = []
         notes_has_more = True
         notes_cursor = ""
-        while notes_has_more and len(result) < config.CRAWLER_MAX_NOTES_COUNT:
+        while notes_has_more and len(result) < crawl_settings.crawler_max_notes_count:
             notes_res = await self.get_notes_by_creator(user_id, notes_cursor)
             if not notes_res:
                 utils.logger.error(
@@ -519,7 +520,7 @@ class XiaoHongShuClient(AbstractApiClient):
                 f"[XiaoHongShuClient.get_all_notes_by_creator] got user_id:{user_id} notes len : {len(notes)}"
             )
 
-            remaining = config.CRAWLER_MAX_NOTES_COUNT - len(result)
+            remaining = crawl_settings.crawler_max_notes_count - len(result)
             if remaining <= 0:
                 break
 
@@ -548,7 +549,7 @@ class XiaoHongShuClient(AbstractApiClient):
         data = {"original_url": f"{self._domain}/discovery/item/{note_id}"}
         return await self.post(uri, data=data, return_response=True)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1), before_sleep=record_retry)
     async def get_note_by_id_from_html(
         self,
         note_id: str,
@@ -570,31 +571,6 @@ class XiaoHongShuClient(AbstractApiClient):
 
         """
 
-        def camel_to_underscore(key):
-            return re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()
-
-        def transform_json_keys(json_data):
-            data_dict = json.loads(json_data)
-            dict_new = {}
-            for key, value in data_dict.items():
-                new_key = camel_to_underscore(key)
-                if not value:
-                    dict_new[new_key] = value
-                elif isinstance(value, dict):
-                    dict_new[new_key] = transform_json_keys(json.dumps(value))
-                elif isinstance(value, list):
-                    dict_new[new_key] = [
-                        (
-                            transform_json_keys(json.dumps(item))
-                            if (item and isinstance(item, dict))
-                            else item
-                        )
-                        for item in value
-                    ]
-                else:
-                    dict_new[new_key] = value
-            return dict_new
-
         url = (
             "https://www.xiaohongshu.com/explore/"
             + note_id
@@ -608,17 +584,7 @@ class XiaoHongShuClient(AbstractApiClient):
             method="GET", url=url, return_response=True, headers=copy_headers
         )
 
-        def get_note_dict(html):
-            state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[
-                0
-            ].replace("undefined", '""')
-
-            if state != "{}":
-                note_dict = transform_json_keys(state)
-                return note_dict["note"]["note_detail_map"][note_id]["note"]
-            return {}
-
         try:
-            return get_note_dict(html)
+            return parse_note_detail_from_html(html, note_id)
         except:
             return None
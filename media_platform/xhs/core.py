@@ -12,20 +12,21 @@
 import asyncio
 import os
 import random
-import time
-from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
-from playwright.async_api import BrowserContext, BrowserType, Page, async_playwright
+from playwright.async_api import BrowserContext, BrowserType, Page
 from tenacity import RetryError
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractCrawler
-from config import CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
 from model.m_xiaohongshu import NoteUrlInfo
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
+from tools.account_pool import AccountPool
+from tools.browser_pool import open_browser
+from tools.concurrency import map_bounded, run_sources
+from tools.session_guard import SessionGuard
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
@@ -43,64 +44,63 @@ class XiaoHongShuCrawler(AbstractCrawler):
     def __init__(self) -> None:
         self.index_url = "https://www.xiaohongshu.com"
         # self.user_agent = utils.get_user_agent()
-        self.user_agent = config.UA if config.UA else "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+        self.user_agent = crawl_settings.ua if crawl_settings.ua else "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
-        if config.ENABLE_IP_PROXY:
+        if crawl_settings.enable_ip_proxy:
             ip_proxy_pool = await create_ip_pool(
-                config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
+                crawl_settings.ip_proxy_pool_count, enable_validate_ip=True
             )
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
                 ip_proxy_info
             )
 
-        async with async_playwright() as playwright:
-            # Launch a browser context.
-            chromium = playwright.chromium
-            self.browser_context = await self.launch_browser(
-                chromium, None, self.user_agent, headless=config.HEADLESS
-            )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            # add a cookie attribute webId to avoid the appearance of a sliding captcha on the webpage
-            await self.browser_context.add_cookies(
-                [
-                    {
-                        "name": "webId",
-                        "value": "xxx123",  # any value
-                        "domain": ".xiaohongshu.com",
-                        "path": "/",
-                    }
-                ]
-            )
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
+        async with open_browser(
+            platform=crawl_settings.platform,
+            launcher=self.launch_browser,
+            user_agent=self.user_agent,
+            headless=crawl_settings.headless,
+            index_url=self.index_url,
+            initializer=self.init_browser_context,
+            use_pool=crawl_settings.use_browser_pool,
+            persistent=crawl_settings.save_login_state,
+        ) as lease:
+            self.browser_context = lease.browser_context
+            self.context_page = lease.page
 
             # Create a client to interact with the xiaohongshu website.
             self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
             if not await self.xhs_client.pong():
                 login_obj = XiaoHongShuLogin(
-                    login_type=config.LOGIN_TYPE,
+                    login_type=crawl_settings.login_type,
                     login_phone="",  # input your phone number
                     browser_context=self.browser_context,
                     context_page=self.context_page,
-                    cookie_str=config.COOKIES,
+                    cookie_str=crawl_settings.cookies,
                 )
                 await login_obj.begin()
                 await self.xhs_client.update_cookies(
                     browser_context=self.browser_context
                 )
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
+            # 之后的请求被风控时由 refresh_session 统一刷新登录态，并发的请求等待刷新完成后重试
+            self.xhs_client.session_guard = SessionGuard("xhs", self.refresh_session)
+            if crawl_settings.enable_account_pool:
+                self.xhs_client.account_pool = await AccountPool.from_login_sessions(
+                    crawl_settings.platform, self.xhs_client,
+                    max_requests_per_sec=crawl_settings.account_max_requests_per_sec,
+                    quarantine_sec=crawl_settings.account_quarantine_sec,
+                )
+            crawler_type_var.set(crawl_settings.crawler_type)
+            if crawl_settings.crawler_type == "search":
                 # Search for notes and retrieve their comment information.
                 await self.search()
-            elif config.CRAWLER_TYPE == "detail":
+            elif crawl_settings.crawler_type == "detail":
                 # Get the information and comments of the specified post
                 await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
+            elif crawl_settings.crawler_type == "creator":
                 # Get creator's information and their notes and comments
                 await self.get_creators_and_notes()
             else:
@@ -108,129 +108,158 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
             utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
 
+    async def refresh_session(self) -> None:
+        """
+        请求被风控时由 SessionGuard 调用(同一时间只有一次)：重新打开页面更新 cookies，登录态失效时重新登录
+        """
+        await self.context_page.goto(self.index_url)
+        await self.xhs_client.update_cookies(browser_context=self.browser_context)
+        if await self.xhs_client.pong():
+            return
+        login_obj = XiaoHongShuLogin(
+            login_type=crawl_settings.login_type,
+            login_phone="",
+            browser_context=self.browser_context,
+            context_page=self.context_page,
+            cookie_str=crawl_settings.cookies,
+        )
+        await login_obj.begin()
+        await self.xhs_client.update_cookies(browser_context=self.browser_context)
+
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
         utils.logger.info(
             "[XiaoHongShuCrawler.search] Begin search xiaohongshu keywords"
         )
         xhs_limit_count = 20  # xhs limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
-        start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(
-                f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}"
-            )
-            page = 1
-            search_id = get_search_id()
-            while (
-                page - start_page + 1
-            ) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
-
-                try:
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] search xhs keyword: {keyword}, page: {page}"
-                    )
-                    note_ids: List[str] = []
-                    xsec_tokens: List[str] = []
-                    notes_res = await self.xhs_client.get_note_by_keyword(
-                        keyword=keyword,
-                        search_id=search_id,
-                        page=page,
-                        sort=(
-                            SearchSortType(config.SORT_TYPE)
-                            if config.SORT_TYPE != ""
-                            else SearchSortType.GENERAL
-                        ),
-                    )
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Search notes res:{notes_res}"
-                    )
-                    if not notes_res or not notes_res.get("has_more", False):
-                        utils.logger.info("No more content!")
-                        break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = [
-                        self.get_note_detail_async_task(
-                            note_id=post_item.get("id"),
-                            xsec_source=post_item.get("xsec_source"),
-                            xsec_token=post_item.get("xsec_token"),
-                            semaphore=semaphore,
-                        )
+        if crawl_settings.crawler_max_notes_count < xhs_limit_count:
+            crawl_settings.crawler_max_notes_count = xhs_limit_count
+        # 不同关键词的搜索互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.keywords.split(","), self.search_keyword,
+                          concurrency=crawl_settings.max_source_concurrency_num)
+
+    async def search_keyword(self, keyword: str) -> None:
+        """Search notes of one keyword and retrieve their comment information."""
+        xhs_limit_count = 20  # xhs limit page fixed value
+        start_page = crawl_settings.start_page
+        source_keyword_var.set(keyword)
+        utils.logger.info(
+            f"[XiaoHongShuCrawler.search_keyword] Current search keyword: {keyword}"
+        )
+        page = 1
+        search_id = get_search_id()
+        while (
+            page - start_page + 1
+        ) * xhs_limit_count <= crawl_settings.crawler_max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] Skip page {page}")
+                page += 1
+                continue
+
+            try:
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.search_keyword] search xhs keyword: {keyword}, page: {page}"
+                )
+                note_ids: List[str] = []
+                xsec_tokens: List[str] = []
+                notes_res = await self.xhs_client.get_note_by_keyword(
+                    keyword=keyword,
+                    search_id=search_id,
+                    page=page,
+                    sort=(
+                        SearchSortType(crawl_settings.sort_type)
+                        if crawl_settings.sort_type != ""
+                        else SearchSortType.GENERAL
+                    ),
+                )
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.search_keyword] Search notes res:{notes_res}"
+                )
+                if not notes_res or not notes_res.get("has_more", False):
+                    utils.logger.info("No more content!")
+                    break
+                note_details = await map_bounded(
+                    lambda post_item: self.get_note_detail_async_task(
+                        note_id=post_item.get("id"),
+                        xsec_source=post_item.get("xsec_source"),
+                        xsec_token=post_item.get("xsec_token"),
+                    ),
+                    [
+                        post_item
                         for post_item in notes_res.get("items", {})
                         if post_item.get("model_type") not in ("rec_query", "hot_query")
-                    ]
-                    note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
-                        if note_detail:
-                            await xhs_store.update_xhs_note(note_detail)
-                            await self.get_notice_media(note_detail)
-                            note_ids.append(note_detail.get("note_id"))
-                            xsec_tokens.append(note_detail.get("xsec_token"))
-                    page += 1
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Note details: {note_details}"
-                    )
-                    await self.batch_get_note_comments(note_ids, xsec_tokens)
-                except DataFetchError:
-                    utils.logger.error(
-                        "[XiaoHongShuCrawler.search] Get note detail error"
-                    )
-                    break
+                    ],
+                    concurrency=crawl_settings.max_concurrency_num,
+                    name="xhs_note_detail",
+                )
+                for note_detail in note_details:
+                    if note_detail:
+                        await xhs_store.update_xhs_note(note_detail)
+                        await self.get_notice_media(note_detail)
+                        note_ids.append(note_detail.get("note_id"))
+                        xsec_tokens.append(note_detail.get("xsec_token"))
+                page += 1
+                utils.logger.info(
+                    f"[XiaoHongShuCrawler.search_keyword] Note details: {note_details}"
+                )
+                await self.batch_get_note_comments(note_ids, xsec_tokens)
+            except DataFetchError:
+                utils.logger.error(
+                    "[XiaoHongShuCrawler.search_keyword] Get note detail error"
+                )
+                break
 
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
         utils.logger.info(
             "[XiaoHongShuCrawler.get_creators_and_notes] Begin get xiaohongshu creators"
         )
-        for user_id in config.XHS_CREATOR_ID_LIST:
-            # get creator detail info from web html content
-            createor_info: Dict = await self.xhs_client.get_creator_info(
-                user_id=user_id
-            )
-            if createor_info:
-                await xhs_store.save_creator(user_id, creator=createor_info)
+        # 不同创作者的爬取互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.xhs_creator_id_list, self.get_creator_and_notes,
+                          concurrency=crawl_settings.max_source_concurrency_num)
+
+    async def get_creator_and_notes(self, user_id: str) -> None:
+        """Get one creator's notes and retrieve their comment information."""
+        # get creator detail info from web html content
+        createor_info: Dict = await self.xhs_client.get_creator_info(
+            user_id=user_id
+        )
+        if createor_info:
+            await xhs_store.save_creator(user_id, creator=createor_info)
 
-            # When proxy is not enabled, increase the crawling interval
-            if config.ENABLE_IP_PROXY:
-                crawl_interval = random.random()
-            else:
-                crawl_interval = random.uniform(1, config.CRAWLER_MAX_SLEEP_SEC)
-            # Get all note information of the creator
-            all_notes_list = await self.xhs_client.get_all_notes_by_creator(
-                user_id=user_id,
-                crawl_interval=crawl_interval,
-                callback=self.fetch_creator_notes_detail,
-            )
+        # When proxy is not enabled, increase the crawling interval
+        if crawl_settings.enable_ip_proxy:
+            crawl_interval = random.random()
+        else:
+            crawl_interval = random.uniform(1, crawl_settings.crawler_max_sleep_sec)
+        # Get all note information of the creator
+        all_notes_list = await self.xhs_client.get_all_notes_by_creator(
+            user_id=user_id,
+            crawl_interval=crawl_interval,
+            callback=self.fetch_creator_notes_detail,
+        )
 
-            note_ids = []
-            xsec_tokens = []
-            for note_item in all_notes_list:
-                note_ids.append(note_item.get("note_id"))
-                xsec_tokens.append(note_item.get("xsec_token"))
-            await self.batch_get_note_comments(note_ids, xsec_tokens)
+        note_ids = []
+        xsec_tokens = []
+        for note_item in all_notes_list:
+            note_ids.append(note_item.get("note_id"))
+            xsec_tokens.append(note_item.get("xsec_token"))
+        await self.batch_get_note_comments(note_ids, xsec_tokens)
 
     async def fetch_creator_notes_detail(self, note_list: List[Dict]):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list = [
-            self.get_note_detail_async_task(
+        note_details = await map_bounded(
+            lambda post_item: self.get_note_detail_async_task(
                 note_id=post_item.get("note_id"),
                 xsec_source=post_item.get("xsec_source"),
                 xsec_token=post_item.get("xsec_token"),
-                semaphore=semaphore,
-            )
-            for post_item in note_list
-        ]
-
-        note_details = await asyncio.gather(*task_list)
+            ),
+            note_list,
+            concurrency=crawl_settings.max_concurrency_num,
+            name="xhs_note_detail",
+        )
         for note_detail in note_details:
             if note_detail:
                 await xhs_store.update_xhs_note(note_detail)
@@ -242,23 +271,26 @@ class XiaoHongShuCrawler(AbstractCrawler):
         Returns:
 
         """
-        get_note_detail_task_list = []
-        for full_note_url in config.XHS_SPECIFIED_NOTE_URL_LIST:
+        note_url_infos: List[NoteUrlInfo] = []
+        for full_note_url in crawl_settings.xhs_specified_note_url_list:
             note_url_info: NoteUrlInfo = parse_note_info_from_note_url(full_note_url)
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_specified_notes] Parse note url info: {note_url_info}"
             )
-            crawler_task = self.get_note_detail_async_task(
-                note_id=note_url_info.note_id,
-                xsec_source=note_url_info.xsec_source,
-                xsec_token=note_url_info.xsec_token,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
-            )
-            get_note_detail_task_list.append(crawler_task)
+            note_url_infos.append(note_url_info)
 
         need_get_comment_note_ids = []
         xsec_tokens = []
-        note_details = await asyncio.gather(*get_note_detail_task_list)
+        note_details = await map_bounded(
+            lambda note_url_info: self.get_note_detail_async_task(
+                note_id=note_url_info.note_id,
+                xsec_source=note_url_info.xsec_source,
+                xsec_token=note_url_info.xsec_token,
+            ),
+            note_url_infos,
+            concurrency=crawl_settings.max_concurrency_num,
+            name="xhs_note_detail",
+        )
         for note_detail in note_details:
             if note_detail:
                 need_get_comment_note_ids.append(note_detail.get("note_id", ""))
@@ -271,7 +303,6 @@ class XiaoHongShuCrawler(AbstractCrawler):
         note_id: str,
         xsec_source: str,
         xsec_token: str,
-        semaphore: asyncio.Semaphore,
     ) -> Optional[Dict]:
         """Get note detail
 
@@ -279,65 +310,63 @@ class XiaoHongShuCrawler(AbstractCrawler):
             note_id:
             xsec_source:
             xsec_token:
-            semaphore:
 
         Returns:
             Dict: note detail
         """
         note_detail_from_html, note_detail_from_api = None, None
-        async with semaphore:
-            # When proxy is not enabled, increase the crawling interval
-            if config.ENABLE_IP_PROXY:
-                crawl_interval = random.random()
-            else:
-                crawl_interval = random.uniform(1, config.CRAWLER_MAX_SLEEP_SEC)
-            try:
-                # 尝试直接获取网页版笔记详情，携带cookie
-                note_detail_from_html: Optional[Dict] = (
+        # When proxy is not enabled, increase the crawling interval
+        if crawl_settings.enable_ip_proxy:
+            crawl_interval = random.random()
+        else:
+            crawl_interval = random.uniform(1, crawl_settings.crawler_max_sleep_sec)
+        try:
+            # 尝试直接获取网页版笔记详情，携带cookie
+            note_detail_from_html: Optional[Dict] = (
+                await self.xhs_client.get_note_by_id_from_html(
+                    note_id, xsec_source, xsec_token, enable_cookie=True
+                )
+            )
+            await asyncio.sleep(crawl_interval)
+            if not note_detail_from_html:
+                # 如果网页版笔记详情获取失败，则尝试不使用cookie获取
+                note_detail_from_html = (
                     await self.xhs_client.get_note_by_id_from_html(
-                        note_id, xsec_source, xsec_token, enable_cookie=True
+                        note_id, xsec_source, xsec_token, enable_cookie=False
                     )
                 )
-                time.sleep(crawl_interval)
-                if not note_detail_from_html:
-                    # 如果网页版笔记详情获取失败，则尝试不使用cookie获取
-                    note_detail_from_html = (
-                        await self.xhs_client.get_note_by_id_from_html(
-                            note_id, xsec_source, xsec_token, enable_cookie=False
-                        )
-                    )
-                    utils.logger.error(
-                        f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error, note_id: {note_id}"
-                    )
-                if not note_detail_from_html:
-                    # 如果网页版笔记详情获取失败，则尝试API获取
-                    note_detail_from_api: Optional[Dict] = (
-                        await self.xhs_client.get_note_by_id(
-                            note_id, xsec_source, xsec_token
-                        )
-                    )
-                note_detail = note_detail_from_html or note_detail_from_api
-                if note_detail:
-                    note_detail.update(
-                        {"xsec_token": xsec_token, "xsec_source": xsec_source}
-                    )
-                    return note_detail
-            except DataFetchError as ex:
                 utils.logger.error(
-                    f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error: {ex}"
+                    f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error, note_id: {note_id}"
                 )
-                return None
-            except KeyError as ex:
-                utils.logger.error(
-                    f"[XiaoHongShuCrawler.get_note_detail_async_task] have not fund note detail note_id:{note_id}, err: {ex}"
+            if not note_detail_from_html:
+                # 如果网页版笔记详情获取失败，则尝试API获取
+                note_detail_from_api: Optional[Dict] = (
+                    await self.xhs_client.get_note_by_id(
+                        note_id, xsec_source, xsec_token
+                    )
                 )
-                return None
+            note_detail = note_detail_from_html or note_detail_from_api
+            if note_detail:
+                note_detail.update(
+                    {"xsec_token": xsec_token, "xsec_source": xsec_source}
+                )
+                return note_detail
+        except DataFetchError as ex:
+            utils.logger.error(
+                f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error: {ex}"
+            )
+            return None
+        except KeyError as ex:
+            utils.logger.error(
+                f"[XiaoHongShuCrawler.get_note_detail_async_task] have not fund note detail note_id:{note_id}, err: {ex}"
+            )
+            return None
 
     async def batch_get_note_comments(
         self, note_list: List[str], xsec_tokens: List[str]
     ):
         """Batch get note comments"""
-        if not config.ENABLE_GET_COMMENTS:
+        if not crawl_settings.enable_get_comments:
             utils.logger.info(
                 f"[XiaoHongShuCrawler.batch_get_note_comments] Crawling comment mode is not enabled"
             )
@@ -346,38 +375,32 @@ class XiaoHongShuCrawler(AbstractCrawler):
         utils.logger.info(
             f"[XiaoHongShuCrawler.batch_get_note_comments] Begin batch get note comments, note list: {note_list}"
         )
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for index, note_id in enumerate(note_list):
-            task = asyncio.create_task(
-                self.get_comments(
-                    note_id=note_id, xsec_token=xsec_tokens[index], semaphore=semaphore
-                ),
-                name=note_id,
-            )
-            task_list.append(task)
-        await asyncio.gather(*task_list)
+        await map_bounded(
+            lambda note: self.get_comments(note_id=note[0], xsec_token=note[1]),
+            zip(note_list, xsec_tokens),
+            concurrency=crawl_settings.max_concurrency_num,
+            name="xhs_note_comments",
+        )
 
     async def get_comments(
-        self, note_id: str, xsec_token: str, semaphore: asyncio.Semaphore
+        self, note_id: str, xsec_token: str
     ):
         """Get note comments with keyword filtering and quantity limitation"""
-        async with semaphore:
-            utils.logger.info(
-                f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}"
-            )
-            # When proxy is not enabled, increase the crawling interval
-            if config.ENABLE_IP_PROXY:
-                crawl_interval = random.random()
-            else:
-                crawl_interval = random.uniform(1, config.CRAWLER_MAX_SLEEP_SEC)
-            await self.xhs_client.get_note_all_comments(
-                note_id=note_id,
-                xsec_token=xsec_token,
-                crawl_interval=crawl_interval,
-                callback=xhs_store.batch_update_xhs_note_comments,
-                max_count=CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-            )
+        utils.logger.info(
+            f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}"
+        )
+        # When proxy is not enabled, increase the crawling interval
+        if crawl_settings.enable_ip_proxy:
+            crawl_interval = random.random()
+        else:
+            crawl_interval = random.uniform(1, crawl_settings.crawler_max_sleep_sec)
+        await self.xhs_client.get_note_all_comments(
+            note_id=note_id,
+            xsec_token=xsec_token,
+            crawl_interval=crawl_interval,
+            callback=xhs_store.batch_update_xhs_note_comments,
+            max_count=crawl_settings.crawler_max_comments_count_singlenotes,
+        )
 
     @staticmethod
     def format_proxy_info(
@@ -427,11 +450,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
         utils.logger.info(
             "[XiaoHongShuCrawler.launch_browser] Begin create browser context ..."
         )
-        if config.SAVE_LOGIN_STATE:
+        if crawl_settings.save_login_state:
             # feat issue #14
             # we will save login state to avoid login every time
             user_data_dir = os.path.join(
-                os.getcwd(), "browser_data", config.USER_DATA_DIR % config.PLATFORM
+                os.getcwd(), "browser_data", crawl_settings.user_data_dir % crawl_settings.platform
             )  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
@@ -449,13 +472,28 @@ class XiaoHongShuCrawler(AbstractCrawler):
             )
             return browser_context
 
+    @staticmethod
+    async def init_browser_context(browser_context: BrowserContext) -> None:
+        """Prepare a new browser context before opening the index page"""
+        # add a cookie attribute webId to avoid the appearance of a sliding captcha on the webpage
+        await browser_context.add_cookies(
+            [
+                {
+                    "name": "webId",
+                    "value": "xxx123",  # any value
+                    "domain": ".xiaohongshu.com",
+                    "path": "/",
+                }
+            ]
+        )
+
     async def close(self):
         """Close browser context"""
         await self.browser_context.close()
         utils.logger.info("[XiaoHongShuCrawler.close] Browser context closed ...")
 
     async def get_notice_media(self, note_detail: Dict):
-        if not config.ENABLE_GET_IMAGES:
+        if not crawl_settings.enable_get_images:
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_notice_media] Crawling image mode is not enabled"
             )
@@ -469,7 +507,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         :param note_item:
         :return:
         """
-        if not config.ENABLE_GET_IMAGES:
+        if not crawl_settings.enable_get_images:
             return
         note_id = note_item.get("note_id")
         image_list: List[Dict] = note_item.get("image_list", [])
@@ -498,7 +536,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         :param note_item:
         :return:
         """
-        if not config.ENABLE_GET_IMAGES:
+        if not crawl_settings.enable_get_images:
             return
         note_id = note_item.get("note_id")
 
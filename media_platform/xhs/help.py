@@ -14,9 +14,11 @@ import json
 import random
 import time
 import urllib.parse
+from typing import Dict
 
 from model.m_xiaohongshu import NoteUrlInfo
-from tools.crawler_util import extract_url_params_to_dict
+from tools.crawler_util import extract_url_params_to_dict, transform_keys_to_snake
+from tools.embedded_json import extract_embedded_json
 
 
 def sign(a1="", b1="", x_s="", x_t=""):
@@ -306,6 +308,23 @@ def parse_note_info_from_note_url(url: str) -> NoteUrlInfo:
     return NoteUrlInfo(note_id=note_id, xsec_token=xsec_token, xsec_source=xsec_source)
 
 
+def parse_note_detail_from_html(html: str, note_id: str) -> Dict:
+    """
+    从笔记详情页HTML的 window.__INITIAL_STATE__ 中解析笔记详情
+    只解析 note.noteDetailMap[note_id].note 这一棵子树并把字段名转换为下划线，页面中其余的状态不做解析
+    Args:
+        html: 笔记详情页HTML
+        note_id: 笔记ID
+
+    Returns:
+        笔记详情，页面中没有该笔记时返回空字典
+
+    """
+    note = extract_embedded_json(html, "window.__INITIAL_STATE__=", ("noteDetailMap", note_id, "note"), undefined='""')
+    if not note:
+        return {}
+    return transform_keys_to_snake(note)
+
 if __name__ == '__main__':
     _img_url = "https://sns-img-bd.xhscdn.com/7a3abfaf-90c1-a828-5de7-022c80b92aa3"
     # 获取一个图片地址在多个cdn下的url地址
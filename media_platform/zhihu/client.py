@@ -12,7 +12,7 @@
 # -*- coding: utf-8 -*-
 import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
 import httpx
@@ -20,11 +20,15 @@ from httpx import Response
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
+from tools.concurrency import expand_sub_comments
+from tools.json_codec import response_json
+from tools.metrics import instrument_request, record_retry, timed
+from tools.session_guard import session_guarded
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
@@ -38,7 +42,7 @@ class ZhiHuClient(AbstractApiClient):
             proxies=None,
             *,
             headers: Dict[str, str],
-            playwright_page: Page,
+            playwright_page: Optional[Page],
             cookie_dict: Dict[str, str],
     ):
         self.proxies = proxies
@@ -47,6 +51,7 @@ class ZhiHuClient(AbstractApiClient):
         self.cookie_dict = cookie_dict
         self._extractor = ZhihuExtractor()
 
+    @timed("sign_seconds", platform="zhihu", method="_pre_headers")
     async def _pre_headers(self, url: str) -> Dict:
         """
         请求头参数签名
@@ -64,7 +69,9 @@ class ZhiHuClient(AbstractApiClient):
         headers['x-zse-96'] = sign_res["x-zse-96"]
         return headers
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @session_guarded
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1), before_sleep=record_retry)
+    @instrument_request("zhihu")
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
         封装httpx的公共请求方法，对请求响应做一些处理
@@ -97,7 +104,7 @@ class ZhiHuClient(AbstractApiClient):
         if return_response:
             return response.text
         try:
-            data: Dict = response.json()
+            data: Dict = response_json(response)
             if data.get("error"):
                 utils.logger.error(f"[ZhiHuClient.request] Request error: {data}")
                 raise DataFetchError(data.get("error", {}).get("message"))
@@ -107,6 +114,7 @@ class ZhiHuClient(AbstractApiClient):
             raise DataFetchError(response.text)
 
 
+    @session_guarded
     async def get(self, uri: str, params=None, **kwargs) -> Union[Response, Dict, str]:
         """
         GET请求，对请求头签名
@@ -308,14 +316,12 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
+        if not crawl_settings.enable_get_sub_comments:
             return []
 
-        all_sub_comments: List[ZhihuComment] = []
-        for parment_comment in comments:
+        async def walk(parment_comment: ZhihuComment) -> AsyncIterator[List[ZhihuComment]]:
             if parment_comment.sub_comment_count == 0:
-                continue
-
+                return
             is_end: bool = False
             offset: str = ""
             limit: int = 10
@@ -330,13 +336,16 @@ class ZhiHuClient(AbstractApiClient):
 
                 if not sub_comments:
                     break
+                yield sub_comments
 
-                if callback:
-                    await callback(sub_comments)
+        async def on_sub_comments(parment_comment: ZhihuComment, sub_comments: List[ZhihuComment]) -> None:
+            if callback:
+                await callback(sub_comments)
 
-                all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
-        return all_sub_comments
+        # 不同一级评论的二级评论并发展开，回调顺序和逐条展开时一致
+        return await expand_sub_comments(comments, walk,
+                                         concurrency=crawl_settings.max_sub_comment_concurrency_num,
+                                         crawl_interval=crawl_interval, callback=on_sub_comments)
 
     async def get_creator_info(self, url_token: str) -> Optional[ZhihuCreator]:
         """
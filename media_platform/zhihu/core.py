@@ -13,19 +13,22 @@
 import asyncio
 import os
 import random
-from asyncio import Task
 from typing import Dict, List, Optional, Tuple, cast
 
-from playwright.async_api import (BrowserContext, BrowserType, Page,
-                                  async_playwright)
+from playwright.async_api import BrowserContext, BrowserType, Page
 
-import config
+from config.settings import crawl_settings
 from constant import zhihu as constant
 from base.base_crawler import AbstractCrawler
 from model.m_zhihu import ZhihuContent, ZhihuCreator
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import zhihu as zhihu_store
 from tools import utils
+from tools.account_pool import AccountPool
+from tools.browser_pool import open_browser
+from tools.concurrency import map_bounded, run_sources
+from tools.session_guard import SessionGuard
+from tools.storage_state import load_storage_state, save_storage_state
 from var import crawler_type_var, source_keyword_var
 
 from .client import ZhiHuClient
@@ -52,35 +55,38 @@ class ZhihuCrawler(AbstractCrawler):
 
         """
         playwright_proxy_format, httpx_proxy_format = None, None
-        if config.ENABLE_IP_PROXY:
-            ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
+        if crawl_settings.enable_ip_proxy:
+            ip_proxy_pool = await create_ip_pool(crawl_settings.ip_proxy_pool_count, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(ip_proxy_info)
 
-        async with async_playwright() as playwright:
-            # Launch a browser context.
-            chromium = playwright.chromium
-            self.browser_context = await self.launch_browser(
-                chromium,
-                None,
-                self.user_agent,
-                headless=config.HEADLESS
-            )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
+        if crawl_settings.browser_free_mode and await self.create_client_from_storage_state(httpx_proxy_format):
+            await self.crawl()
+            utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
+            return
 
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url, wait_until="domcontentloaded")
+        async with open_browser(
+            platform=crawl_settings.platform,
+            launcher=self.launch_browser,
+            user_agent=self.user_agent,
+            headless=crawl_settings.headless,
+            index_url=self.index_url,
+            goto_kwargs={"wait_until": "domcontentloaded"},
+            use_pool=crawl_settings.use_browser_pool,
+            persistent=crawl_settings.save_login_state,
+        ) as lease:
+            self.browser_context = lease.browser_context
+            self.context_page = lease.page
 
             # Create a client to interact with the zhihu website.
             self.zhihu_client = await self.create_zhihu_client(httpx_proxy_format)
             if not await self.zhihu_client.pong():
                 login_obj = ZhiHuLogin(
-                    login_type=config.LOGIN_TYPE,
+                    login_type=crawl_settings.login_type,
                     login_phone="",  # input your phone number
                     browser_context=self.browser_context,
                     context_page=self.context_page,
-                    cookie_str=config.COOKIES
+                    cookie_str=crawl_settings.cookies
                 )
                 await login_obj.begin()
                 await self.zhihu_client.update_cookies(browser_context=self.browser_context)
@@ -91,57 +97,116 @@ class ZhihuCrawler(AbstractCrawler):
             await asyncio.sleep(5)
             await self.zhihu_client.update_cookies(browser_context=self.browser_context)
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
-
+            # 之后的请求被风控时由 refresh_session 统一刷新登录态，并发的请求等待刷新完成后重试
+            self.zhihu_client.session_guard = SessionGuard("zhihu", self.refresh_session)
+            if crawl_settings.browser_free_mode:
+                # 保存登录态，下次运行时先尝试不启动浏览器
+                await save_storage_state(crawl_settings.platform, self.browser_context)
+            await self.crawl()
             utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
 
+    async def create_client_from_storage_state(self, httpx_proxy: Optional[str]) -> bool:
+        """
+        免浏览器模式：用保存的登录态(或配置的 COOKIES)直接创建 API 客户端，不启动浏览器
+        Returns:
+            登录态是否有效，无效时需要启动浏览器登录
+
+        """
+        stored_state = load_storage_state(crawl_settings.platform, crawl_settings.cookies)
+        if stored_state is None:
+            return False
+        self.browser_context = stored_state
+        self.context_page = None
+        self.zhihu_client = await self.create_zhihu_client(httpx_proxy)
+        if await self.zhihu_client.pong():
+            utils.logger.info("[ZhihuCrawler.create_client_from_storage_state] use stored login state, skip launching browser")
+            return True
+        utils.logger.info("[ZhihuCrawler.create_client_from_storage_state] stored login state expired, launch browser to login")
+        return False
+
+    async def crawl(self):
+        """按爬虫类型爬取数据，需要先创建好 API 客户端"""
+        if crawl_settings.enable_account_pool:
+            self.zhihu_client.account_pool = await AccountPool.from_login_sessions(
+                crawl_settings.platform, self.zhihu_client,
+                max_requests_per_sec=crawl_settings.account_max_requests_per_sec,
+                quarantine_sec=crawl_settings.account_quarantine_sec,
+            )
+        crawler_type_var.set(crawl_settings.crawler_type)
+        if crawl_settings.crawler_type == "search":
+            # Search for notes and retrieve their comment information.
+            await self.search()
+        elif crawl_settings.crawler_type == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_notes()
+        elif crawl_settings.crawler_type == "creator":
+            # Get creator's information and their notes and comments
+            await self.get_creators_and_notes()
+        else:
+            pass
+
+    async def refresh_session(self) -> None:
+        """
+        请求被风控时由 SessionGuard 调用(同一时间只有一次)：重新打开页面更新 cookies，登录态失效时重新登录
+        """
+        await self.zhihu_client.update_cookies(browser_context=self.browser_context)
+        if not await self.zhihu_client.pong():
+            login_obj = ZhiHuLogin(
+                login_type=crawl_settings.login_type,
+                login_phone="",
+                browser_context=self.browser_context,
+                context_page=self.context_page,
+                cookie_str=crawl_settings.cookies,
+            )
+            await login_obj.begin()
+        # 和启动时一样打开搜索页面获取搜索接口需要的cookies
+        await self.context_page.goto(f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content",
+                                     wait_until="domcontentloaded")
+        await asyncio.sleep(5)
+        await self.zhihu_client.update_cookies(browser_context=self.browser_context)
+
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
         utils.logger.info("[ZhihuCrawler.search] Begin search zhihu keywords")
         zhihu_limit_count = 20  # zhihu limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < zhihu_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = zhihu_limit_count
-        start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[ZhihuCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * zhihu_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[ZhihuCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
-
-                try:
-                    utils.logger.info(f"[ZhihuCrawler.search] search zhihu keyword: {keyword}, page: {page}")
-                    content_list: List[ZhihuContent]  = await self.zhihu_client.get_note_by_keyword(
-                        keyword=keyword,
-                        page=page,
-                    )
-                    utils.logger.info(f"[ZhihuCrawler.search] Search contents :{content_list}")
-                    if not content_list:
-                        utils.logger.info("No more content!")
-                        break
-
-                    page += 1
-                    for content in content_list:
-                        await zhihu_store.update_zhihu_content(content)
-
-                    await self.batch_get_content_comments(content_list)
-                except DataFetchError:
-                    utils.logger.error("[ZhihuCrawler.search] Search content error")
-                    return
+        if crawl_settings.crawler_max_notes_count < zhihu_limit_count:
+            crawl_settings.crawler_max_notes_count = zhihu_limit_count
+        # 不同关键词的搜索互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.keywords.split(","), self.search_keyword,
+                          concurrency=crawl_settings.max_source_concurrency_num)
+
+    async def search_keyword(self, keyword: str) -> None:
+        """Search for notes of one keyword and retrieve their comment information."""
+        zhihu_limit_count = 20  # zhihu limit page fixed value
+        start_page = crawl_settings.start_page
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[ZhihuCrawler.search_keyword] Current search keyword: {keyword}")
+        page = 1
+        while (page - start_page + 1) * zhihu_limit_count <= crawl_settings.crawler_max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[ZhihuCrawler.search_keyword] Skip page {page}")
+                page += 1
+                continue
+
+            try:
+                utils.logger.info(f"[ZhihuCrawler.search_keyword] search zhihu keyword: {keyword}, page: {page}")
+                content_list: List[ZhihuContent]  = await self.zhihu_client.get_note_by_keyword(
+                    keyword=keyword,
+                    page=page,
+                )
+                utils.logger.info(f"[ZhihuCrawler.search_keyword] Search contents :{content_list}")
+                if not content_list:
+                    utils.logger.info("No more content!")
+                    break
+
+                page += 1
+                for content in content_list:
+                    await zhihu_store.update_zhihu_content(content)
+
+                await self.batch_get_content_comments(content_list)
+            except DataFetchError:
+                utils.logger.error("[ZhihuCrawler.search_keyword] Search content error")
+                return
 
     async def batch_get_content_comments(self, content_list: List[ZhihuContent]):
         """
@@ -152,34 +217,28 @@ class ZhihuCrawler(AbstractCrawler):
         Returns:
 
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not crawl_settings.enable_get_comments:
             utils.logger.info(f"[ZhihuCrawler.batch_get_content_comments] Crawling comment mode is not enabled")
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for content_item in content_list:
-            task = asyncio.create_task(self.get_comments(content_item, semaphore), name=content_item.content_id)
-            task_list.append(task)
-        await asyncio.gather(*task_list)
+        await map_bounded(self.get_comments, content_list,
+                          concurrency=crawl_settings.max_concurrency_num, name="zhihu_content_comments")
 
-    async def get_comments(self, content_item: ZhihuContent, semaphore: asyncio.Semaphore):
+    async def get_comments(self, content_item: ZhihuContent):
         """
         Get note comments with keyword filtering and quantity limitation
         Args:
             content_item:
-            semaphore:
 
         Returns:
 
         """
-        async with semaphore:
-            utils.logger.info(f"[ZhihuCrawler.get_comments] Begin get note id comments {content_item.content_id}")
-            await self.zhihu_client.get_note_all_comments(
-                content=content_item,
-                crawl_interval=random.random(),
-                callback=zhihu_store.batch_update_zhihu_note_comments
-            )
+        utils.logger.info(f"[ZhihuCrawler.get_comments] Begin get note id comments {content_item.content_id}")
+        await self.zhihu_client.get_note_all_comments(
+            content=content_item,
+            crawl_interval=random.random(),
+            callback=zhihu_store.batch_update_zhihu_note_comments
+        )
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -188,84 +247,92 @@ class ZhihuCrawler(AbstractCrawler):
 
         """
         utils.logger.info("[ZhihuCrawler.get_creators_and_notes] Begin get xiaohongshu creators")
-        for user_link in config.ZHIHU_CREATOR_URL_LIST:
-            utils.logger.info(f"[ZhihuCrawler.get_creators_and_notes] Begin get creator {user_link}")
-            user_url_token = user_link.split("/")[-1]
-            # get creator detail info from web html content
-            createor_info: ZhihuCreator = await self.zhihu_client.get_creator_info(url_token=user_url_token)
-            if not createor_info:
-                utils.logger.info(f"[ZhihuCrawler.get_creators_and_notes] Creator {user_url_token} not found")
-                continue
+        # 不同创作者的爬取互不依赖，按 MAX_SOURCE_CONCURRENCY_NUM 并发
+        await run_sources(crawl_settings.zhihu_creator_url_list, self.get_creator_and_notes,
+                          concurrency=crawl_settings.max_source_concurrency_num)
+
+    async def get_creator_and_notes(self, user_link: str) -> None:
+        """
+        Get one creator's information and their notes and comments
+        Args:
+            user_link: creator home page url
 
-            utils.logger.info(f"[ZhihuCrawler.get_creators_and_notes] Creator info: {createor_info}")
-            await zhihu_store.save_creator(creator=createor_info)
+        Returns:
 
-            # 默认只提取回答信息，如果需要文章和视频，把下面的注释打开即可
+        """
+        utils.logger.info(f"[ZhihuCrawler.get_creator_and_notes] Begin get creator {user_link}")
+        user_url_token = user_link.split("/")[-1]
+        # get creator detail info from web html content
+        createor_info: ZhihuCreator = await self.zhihu_client.get_creator_info(url_token=user_url_token)
+        if not createor_info:
+            utils.logger.info(f"[ZhihuCrawler.get_creator_and_notes] Creator {user_url_token} not found")
+            return
 
-            # Get all anwser information of the creator
-            all_content_list = await self.zhihu_client.get_all_anwser_by_creator(
-                creator=createor_info,
-                crawl_interval=random.random(),
-                callback=zhihu_store.batch_update_zhihu_contents
-            )
+        utils.logger.info(f"[ZhihuCrawler.get_creator_and_notes] Creator info: {createor_info}")
+        await zhihu_store.save_creator(creator=createor_info)
 
+        # 默认只提取回答信息，如果需要文章和视频，把下面的注释打开即可
 
-            # Get all articles of the creator's contents
-            # all_content_list = await self.zhihu_client.get_all_articles_by_creator(
-            #     creator=createor_info,
-            #     crawl_interval=random.random(),
-            #     callback=zhihu_store.batch_update_zhihu_contents
-            # )
+        # Get all anwser information of the creator
+        all_content_list = await self.zhihu_client.get_all_anwser_by_creator(
+            creator=createor_info,
+            crawl_interval=random.random(),
+            callback=zhihu_store.batch_update_zhihu_contents
+        )
 
-            # Get all videos of the creator's contents
-            # all_content_list = await self.zhihu_client.get_all_videos_by_creator(
-            #     creator=createor_info,
-            #     crawl_interval=random.random(),
-            #     callback=zhihu_store.batch_update_zhihu_contents
-            # )
 
-            # Get all comments of the creator's contents
-            await self.batch_get_content_comments(all_content_list)
+        # Get all articles of the creator's contents
+        # all_content_list = await self.zhihu_client.get_all_articles_by_creator(
+        #     creator=createor_info,
+        #     crawl_interval=random.random(),
+        #     callback=zhihu_store.batch_update_zhihu_contents
+        # )
 
-    async def get_note_detail(
-        self, full_note_url: str, semaphore: asyncio.Semaphore
-    ) -> Optional[ZhihuContent]:
+        # Get all videos of the creator's contents
+        # all_content_list = await self.zhihu_client.get_all_videos_by_creator(
+        #     creator=createor_info,
+        #     crawl_interval=random.random(),
+        #     callback=zhihu_store.batch_update_zhihu_contents
+        # )
+
+        # Get all comments of the creator's contents
+        await self.batch_get_content_comments(all_content_list)
+
+    async def get_note_detail(self, full_note_url: str) -> Optional[ZhihuContent]:
         """
         Get note detail
         Args:
             full_note_url: str
-            semaphore:
 
         Returns:
 
         """
-        async with semaphore:
+        utils.logger.info(
+            f"[ZhihuCrawler.get_specified_notes] Begin get specified note {full_note_url}"
+        )
+        # judge note type
+        note_type: str = judge_zhihu_url(full_note_url)
+        if note_type == constant.ANSWER_NAME:
+            question_id = full_note_url.split("/")[-3]
+            answer_id = full_note_url.split("/")[-1]
             utils.logger.info(
-                f"[ZhihuCrawler.get_specified_notes] Begin get specified note {full_note_url}"
+                f"[ZhihuCrawler.get_specified_notes] Get answer info, question_id: {question_id}, answer_id: {answer_id}"
             )
-            # judge note type
-            note_type: str = judge_zhihu_url(full_note_url)
-            if note_type == constant.ANSWER_NAME:
-                question_id = full_note_url.split("/")[-3]
-                answer_id = full_note_url.split("/")[-1]
-                utils.logger.info(
-                    f"[ZhihuCrawler.get_specified_notes] Get answer info, question_id: {question_id}, answer_id: {answer_id}"
-                )
-                return await self.zhihu_client.get_answer_info(question_id, answer_id)
+            return await self.zhihu_client.get_answer_info(question_id, answer_id)
 
-            elif note_type == constant.ARTICLE_NAME:
-                article_id = full_note_url.split("/")[-1]
-                utils.logger.info(
-                    f"[ZhihuCrawler.get_specified_notes] Get article info, article_id: {article_id}"
-                )
-                return await self.zhihu_client.get_article_info(article_id)
+        elif note_type == constant.ARTICLE_NAME:
+            article_id = full_note_url.split("/")[-1]
+            utils.logger.info(
+                f"[ZhihuCrawler.get_specified_notes] Get article info, article_id: {article_id}"
+            )
+            return await self.zhihu_client.get_article_info(article_id)
 
-            elif note_type == constant.VIDEO_NAME:
-                video_id = full_note_url.split("/")[-1]
-                utils.logger.info(
-                    f"[ZhihuCrawler.get_specified_notes] Get video info, video_id: {video_id}"
-                )
-                return await self.zhihu_client.get_video_info(video_id)
+        elif note_type == constant.VIDEO_NAME:
+            video_id = full_note_url.split("/")[-1]
+            utils.logger.info(
+                f"[ZhihuCrawler.get_specified_notes] Get video info, video_id: {video_id}"
+            )
+            return await self.zhihu_client.get_video_info(video_id)
 
     async def get_specified_notes(self):
         """
@@ -273,22 +340,18 @@ class ZhihuCrawler(AbstractCrawler):
         Returns:
 
         """
-        get_note_detail_task_list = []
-        for full_note_url in config.ZHIHU_SPECIFIED_ID_LIST:
-            # remove query params
-            full_note_url = full_note_url.split("?")[0]
-            crawler_task = self.get_note_detail(
-                full_note_url=full_note_url,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
-            )
-            get_note_detail_task_list.append(crawler_task)
-
         need_get_comment_notes: List[ZhihuContent] = []
-        note_details = await asyncio.gather(*get_note_detail_task_list)
+        note_details = await map_bounded(
+            self.get_note_detail,
+            # remove query params
+            [full_note_url.split("?")[0] for full_note_url in crawl_settings.zhihu_specified_id_list],
+            concurrency=crawl_settings.max_concurrency_num,
+            name="zhihu_content_detail",
+        )
         for index, note_detail in enumerate(note_details):
             if not note_detail:
                 utils.logger.info(
-                    f"[ZhihuCrawler.get_specified_notes] Note {config.ZHIHU_SPECIFIED_ID_LIST[index]} not found"
+                    f"[ZhihuCrawler.get_specified_notes] Note {crawl_settings.zhihu_specified_id_list[index]} not found"
                 )
                 continue
 
@@ -343,11 +406,11 @@ class ZhihuCrawler(AbstractCrawler):
     ) -> BrowserContext:
         """Launch browser and create browser context"""
         utils.logger.info("[ZhihuCrawler.launch_browser] Begin create browser context ...")
-        if config.SAVE_LOGIN_STATE:
+        if crawl_settings.save_login_state:
             # feat issue #14
             # we will save login state to avoid login every time
             user_data_dir = os.path.join(os.getcwd(), "browser_data",
-                                         config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+                                         crawl_settings.user_data_dir % crawl_settings.platform)  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -10,7 +10,6 @@
 
 
 # -*- coding: utf-8 -*-
-import json
 from typing import Dict, List, Optional
 from urllib.parse import parse_qs, urlparse
 
@@ -19,6 +18,7 @@ from parsel import Selector
 
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
+from tools import json_codec
 from tools.crawler_util import extract_text_from_html
 
 ZHIHU_SGIN_JS = None
@@ -332,7 +332,7 @@ class ZhihuExtractor:
         if not js_init_data:
             return None
 
-        js_init_data_dict: Dict = json.loads(js_init_data)
+        js_init_data_dict: Dict = json_codec.loads(js_init_data)
         users_info: Dict = js_init_data_dict.get("initialState", {}).get("entities", {}).get("users", {})
         if not users_info:
             return None
@@ -389,7 +389,7 @@ class ZhihuExtractor:
         js_init_data: str = Selector(text=html_content).xpath("//script[@id='js-initialData']/text()").get(default="")
         if not js_init_data:
             return None
-        json_data: Dict = json.loads(js_init_data)
+        json_data: Dict = json_codec.loads(js_init_data)
         answer_info: Dict = json_data.get("initialState", {}).get("entities", {}).get("answers", {})
         if not answer_info:
             return None
@@ -408,7 +408,7 @@ class ZhihuExtractor:
         js_init_data: str = Selector(text=html_content).xpath("//script[@id='js-initialData']/text()").get(default="")
         if not js_init_data:
             return None
-        json_data: Dict = json.loads(js_init_data)
+        json_data: Dict = json_codec.loads(js_init_data)
         article_info: Dict = json_data.get("initialState", {}).get("entities", {}).get("articles", {})
         if not article_info:
             return None
@@ -427,7 +427,7 @@ class ZhihuExtractor:
         js_init_data: str = Selector(text=html_content).xpath("//script[@id='js-initialData']/text()").get(default="")
         if not js_init_data:
             return None
-        json_data: Dict = json.loads(js_init_data)
+        json_data: Dict = json_codec.loads(js_init_data)
         zvideo_info: Dict = json_data.get("initialState", {}).get("entities", {}).get("zvideos", {})
         users: Dict = json_data.get("initialState", {}).get("entities", {}).get("users", {})
         if not zvideo_info:
@@ -8,10 +8,17 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。  
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
+from .base_proxy import IpCache, IpGetError, ProxyProvider
+from .types import IpInfoModel, ProviderNameEnum
 from .proxy_manager import ProxyManager, ProxyInfo, ProxyStrategy
 from .proxy_api import router as proxy_router
 
 __all__ = [
+    "IpCache",
+    "IpGetError",
+    "ProxyProvider",
+    "IpInfoModel",
+    "ProviderNameEnum",
     "ProxyManager",
     "ProxyInfo", 
     "ProxyStrategy",
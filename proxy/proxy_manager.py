@@ -81,7 +81,11 @@ class ProxyStrategy(ABC):
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
-        self.db: AsyncMysqlDB = media_crawler_db_var.get()
+
+    @property
+    def db(self) -> AsyncMysqlDB:
+        # 模块导入时就会创建全局实例，此时数据库还没有初始化，使用时再获取
+        return media_crawler_db_var.get()
     
     @abstractmethod
     async def select_proxy(self, platform: str = None, **kwargs) -> Optional[ProxyInfo]:
@@ -300,10 +304,13 @@ class ProxyManager:
     """代理管理器"""
     
     def __init__(self):
-        self.db: AsyncMysqlDB = media_crawler_db_var.get()
         self.strategies: Dict[str, ProxyStrategy] = {}
         self._load_strategies()
     
+    @property
+    def db(self) -> AsyncMysqlDB:
+        return media_crawler_db_var.get()
+
     def _load_strategies(self):
         """加载策略"""
         strategy_classes = {
@@ -13,3 +13,34 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 17:29
 # @Desc    :
+from tools import csv_sink, parquet_sink, sqlite_sink
+
+
+def check_store_dependencies(save_data_option: str) -> None:
+    """
+    爬虫启动前检查存储方式需要的可选依赖，parquet 存储需要 pyarrow
+    Args:
+        save_data_option: 存储方式
+
+    Returns:
+
+    """
+    if save_data_option == "parquet":
+        parquet_sink.check_pyarrow()
+
+
+async def close_store_sinks(save_data_option: str) -> None:
+    """
+    爬虫结束时写入 csv、parquet、sqlite 存储中还在缓冲的数据，parquet 文件在关闭时才写入文件尾
+    Args:
+        save_data_option: 存储方式
+
+    Returns:
+
+    """
+    if save_data_option == "csv":
+        await csv_sink.get_csv_sink().close()
+    elif save_data_option == "parquet":
+        await parquet_sink.get_parquet_sink().close()
+    elif save_data_option == "sqlite":
+        await sqlite_sink.get_sqlite_sink().close()
@@ -16,7 +16,8 @@
 
 from typing import List
 
-import config
+from config.settings import crawl_settings
+from tools.task_progress import track_store
 from var import source_keyword_var
 
 from .bilibili_store_impl import *
@@ -28,16 +29,18 @@ class BiliStoreFactory:
         "csv": BiliCsvStoreImplement,
         "db": BiliDbStoreImplement,
         "json": BiliJsonStoreImplement,
+        "parquet": BiliParquetStoreImplement,
+        "sqlite": BiliSqliteStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = BiliStoreFactory.STORES.get(crawl_settings.save_data_option)
         if not store_class:
             raise ValueError(
-                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json ..."
+                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or parquet or sqlite ..."
             )
-        return store_class()
+        return track_store(store_class())
 
 
 async def update_bilibili_video(video_item: Dict):
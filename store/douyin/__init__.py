@@ -15,7 +15,8 @@
 # @Desc    :
 from typing import List
 
-import config
+from config.settings import crawl_settings
+from tools.task_progress import track_store
 from var import source_keyword_var
 
 from .douyin_store_impl import *
@@ -26,16 +27,18 @@ class DouyinStoreFactory:
         "csv": DouyinCsvStoreImplement,
         "db": DouyinDbStoreImplement,
         "json": DouyinJsonStoreImplement,
+        "parquet": DouyinParquetStoreImplement,
+        "sqlite": DouyinSqliteStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = DouyinStoreFactory.STORES.get(crawl_settings.save_data_option)
         if not store_class:
             raise ValueError(
-                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json ..."
+                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or parquet or sqlite ..."
             )
-        return store_class()
+        return track_store(store_class())
 
 
 def _extract_comment_image_list(comment_item: Dict) -> List[str]:
@@ -15,7 +15,8 @@
 # @Desc    :
 from typing import List
 
-import config
+from config.settings import crawl_settings
+from tools.task_progress import track_store
 from var import source_keyword_var
 
 from .kuaishou_store_impl import *
@@ -25,16 +26,18 @@ class KuaishouStoreFactory:
     STORES = {
         "csv": KuaishouCsvStoreImplement,
         "db": KuaishouDbStoreImplement,
-        "json": KuaishouJsonStoreImplement
+        "json": KuaishouJsonStoreImplement,
+        "parquet": KuaishouParquetStoreImplement,
+        "sqlite": KuaishouSqliteStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = KuaishouStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = KuaishouStoreFactory.STORES.get(crawl_settings.save_data_option)
         if not store_class:
             raise ValueError(
-                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or parquet or sqlite ...")
+        return track_store(store_class())
 
 
 async def update_kuaishou_video(video_item: Dict):
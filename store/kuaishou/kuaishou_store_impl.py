@@ -14,17 +14,15 @@
 # @Time    : 2024/1/14 20:03
 # @Desc    : 快手存储实现类
 import asyncio
-import csv
-import json
 import os
 import pathlib
 from typing import Dict
 
 import aiofiles
 
-import config
+from config.settings import crawl_settings
 from base.base_crawler import AbstractStore
-from tools import utils, words
+from tools import csv_sink, json_codec, parquet_sink, sqlite_sink, utils, words
 from var import crawler_type_var
 
 
@@ -71,13 +69,9 @@ class KuaishouCsvStoreImplement(AbstractStore):
         Returns: no returns
 
         """
-        pathlib.Path(self.csv_store_path).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(store_type=store_type)
-        async with aiofiles.open(save_file_name, mode='a+', encoding="utf-8-sig", newline="") as f:
-            writer = csv.writer(f)
-            if await f.tell() == 0:
-                await writer.writerow(save_item.keys())
-            await writer.writerow(save_item.values())
+        await csv_sink.get_csv_sink().write(save_file_name, save_item,
+                                            rotate_key=(self.csv_store_path, crawler_type_var.get(), store_type))
 
     async def store_content(self, content_item: Dict):
         """
@@ -153,7 +147,6 @@ class KuaishouJsonStoreImplement(AbstractStore):
     words_store_path: str = "data/kuaishou/words"
     lock = asyncio.Lock()
     file_count:int=calculate_number_of_files(json_store_path)
-    WordCloud = words.AsyncWordCloudGenerator()
 
 
 
@@ -190,15 +183,15 @@ class KuaishouJsonStoreImplement(AbstractStore):
         async with self.lock:
             if os.path.exists(save_file_name):
                 async with aiofiles.open(save_file_name, 'r', encoding='utf-8') as file:
-                    save_data = json.loads(await file.read())
+                    save_data = json_codec.loads(await file.read())
 
             save_data.append(save_item)
             async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
-                await file.write(json.dumps(save_data, ensure_ascii=False))
+                await file.write(json_codec.dumps(save_data))
 
-            if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
+            if crawl_settings.enable_get_comments and crawl_settings.enable_get_wordcloud:
                 try:
-                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
+                    await words.get_word_frequency_engine().add_item(save_item, words_file_name_prefix)
                 except:
                     pass
 
@@ -233,4 +226,109 @@ class KuaishouJsonStoreImplement(AbstractStore):
         Returns:
 
         """
-        await self.save_data_to_json(creator, "creator")
\ No newline at end of file
+        await self.save_data_to_json(creator, "creator")
+
+
+class KuaishouParquetStoreImplement(AbstractStore):
+    parquet_store_path: str = "data/kuaishou/parquet"
+    file_count: int = calculate_number_of_files(parquet_store_path)
+    # 数据类型 -> schema/tables.sql 中的表，用于确定字段类型
+    table_names: Dict[str, str] = {
+        "contents": "kuaishou_video",
+        "comments": "kuaishou_video_comment",
+    }
+
+    def make_save_file_name(self, store_type: str) -> str:
+        """
+        make save file name by store type
+        Args:
+            store_type: contents or comments
+
+        Returns: eg: data/kuaishou/parquet/1_search_comments_20240114.parquet ...
+
+        """
+        return f"{self.parquet_store_path}/{self.file_count}_{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}.parquet"
+
+    async def save_data_to_parquet(self, save_item: Dict, store_type: str):
+        """
+        Save data in Parquet format, rows are buffered and written as row groups
+        Args:
+            save_item:  save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: no returns
+
+        """
+        save_file_name = self.make_save_file_name(store_type=store_type)
+        await parquet_sink.get_parquet_sink().write(save_file_name, save_item, table_name=self.table_names[store_type],
+                                                    rotate_key=(self.parquet_store_path, crawler_type_var.get(), store_type))
+
+    async def store_content(self, content_item: Dict):
+        """
+        Kuaishou content Parquet storage implementation
+        Args:
+            content_item: note item dict
+
+        Returns:
+
+        """
+        await self.save_data_to_parquet(save_item=content_item, store_type="contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        Kuaishou comment Parquet storage implementation
+        Args:
+            comment_item: comment item dict
+
+        Returns:
+
+        """
+        await self.save_data_to_parquet(save_item=comment_item, store_type="comments")
+
+    async def store_creator(self, creator: Dict):
+        pass
+
+
+class KuaishouSqliteStoreImplement(AbstractStore):
+    # 数据类型 -> schema/tables.sql 中的表
+    table_names: Dict[str, str] = {
+        "contents": "kuaishou_video",
+        "comments": "kuaishou_video_comment",
+    }
+
+    async def save_data_to_sqlite(self, save_item: Dict, store_type: str):
+        """
+        Save data to the local SQLite database, rows with the same unique key are updated
+        Args:
+            save_item:  save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: no returns
+
+        """
+        await sqlite_sink.get_sqlite_sink().upsert(self.table_names[store_type], save_item)
+
+    async def store_content(self, content_item: Dict):
+        """
+        Kuaishou content SQLite storage implementation
+        Args:
+            content_item: note item dict
+
+        Returns:
+
+        """
+        await self.save_data_to_sqlite(save_item=content_item, store_type="contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        Kuaishou comment SQLite storage implementation
+        Args:
+            comment_item: comment item dict
+
+        Returns:
+
+        """
+        await self.save_data_to_sqlite(save_item=comment_item, store_type="comments")
+
+    async def store_creator(self, creator: Dict):
+        pass
@@ -12,7 +12,9 @@
 # -*- coding: utf-8 -*-
 from typing import List
 
+from config.settings import crawl_settings
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from tools.task_progress import track_store
 from var import source_keyword_var
 
 from . import tieba_store_impl
@@ -23,16 +25,18 @@ class TieBaStoreFactory:
     STORES = {
         "csv": TieBaCsvStoreImplement,
         "db": TieBaDbStoreImplement,
-        "json": TieBaJsonStoreImplement
+        "json": TieBaJsonStoreImplement,
+        "parquet": TieBaParquetStoreImplement,
+        "sqlite": TieBaSqliteStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = TieBaStoreFactory.STORES.get(crawl_settings.save_data_option)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or parquet or sqlite ...")
+        return track_store(store_class())
 
 
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
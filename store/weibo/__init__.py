@@ -17,6 +17,8 @@
 import re
 from typing import List
 
+from config.settings import crawl_settings
+from tools.task_progress import track_store
 from var import source_keyword_var
 
 from .weibo_store_image import *
@@ -28,15 +30,17 @@ class WeibostoreFactory:
         "csv": WeiboCsvStoreImplement,
         "db": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "parquet": WeiboParquetStoreImplement,
+        "sqlite": WeiboSqliteStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = WeibostoreFactory.STORES.get(crawl_settings.save_data_option)
         if not store_class:
             raise ValueError(
-                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or parquet or sqlite ...")
+        return track_store(store_class())
 
 
 async def batch_update_weibo_notes(note_list: List[Dict]):
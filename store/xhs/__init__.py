@@ -15,7 +15,9 @@
 # @Desc    :
 from typing import List
 
-import config
+from config.settings import crawl_settings
+from tools import json_codec
+from tools.task_progress import track_store
 from var import source_keyword_var
 
 from . import xhs_store_impl
@@ -27,15 +29,17 @@ class XhsStoreFactory:
     STORES = {
         "csv": XhsCsvStoreImplement,
         "db": XhsDbStoreImplement,
-        "json": XhsJsonStoreImplement
+        "json": XhsJsonStoreImplement,
+        "parquet": XhsParquetStoreImplement,
+        "sqlite": XhsSqliteStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = XhsStoreFactory.STORES.get(crawl_settings.save_data_option)
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or parquet or sqlite ...")
+        return track_store(store_class())
 
 
 def get_video_url_arr(note_item: Dict) -> List:
@@ -203,8 +207,7 @@ async def save_creator(user_id: str, creator: Dict):
         'follows': follows, # 关注数
         'fans': fans,  # 粉丝数
         'interaction': interaction, # 互动数
-        'tag_list': json.dumps({tag.get('tagType'): tag.get('name') for tag in creator.get('tags')},
-                               ensure_ascii=False), # 标签
+        'tag_list': json_codec.dumps({tag.get('tagType'): tag.get('name') for tag in creator.get('tags')}), # 标签
         "last_modify_ts": utils.get_current_timestamp(), # 最后更新时间戳（MediaCrawler程序生成的，主要用途在db存储的时候记录一条记录最新更新时间）
     }
     utils.logger.info(f"[store.xhs.save_creator] creator:{local_db_item}")
@@ -12,12 +12,15 @@
 # -*- coding: utf-8 -*-
 from typing import List
 
-import config
+from config.settings import crawl_settings
+from tools.task_progress import track_store
 from base.base_crawler import AbstractStore
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from store.zhihu.zhihu_store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuDbStoreImplement,
-                                          ZhihuJsonStoreImplement)
+                                          ZhihuJsonStoreImplement,
+                                          ZhihuParquetStoreImplement,
+                                          ZhihuSqliteStoreImplement)
 from tools import utils
 from var import source_keyword_var
 
@@ -26,15 +29,17 @@ class ZhihuStoreFactory:
     STORES = {
         "csv": ZhihuCsvStoreImplement,
         "db": ZhihuDbStoreImplement,
-        "json": ZhihuJsonStoreImplement
+        "json": ZhihuJsonStoreImplement,
+        "parquet": ZhihuParquetStoreImplement,
+        "sqlite": ZhihuSqliteStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
-        store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
+        store_class = ZhihuStoreFactory.STORES.get(crawl_settings.save_data_option)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or parquet or sqlite ...")
+        return track_store(store_class())
 
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     """
@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+import unittest
+
+from tools.account_pool import AccountPool, PooledAccount, clone_client
+from tools.session_guard import AccountBlockedError, session_guarded
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class FakeClient:
+    session_guard = None
+    account_pool = None
+
+    def __init__(self, name: str, blocked: bool = False):
+        self.name = name
+        self.blocked = blocked
+        self.headers = {"Cookie": ""}
+        self.cookie_dict = {}
+        self.calls = 0
+
+    @session_guarded
+    async def get(self, uri: str):
+        self.calls += 1
+        await asyncio.sleep(0.001)
+        if self.blocked:
+            raise AccountBlockedError(self.name)
+        return f"{self.name}:{uri}"
+
+    async def update_cookies(self, browser_context):
+        cookies = await browser_context.cookies()
+        self.cookie_dict = {cookie["name"]: cookie["value"] for cookie in cookies}
+        self.headers["Cookie"] = ";".join(f"{key}={value}" for key, value in self.cookie_dict.items())
+
+
+class TestAccountPool(unittest.TestCase):
+
+    def _crawl(self, clients, count: int):
+        async def main():
+            main_client = clients[0]
+            main_client.account_pool = AccountPool(
+                "test", [PooledAccount(client.name, client, min_interval=0.05) for client in clients], quarantine_sec=60,
+            )
+            start = time.perf_counter()
+            results = await asyncio.gather(*(main_client.get(str(i)) for i in range(count)))
+            return results, time.perf_counter() - start
+
+        return _run(main())
+
+    def test_spread_with_rate_budget(self):
+        clients = [FakeClient(f"a{i}") for i in range(3)]
+        results, elapsed = self._crawl(clients, 12)
+        self.assertEqual(len(results), 12)
+        self.assertEqual([client.calls for client in clients], [4, 4, 4])
+        # 每个账号 4 次请求间隔 0.05 秒，单账号需要 0.55 秒以上
+        self.assertLess(elapsed, 0.4)
+
+    def test_quarantine_blocked_account(self):
+        clients = [FakeClient("a0"), FakeClient("a1", blocked=True), FakeClient("a2")]
+        results, _ = self._crawl(clients, 6)
+        self.assertTrue(all(not result.startswith("a1") for result in results))
+        # 同时发出的请求已经分到 a1 的各自换账号重试，之后不再分到 a1
+        self.assertEqual(clients[1].calls, 2)
+        self.assertEqual(clients[0].calls + clients[2].calls, 6)
+
+    def test_all_blocked_raises(self):
+        clients = [FakeClient("a0", blocked=True), FakeClient("a1", blocked=True)]
+        with self.assertRaises(AccountBlockedError):
+            self._crawl(clients, 1)
+
+    def test_clone_client(self):
+        client = FakeClient("a0")
+        client.headers["Cookie"] = "a=1"
+        account_client = _run(clone_client(client, {"a": "2", "b": "3"}))
+        self.assertEqual(client.headers["Cookie"], "a=1")
+        self.assertEqual(account_client.headers["Cookie"], "a=2;b=3")
+        self.assertEqual(account_client.cookie_dict, {"a": "2", "b": "3"})
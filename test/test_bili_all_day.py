@@ -0,0 +1,52 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from media_platform.bilibili.all_day import AllDayProgress, iter_days
+
+
+class TestAllDay(unittest.TestCase):
+
+    def test_iter_days(self):
+        self.assertEqual(iter_days("2024-02-28", "2024-03-01"), ["2024-02-28", "2024-02-29", "2024-03-01"])
+        self.assertEqual(iter_days("2024-01-01", "2024-01-01"), ["2024-01-01"])
+
+    def test_progress_resume(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "bilibili", "all_day_progress.json")
+            progress = AllDayProgress(file_path)
+            progress.mark_done("k1", "2024-01-02")
+            progress.mark_done("k1", "2024-01-01")
+            progress.mark_done("k1", "2024-01-01")
+
+            resumed = AllDayProgress(file_path)
+            self.assertTrue(resumed.is_done("k1", "2024-01-01"))
+            self.assertTrue(resumed.is_done("k1", "2024-01-02"))
+            self.assertFalse(resumed.is_done("k1", "2024-01-03"))
+            self.assertFalse(resumed.is_done("k2", "2024-01-01"))
+            self.assertEqual(resumed._done, {"k1": ["2024-01-01", "2024-01-02"]})
+
+    def test_progress_concurrent_keywords(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "all_day_progress.json")
+            # 并发搜索的关键词各自创建进度对象，写回时不覆盖对方的进度
+            progress_k1 = AllDayProgress(file_path)
+            progress_k2 = AllDayProgress(file_path)
+            progress_k1.mark_done("k1", "2024-01-01")
+            progress_k2.mark_done("k2", "2024-01-01")
+            progress_k1.mark_done("k1", "2024-01-02")
+
+            resumed = AllDayProgress(file_path)
+            self.assertEqual(resumed._done, {"k1": ["2024-01-01", "2024-01-02"], "k2": ["2024-01-01"]})
@@ -0,0 +1,233 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import gc
+import unittest
+from contextvars import ContextVar
+
+from tools.concurrency import expand_sub_comments, fetch_pages, map_bounded, run_sources
+from tools.metrics import metrics
+
+
+def _run(coro):
+    # 不用 asyncio.run，避免清掉主线程的事件循环影响后面使用 get_event_loop 的用例
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class TestFetchPages(unittest.TestCase):
+
+    def test_ordered_and_concurrent(self):
+        running = []
+        max_running = []
+        seen_pages = []
+
+        async def fetch_page(page: int):
+            running.append(page)
+            max_running.append(len(running))
+            # 前面的页返回得更慢，结果仍按页码顺序处理
+            await asyncio.sleep(0.01 * (6 - page))
+            running.remove(page)
+            return [f"{page}-1", f"{page}-2"]
+
+        async def on_page(page: int, items):
+            seen_pages.append(page)
+
+        result = _run(fetch_pages(fetch_page, range(1, 6), concurrency=3, on_page=on_page))
+        self.assertEqual(result, [f"{page}-{index}" for page in range(1, 6) for index in (1, 2)])
+        self.assertEqual(seen_pages, [1, 2, 3, 4, 5])
+        self.assertEqual(max(max_running), 3)
+
+    def test_stop_on_empty_page(self):
+        cancelled = []
+
+        async def fetch_page(page: int):
+            try:
+                await asyncio.sleep(0 if page <= 2 else 1)
+            except asyncio.CancelledError:
+                cancelled.append(page)
+                raise
+            return [page] * 4 if page != 2 else []
+
+        self.assertEqual(_run(fetch_pages(fetch_page, range(1, 10), concurrency=4)), [1, 1, 1, 1])
+        self.assertEqual(cancelled, [3, 4])
+
+    def test_max_count_limits_requests(self):
+        requested = []
+
+        async def fetch_page(page: int):
+            requested.append(page)
+            await asyncio.sleep(0)
+            return [page] * 4
+
+        # 先只请求第一页，按每页 4 条估计还需要 2 页
+        result = _run(fetch_pages(fetch_page, range(1, 10), concurrency=4, max_count=10))
+        self.assertEqual(result, [1, 1, 1, 1, 2, 2, 2, 2, 3, 3])
+        self.assertEqual(requested, [1, 2, 3])
+
+
+class TestExpandSubComments(unittest.TestCase):
+
+    def test_ordered_callbacks_and_concurrency(self):
+        running = []
+        max_running = []
+        seen = []
+
+        async def walk(root: int):
+            running.append(root)
+            max_running.append(len(running))
+            for page in range(3):
+                # 后面的一级评论返回得更快
+                await asyncio.sleep(0.005 * (5 - root))
+                yield [f"{root}-{page}"]
+            running.remove(root)
+
+        async def callback(root: int, sub_comments):
+            seen.extend(sub_comments)
+
+        result = _run(expand_sub_comments(range(5), walk, concurrency=2, callback=callback))
+        expected = [f"{root}-{page}" for root in range(5) for page in range(3)]
+        self.assertEqual(result, expected)
+        self.assertEqual(seen, expected)
+        self.assertEqual(max(max_running), 2)
+
+    def test_error_cancels_other_chains(self):
+        cancelled = []
+
+        async def walk(root: int):
+            if root == 0:
+                yield ["0-0"]
+                raise ValueError("chain error")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(root)
+                raise
+            yield [f"{root}-0"]
+
+        with self.assertRaises(ValueError):
+            _run(expand_sub_comments(range(3), walk, concurrency=3))
+        self.assertEqual(sorted(cancelled), [1, 2])
+
+
+class TestRunSources(unittest.TestCase):
+
+    def test_context_isolated_and_bounded(self):
+        keyword_var: ContextVar[str] = ContextVar("keyword", default="")
+        started = []
+        running = []
+        max_running = []
+        seen = {}
+
+        async def handle(keyword: str):
+            keyword_var.set(keyword)
+            started.append(keyword)
+            running.append(keyword)
+            max_running.append(len(running))
+            # 第一个关键词最慢，名额空出后后面的关键词立即开始
+            await asyncio.sleep(0.03 if keyword == "k0" else 0.005)
+            seen[keyword] = keyword_var.get()
+            running.remove(keyword)
+
+        async def run():
+            await run_sources([f"k{index}" for index in range(5)], handle, concurrency=2)
+            return keyword_var.get()
+
+        self.assertEqual(_run(run()), "")
+        self.assertEqual(started, ["k0", "k1", "k2", "k3", "k4"])
+        self.assertEqual(seen, {f"k{index}": f"k{index}" for index in range(5)})
+        self.assertEqual(max(max_running), 2)
+
+    def test_error_cancels_other_sources(self):
+        cancelled = []
+
+        async def handle(source: int):
+            if source == 0:
+                await asyncio.sleep(0)
+                raise ValueError("source error")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(source)
+                raise
+
+        with self.assertRaises(ValueError):
+            _run(run_sources(range(5), handle, concurrency=3))
+        self.assertEqual(sorted(cancelled), [1, 2])
+
+    def test_errors_in_same_round_all_retrieved(self):
+        async def handle(source: int):
+            await asyncio.sleep(0)
+            raise ValueError(f"source {source} error")
+
+        loop = asyncio.new_event_loop()
+        unretrieved = []
+        loop.set_exception_handler(lambda _, context: unretrieved.append(context))
+        try:
+            with self.assertRaises(ValueError):
+                loop.run_until_complete(run_sources(range(3), handle, concurrency=3))
+        finally:
+            loop.close()
+        gc.collect()
+        self.assertEqual(unretrieved, [])
+
+
+class TestMapBounded(unittest.TestCase):
+
+    def test_ordered_bounded_and_isolated(self):
+        running = []
+        max_running = []
+        pulled = []
+
+        def items():
+            for item in range(6):
+                pulled.append(item)
+                yield item
+
+        async def handle(item: int):
+            running.append(item)
+            max_running.append(len(running))
+            # 后面的数据处理得更快，结果仍按顺序返回
+            await asyncio.sleep(0.002 * (6 - item))
+            running.remove(item)
+            if item == 2:
+                raise ValueError("item error")
+            return item * 10
+
+        metrics.reset()
+        result = _run(map_bounded(handle, items(), concurrency=2, name="test_pool"))
+        self.assertEqual(result, [0, 10, None, 30, 40, 50])
+        self.assertEqual(max(max_running), 2)
+        self.assertEqual(pulled, list(range(6)))
+        counters = {dict(key)["outcome"]: value for key, value in metrics.snapshot()["counters"]["work_items_total"]}
+        self.assertEqual(counters, {"ok": 5, "ValueError": 1})
+
+    def test_cancel_stops_workers(self):
+        started = []
+
+        async def handle(item: int):
+            started.append(item)
+            await asyncio.sleep(1)
+
+        async def run():
+            task = asyncio.ensure_future(map_bounded(handle, range(100), concurrency=3))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        _run(run())
+        self.assertEqual(started, [0, 1, 2])
@@ -0,0 +1,45 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+import config
+from config.settings import CrawlSettings, crawl_settings, set_crawl_settings
+
+
+class TestCrawlSettings(unittest.TestCase):
+
+    def test_from_config_snapshot(self):
+        settings = CrawlSettings.from_config(platform="bili")
+        self.assertEqual(settings.platform, "bili")
+        self.assertEqual(settings.keywords, config.KEYWORDS)
+        settings.bili_specified_id_list.append("BV_TEST")
+        self.assertNotIn("BV_TEST", config.BILI_SPECIFIED_ID_LIST)
+
+    def test_concurrent_tasks_are_isolated(self):
+        async def run_task(platform: str, keywords: str):
+            set_crawl_settings(CrawlSettings.from_config(platform=platform, keywords=keywords))
+            await asyncio.sleep(0.01)
+            crawl_settings.crawler_max_notes_count = len(keywords)
+            await asyncio.sleep(0.01)
+            return crawl_settings.platform, crawl_settings.keywords, crawl_settings.crawler_max_notes_count
+
+        async def main():
+            return await asyncio.gather(run_task("xhs", "a"), run_task("dy", "bb"))
+
+        results = asyncio.get_event_loop().run_until_complete(main())
+        self.assertEqual(results, [("xhs", "a", 1), ("dy", "bb", 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
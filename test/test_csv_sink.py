@@ -0,0 +1,89 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import csv
+import os
+import tempfile
+import unittest
+
+from tools.csv_sink import CsvSink
+
+
+def _read_rows(file_path: str):
+    with open(file_path, encoding="utf-8-sig", newline="") as f:
+        return list(csv.reader(f))
+
+
+class TestCsvSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.key = (self.tmp_dir.name, "search", "contents")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _path(self, date: str) -> str:
+        return os.path.join(self.tmp_dir.name, "xhs", f"1_search_contents_{date}.csv")
+
+    def test_buffer_and_close(self):
+        async def run():
+            sink = CsvSink(flush_rows=3, flush_interval_sec=3600)
+            path = self._path("2024-01-01")
+            await sink.write(path, {"id": "1", "title": "标题,1"}, rotate_key=self.key)
+            await sink.write(path, {"id": "2", "title": "标题\n2"}, rotate_key=self.key)
+            # 未达到落盘条数
+            self.assertEqual(os.path.getsize(path), 0)
+            await sink.write(path, {"id": "3", "title": "t3"}, rotate_key=self.key)
+            self.assertEqual(len(_read_rows(path)), 4)
+            await sink.write(path, {"id": "4", "title": "t4"}, rotate_key=self.key)
+            await sink.close()
+            # 关闭后再写入，追加到已有文件，不重复写表头和 BOM
+            await sink.write(path, {"id": "5", "title": "t5"}, rotate_key=self.key)
+            await sink.close()
+            return path
+
+        path = asyncio.run(run())
+        rows = _read_rows(path)
+        self.assertEqual(rows[0], ["id", "title"])
+        self.assertEqual([row[0] for row in rows[1:]], ["1", "2", "3", "4", "5"])
+        self.assertEqual(rows[2][1], "标题\n2")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read().count(b"\xef\xbb\xbf"), 1)
+
+    def test_rotate_when_date_changes(self):
+        async def run():
+            sink = CsvSink(flush_rows=100, flush_interval_sec=3600)
+            await sink.write(self._path("2024-01-01"), {"id": "1"}, rotate_key=self.key)
+            await sink.write(self._path("2024-01-02"), {"id": "2"}, rotate_key=self.key)
+            # 旧文件在切换时写入并关闭
+            self.assertEqual(_read_rows(self._path("2024-01-01")), [["id"], ["1"]])
+            self.assertEqual(len(sink._files), 1)
+            await sink.close()
+
+        asyncio.run(run())
+        self.assertEqual(_read_rows(self._path("2024-01-02")), [["id"], ["2"]])
+
+    def test_flush_idle_file_by_timer(self):
+        async def run():
+            sink = CsvSink(flush_rows=100, flush_interval_sec=0.05)
+            path = self._path("2024-01-01")
+            await sink.write(path, {"id": "1"}, rotate_key=self.key)
+            self.assertEqual(os.path.getsize(path), 0)
+            # 没有新数据写入，缓冲也会在落盘间隔后写入文件
+            await asyncio.sleep(0.2)
+            self.assertEqual(_read_rows(path), [["id"], ["1"]])
+            self.assertIsNone(sink._flusher)
+            await sink.close()
+
+        asyncio.run(run())
@@ -0,0 +1,46 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import unittest
+
+from tools.embedded_json import extract_embedded_json
+
+MARKER = "window.__INITIAL_STATE__="
+
+
+def _page(state: str) -> str:
+    return f"<html><body><script>{MARKER}{state}</script>\n<script>var other = {{}};</script></body></html>"
+
+
+class TestEmbeddedJson(unittest.TestCase):
+
+    def test_extract_nested_path(self):
+        html = _page('{"user":{"name":"a"},"note":{"noteDetailMap":{"1":{"comments":{"note":1},"note":{"title":"t"}}}}}')
+        self.assertEqual(extract_embedded_json(html, MARKER, ("noteDetailMap", "1", "note")), {"title": "t"})
+
+    def test_key_of_sibling_object_is_not_matched(self):
+        html = _page('{"a":{"x":1},"b":{"target":2}}')
+        self.assertIsNone(extract_embedded_json(html, MARKER, ("a", "target")))
+        self.assertEqual(extract_embedded_json(html, MARKER, ("b", "target")), 2)
+
+    def test_key_inside_string_is_not_matched(self):
+        html = _page('{"desc":"{\\"target\\":1}","data":{"desc":"\\"target\\":","target":[1,2]}}')
+        self.assertEqual(extract_embedded_json(html, MARKER, ("data", "target")), [1, 2])
+
+    def test_undefined(self):
+        html = _page('{"userPageData":{"a":undefined,"b":"undefined"},"c":undefined}')
+        self.assertEqual(extract_embedded_json(html, MARKER, ("userPageData",)), {"a": None, "b": "undefined"})
+        self.assertEqual(extract_embedded_json(html, MARKER, ("userPageData",), undefined='""'), {"a": "", "b": "undefined"})
+
+    def test_missing(self):
+        self.assertIsNone(extract_embedded_json("<html></html>", MARKER, ("note",)))
+        self.assertIsNone(extract_embedded_json(_page("{}"), MARKER, ("note",)))
@@ -0,0 +1,39 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import unittest
+
+from benchmark.import_time import HEAVY_MODULES, measure_import
+
+# 导入耗时预算，单位毫秒，CI 机器较慢时留有余量
+IMPORT_BUDGET_MS = {
+    "main": 1500,
+    "api_server": 3000,
+}
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_heavy_modules_are_lazy(self):
+        for module in IMPORT_BUDGET_MS:
+            report = measure_import(module)
+            for heavy_module in HEAVY_MODULES:
+                self.assertFalse(report.imported(heavy_module), f"import {module} should not import {heavy_module}")
+
+    def test_import_time_budget(self):
+        for module, budget_ms in IMPORT_BUDGET_MS.items():
+            report = measure_import(module)
+            self.assertLess(report.total_ms, budget_ms, f"import {module} took {report.total_ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from worker.job_queue import SqliteJobQueue
+
+
+class TestSqliteJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.queue = SqliteJobQueue(os.path.join(self.tmp_dir.name, "task_queue.db"))
+
+    def test_claim_in_order_and_once(self):
+        self.queue.put("task_1", {"platform": "xhs"})
+        self.queue.put("task_2", {"platform": "dy"})
+        self.assertEqual(self.queue.pending_count(), 2)
+        self.assertEqual(self.queue.claim("worker_a")["task_id"], "task_1")
+        job = self.queue.claim("worker_b")
+        self.assertEqual(job["task_id"], "task_2")
+        self.assertEqual(job["payload"], {"platform": "dy"})
+        self.assertIsNone(self.queue.claim("worker_c"))
+
+    def test_update_and_requeue(self):
+        self.queue.put("task_1", {"platform": "xhs"})
+        self.queue.put("task_2", {"platform": "dy"})
+        self.queue.claim("worker_a")
+        self.queue.claim("worker_a")
+        self.queue.update("task_1", status="completed", result={"count": 1}, progress=1.0)
+        job = self.queue.get("task_1")
+        self.assertEqual(job["status"], "completed")
+        self.assertEqual(job["result"], {"count": 1})
+        # task_2 仍在运行，模拟进程重启后重新入队
+        self.assertEqual(self.queue.requeue_running(), 1)
+        self.assertEqual(self.queue.claim("worker_b")["task_id"], "task_2")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import unittest
+from collections import Counter
+
+from tools import json_codec
+
+
+class TestJsonCodec(unittest.TestCase):
+
+    def test_dumps_compact_is_byte_exact(self):
+        # 签名依赖请求体原文，各种取值都必须和标准库的输出逐字节一致
+        bodies = [
+            {"keyword": "网球 tennis", "page": 1, "page_size": 20, "sort": "general", "note_type": 0},
+            {"note_id": "66f1", "image_formats": ["jpg", "webp", "avif"], "extra": {"need_body_topic": 1}},
+            {"text": "\"quote\" \\ / \n\t\x00   😀", "flag": True, "empty": None, "big": 2 ** 70},
+            {"score": 0.1, "ts": 1e16, "nan": float("nan")},
+            {1: "int key", "tuple": (1, 2)},
+            [],
+        ]
+        for body in bodies:
+            self.assertEqual(json_codec.dumps_compact(body), json.dumps(body, separators=(",", ":"), ensure_ascii=False))
+
+    def test_loads(self):
+        self.assertEqual(json_codec.loads(b'{"a":"\xe4\xb8\xad","b":[1,2.5,null]}'), {"a": "中", "b": [1, 2.5, None]})
+        self.assertEqual(json_codec.loads('[9223372036854775807,18446744073709551615,-9223372036854775808]'),
+                         [2 ** 63 - 1, 2 ** 64 - 1, -2 ** 63])
+        # orjson 不支持的内容交给标准库
+        self.assertTrue(json_codec.loads('[NaN]')[0] != json_codec.loads('[NaN]')[0])
+        with self.assertRaises(json.JSONDecodeError):
+            json_codec.loads("{")
+
+    def test_dumps_round_trip(self):
+        data = [{"note_id": "1", "title": "标题", "liked_count": 10}, Counter({"词": 3})]
+        self.assertEqual(json.loads(json_codec.dumps(data)), [{"note_id": "1", "title": "标题", "liked_count": 10}, {"词": 3}])
+        self.assertEqual(json.loads(json_codec.dumps(data, indent=True)), json.loads(json_codec.dumps(data)))
+        self.assertEqual(json_codec.dumps({"t": object()}, default=lambda _: "x"), '{"t":"x"}')
@@ -0,0 +1,60 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+from tools.metrics import MetricsRegistry, endpoint_label, instrument_request, metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_endpoint_label_hides_ids(self):
+        self.assertEqual(endpoint_label("https://www.zhihu.com/api/v4/answers/4885821440/root_comments?limit=10"),
+                         "/api/v4/answers/:id/root_comments")
+        self.assertEqual(endpoint_label("https://edith.xiaohongshu.com/api/sns/web/v1/feed"), "/api/sns/web/v1/feed")
+
+    def test_instrument_request(self):
+        class Client:
+            @instrument_request("xhs")
+            async def request(self, method, url, **kwargs):
+                if kwargs.get("fail"):
+                    raise type("IPBlockError", (Exception,), {})()
+                return {}
+
+        client = Client()
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(client.request("GET", "https://edith.xiaohongshu.com/api/sns/web/v1/feed"))
+        with self.assertRaises(Exception):
+            loop.run_until_complete(client.request("GET", "https://edith.xiaohongshu.com/api/sns/web/v1/feed", fail=True))
+        loop.close()
+
+        text = metrics.render_prometheus()
+        self.assertIn('mediacrawler_request_seconds_count{endpoint="/api/sns/web/v1/feed",outcome="ok",platform="xhs"} 1', text)
+        self.assertIn('mediacrawler_block_events_total{platform="xhs",reason="ip_block"} 1', text)
+
+    def test_merge_snapshot(self):
+        worker = MetricsRegistry()
+        for value in (0.001, 0.2, 3):
+            worker.observe("request_seconds", value, platform="bili")
+        merged = MetricsRegistry()
+        merged.merge_snapshot(worker.snapshot(), process="worker-1")
+        histogram = merged._histograms["request_seconds"][(("platform", "bili"), ("process", "worker-1"))]
+        self.assertEqual(histogram.count, 3)
+        self.assertEqual(histogram.quantile(0.5), 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from tools.parquet_sink import ParquetSink
+from tools.table_schema import INTEGER, TEXT, get_table_columns, parse_tables
+from var import parquet_files_var
+
+
+class TestTableSchema(unittest.TestCase):
+
+    def test_parse_tables(self):
+        tables = parse_tables("""
+            -- comment; with semicolon
+            CREATE TABLE `t`
+            (
+                `id`    int NOT NULL AUTO_INCREMENT COMMENT 'id; 自增',
+                `name`  varchar(64) DEFAULT NULL,
+                count   BIGINT DEFAULT 0,
+                PRIMARY KEY (`id`),
+                KEY `idx_t_name` (`name`)
+            ) ENGINE=InnoDB COMMENT='t';
+            alter table t add column `tag` longtext;
+        """)
+        self.assertEqual(tables, {"t": {"id": INTEGER, "name": TEXT, "count": INTEGER, "tag": TEXT}})
+
+    def test_schema_file(self):
+        columns = get_table_columns("xhs_note")
+        self.assertEqual(columns["time"], INTEGER)
+        self.assertEqual(columns["liked_count"], TEXT)
+        # ALTER TABLE 增加的字段
+        self.assertEqual(columns["source_keyword"], TEXT)
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+class TestParquetSink(unittest.TestCase):
+
+    def test_row_groups_and_types(self):
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "1_search_contents_2024-01-01.parquet")
+            key = (tmp_dir, "search", "contents")
+
+            async def run():
+                sink = ParquetSink(row_group_rows=2)
+                for index in range(5):
+                    await sink.write(path, {"note_id": str(index), "time": str(index * 10), "liked_count": 10 + index,
+                                            "tag_list": ["a", "标签"], "note_url": None},
+                                     table_name="xhs_note", rotate_key=key)
+                await sink.close()
+                # 关闭后再写入同一个文件名时写入新文件
+                await sink.write(path, {"note_id": "5", "time": "1万+"}, table_name="xhs_note", rotate_key=key)
+                await sink.close()
+
+            asyncio.run(run())
+            parquet_file = pq.ParquetFile(path)
+            self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+            self.assertEqual(parquet_file.metadata.row_group(0).column(0).compression, "ZSTD")
+            table = parquet_file.read()
+            self.assertEqual(str(table.schema.field("time").type), "int64")
+            self.assertEqual(str(table.schema.field("liked_count").type), "string")
+            self.assertEqual(table.column("time").to_pylist(), [0, 10, 20, 30, 40])
+            self.assertEqual(table.column("liked_count").to_pylist()[0], "10")
+            self.assertEqual(table.column("tag_list").to_pylist()[0], '["a","标签"]')
+            self.assertEqual(table.column("note_url").to_pylist()[0], None)
+            second = pq.read_table(path.replace(".parquet", "_1.parquet"))
+            self.assertEqual(second.column("time").to_pylist(), [None])
+
+    def test_close_only_current_task_files(self):
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            own = os.path.join(tmp_dir, "1_search_contents_2024-01-01.parquet")
+            shared = os.path.join(tmp_dir, "1_search_comments_2024-01-01.parquet")
+            sink = ParquetSink(row_group_rows=100)
+
+            async def write(path, note_id):
+                await sink.write(path, {"note_id": note_id}, table_name="xhs_note",
+                                 rotate_key=(tmp_dir, "search", os.path.basename(path)))
+
+            async def task_b(started, finish):
+                parquet_files_var.set(set())
+                await write(shared, "b1")
+                started.set()
+                await finish.wait()
+                # 另一个任务结束后继续写入，仍写入原文件
+                await write(shared, "b2")
+                await sink.close()
+
+            async def run():
+                started, finish = asyncio.Event(), asyncio.Event()
+                other = asyncio.create_task(task_b(started, finish))
+                await started.wait()
+                parquet_files_var.set(set())
+                await write(own, "a1")
+                await write(shared, "a2")
+                await sink.close()
+                self.assertEqual(list(sink._files), [shared])
+                finish.set()
+                await other
+                self.assertEqual(sink._files, {})
+
+            asyncio.run(run())
+            self.assertEqual(pq.read_table(own).num_rows, 1)
+            self.assertEqual(pq.read_table(shared).column("note_id").to_pylist(), ["b1", "a2", "b2"])
+            self.assertFalse(os.path.exists(shared.replace(".parquet", "_1.parquet")))
@@ -0,0 +1,71 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+from tools.metrics import metrics
+from tools.resource_blocker import ESTIMATED_RESOURCE_BYTES, ResourceBlocker
+
+
+class FakeRequest:
+
+    def __init__(self, resource_type: str, url: str):
+        self.resource_type = resource_type
+        self.url = url
+
+
+class FakeRoute:
+
+    def __init__(self, resource_type: str, url: str):
+        self.request = FakeRequest(resource_type, url)
+        self.result = None
+
+    async def continue_(self):
+        self.result = "continue"
+
+    async def abort(self, error_code: str = "failed"):
+        self.result = "abort"
+
+
+class TestResourceBlocker(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.blocker = ResourceBlocker("xhs", ["image", "media", "font"], ["hm.baidu.com", "t2.xiaohongshu.com"])
+
+    def test_block_reason(self):
+        self.assertEqual(self.blocker.block_reason("image", "https://sns-img-qc.xhscdn.com/a.jpg"), "image")
+        self.assertEqual(self.blocker.block_reason("script", "https://hm.baidu.com/hm.js?x=1"), "tracker")
+        self.assertEqual(self.blocker.block_reason("xhr", "https://T2.xiaohongshu.com/api/v2/collect"), "tracker")
+        # 签名和登录需要的脚本、接口请求放行
+        self.assertIsNone(self.blocker.block_reason("script", "https://fe-static.xhscdn.com/formula-static/index.js"))
+        self.assertIsNone(self.blocker.block_reason("xhr", "https://edith.xiaohongshu.com/api/sns/web/v1/feed"))
+        self.assertIsNone(self.blocker.block_reason("document", "https://www.xiaohongshu.com"))
+        self.assertIsNone(self.blocker.block_reason("script", "https://nothm.baidu.com/a.js"))
+
+    def test_handle_records_saved_bytes(self):
+        routes = [
+            FakeRoute("image", "https://sns-img-qc.xhscdn.com/a.jpg"),
+            FakeRoute("image", "https://sns-img-qc.xhscdn.com/b.jpg"),
+            FakeRoute("script", "https://fe-static.xhscdn.com/index.js"),
+        ]
+        loop = asyncio.new_event_loop()
+        try:
+            for route in routes:
+                loop.run_until_complete(self.blocker.handle(route))
+        finally:
+            loop.close()
+        self.assertEqual([route.result for route in routes], ["abort", "abort", "continue"])
+        counters = dict((tuple(map(tuple, key)), value)
+                        for key, value in metrics.snapshot()["counters"]["browser_blocked_bytes_estimated_total"])
+        self.assertEqual(counters[(("platform", "xhs"), ("reason", "image"))], 2 * ESTIMATED_RESOURCE_BYTES["image"])
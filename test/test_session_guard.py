@@ -0,0 +1,110 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+from tenacity import retry, stop_after_attempt
+
+from tools.session_guard import AccountBlockedError, SessionGuard, is_block_error, session_guarded
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class IPBlockError(Exception):
+    pass
+
+
+class FakeClient:
+    session_guard = None
+    account_pool = None
+
+    def __init__(self):
+        self.cookie = "old"
+        self.requests = 0
+
+    @session_guarded
+    async def request(self, name: str):
+        self.requests += 1
+        await asyncio.sleep(0.01)
+        if self.cookie == "old":
+            raise AccountBlockedError(name)
+        return f"{name}-{self.cookie}"
+
+    @session_guarded
+    async def get(self, name: str):
+        # 嵌套的守护方法只在最外层重试
+        return await self.request(name)
+
+
+class TestSessionGuard(unittest.TestCase):
+
+    def test_single_refresh_and_retry(self):
+        client = FakeClient()
+        refreshes = []
+
+        async def refresh():
+            refreshes.append(client.requests)
+            await asyncio.sleep(0.02)
+            client.cookie = "new"
+
+        async def main():
+            client.session_guard = SessionGuard("test", refresh)
+            first = await asyncio.gather(*(client.get(str(i)) for i in range(5)))
+            # 刷新后发起的请求不再触发刷新
+            second = await client.get("5")
+            return first, second
+
+        first, second = _run(main())
+        self.assertEqual(first, [f"{i}-new" for i in range(5)])
+        self.assertEqual(second, "5-new")
+        self.assertEqual(len(refreshes), 1)
+        self.assertEqual(client.requests, 11)
+
+    def test_refresh_failed_raises_original_error(self):
+        client = FakeClient()
+
+        async def refresh():
+            raise RuntimeError("login failed")
+
+        async def main():
+            client.session_guard = SessionGuard("test", refresh)
+            return await asyncio.gather(client.get("a"), client.get("b"), return_exceptions=True)
+
+        results = _run(main())
+        self.assertTrue(all(isinstance(result, AccountBlockedError) for result in results))
+        self.assertEqual(client.requests, 2)
+
+    def test_is_block_error(self):
+        @retry(stop=stop_after_attempt(2))
+        def blocked():
+            raise IPBlockError()
+
+        try:
+            blocked()
+        except Exception as e:
+            self.assertTrue(is_block_error(e))
+
+        try:
+            try:
+                raise AccountBlockedError("account blocked")
+            except Exception as e:
+                raise ValueError(str(e))
+        except ValueError as e:
+            self.assertTrue(is_block_error(e))
+        self.assertFalse(is_block_error(ValueError("not found")))
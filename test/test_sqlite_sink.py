@@ -0,0 +1,107 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from tools.sqlite_sink import SqliteSink, SqliteTaskWrites, SqliteWriteError
+from var import sqlite_writes_var
+
+
+class TestSqliteSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "data", "media_crawler.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_upsert_by_unique_key(self):
+        async def run():
+            sink = SqliteSink(db_path=self.db_path, batch_rows=2, commit_interval_sec=3600)
+            await sink.upsert("xhs_note", {"note_id": "1", "title": "t1", "liked_count": "10", "add_ts": 100,
+                                           "tag_list": ["a", "标签"]})
+            await sink.upsert("xhs_note", {"note_id": "2", "title": "t2", "add_ts": 100})
+            await sink.flush()
+            # 第一批已提交，读连接可以读到
+            self.assertEqual(len(await sink.query("SELECT note_id FROM xhs_note")), 2)
+            await sink.upsert("xhs_note", {"note_id": "1", "title": "t1 new", "add_ts": 200, "extra": 1})
+            await sink.upsert("xhs_note_comment", {"comment_id": "c1", "note_id": "1", "content": "评论"})
+            await sink.close()
+            # 关闭后再写入时重新打开
+            await sink.upsert("xhs_note_comment", {"comment_id": "c1", "note_id": "1", "content": "评论2"})
+            await sink.close()
+
+        asyncio.run(run())
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        notes = [dict(row) for row in conn.execute("SELECT * FROM xhs_note ORDER BY id")]
+        self.assertEqual([note["note_id"] for note in notes], ["1", "2"])
+        self.assertEqual(notes[0]["title"], "t1 new")
+        # add_ts 保留第一次写入的值
+        self.assertEqual(notes[0]["add_ts"], 100)
+        self.assertEqual(notes[0]["tag_list"], '["a","标签"]')
+        # 数据中多出的字段自动加列
+        self.assertEqual(notes[0]["extra"], "1")
+        comments = [dict(row) for row in conn.execute("SELECT * FROM xhs_note_comment")]
+        self.assertEqual(len(comments), 1)
+        self.assertEqual(comments[0]["content"], "评论2")
+        self.assertIsNotNone(comments[0]["add_ts"])
+        conn.close()
+
+    def test_failed_rows_dropped_one_by_one(self):
+        async def run():
+            sink = SqliteSink(db_path=self.db_path, batch_rows=10, commit_interval_sec=3600, max_queue_rows=3)
+            await sink.upsert("xhs_note", {"note_id": "1", "title": "t1"})
+            # 无法绑定为 sqlite 参数的值，整批写入失败
+            await sink.upsert("xhs_note", {"note_id": "2", "title": object()})
+            await sink.upsert("xhs_note", {"note_id": "3", "title": "t3"})
+            self.assertEqual(sink._queue.maxsize, 3)
+            with self.assertRaises(SqliteWriteError):
+                await sink.close()
+
+        asyncio.run(run())
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual([row[0] for row in conn.execute("SELECT note_id FROM xhs_note ORDER BY id")], ["1", "3"])
+        conn.close()
+
+    def test_close_scoped_to_task(self):
+        async def run():
+            sink = SqliteSink(db_path=self.db_path, batch_rows=10, commit_interval_sec=3600)
+
+            async def task_a():
+                sqlite_writes_var.set(SqliteTaskWrites())
+                await sink.upsert("xhs_note", {"note_id": "a1", "title": object()})
+                # a 结束时 b 仍在写入，只抛出 a 自己的失败
+                with self.assertRaises(SqliteWriteError):
+                    await sink.close()
+
+            async def task_b():
+                sqlite_writes_var.set(SqliteTaskWrites())
+                await sink.upsert("xhs_note", {"note_id": "b1", "title": "b1"})
+                await asyncio.sleep(0.05)
+                await sink.upsert("xhs_note", {"note_id": "b2", "title": "b2"})
+                await sink.close()
+
+            await asyncio.gather(task_a(), task_b())
+            self.assertEqual(sink._users, 0)
+            self.assertIsNone(sink._writer_task)
+
+        asyncio.run(run())
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual([row[0] for row in conn.execute("SELECT note_id FROM xhs_note ORDER BY id")], ["b1", "b2"])
+        conn.close()
@@ -0,0 +1,51 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from config.settings import crawl_settings_var, get_crawl_settings
+from tools.storage_state import load_storage_state
+
+
+class TestStorageState(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.settings_token = crawl_settings_var.set(
+            get_crawl_settings().copy(storage_state_file=os.path.join(self.tmp_dir.name, "%s_storage_state.json"))
+        )
+
+    def tearDown(self):
+        crawl_settings_var.reset(self.settings_token)
+        self.tmp_dir.cleanup()
+
+    def _cookies(self, state):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(state.cookies())
+        finally:
+            loop.close()
+
+    def test_load_saved_state(self):
+        with open(os.path.join(self.tmp_dir.name, "bili_storage_state.json"), "w", encoding="utf-8") as f:
+            json.dump({"cookies": [{"name": "SESSDATA", "value": "abc", "domain": ".bilibili.com"}], "origins": []}, f)
+        state = load_storage_state("bili", "SESSDATA=from_config")
+        self.assertEqual(self._cookies(state), [{"name": "SESSDATA", "value": "abc", "domain": ".bilibili.com"}])
+
+    def test_fallback_to_cookie_str(self):
+        state = load_storage_state("wb", "SUB=1; SUBP=2")
+        self.assertEqual(self._cookies(state), [{"name": "SUB", "value": "1"}, {"name": "SUBP", "value": "2"}])
+        self.assertIsNone(load_storage_state("zhihu", ""))
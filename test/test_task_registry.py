@@ -0,0 +1,68 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from worker.task_registry import SqliteTaskRegistry
+
+
+class TestSqliteTaskRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.registry = SqliteTaskRegistry(os.path.join(self.tmp_dir.name, "task_registry.db"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_paginate_by_created_at(self):
+        for index in range(5):
+            self.registry.create(f"task_{index}", platform="xhs")
+        self.registry.update("task_1", status="completed", result={"counts": {"contents": 1}})
+
+        seen = []
+        tasks, cursor = self.registry.list(limit=2)
+        seen.extend(task["task_id"] for task in tasks)
+        while cursor:
+            tasks, cursor = self.registry.list(cursor=cursor, limit=2)
+            seen.extend(task["task_id"] for task in tasks)
+        self.assertEqual(sorted(seen), [f"task_{index}" for index in range(5)])
+        self.assertEqual(len(set(seen)), 5)
+
+        tasks, cursor = self.registry.list(status="completed")
+        self.assertEqual([task["task_id"] for task in tasks], ["task_1"])
+        self.assertEqual(tasks[0]["result"], {"counts": {"contents": 1}})
+        self.assertIsNone(cursor)
+        self.assertEqual(self.registry.count(), 5)
+
+    def test_evict_only_finished_tasks(self):
+        self.registry.create("task_running")
+        self.registry.update("task_running", status="running")
+        self.registry.create("task_done")
+        self.registry.update("task_done", status="completed")
+        self.registry.create("task_failed")
+        self.registry.update("task_failed", status="failed")
+        self.registry.create("task_verify")
+        self.registry.update("task_verify", status="need_verification")
+
+        self.assertEqual(self.registry.unfinished_task_ids(), ["task_running"])
+        self.assertEqual(self.registry.evict(ttl_sec=3600), [])
+        self.assertEqual(self.registry.evict(ttl_sec=3600, max_tasks=3), ["task_done"])
+        self.assertEqual(sorted(self.registry.evict(ttl_sec=-1)), ["task_failed", "task_verify"])
+        self.assertIsNotNone(self.registry.get("task_running"))
+        self.assertIsNone(self.registry.get("task_done"))
+
+
+if __name__ == '__main__':
+    unittest.main()
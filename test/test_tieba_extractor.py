@@ -0,0 +1,36 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import unittest
+
+from benchmark.tieba_extractor import TEST_DATA_DIR, build_cases
+from media_platform.tieba.help import TieBaExtractor
+
+EXPECTED_DIR = os.path.join(TEST_DATA_DIR, "expected")
+
+
+class TestTieBaExtractor(unittest.TestCase):
+
+    def test_extract_matches_expected(self):
+        """expected 目录中是 parsel 实现对同一批页面的解析结果"""
+        for name, page, parse in build_cases(TieBaExtractor()):
+            with self.subTest(page=name):
+                result = parse(page)
+                data = [item.model_dump() for item in result] if isinstance(result, list) else result.model_dump()
+                with open(os.path.join(EXPECTED_DIR, f"{name}.json"), encoding="utf-8") as f:
+                    self.assertEqual(json.loads(json.dumps(data)), json.load(f))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,3 +19,13 @@ def test_convert_cookies():
     cookie_dict = utils.convert_str_cookie_to_dict(xhs_cookies)
     assert cookie_dict.get("webId") == "1190c4d3cxxxx125xxx"
     assert cookie_dict.get("a1") == "x000101360"
+
+
+def test_transform_keys_to_snake():
+    data = {"noteId": "1", "imageList": [{"urlDefault": "a"}, "b", []], "interactInfo": {}, "user": {"userId": "2"}}
+    assert utils.transform_keys_to_snake(data) == {
+        "note_id": "1",
+        "image_list": [{"url_default": "a"}, "b", []],
+        "interact_info": {},
+        "user": {"user_id": "2"},
+    }
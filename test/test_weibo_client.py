@@ -0,0 +1,47 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from media_platform.weibo.client import WeiboClient
+
+
+_AsyncClient = httpx.AsyncClient
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"ok": 1, "data": {"login": True, "path": request.url.path}})
+
+
+class TestWeiboClient(unittest.TestCase):
+
+    def test_request_without_pool_and_guard(self):
+        client = WeiboClient(headers={"Cookie": ""}, playwright_page=None, cookie_dict={})
+        self.assertIsNone(client.session_guard)
+        self.assertIsNone(client.account_pool)
+
+        def mock_client(**kwargs):
+            return _AsyncClient(transport=httpx.MockTransport(_handler))
+
+        loop = asyncio.new_event_loop()
+        try:
+            with mock.patch("media_platform.weibo.client.httpx.AsyncClient", mock_client):
+                data = loop.run_until_complete(client.get("/api/config"))
+                pong = loop.run_until_complete(client.pong())
+        finally:
+            loop.close()
+        self.assertEqual(data, {"login": True, "path": "/api/config"})
+        self.assertTrue(pong)
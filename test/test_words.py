@@ -0,0 +1,64 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tools.words import WordFrequencyEngine
+from var import word_prefixes_var
+
+
+class TestWordFrequencyEngine(unittest.TestCase):
+
+    def test_finalize_only_current_task_prefixes(self):
+        engine = WordFrequencyEngine(max_workers=0, checkpoint_items=1000, checkpoint_interval_sec=3600)
+        rendered = []
+
+        async def render_word_cloud(save_words_prefix):
+            rendered.append(save_words_prefix)
+
+        async def task(prefixes, started, finish):
+            word_prefixes_var.set(set())
+            for prefix in prefixes:
+                await engine.add_item({"content": "今天天气很好"}, prefix)
+            started.set()
+            await finish.wait()
+            await engine.finalize(word_prefixes_var.get())
+
+        async def main(tmp_dir):
+            own, shared, other = (os.path.join(tmp_dir, name) for name in ("own", "shared", "other"))
+            started_a, started_b, finish_a, finish_b = (asyncio.Event() for _ in range(4))
+            task_a = asyncio.create_task(task([own, shared], started_a, finish_a))
+            task_b = asyncio.create_task(task([shared, other], started_b, finish_b))
+            await started_a.wait()
+            await started_b.wait()
+            finish_a.set()
+            await task_a
+            self.assertEqual(sorted(rendered), sorted([own, shared]))
+            # 其他任务还在统计的前缀保留在内存中
+            self.assertEqual(sorted(engine.prefixes), sorted([shared, other]))
+            finish_b.set()
+            await task_b
+            self.assertEqual(engine.prefixes, [])
+            self.assertTrue(os.path.exists(f"{other}_word_freq.json"))
+
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                mock.patch.object(engine, "render_word_cloud", render_word_cloud):
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(main(tmp_dir))
+            finally:
+                loop.close()
+                engine.close()
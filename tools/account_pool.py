@@ -0,0 +1,184 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 多账号池：把请求分摊到多个登录账号，每个账号单独限速，被风控的账号隔离一段时间
+
+import asyncio
+import copy
+import functools
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from tools import utils
+from tools.metrics import metrics
+from tools.session_guard import is_block_error, run_guarded
+from tools.storage_state import StoredBrowserState
+
+
+class PooledAccount:
+    """账号池中的一个账号：该账号的 API 客户端、进行中的请求数、限速和隔离状态"""
+
+    def __init__(self, account_id: str, client: Any, min_interval: float = 0) -> None:
+        self.account_id = account_id
+        self.client = client
+        # 相邻两次请求的最小间隔(秒)，0 表示不限速
+        self.min_interval = min_interval
+        self.in_flight = 0
+        # 下一次请求最早可以发出的时间(事件循环时间)
+        self.next_request_at = 0.0
+        self.quarantined_until = 0.0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.quarantined_until
+
+    def reserve(self, now: float) -> float:
+        """预留一次请求的时间，返回需要等待的秒数"""
+        request_at = max(now, self.next_request_at)
+        self.next_request_at = request_at + self.min_interval
+        return request_at - now
+
+
+class AccountPool:
+    """
+    同一平台多个登录账号的账号池，安装在爬虫的主客户端上(client.account_pool)
+    - 主客户端 request/get/post 的每次调用选择一个账号的客户端执行：优先进行中请求最少的健康账号，
+      相同时选可以最早发出请求的账号
+    - 每个账号按 min_interval 单独限速，总吞吐随账号数增加
+    - 请求出现验证码(461/471)、IPBlockError 等风控异常时隔离该账号 quarantine_sec 秒，换其他健康账号重试，
+      没有其他健康账号时抛出原异常
+    - 全部账号都在隔离中时使用最早解除隔离的账号，不中断爬取
+    """
+
+    def __init__(self, platform: str, accounts: List[PooledAccount], quarantine_sec: float = 600) -> None:
+        """
+        Args:
+            platform: 平台，用于日志和指标
+            accounts: 账号列表，第一个为主账号
+            quarantine_sec: 账号被风控后的隔离时间(秒)
+        """
+        self.platform = platform
+        self.accounts = accounts
+        self.quarantine_sec = quarantine_sec
+
+    def pick(self, exclude: Set[str]) -> Optional[PooledAccount]:
+        """
+        选择执行下一次请求的账号
+        Args:
+            exclude: 本次请求已经被风控的账号
+
+        Returns:
+            选中的账号，没有可用账号时返回 None
+
+        """
+        now = asyncio.get_running_loop().time()
+        candidates = [account for account in self.accounts if account.account_id not in exclude]
+        if not candidates:
+            return None
+        healthy = [account for account in candidates if account.is_healthy(now)]
+        if not healthy:
+            if exclude:
+                return None
+            return min(candidates, key=lambda account: account.quarantined_until)
+        return min(healthy, key=lambda account: (account.in_flight, max(account.next_request_at, now)))
+
+    def quarantine(self, account: PooledAccount, error: BaseException) -> None:
+        account.quarantined_until = asyncio.get_running_loop().time() + self.quarantine_sec
+        metrics.inc("account_quarantine_total", platform=self.platform)
+        utils.logger.warning(
+            f"[AccountPool.quarantine] {self.platform} account {account.account_id} blocked, "
+            f"quarantined for {self.quarantine_sec}s: {error!r}"
+        )
+
+    async def call(self, func: Callable, args: Tuple, kwargs: Dict) -> Any:
+        """
+        选择账号执行一次客户端请求方法
+        Args:
+            func: 未绑定的客户端请求方法(被 session_guarded 装饰之前)
+            args: 位置参数
+            kwargs: 关键字参数
+
+        Returns:
+            请求结果
+
+        """
+        blocked: Set[str] = set()
+        last_error: Optional[BaseException] = None
+        while True:
+            account = self.pick(blocked)
+            if account is None and last_error is not None:
+                raise last_error
+            account.in_flight += 1
+            try:
+                wait = account.reserve(asyncio.get_running_loop().time())
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                return await run_guarded(account.client, functools.partial(func, account.client, *args, **kwargs))
+            except Exception as e:
+                if not is_block_error(e):
+                    raise
+                self.quarantine(account, e)
+                blocked.add(account.account_id)
+                last_error = e
+            finally:
+                account.in_flight -= 1
+
+    @classmethod
+    async def from_login_sessions(cls, platform: str, client: Any, max_requests_per_sec: float = 0,
+                                  quarantine_sec: float = 600) -> "AccountPool":
+        """
+        以当前登录的客户端为主账号，加上 LoginManager 中该平台所有已登录、未过期会话的 cookies 组成账号池
+        其他账号的客户端复制自主客户端，只替换 cookies，不设置登录态守护(被风控时隔离)
+        Args:
+            platform: 平台
+            client: 当前登录的 API 客户端
+            max_requests_per_sec: 每个账号每秒最多发出的请求数，0 表示不限速
+            quarantine_sec: 账号被风控后的隔离时间(秒)
+
+        Returns:
+
+        """
+        from login_manager import LoginStatus, login_manager
+
+        min_interval = 1 / max_requests_per_sec if max_requests_per_sec > 0 else 0
+        accounts = [PooledAccount("main", client, min_interval)]
+        now = datetime.now()
+        for session_id, session in list(login_manager.sessions.items()):
+            if session.platform != platform or session.status != LoginStatus.LOGGED_IN:
+                continue
+            if session.expire_time and now > session.expire_time:
+                continue
+            cookies = await login_manager.get_session_cookies(session_id)
+            if not cookies:
+                continue
+            accounts.append(PooledAccount(session_id, await clone_client(client, cookies), min_interval))
+        utils.logger.info(f"[AccountPool.from_login_sessions] {platform} account pool size: {len(accounts)}")
+        return cls(platform, accounts, quarantine_sec)
+
+
+async def clone_client(client: Any, cookie_dict: Dict[str, str]) -> Any:
+    """
+    复制一个使用另一组 cookies 的客户端，请求头等字典属性单独复制，更新 cookies 不影响原客户端
+    Args:
+        client: 原客户端
+        cookie_dict: cookies
+
+    Returns:
+
+    """
+    account_client = copy.copy(client)
+    for name, value in vars(client).items():
+        if isinstance(value, dict):
+            setattr(account_client, name, dict(value))
+    account_client.session_guard = None
+    account_client.account_pool = None
+    await account_client.update_cookies(StoredBrowserState([{"name": name, "value": value} for name, value in cookie_dict.items()]))
+    return account_client
@@ -0,0 +1,251 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 浏览器上下文池，在多个爬虫任务之间复用已启动且已登录的浏览器上下文
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from playwright.async_api import BrowserContext, BrowserType, Page, Playwright, async_playwright
+
+import config
+from tools import utils
+from tools.metrics import metrics
+from tools.resource_blocker import install_resource_blocking
+
+# 创建浏览器上下文的函数，即各平台爬虫的 launch_browser
+BrowserLauncher = Callable[[BrowserType, Optional[Dict], Optional[str], bool], Awaitable[BrowserContext]]
+# 新建上下文后、打开首页前执行的初始化函数，如注入cookie
+ContextInitializer = Callable[[BrowserContext], Awaitable[None]]
+
+STEALTH_JS_PATH = "libs/stealth.min.js"
+
+
+@dataclass
+class BrowserLease:
+    """一次租用得到的浏览器上下文和已打开首页的页面"""
+    browser_context: BrowserContext
+    page: Page
+    key: Tuple
+    created_at: float = field(default_factory=time.time)
+    lease_count: int = 0
+
+
+class BrowserPool:
+    """
+    浏览器上下文池
+    - 进程内共享一个 Playwright 驱动
+    - 按 (平台, UA, headless, 是否持久化登录态) 缓存空闲的浏览器上下文，下次任务直接复用，省去启动浏览器、注入脚本和打开首页的时间
+    - 持久化登录态(SAVE_LOGIN_STATE)的上下文共用同一个 user_data_dir，同一时间只能被一个任务租用，其他任务排队等待
+    - 上下文超过最大存活时间、最大租用次数或 JS 堆内存上限后回收
+    """
+
+    def __init__(
+        self,
+        max_idle_per_key: int = config.BROWSER_POOL_MAX_IDLE_PER_KEY,
+        max_age_sec: float = config.BROWSER_POOL_CONTEXT_MAX_AGE_SEC,
+        max_lease_count: int = config.BROWSER_POOL_CONTEXT_MAX_LEASES,
+        max_js_heap_mb: float = config.BROWSER_POOL_MAX_JS_HEAP_MB,
+    ) -> None:
+        self.max_idle_per_key = max_idle_per_key
+        self.max_age_sec = max_age_sec
+        self.max_lease_count = max_lease_count
+        self.max_js_heap_mb = max_js_heap_mb
+        self._playwright: Optional[Playwright] = None
+        self._playwright_lock = asyncio.Lock()
+        self._idle: Dict[Tuple, List[BrowserLease]] = {}
+        self._busy_exclusive: Dict[Tuple, asyncio.Event] = {}
+
+    async def get_chromium(self) -> BrowserType:
+        """获取进程内共享的 chromium，首次调用时启动 Playwright 驱动"""
+        async with self._playwright_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+        return self._playwright.chromium
+
+    async def _js_heap_mb(self, page: Page) -> float:
+        try:
+            used = await page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : 0")
+            return used / 1024 / 1024
+        except Exception:
+            return 0
+
+    async def _is_reusable(self, lease: BrowserLease) -> bool:
+        if lease.page.is_closed():
+            return False
+        if time.time() - lease.created_at > self.max_age_sec:
+            return False
+        if 0 < self.max_lease_count <= lease.lease_count:
+            return False
+        if self.max_js_heap_mb > 0 and await self._js_heap_mb(lease.page) > self.max_js_heap_mb:
+            return False
+        return True
+
+    @staticmethod
+    async def _close(lease: BrowserLease) -> None:
+        try:
+            await lease.browser_context.close()
+        except Exception as e:
+            utils.logger.warning(f"[BrowserPool._close] close browser context {lease.key} error: {e}")
+
+    async def _acquire_idle(self, key: Tuple) -> Optional[BrowserLease]:
+        idle_list = self._idle.get(key, [])
+        while idle_list:
+            lease = idle_list.pop()
+            if await self._is_reusable(lease):
+                return lease
+            utils.logger.info(f"[BrowserPool._acquire_idle] recycle browser context {key}")
+            await self._close(lease)
+        return None
+
+    async def _create(
+        self,
+        key: Tuple,
+        launcher: BrowserLauncher,
+        user_agent: Optional[str],
+        headless: bool,
+        index_url: str,
+        initializer: Optional[ContextInitializer],
+        goto_kwargs: Dict[str, Any],
+    ) -> BrowserLease:
+        chromium = await self.get_chromium()
+        browser_context = await launcher(chromium, None, user_agent, headless)
+        # stealth.min.js is a js script to prevent the website from detecting the crawler.
+        await browser_context.add_init_script(path=STEALTH_JS_PATH)
+        # key 的第一项为平台
+        await install_resource_blocking(browser_context, key[0])
+        if initializer:
+            await initializer(browser_context)
+        page = await browser_context.new_page()
+        await page.goto(index_url, **goto_kwargs)
+        return BrowserLease(browser_context=browser_context, page=page, key=key)
+
+    async def _release(self, lease: BrowserLease, failed: bool) -> None:
+        idle_list = self._idle.setdefault(lease.key, [])
+        if failed or len(idle_list) >= self.max_idle_per_key or not await self._is_reusable(lease):
+            await self._close(lease)
+        else:
+            idle_list.append(lease)
+
+    @asynccontextmanager
+    async def lease(
+        self,
+        platform: str,
+        launcher: BrowserLauncher,
+        user_agent: Optional[str],
+        headless: bool,
+        index_url: str,
+        initializer: Optional[ContextInitializer] = None,
+        goto_kwargs: Optional[Dict[str, Any]] = None,
+        persistent: bool = False,
+    ) -> AsyncIterator[BrowserLease]:
+        """
+        租用一个已打开平台首页的浏览器上下文，退出时归还到池中
+        Args:
+            platform: 平台
+            launcher: 创建浏览器上下文的函数，即爬虫的 launch_browser
+            user_agent: user agent
+            headless: 是否无头
+            index_url: 首页地址，新建上下文后打开
+            initializer: 新建上下文后、打开首页前的初始化函数
+            goto_kwargs: 打开首页时传给 page.goto 的参数
+            persistent: 是否为持久化登录态的上下文，同一时间只允许一个任务使用
+
+        Returns:
+
+        """
+        key = (platform, user_agent, headless, persistent)
+        goto_kwargs = goto_kwargs or {}
+        if persistent:
+            # 同一个 user_data_dir 只能被一个浏览器打开，等待上一个任务归还
+            while key in self._busy_exclusive:
+                await self._busy_exclusive[key].wait()
+            self._busy_exclusive[key] = asyncio.Event()
+
+        failed = False
+        lease: Optional[BrowserLease] = None
+        try:
+            lease = await self._acquire_idle(key)
+            if lease is not None:
+                utils.logger.info(f"[BrowserPool.lease] reuse warm browser context for {platform}")
+            else:
+                utils.logger.info(f"[BrowserPool.lease] launch new browser context for {platform}")
+                lease = await self._create(key, launcher, user_agent, headless, index_url, initializer, goto_kwargs)
+            lease.lease_count += 1
+            yield lease
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            if lease is not None:
+                await self._release(lease, failed)
+            if persistent:
+                self._busy_exclusive.pop(key).set()
+
+    @property
+    def idle_count(self) -> int:
+        return sum(len(idle_list) for idle_list in self._idle.values())
+
+    async def close(self) -> None:
+        """关闭池中所有上下文和 Playwright 驱动"""
+        for idle_list in self._idle.values():
+            for lease in idle_list:
+                await self._close(lease)
+        self._idle.clear()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+@asynccontextmanager
+async def open_browser(
+    platform: str,
+    launcher: BrowserLauncher,
+    user_agent: Optional[str],
+    headless: bool,
+    index_url: str,
+    initializer: Optional[ContextInitializer] = None,
+    goto_kwargs: Optional[Dict[str, Any]] = None,
+    use_pool: bool = False,
+    persistent: bool = False,
+) -> AsyncIterator[BrowserLease]:
+    """
+    爬虫获取浏览器上下文的统一入口
+    use_pool 为 False 时与原来的行为一致：启动 Playwright 和浏览器，任务结束后全部关闭
+    use_pool 为 True 时从进程内的浏览器池租用热上下文
+    """
+    if use_pool:
+        async with browser_pool.lease(
+            platform, launcher, user_agent, headless, index_url,
+            initializer=initializer, goto_kwargs=goto_kwargs, persistent=persistent,
+        ) as lease:
+            yield lease
+        return
+
+    async with async_playwright() as playwright:
+        # Launch a browser context.
+        browser_context = await launcher(playwright.chromium, None, user_agent, headless)
+        # stealth.min.js is a js script to prevent the website from detecting the crawler.
+        await browser_context.add_init_script(path=STEALTH_JS_PATH)
+        await install_resource_blocking(browser_context, platform)
+        if initializer:
+            await initializer(browser_context)
+        page = await browser_context.new_page()
+        await page.goto(index_url, **(goto_kwargs or {}))
+        yield BrowserLease(browser_context=browser_context, page=page, key=(platform, user_agent, headless, persistent))
+
+
+browser_pool = BrowserPool()
+metrics.register_gauge("browser_pool_idle_contexts", lambda: browser_pool.idle_count)
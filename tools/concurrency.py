@@ -0,0 +1,249 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬虫内部的并发工具
+
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Iterable, List, Optional, Set, Tuple
+
+from tools import utils
+from tools.metrics import metrics
+
+
+async def fetch_pages(fetch_page: Callable[[int], Awaitable[List[Any]]], pages: Iterable[int],
+                      concurrency: int = 1, max_count: Optional[int] = None, crawl_interval: float = 0,
+                      on_page: Optional[Callable[[int, List[Any]], Awaitable[None]]] = None) -> List[Any]:
+    """
+    并发获取页码已知的分页数据，结果按页码顺序返回
+    - 最多同时请求 concurrency 页，每页请求完成后等待 crawl_interval 秒再让出并发名额
+    - 按页码顺序处理结果，遇到空页时停止(和逐页翻页时一样)，之后的页即使已经请求也丢弃
+    - 累计条数达到 max_count 时截断，取消还在进行的请求；设置了 max_count 时先只请求第一页，
+      之后按每页条数估计还需要的页数，不多发请求
+    Args:
+        fetch_page: 获取一页数据的函数，参数为页码
+        pages: 要获取的页码，按顺序排列
+        concurrency: 最大并发请求数
+        max_count: 最多获取的条数，None 表示不限制
+        crawl_interval: 每页请求完成后的等待时间(秒)
+        on_page: 按页码顺序对每页数据调用的回调，参数为页码和该页数据(已按 max_count 截断)
+
+    Returns:
+        所有页的数据
+
+    """
+    result: List[Any] = []
+    if max_count is not None and max_count <= 0:
+        return result
+    page_iter = iter(pages)
+    pending: Deque[Tuple[int, asyncio.Task]] = deque()
+    # 已获取的页中最多的条数
+    page_size = 0
+
+    async def fetch(page: int) -> List[Any]:
+        items = await fetch_page(page)
+        if crawl_interval:
+            await asyncio.sleep(crawl_interval)
+        return items
+
+    def need_more_pages() -> bool:
+        if max_count is None:
+            return True
+        if not page_size:
+            return not pending
+        return len(result) + len(pending) * page_size < max_count
+
+    def schedule() -> None:
+        while len(pending) < max(concurrency, 1) and need_more_pages():
+            page = next(page_iter, None)
+            if page is None:
+                return
+            pending.append((page, asyncio.create_task(fetch(page))))
+
+    try:
+        schedule()
+        while pending:
+            page, task = pending.popleft()
+            items = await task
+            if not items:
+                break
+            page_size = max(page_size, len(items))
+            if max_count is not None and len(result) + len(items) > max_count:
+                items = items[:max_count - len(result)]
+            result.extend(items)
+            reach_max_count = max_count is not None and len(result) >= max_count
+            if not reach_max_count:
+                # 回调处理当前页期间后面的页继续请求
+                schedule()
+            if on_page:
+                await on_page(page, items)
+            if reach_max_count:
+                break
+    finally:
+        for _, task in pending:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+    return result
+
+
+_CHAIN_END = object()
+
+
+async def expand_sub_comments(roots: Iterable[Any], walk: Callable[[Any], AsyncIterator[List[Any]]],
+                              concurrency: int = 1, crawl_interval: float = 0,
+                              callback: Optional[Callable[[Any, List[Any]], Awaitable[None]]] = None) -> List[Any]:
+    """
+    并发展开多条一级评论下的二级评论
+    - 每条一级评论的二级评论按游标逐页获取(一条链)，不同一级评论的链互不依赖，最多同时进行 concurrency 条
+    - 同一条链内相邻两页之间等待 crawl_interval 秒
+    - 回调按一级评论的顺序、链内按页的顺序调用，和逐条展开时的顺序一致；后面的链先获取到的数据缓存到轮到它为止
+    Args:
+        roots: 一级评论
+        walk: 逐页返回一条一级评论下二级评论的异步生成器函数
+        concurrency: 最多同时展开的一级评论数
+        crawl_interval: 链内每页之间的等待时间(秒)
+        callback: 按顺序对每页二级评论调用的回调，参数为一级评论和该页二级评论
+
+    Returns:
+        所有二级评论
+
+    """
+    roots = list(roots)
+    result: List[Any] = []
+    if not roots:
+        return result
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    queues: List[asyncio.Queue] = [asyncio.Queue() for _ in roots]
+
+    async def run_chain(root: Any, queue: asyncio.Queue) -> None:
+        async with semaphore:
+            try:
+                pages = walk(root).__aiter__()
+                first_page = True
+                while True:
+                    if not first_page and crawl_interval:
+                        await asyncio.sleep(crawl_interval)
+                    first_page = False
+                    try:
+                        batch = await pages.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    queue.put_nowait(batch)
+            except Exception as e:
+                queue.put_nowait(e)
+            finally:
+                queue.put_nowait(_CHAIN_END)
+
+    tasks = [asyncio.create_task(run_chain(root, queue)) for root, queue in zip(roots, queues)]
+    try:
+        for root, queue in zip(roots, queues):
+            while True:
+                batch = await queue.get()
+                if batch is _CHAIN_END:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                if not batch:
+                    continue
+                result.extend(batch)
+                if callback:
+                    await callback(root, batch)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return result
+
+
+_SOURCE_END = object()
+
+
+async def run_sources(sources: Iterable[Any], handle: Callable[[Any], Awaitable[None]], concurrency: int = 1) -> None:
+    """
+    并发处理多个互不依赖的爬取来源(搜索关键词、创作者等)
+    - 每个来源一个任务，最多同时处理 concurrency 个；按来源顺序开始，一个来源完成后立即开始下一个，
+      不会因为某个来源的数据多而让其余名额空等
+    - asyncio 创建任务时会复制当前上下文，在任务内设置的 source_keyword_var 等上下文变量只影响该来源
+    - 任一来源抛出异常时取消其余来源并抛出该异常，和逐个处理时一样中断本次爬取
+    Args:
+        sources: 爬取来源，按顺序排列
+        handle: 处理单个来源的函数
+        concurrency: 最多同时处理的来源数
+
+    Returns:
+
+    """
+    source_iter = iter(sources)
+    running: Set[asyncio.Task] = set()
+    try:
+        while True:
+            while len(running) < max(concurrency, 1):
+                source = next(source_iter, _SOURCE_END)
+                if source is _SOURCE_END:
+                    break
+                running.add(asyncio.create_task(handle(source)))
+            if not running:
+                break
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            # 同一轮可能有多个来源出错，都取出异常后再抛出第一个，避免其余的报 exception was never retrieved
+            errors = [task.exception() for task in done]
+            error = next((e for e in errors if e is not None), None)
+            if error is not None:
+                raise error
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+
+async def map_bounded(handle: Callable[[Any], Awaitable[Any]], items: Iterable[Any], concurrency: int = 1,
+                      name: str = "default") -> List[Any]:
+    """
+    用固定数量的 worker 并发处理一批互不依赖的数据(帖子详情、帖子评论等)，结果按 items 的顺序返回
+    - 只创建 concurrency 个 worker 协程，worker 从 items 的迭代器中逐个取出数据处理，
+      同时存在的协程数不随数据量增长，items 可以是生成器
+    - 单条数据处理出错时记录日志，该条的结果为 None，不影响其他数据；调用方被取消时所有 worker 一起取消
+    - 每条数据的处理结果计入 work_items_total 指标，标签为 pool(即 name) 和 outcome(ok 或异常类型名)
+    Args:
+        handle: 处理单条数据的函数
+        items: 待处理的数据
+        concurrency: worker 数量
+        name: 本批数据的名称，用于日志和指标
+
+    Returns:
+        每条数据的处理结果
+
+    """
+    results: List[Any] = []
+    item_iter = enumerate(items)
+
+    async def worker() -> None:
+        for index, item in item_iter:
+            if len(results) <= index:
+                results.extend([None] * (index + 1 - len(results)))
+            try:
+                results[index] = await handle(item)
+            except Exception as e:
+                metrics.inc("work_items_total", pool=name, outcome=type(e).__name__)
+                utils.logger.error(f"[map_bounded] {name} item {index} failed: {e!r}")
+                continue
+            metrics.inc("work_items_total", pool=name, outcome="ok")
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(concurrency, 1))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    return results
@@ -15,13 +15,14 @@
 # @Desc    : 爬虫相关的工具函数
 
 import base64
+import functools
 import json
 import random
 import re
 import urllib
 import urllib.parse
 from io import BytesIO
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 from PIL import Image, ImageDraw
@@ -195,6 +196,30 @@ def extract_text_from_html(html: str) -> str:
     clean_text = re.sub(r'<[^>]+>', '', clean_html).strip()
     return clean_text
 
+_CAMEL_BOUNDARY_PATTERN = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+@functools.lru_cache(maxsize=4096)
+def camel_to_snake(key: str) -> str:
+    """noteDetailMap -> note_detail_map，页面中的字段名重复度很高，转换结果用有界缓存复用"""
+    return _CAMEL_BOUNDARY_PATTERN.sub("_", key).lower()
+
+
+def transform_keys_to_snake(data: Any) -> Any:
+    """
+    把已解析的 json 对象中 dict 的字段名从驼峰转换为下划线，一次遍历完成
+    列表中只转换 dict 元素，其余元素原样保留
+    """
+    if isinstance(data, dict):
+        return {
+            camel_to_snake(key): transform_keys_to_snake(value) if value and isinstance(value, (dict, list)) else value
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [transform_keys_to_snake(item) if item and isinstance(item, dict) else item for item in data]
+    return data
+
+
 def extract_url_params_to_dict(url: str) -> Dict:
     """Extract URL parameters to dict"""
     url_params_dict = dict()
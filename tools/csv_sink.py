@@ -0,0 +1,164 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : CSV 写入：每个文件保持一个打开的句柄，数据先写入内存缓冲，按条数或时间间隔批量落盘
+
+import asyncio
+import csv
+import io
+import pathlib
+import time
+from typing import Dict, Iterable, Optional, TextIO, Tuple
+
+import config
+from tools import utils
+
+
+class _CsvFile:
+    """一个打开的 CSV 文件及其未落盘的数据"""
+
+    def __init__(self, file_path: str) -> None:
+        pathlib.Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        # utf-8-sig 在追加已有内容的文件时不会重复写入 BOM
+        self.file: TextIO = open(file_path, mode='a', encoding="utf-8-sig", newline="")
+        self.need_header = self.file.tell() == 0
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.pending = 0
+        self.last_flush = time.time()
+
+    def write_row(self, save_item: Dict) -> None:
+        if self.need_header:
+            self.writer.writerow(save_item.keys())
+            self.need_header = False
+        self.writer.writerow(save_item.values())
+        self.pending += 1
+
+    def take_buffer(self) -> str:
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.pending = 0
+        self.last_flush = time.time()
+        return data
+
+    def write_and_flush(self, data: str) -> None:
+        self.file.write(data)
+        self.file.flush()
+
+
+class CsvSink:
+    """
+    进程内共享的 CSV 写入
+    - 文件名由各平台存储实现生成(包含平台、爬虫类型、数据类型和日期)，每个文件只打开一次
+    - 日期变化后存储实现生成新的文件名，旧文件的缓冲落盘后关闭，实现按天切分
+    - 缓冲条数达到 CSV_FLUSH_ROWS 或距上次落盘超过 CSV_FLUSH_INTERVAL_SEC 时落盘，爬虫结束时调用 close 写入剩余数据
+    - 有打开的文件时后台定时检查，没有新数据写入的文件超过 CSV_FLUSH_INTERVAL_SEC 后也会落盘
+    """
+
+    def __init__(self, flush_rows: int = config.CSV_FLUSH_ROWS,
+                 flush_interval_sec: float = config.CSV_FLUSH_INTERVAL_SEC) -> None:
+        self.flush_rows = flush_rows
+        self.flush_interval_sec = flush_interval_sec
+        # (存储目录, 爬虫类型, 数据类型) -> 当前写入的文件路径
+        self._current: Dict[Tuple[str, str, str], str] = {}
+        self._files: Dict[str, _CsvFile] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def write(self, file_path: str, save_item: Dict, rotate_key: Tuple[str, str, str]) -> None:
+        """
+        写入一条数据
+        Args:
+            file_path: CSV 文件路径
+            save_item: 数据，第一次写入文件时用字段名作为表头
+            rotate_key: 文件所属的 (存储目录, 爬虫类型, 数据类型)，同一个 key 的文件路径变化(日期变化)时关闭旧文件
+
+        Returns:
+
+        """
+        async with self._get_lock():
+            current_path = self._current.get(rotate_key)
+            if current_path != file_path:
+                if current_path is not None:
+                    utils.logger.info(f"[CsvSink.write] rotate csv file {current_path} -> {file_path}")
+                    await self._close_files([current_path])
+                self._current[rotate_key] = file_path
+            csv_file = self._files.get(file_path)
+            if csv_file is None:
+                csv_file = _CsvFile(file_path)
+                self._files[file_path] = csv_file
+            csv_file.write_row(save_item)
+            if (csv_file.pending >= self.flush_rows
+                    or time.time() - csv_file.last_flush >= self.flush_interval_sec):
+                await self._flush_file(csv_file)
+            elif self._flusher is None or self._flusher.done():
+                self._flusher = asyncio.create_task(self._flush_idle_files())
+
+    async def _flush_idle_files(self) -> None:
+        """定时把超过落盘间隔的缓冲写入磁盘，所有文件都已落盘后退出，下次写入时重新启动"""
+        while True:
+            await asyncio.sleep(self.flush_interval_sec)
+            async with self._get_lock():
+                pending_files = [csv_file for csv_file in self._files.values() if csv_file.pending]
+                for csv_file in pending_files:
+                    if time.time() - csv_file.last_flush >= self.flush_interval_sec:
+                        await self._flush_file(csv_file)
+                if not any(csv_file.pending for csv_file in pending_files):
+                    self._flusher = None
+                    return
+
+    async def _flush_file(self, csv_file: _CsvFile) -> None:
+        data = csv_file.take_buffer()
+        if data:
+            await asyncio.get_running_loop().run_in_executor(None, csv_file.write_and_flush, data)
+
+    async def _close_files(self, file_paths: Iterable[str]) -> None:
+        for file_path in list(file_paths):
+            csv_file = self._files.pop(file_path)
+            await self._flush_file(csv_file)
+            csv_file.file.close()
+
+    async def flush(self) -> None:
+        """把所有文件的缓冲写入磁盘"""
+        async with self._get_lock():
+            for csv_file in self._files.values():
+                await self._flush_file(csv_file)
+
+    async def close(self) -> None:
+        """写入剩余数据并关闭所有文件，之后再写入时重新打开"""
+        async with self._get_lock():
+            await self._close_files(self._files.keys())
+            self._current.clear()
+            if self._flusher is not None:
+                self._flusher.cancel()
+                self._flusher = None
+
+
+_csv_sink: Optional[CsvSink] = None
+
+
+def get_csv_sink() -> CsvSink:
+    """
+    获取进程内共享的 CSV 写入
+    Returns:
+
+    """
+    global _csv_sink
+    if _csv_sink is None:
+        _csv_sink = CsvSink()
+    return _csv_sink
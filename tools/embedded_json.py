@@ -0,0 +1,143 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 从页面内嵌的 js 状态(window.__INITIAL_STATE__、$render_data 等)中只解析需要的子对象
+#            页面状态通常有几十到几百KB，而爬虫只需要其中的一棵子树，整页 json.loads 后再取值会把所有对象都创建一遍
+
+import json
+import re
+from typing import Any, Optional, Sequence
+
+# 页面中的字符串可能包含未转义的换行等控制字符
+_DECODER = json.JSONDecoder(strict=False)
+
+# 字符串或值为 undefined 的裸标识符，字符串原样保留
+_UNDEFINED_PATTERN = re.compile(r'("(?:[^"\\]|\\.)*")|\bundefined\b')
+
+# 字符串或括号，用于在解析失败时定位子对象的结束位置
+_TOKEN_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+
+_SCALAR_PATTERN = re.compile(r'[^,}\]]*')
+
+# 删除括号以外的 ascii 字符，去掉字符串后 json 的结构部分只有 ascii 字符
+_NON_BRACKET_TABLE = str.maketrans("", "", "".join(chr(code) for code in range(128) if chr(code) not in "{}[]"))
+
+
+def _unmatched_brackets(text: str) -> str:
+    """
+    去掉 json 片段中的字符串后，返回没有配对的括号，如 "}]{" 表示片段中先关闭了两层，之后又打开了一层
+    """
+    text = text.replace("\\\\", "").replace('\\"', "")
+    brackets = "".join(text.split('"')[::2]).translate(_NON_BRACKET_TABLE)
+    while True:
+        reduced = brackets.replace("{}", "").replace("[]", "")
+        if reduced == brackets:
+            return reduced
+        brackets = reduced
+
+
+def _find_key(text: str, start: int, end: int, key: str, direct_child: bool) -> int:
+    """
+    在 text[start:end] 中查找字段名 key，返回字段值的起始位置，找不到返回 -1
+    direct_child 为 True 时，要求字段是 start 处所在对象的直接子字段
+    """
+    literal = json.dumps(key, ensure_ascii=False) + ":"
+    candidate = start
+    while True:
+        candidate = text.find(literal, candidate, end)
+        if candidate < 0:
+            return -1
+        value_start = candidate + len(literal)
+        # 字段名前面只能是 { 或 ,
+        before = candidate - 1
+        while before >= start and text[before].isspace():
+            before -= 1
+        if before >= start and text[before] not in "{,":
+            candidate = value_start
+            continue
+        if not direct_child:
+            return value_start
+        unmatched = _unmatched_brackets(text[start:candidate])
+        if unmatched[:1] in ("}", "]"):
+            # 所在对象已经结束
+            return -1
+        if not unmatched:
+            return value_start
+        candidate = value_start
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos].isspace():
+        pos += 1
+    return pos
+
+
+def _replace_undefined(fragment: str, undefined: str) -> str:
+    return _UNDEFINED_PATTERN.sub(lambda match: match.group(1) or undefined, fragment)
+
+
+def _decode_value(text: str, pos: int, undefined: str) -> Any:
+    """
+    解析 pos 处的 json 值，值中包含 js 的 undefined 时，只对这个值的文本做替换后再解析
+    """
+    try:
+        return _DECODER.raw_decode(text, pos)[0]
+    except ValueError:
+        pass
+    if text[pos] not in "{[":
+        return _DECODER.decode(_replace_undefined(_SCALAR_PATTERN.match(text, pos).group().strip(), undefined))
+    depth = 0
+    for match in _TOKEN_PATTERN.finditer(text, pos):
+        token = match.group()
+        if token in ("{", "["):
+            depth += 1
+        elif token in ("}", "]"):
+            depth -= 1
+            if depth == 0:
+                return _DECODER.decode(_replace_undefined(text[pos:match.end()], undefined))
+    raise ValueError("unterminated json value")
+
+
+def extract_embedded_json(html: str, marker: str, path: Sequence[str] = (), undefined: str = "null") -> Optional[Any]:
+    """
+    从页面中 marker 之后的 js 状态里解析 path 指向的子对象，其余部分只做查找不做解析
+    Args:
+        html: 页面HTML
+        marker: 状态变量的前缀，如 "window.__INITIAL_STATE__="
+        path: 字段路径，第一个字段在状态中按字段名直接定位，应当在状态中唯一，后面的字段必须是上一个字段值的直接子字段
+        undefined: js 的 undefined 替换成的 json 文本，如 "null"、'""'
+
+    Returns:
+        子对象，页面中没有 marker 或者找不到 path 时返回 None
+
+    """
+    start = html.find(marker)
+    if start < 0:
+        return None
+    pos = start + len(marker)
+    # 内嵌在 <script> 中的状态不会出现原样的 </script>
+    end = html.find("</script>", pos)
+    if end < 0:
+        end = len(html)
+    for index, key in enumerate(path):
+        if index > 0:
+            if html[pos] != "{":
+                return None
+            pos += 1
+        pos = _find_key(html, pos, end, key, direct_child=index > 0)
+        if pos < 0:
+            return None
+        pos = _skip_whitespace(html, pos)
+    pos = _skip_whitespace(html, pos)
+    if pos >= end:
+        return None
+    return _decode_value(html, pos, undefined)
@@ -0,0 +1,107 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 统一的 json 编解码，安装了 orjson 时使用 orjson，否则使用标准库 json
+#            orjson 是可选依赖: pip install orjson
+
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson 只能序列化 64 位以内的整数
+_INT64_MIN = -(1 << 63)
+_UINT64_MAX = (1 << 64) - 1
+
+# 默认的缩进宽度，和 orjson.OPT_INDENT_2 保持一致，保证有没有安装 orjson 时写出的文件格式相同
+INDENT = 2
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """
+    解析 json 文本，orjson 不支持的内容(NaN、非 utf-8 编码等)交给标准库解析
+    注意 orjson 会把超过 64 位的整数解析成浮点数，平台返回的 id 都在 64 位以内
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """
+    序列化为 json 字符串，非 ascii 字符不转义
+    Args:
+        obj: 待序列化的对象
+        indent: 是否缩进，用于写入需要人工查看的文件
+        default: 无法序列化的对象的转换函数，同 json.dumps 的 default
+
+    Returns:
+
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode("utf-8")
+        except orjson.JSONEncodeError:
+            pass
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=INDENT, default=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default)
+
+
+def _is_byte_exact(obj: Any) -> bool:
+    """
+    判断 orjson 对 obj 的输出是否和 json.dumps(obj, separators=(",", ":"), ensure_ascii=False) 完全一致
+    浮点数的格式两者不同(如 1e16 和 1e+16)，非字符串的字段名和超过 64 位的整数 orjson 也无法按标准库的方式处理
+    """
+    if obj is None or isinstance(obj, (str, bool)):
+        return True
+    if isinstance(obj, int):
+        return _INT64_MIN <= obj <= _UINT64_MAX
+    if isinstance(obj, (list, tuple)):
+        return all(_is_byte_exact(item) for item in obj)
+    if isinstance(obj, dict):
+        return all(isinstance(key, str) and _is_byte_exact(value) for key, value in obj.items())
+    return False
+
+
+def dumps_compact(obj: Any) -> str:
+    """
+    紧凑格式序列化，输出和 json.dumps(obj, separators=(",", ":"), ensure_ascii=False) 逐字节一致
+    签名计算依赖请求体的原文，请求体必须用这个函数序列化
+    """
+    if orjson is not None and _is_byte_exact(obj):
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except orjson.JSONEncodeError:
+            # 字符串中有单独的代理字符等
+            pass
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def response_json(response: Any) -> Any:
+    """
+    解析 httpx/requests 响应的 json 内容，直接解析原始字节，省去解码成字符串的一步
+    """
+    try:
+        return loads(response.content)
+    except ValueError:
+        # 非 utf-8 编码的响应按响应头中的编码解码后再解析
+        return json.loads(response.text)
@@ -0,0 +1,339 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 进程内的爬虫指标：请求耗时、签名耗时、存储写入耗时、重试和风控次数、队列深度
+#            指标只在事件循环线程里更新，计数直接修改字典和列表，不加锁
+#            api_server 的 /metrics 以 Prometheus 文本格式输出，命令行运行结束时打印汇总
+
+import asyncio
+import bisect
+import functools
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+METRIC_PREFIX = "mediacrawler_"
+
+# 耗时直方图的桶上限，单位秒，最后一个桶为 +Inf
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 路径中的纯数字或较长的字母数字混合段视为ID，避免每个帖子一个 endpoint 标签
+_ID_SEGMENT_PATTERN = re.compile(r"^(\d+|(?=[A-Za-z_\-]*\d)[A-Za-z0-9_\-]{16,})$")
+
+# 视为风控事件的异常类型
+BLOCK_EXCEPTIONS = {
+    "IPBlockError": "ip_block",
+    "ForbiddenError": "forbidden",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(label_key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(label_key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+def endpoint_label(url: str) -> str:
+    """
+    把请求URL归一为 endpoint 标签：只保留路径，ID段替换为 :id
+    """
+    path = urlparse(url).path or "/"
+    return "/".join(":id" if _ID_SEGMENT_PATTERN.match(segment) else segment for segment in path.split("/"))
+
+
+class Histogram:
+    """固定桶的直方图"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数，返回所在桶的上限"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def merge(self, counts: List[int], total: float, count: int) -> None:
+        for index, bucket_count in enumerate(counts):
+            self.counts[index] += bucket_count
+        self.sum += total
+        self.count += count
+
+
+class MetricsRegistry:
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        # 抓取时才计算的指标，如任务队列深度
+        self._gauge_callbacks: Dict[str, Tuple[LabelKey, Callable[[], float]]] = {}
+        self._help: Dict[str, str] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        series = self._counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        series = self._histograms.setdefault(name, {})
+        key = _label_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], float], **labels: str) -> None:
+        self._gauge_callbacks[name] = (_label_key(labels), callback)
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._histograms.clear()
+        self._gauges.clear()
+
+    def _collect_gauges(self) -> Dict[str, Dict[LabelKey, float]]:
+        gauges = {name: dict(series) for name, series in self._gauges.items()}
+        for name, (key, callback) in self._gauge_callbacks.items():
+            try:
+                gauges.setdefault(name, {})[key] = callback()
+            except Exception:
+                continue
+        return gauges
+
+    def snapshot(self) -> Dict:
+        """可序列化的指标快照，用于 worker 进程把指标交给 api 进程汇总"""
+        return {
+            "counters": {name: [[list(key), value] for key, value in series.items()]
+                         for name, series in self._counters.items()},
+            "histograms": {name: [[list(key), histogram.counts, histogram.sum, histogram.count]
+                                  for key, histogram in series.items()]
+                           for name, series in self._histograms.items()},
+            "gauges": {name: [[list(key), value] for key, value in series.items()]
+                       for name, series in self._collect_gauges().items()},
+        }
+
+    def merge_snapshot(self, snapshot: Dict, **extra_labels: str) -> None:
+        for name, series in snapshot.get("counters", {}).items():
+            for key, value in series:
+                self.inc(name, value, **dict(key), **extra_labels)
+        for name, series in snapshot.get("histograms", {}).items():
+            for key, counts, total, count in series:
+                labels = _label_key({**dict(key), **extra_labels})
+                histogram = self._histograms.setdefault(name, {}).setdefault(labels, Histogram())
+                histogram.merge(counts, total, count)
+        for name, series in snapshot.get("gauges", {}).items():
+            for key, value in series:
+                self.set_gauge(name, value, **dict(key), **extra_labels)
+
+    def render_prometheus(self) -> str:
+        """Prometheus 文本格式"""
+        lines: List[str] = []
+
+        def header(name: str, metric_type: str) -> None:
+            if name in self._help:
+                lines.append(f"# HELP {METRIC_PREFIX}{name} {self._help[name]}")
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} {metric_type}")
+
+        for name, series in sorted(self._counters.items()):
+            header(name, "counter")
+            for key, value in series.items():
+                lines.append(f"{METRIC_PREFIX}{name}{_format_labels(key)} {value}")
+        for name, series in sorted(self._collect_gauges().items()):
+            header(name, "gauge")
+            for key, value in series.items():
+                lines.append(f"{METRIC_PREFIX}{name}{_format_labels(key)} {value}")
+        for name, series in sorted(self._histograms.items()):
+            header(name, "histogram")
+            for key, histogram in series.items():
+                cumulative = 0
+                for index, bucket_count in enumerate(histogram.counts):
+                    cumulative += bucket_count
+                    le = str(histogram.buckets[index]) if index < len(histogram.buckets) else "+Inf"
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+                lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(key)} {histogram.sum}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self) -> str:
+        """命令行运行结束时打印的汇总"""
+        lines = ["===== crawler metrics ====="]
+        for name, series in sorted(self._histograms.items()):
+            for key, histogram in sorted(series.items(), key=lambda item: -item[1].sum):
+                avg_ms = histogram.sum / histogram.count * 1000 if histogram.count else 0
+                lines.append(
+                    f"{name}{_format_labels(key)} count={histogram.count} total={histogram.sum:.2f}s "
+                    f"avg={avg_ms:.1f}ms p50<={histogram.quantile(0.5) * 1000:.0f}ms "
+                    f"p99<={histogram.quantile(0.99) * 1000:.0f}ms"
+                )
+        for name, series in sorted(self._counters.items()):
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+        return "\n".join(lines)
+
+
+metrics = MetricsRegistry()
+metrics.describe("request_seconds", "HTTP request latency per platform and endpoint")
+metrics.describe("sign_seconds", "Request signature latency")
+metrics.describe("store_write_seconds", "Store write latency per backend")
+metrics.describe("retries_total", "Retried calls")
+metrics.describe("block_events_total", "Captcha, IP block and account block responses")
+metrics.describe("work_items_total", "Items processed by bounded worker pools per outcome")
+metrics.describe("session_refresh_total", "Shared session refreshes after blocked requests per outcome")
+metrics.describe("browser_blocked_requests_total", "Browser requests aborted by resource blocking per reason")
+metrics.describe("browser_blocked_bytes_estimated_total", "Estimated bytes saved by aborted browser requests")
+
+
+def timed(name: str, **labels: str):
+    """
+    统计函数耗时的装饰器，支持同步和异步函数
+    Args:
+        name: 直方图名称
+        **labels: 标签
+
+    Returns:
+
+    """
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with metrics.timer(name, **labels):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.timer(name, **labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_request(platform: str):
+    """
+    客户端 request 方法的装饰器，按平台和 endpoint 统计每次请求的耗时和结果
+    放在 @retry 下面，每次重试都会单独计数
+    Args:
+        platform: 平台
+
+    Returns:
+
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, method, url, *args, **kwargs):
+            start = time.perf_counter()
+            outcome = "ok"
+            try:
+                return await func(self, method, url, *args, **kwargs)
+            except Exception as e:
+                outcome = type(e).__name__
+                if outcome in BLOCK_EXCEPTIONS:
+                    record_block_event(platform, BLOCK_EXCEPTIONS[outcome])
+                raise
+            finally:
+                metrics.observe(
+                    "request_seconds", time.perf_counter() - start,
+                    platform=platform, endpoint=endpoint_label(url), outcome=outcome,
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def record_retry(retry_state) -> None:
+    """tenacity 的 before_sleep 回调，统计重试次数"""
+    metrics.inc("retries_total", function=getattr(retry_state.fn, "__qualname__", "unknown"))
+
+
+def record_block_event(platform: str, reason: str) -> None:
+    metrics.inc("block_events_total", platform=platform, reason=reason)
+
+
+def dump_snapshot(file_path: str) -> None:
+    """把当前进程的指标快照写入文件，先写临时文件再替换"""
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metrics.snapshot(), f)
+    os.replace(tmp_path, file_path)
+
+
+def render_with_snapshots(snapshot_dir: str) -> str:
+    """
+    汇总当前进程和 worker 进程写入的指标快照，输出 Prometheus 文本格式
+    Args:
+        snapshot_dir: worker 指标快照目录
+
+    Returns:
+
+    """
+    registry = MetricsRegistry()
+    registry._help = metrics._help
+    registry.merge_snapshot(metrics.snapshot(), process="api")
+    if os.path.isdir(snapshot_dir):
+        for file_name in sorted(os.listdir(snapshot_dir)):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(snapshot_dir, file_name), "r", encoding="utf-8") as f:
+                    registry.merge_snapshot(json.load(f), process=file_name[:-len(".json")])
+            except (OSError, ValueError):
+                continue
+    return registry.render_prometheus()
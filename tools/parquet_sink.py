@@ -0,0 +1,208 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Parquet 写入：数据按文件缓冲成 Arrow RecordBatch，达到指定条数后写成一个 zstd 压缩的 row group
+#            依赖 pyarrow，只在使用 parquet 存储时导入: pip install pyarrow
+
+import asyncio
+import importlib.util
+import os
+import pathlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from tools import json_codec, utils
+from tools.table_schema import INTEGER, get_table_columns
+from var import parquet_files_var
+
+
+def check_pyarrow() -> None:
+    """使用 parquet 存储前检查是否安装了 pyarrow，没有安装时在爬虫启动前报错"""
+    if importlib.util.find_spec("pyarrow") is None:
+        raise ValueError("save data option parquet requires pyarrow, install it with: pip install pyarrow")
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """整数字段的取值，和写入 mysql 时一样，无法转换的值(如 "1万+")写为空"""
+    if value is None or isinstance(value, int):
+        return int(value) if isinstance(value, bool) else value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+
+def _to_str(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return json_codec.dumps(value)
+    return str(value)
+
+
+class _ParquetFile:
+    """一个正在写入的 Parquet 文件，schema 在第一条数据写入时确定"""
+
+    def __init__(self, file_path: str, table_name: str, first_item: Dict) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        table_columns = get_table_columns(table_name)
+        # 字段顺序和各平台 update_xxx 构造的数据一致，类型和 schema/tables.sql 中的表一致
+        self.columns: List[Tuple[str, bool]] = [
+            (name, table_columns.get(name) == INTEGER) for name in first_item.keys()
+        ]
+        self.schema = pa.schema([
+            pa.field(name, pa.int64() if is_integer else pa.string()) for name, is_integer in self.columns
+        ])
+        pathlib.Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        self.file_path = file_path
+        self.writer = pq.ParquetWriter(file_path, self.schema, compression="zstd")
+        self.rows: List[Dict] = []
+        self.dropped_keys = set()
+
+    def add_row(self, save_item: Dict) -> None:
+        extra_keys = save_item.keys() - set(name for name, _ in self.columns) - self.dropped_keys
+        if extra_keys:
+            utils.logger.warning(f"[ParquetSink.write] fields {sorted(extra_keys)} not in schema of {self.file_path}, dropped")
+            self.dropped_keys.update(extra_keys)
+        self.rows.append(save_item)
+
+    def take_batch(self) -> Any:
+        rows, self.rows = self.rows, []
+        arrays = []
+        for name, is_integer in self.columns:
+            convert = _to_int if is_integer else _to_str
+            arrays.append(self.pa.array([convert(row.get(name)) for row in rows],
+                                        type=self.pa.int64() if is_integer else self.pa.string()))
+        return self.pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+class ParquetSink:
+    """
+    进程内共享的 Parquet 写入
+    - 每个文件一个 ParquetWriter，字段类型取自 schema/tables.sql 中对应的表，保证每个文件的 schema 相同
+    - 缓冲条数达到 PARQUET_ROW_GROUP_ROWS 时写入一个 row group，爬虫结束时调用 close 写入剩余数据和文件尾
+    - 日期变化后存储实现生成新的文件名，旧文件写完后关闭；Parquet 文件关闭后不能追加，已存在的文件名加序号后缀
+    - 进程内同时运行多个任务时，任务结束只关闭本任务写入、且没有其他任务在写的文件
+    """
+
+    def __init__(self, row_group_rows: int = config.PARQUET_ROW_GROUP_ROWS) -> None:
+        self.row_group_rows = row_group_rows
+        # (存储目录, 爬虫类型, 数据类型) -> 当前写入的文件路径
+        self._current: Dict[Tuple[str, str, str], str] = {}
+        self._files: Dict[str, _ParquetFile] = {}
+        # 文件路径 -> 正在写入的任务数
+        self._users: Dict[str, int] = {}
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @staticmethod
+    def _unused_path(file_path: str) -> str:
+        base, ext = os.path.splitext(file_path)
+        index = 1
+        while os.path.exists(file_path):
+            file_path = f"{base}_{index}{ext}"
+            index += 1
+        return file_path
+
+    async def write(self, file_path: str, save_item: Dict, table_name: str, rotate_key: Tuple[str, str, str]) -> None:
+        """
+        写入一条数据
+        Args:
+            file_path: Parquet 文件路径
+            save_item: 数据
+            table_name: schema/tables.sql 中对应的表名，用于确定字段类型
+            rotate_key: 文件所属的 (存储目录, 爬虫类型, 数据类型)，同一个 key 的文件路径变化(日期变化)时关闭旧文件
+
+        Returns:
+
+        """
+        async with self._get_lock():
+            current_path = self._current.get(rotate_key)
+            if current_path != file_path:
+                if current_path is not None:
+                    utils.logger.info(f"[ParquetSink.write] rotate parquet file {current_path} -> {file_path}")
+                    await self._close_files([current_path])
+                    self._users.pop(current_path, None)
+                self._current[rotate_key] = file_path
+            parquet_file = self._files.get(file_path)
+            if parquet_file is None:
+                parquet_file = _ParquetFile(self._unused_path(file_path), table_name, save_item)
+                self._files[file_path] = parquet_file
+            task_files = parquet_files_var.get()
+            if task_files is not None and file_path not in task_files:
+                task_files.add(file_path)
+                self._users[file_path] = self._users.get(file_path, 0) + 1
+            parquet_file.add_row(save_item)
+            if len(parquet_file.rows) >= self.row_group_rows:
+                await self._flush_file(parquet_file)
+
+    async def _flush_file(self, parquet_file: _ParquetFile) -> None:
+        if parquet_file.rows:
+            batch = parquet_file.take_batch()
+            await asyncio.get_running_loop().run_in_executor(None, parquet_file.writer.write_batch, batch)
+
+    async def _close_files(self, file_paths: List[str]) -> None:
+        for file_path in list(file_paths):
+            parquet_file = self._files.pop(file_path, None)
+            if parquet_file is None:
+                continue
+            await self._flush_file(parquet_file)
+            await asyncio.get_running_loop().run_in_executor(None, parquet_file.writer.close)
+
+    async def close(self) -> None:
+        """
+        写入剩余数据并关闭当前任务写入的文件，之后再写入时创建新文件
+        不在任务中调用(命令行运行)时关闭所有文件
+        """
+        async with self._get_lock():
+            task_files = parquet_files_var.get()
+            if task_files is None:
+                closing = list(self._files.keys())
+                self._users.clear()
+            else:
+                closing = []
+                for file_path in task_files:
+                    users = self._users.pop(file_path, 0) - 1
+                    if users > 0:
+                        self._users[file_path] = users
+                    else:
+                        closing.append(file_path)
+                task_files.clear()
+            await self._close_files(closing)
+            for rotate_key, file_path in list(self._current.items()):
+                if file_path in closing:
+                    del self._current[rotate_key]
+
+
+_parquet_sink: Optional[ParquetSink] = None
+
+
+def get_parquet_sink() -> ParquetSink:
+    """
+    获取进程内共享的 Parquet 写入
+    Returns:
+
+    """
+    global _parquet_sink
+    if _parquet_sink is None:
+        _parquet_sink = ParquetSink()
+    return _parquet_sink
@@ -0,0 +1,107 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 浏览器请求拦截：中止图片、视频、字体和统计埋点请求，减少浏览器上下文的带宽、内存和 CPU 占用
+
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Route
+
+import config
+from tools import utils
+from tools.metrics import metrics
+
+# 被中止的请求没有响应，节省的流量按各类资源的平均大小估算，单位字节
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 40 * 1024,
+    "media": 512 * 1024,
+    "font": 60 * 1024,
+    "tracker": 10 * 1024,
+}
+
+
+class ResourceBlocker:
+    """
+    安装在浏览器上下文上的请求拦截器
+    - resource_types 中的资源类型直接中止，document、script、xhr、fetch 等签名和登录需要的资源放行
+    - tracker_domains 及其子域名的请求无论资源类型都中止
+    - 中止的请求数和估算节省的流量按平台、原因记录到指标
+    """
+
+    def __init__(self, platform: str, resource_types: Iterable[str], tracker_domains: Iterable[str]) -> None:
+        self.platform = platform
+        self.resource_types = frozenset(resource_types)
+        self.tracker_domains = tuple(domain.lower().lstrip(".") for domain in tracker_domains)
+
+    def _is_tracker(self, url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == domain or host.endswith("." + domain) for domain in self.tracker_domains)
+
+    def block_reason(self, resource_type: str, url: str) -> Optional[str]:
+        """
+        判断请求是否需要中止
+        Args:
+            resource_type: Playwright 的 request.resource_type
+            url: 请求地址
+
+        Returns:
+            中止原因(资源类型或 tracker)，放行时返回 None
+
+        """
+        if self.tracker_domains and self._is_tracker(url):
+            return "tracker"
+        if resource_type in self.resource_types:
+            return resource_type
+        return None
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        reason = self.block_reason(request.resource_type, request.url)
+        try:
+            if reason is None:
+                await route.continue_()
+                return
+            metrics.inc("browser_blocked_requests_total", platform=self.platform, reason=reason)
+            metrics.inc("browser_blocked_bytes_estimated_total", ESTIMATED_RESOURCE_BYTES.get(reason, 0),
+                        platform=self.platform, reason=reason)
+            await route.abort("blockedbyclient")
+        except Exception as e:
+            # 页面关闭或上下文回收时正在处理的请求会失败，忽略即可
+            utils.logger.debug(f"[ResourceBlocker.handle] route {request.url} error: {e}")
+
+    async def install(self, browser_context: BrowserContext) -> None:
+        await browser_context.route("**/*", self.handle)
+
+
+def create_resource_blocker(platform: str) -> Optional[ResourceBlocker]:
+    """
+    按配置创建平台的请求拦截器，未开启或没有需要中止的请求时返回 None
+    Args:
+        platform: 平台
+
+    Returns:
+
+    """
+    if not config.ENABLE_RESOURCE_BLOCKING:
+        return None
+    resource_types = config.PLATFORM_BLOCK_RESOURCE_TYPES.get(platform, config.BLOCK_RESOURCE_TYPES)
+    if not resource_types and not config.BLOCK_TRACKER_DOMAINS:
+        return None
+    return ResourceBlocker(platform, resource_types, config.BLOCK_TRACKER_DOMAINS)
+
+
+async def install_resource_blocking(browser_context: BrowserContext, platform: str) -> None:
+    """在新建的浏览器上下文上安装平台的请求拦截，打开首页前调用"""
+    blocker = create_resource_blocker(platform)
+    if blocker is not None:
+        await blocker.install(browser_context)
@@ -0,0 +1,180 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 并发任务共享的登录态守护：请求被风控时只刷新一次 cookies/重新登录，其余请求等待刷新完成后重试
+
+import asyncio
+import functools
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional
+
+from tools import utils
+from tools.metrics import BLOCK_EXCEPTIONS, metrics
+
+# 当前协程是否已经处于守护的请求(或刷新过程)中，嵌套的请求直接执行，由最外层负责刷新和重试
+_guarded_var: ContextVar[bool] = ContextVar("session_guarded", default=False)
+
+
+class AccountBlockedError(Exception):
+    """账号被风控：出现验证码、接口返回 blocked 等，需要刷新登录态"""
+
+
+def is_block_error(e: BaseException) -> bool:
+    """
+    异常(包括 tenacity 的 RetryError、被包装成 DataFetchError 的原始异常)是否表示账号或IP被风控
+    Args:
+        e: 请求抛出的异常
+
+    Returns:
+
+    """
+    seen = set()
+    while e is not None and id(e) not in seen:
+        seen.add(id(e))
+        if isinstance(e, AccountBlockedError) or type(e).__name__ in BLOCK_EXCEPTIONS:
+            return True
+        e = e.__cause__ or e.__context__
+    return False
+
+
+class SessionGuard:
+    """
+    一个爬虫实例内所有并发任务共享的登录态守护
+    - 请求抛出风控异常时调用 refresh 刷新登录态(重新打开首页更新 cookies，失效时重新登录)，
+      同一时间只有一次刷新，其余出错的请求等待这次刷新完成，不会各自刷新或被取消
+    - 刷新进行中新发起的请求先等待刷新完成，避免继续用旧的 cookies 请求
+    - 刷新完成后出错的请求重试一次；请求开始后已经有其他请求完成了刷新时直接重试
+    - 刷新失败或重试仍然出错时抛出原异常，交给调用方按原来的方式处理
+    """
+
+    def __init__(self, platform: str, refresh: Callable[[], Awaitable[None]],
+                 is_session_error: Callable[[BaseException], bool] = is_block_error) -> None:
+        """
+        Args:
+            platform: 平台，用于日志和指标
+            refresh: 刷新登录态的函数
+            is_session_error: 判断异常是否需要刷新登录态
+        """
+        self.platform = platform
+        self._refresh = refresh
+        self._is_session_error = is_session_error
+        # 成功刷新的次数
+        self._generation = 0
+        self._refreshing: Optional[asyncio.Task] = None
+
+    async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        在守护下执行一次请求
+        Args:
+            func: 发起请求的函数，重试时会再次调用
+
+        Returns:
+            请求结果
+
+        """
+        if _guarded_var.get():
+            return await func()
+        token = _guarded_var.set(True)
+        try:
+            await self.wait_ready()
+            generation = self._generation
+            try:
+                return await func()
+            except Exception as e:
+                if not self._is_session_error(e):
+                    raise
+                utils.logger.warning(f"[SessionGuard.call] {self.platform} request blocked, wait for session refresh: {e!r}")
+                if not await self.recover(generation):
+                    raise
+            return await func()
+        finally:
+            _guarded_var.reset(token)
+
+    async def wait_ready(self) -> None:
+        """刷新进行中时等待刷新完成"""
+        if self._refreshing is not None:
+            await asyncio.shield(self._refreshing)
+
+    async def recover(self, generation: int) -> bool:
+        """
+        请求出错后刷新登录态，已有刷新进行中时等待它完成
+        Args:
+            generation: 请求开始时的刷新次数
+
+        Returns:
+            请求开始之后登录态是否已经刷新过
+
+        """
+        if self._refreshing is None:
+            if generation != self._generation:
+                return True
+            self._refreshing = asyncio.create_task(self._run_refresh())
+        return await asyncio.shield(self._refreshing)
+
+    async def _run_refresh(self) -> bool:
+        # 刷新过程中的 pong、登录等请求不再经过守护
+        _guarded_var.set(True)
+        utils.logger.info(f"[SessionGuard._run_refresh] {self.platform} begin refresh session ...")
+        try:
+            await self._refresh()
+        except Exception as e:
+            utils.logger.error(f"[SessionGuard._run_refresh] {self.platform} refresh session failed: {e!r}")
+            metrics.inc("session_refresh_total", platform=self.platform, outcome=type(e).__name__)
+            return False
+        finally:
+            self._refreshing = None
+        self._generation += 1
+        metrics.inc("session_refresh_total", platform=self.platform, outcome="ok")
+        utils.logger.info(f"[SessionGuard._run_refresh] {self.platform} session refreshed")
+        return True
+
+
+async def run_guarded(client: Any, call: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    在客户端的登录态守护下执行一次请求，客户端没有设置守护时直接执行(嵌套的请求同样不再经过守护和账号路由)
+    Args:
+        client: API客户端
+        call: 发起请求的函数
+
+    Returns:
+        请求结果
+
+    """
+    guard: Optional[SessionGuard] = client.session_guard
+    if guard is not None:
+        return await guard.call(call)
+    token = _guarded_var.set(True)
+    try:
+        return await call()
+    finally:
+        _guarded_var.reset(token)
+
+
+def session_guarded(func):
+    """
+    客户端请求方法的装饰器
+    - 客户端设置了 account_pool 时由账号池选择一个账号的客户端执行，见 tools.account_pool.AccountPool
+    - 客户端设置了 session_guard 时在守护下执行
+    放在 request 和会重新生成签名请求头的 get/post 上，嵌套调用时由最外层负责路由和重试，重试时重新签名
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if _guarded_var.get():
+            return await func(self, *args, **kwargs)
+        if self.account_pool is not None:
+            return await self.account_pool.call(func, args, kwargs)
+        if self.session_guard is None:
+            return await func(self, *args, **kwargs)
+        return await self.session_guard.call(functools.partial(func, self, *args, **kwargs))
+
+    return wrapper
@@ -17,11 +17,10 @@ import os
 from typing import List
 from urllib.parse import urlparse
 
-import cv2
 import httpx
-import numpy as np
 
 
+# cv2、numpy 导入较慢，在用到的方法内部再导入
 class Slide:
     """
     copy from https://blog.csdn.net/weixin_43582101 thanks for author
@@ -44,6 +43,8 @@ class Slide:
 
     @staticmethod
     def check_is_img_path(img, img_type, resize):
+        import cv2
+        import numpy as np
         if img.startswith('http'):
             headers = {
                 "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;"
@@ -74,6 +75,7 @@ class Slide:
     @staticmethod
     def clear_white(img):
         """清除图片的空白区域，这里主要清除滑块的空白"""
+        import cv2
         img = cv2.imread(img)
         rows, cols, channel = img.shape
         min_x = 255
@@ -97,6 +99,7 @@ class Slide:
         return img1
 
     def template_match(self, tpl, target):
+        import cv2
         th, tw = tpl.shape[:2]
         result = cv2.matchTemplate(target, tpl, cv2.TM_CCOEFF_NORMED)
         # 寻找矩阵(一维数组当作向量,用Mat定义) 中最小值和最大值的位置
@@ -115,10 +118,12 @@ class Slide:
 
     @staticmethod
     def image_edge_detection(img):
+        import cv2
         edges = cv2.Canny(img, 100, 200)
         return edges
 
     def discern(self):
+        import cv2
         img1 = self.clear_white(self.gap)
         img1 = cv2.cvtColor(img1, cv2.COLOR_RGB2GRAY)
         slide = self.image_edge_detection(img1)
@@ -0,0 +1,378 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : SQLite 写入：WAL 模式的本地数据库，单个写入任务把数据攒批后在一个事务中 upsert，
+#            不需要部署 mysql 也能按数据的唯一标识去重，写入的同时可以用其他连接读取
+
+import asyncio
+import os
+import pathlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import config
+from tools import json_codec, utils
+from tools.table_schema import INTEGER, load_table_indexes, load_tables
+from var import sqlite_writes_var
+
+# 表 -> 数据的唯一标识，同一标识的数据再次写入时更新已有的行
+UNIQUE_KEYS: Dict[str, Tuple[str, ...]] = {
+    "bilibili_video": ("video_id",),
+    "bilibili_video_comment": ("comment_id",),
+    "bilibili_up_info": ("user_id",),
+    "bilibili_contact_info": ("up_id", "fan_id"),
+    "bilibili_up_dynamic": ("dynamic_id",),
+    "douyin_aweme": ("aweme_id",),
+    "douyin_aweme_comment": ("comment_id",),
+    "dy_creator": ("user_id",),
+    "kuaishou_video": ("video_id",),
+    "kuaishou_video_comment": ("comment_id",),
+    "weibo_note": ("note_id",),
+    "weibo_note_comment": ("comment_id",),
+    "weibo_creator": ("user_id",),
+    "xhs_note": ("note_id",),
+    "xhs_note_comment": ("comment_id",),
+    "xhs_creator": ("user_id",),
+    "tieba_note": ("note_id",),
+    "tieba_comment": ("comment_id",),
+    "tieba_creator": ("user_id",),
+    "zhihu_content": ("content_id",),
+    "zhihu_comment": ("comment_id",),
+    "zhihu_creator": ("user_id",),
+}
+
+# 只在第一次插入时写入、更新时保留的字段
+_INSERT_ONLY_COLUMNS = {"add_ts"}
+
+_STOP = object()
+# 写入任务收到后立即提交已取出的数据，不等凑满一批或提交间隔
+_FLUSH = object()
+
+
+class SqliteWriteError(Exception):
+    """部分数据写入失败，close 时抛出"""
+
+
+class SqliteTaskWrites:
+    """一个爬虫任务放入写入队列的数据：还没写入的条数和写入失败的条数"""
+
+    def __init__(self) -> None:
+        # 是否计入 SqliteSink 的使用中任务数
+        self.registered = False
+        self.pending = 0
+        self.failed_rows = 0
+        self.last_error: Optional[Exception] = None
+        self._written: Optional[asyncio.Event] = None
+
+    def done(self, error: Optional[Exception] = None) -> None:
+        self.pending -= 1
+        if error is not None:
+            self.failed_rows += 1
+            self.last_error = error
+        if self.pending == 0 and self._written is not None:
+            self._written.set()
+
+    async def wait_written(self) -> None:
+        while self.pending > 0:
+            self._written = asyncio.Event()
+            await self._written.wait()
+
+    def raise_failures(self, db_path: str) -> None:
+        if not self.failed_rows:
+            return
+        failed_rows, last_error = self.failed_rows, self.last_error
+        self.failed_rows, self.last_error = 0, None
+        raise SqliteWriteError(f"{failed_rows} rows failed to write to {db_path}: {last_error}") from last_error
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_value(value: Any) -> Any:
+    if isinstance(value, (dict, list, tuple)):
+        return json_codec.dumps(value)
+    return value
+
+
+class SqliteSink:
+    """
+    进程内共享的 SQLite 写入
+    - 表结构取自 schema/tables.sql，id 为自增主键，UNIQUE_KEYS 中的字段建唯一索引，数据中多出的字段自动加为 TEXT 列
+    - upsert 只把数据放入队列，由一个写入任务取出，攒够 SQLITE_BATCH_ROWS 条或等待超过 SQLITE_COMMIT_INTERVAL_SEC 秒后
+      在一个事务中批量写入；写连接只在一个线程中使用，不阻塞事件循环
+    - 队列最多缓冲 SQLITE_MAX_QUEUE_ROWS 条，写入跟不上时 upsert 等待
+    - 一批写入失败时逐条重试，只丢弃写入失败的数据，写入该数据的任务 close 时抛出 SqliteWriteError
+    - 进程内同时运行多个任务时，任务 close 只等待本任务的数据写入，没有任务在使用时才停止写入任务、关闭连接
+    - WAL 模式下读写互不阻塞，query 使用每个线程独立的只读连接
+    """
+
+    def __init__(self, db_path: str = config.SQLITE_DB_PATH, batch_rows: int = config.SQLITE_BATCH_ROWS,
+                 commit_interval_sec: float = config.SQLITE_COMMIT_INTERVAL_SEC,
+                 max_queue_rows: int = config.SQLITE_MAX_QUEUE_ROWS) -> None:
+        self.db_path = db_path
+        self.batch_rows = batch_rows
+        self.commit_interval_sec = commit_interval_sec
+        self.max_queue_rows = max_queue_rows
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        # 表 -> 已有的字段
+        self._table_columns: Dict[str, List[str]] = {}
+        self._readers = threading.local()
+        self._reader_conns: List[sqlite3.Connection] = []
+        self._reader_lock = threading.Lock()
+        # 正在写入的任务数，不在任务中(命令行运行)写入的数据计入 _default_writes
+        self._users = 0
+        self._default_writes = SqliteTaskWrites()
+        # 正在停止写入任务时，新的写入等待停止完成后再启动新的写入任务
+        self._stopping: Optional[asyncio.Task] = None
+
+    def _ensure_writer(self) -> None:
+        if self._writer_task is None or self._writer_task.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue_rows)
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite_sink")
+            self._writer_task = asyncio.create_task(self._run_writer())
+
+    async def upsert(self, table_name: str, save_item: Dict) -> None:
+        """
+        写入一条数据，已有相同唯一标识的数据时更新
+        Args:
+            table_name: schema/tables.sql 中的表名
+            save_item: 数据
+
+        Returns:
+
+        """
+        while self._stopping is not None:
+            await asyncio.shield(self._stopping)
+        writes = sqlite_writes_var.get() or self._default_writes
+        if not writes.registered:
+            writes.registered = True
+            self._users += 1
+        self._ensure_writer()
+        writes.pending += 1
+        await self._queue.put((table_name, save_item, writes))
+
+    async def _run_writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopped = False
+        while not stopped:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.commit_interval_sec
+            while len(batch) < self.batch_rows and batch[-1] is not _STOP and batch[-1] is not _FLUSH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            marker = batch.pop() if batch[-1] is _STOP or batch[-1] is _FLUSH else None
+            stopped = marker is _STOP
+            if batch:
+                await self._write(batch)
+            for _ in range(len(batch) + (marker is not None)):
+                self._queue.task_done()
+
+    async def _write(self, batch: List[Tuple[str, Dict, SqliteTaskWrites]]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._write_batch, [row[:2] for row in batch])
+            for _, _, writes in batch:
+                writes.done()
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                self._record_failure(batch[0], e)
+                return
+            utils.logger.warning(f"[SqliteSink._write] write {len(batch)} rows to {self.db_path} error: {e}, retry one by one")
+        for row in batch:
+            try:
+                await loop.run_in_executor(self._executor, self._write_batch, [row[:2]])
+            except Exception as e:
+                self._record_failure(row, e)
+            else:
+                row[2].done()
+
+    def _record_failure(self, row: Tuple[str, Dict, SqliteTaskWrites], error: Exception) -> None:
+        row[2].done(error)
+        utils.logger.error(f"[SqliteSink._write] drop row of table {row[0]} in {self.db_path}, error: {error}")
+
+    def _connect(self) -> sqlite3.Connection:
+        pathlib.Path(os.path.dirname(self.db_path) or ".").mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 模式下 NORMAL 只在 checkpoint 时 fsync，掉电可能丢失最后几个事务，但不会损坏数据库
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ensure_table(self, table_name: str, item_keys: Sequence[str]) -> List[str]:
+        columns = self._table_columns.get(table_name)
+        if columns is None:
+            existing = [row[1] for row in self._conn.execute(f"PRAGMA table_info({_quote(table_name)})")]
+            if not existing:
+                self._create_table(table_name)
+                existing = [row[1] for row in self._conn.execute(f"PRAGMA table_info({_quote(table_name)})")]
+            columns = self._table_columns[table_name] = existing
+        missing = [key for key in item_keys if key not in columns]
+        for key in missing:
+            utils.logger.info(f"[SqliteSink._ensure_table] add column {key} to table {table_name}")
+            self._conn.execute(f"ALTER TABLE {_quote(table_name)} ADD COLUMN {_quote(key)} TEXT")
+            columns.append(key)
+        return columns
+
+    def _create_table(self, table_name: str) -> None:
+        table_columns = load_tables()[table_name]
+        column_defs = ["id INTEGER PRIMARY KEY AUTOINCREMENT"] + [
+            f"{_quote(name)} {'INTEGER' if column_type == INTEGER else 'TEXT'}"
+            for name, column_type in table_columns.items() if name != "id"
+        ]
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table_name)} ({', '.join(column_defs)})")
+        unique_keys = UNIQUE_KEYS[table_name]
+        self._conn.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {_quote(f'{table_name}__unique')} "
+            f"ON {_quote(table_name)} ({', '.join(_quote(key) for key in unique_keys)})"
+        )
+        for index_name, index_columns in load_table_indexes().get(table_name, []):
+            if tuple(index_columns) == unique_keys:
+                continue
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {_quote(f'{table_name}__{index_name}')} "
+                f"ON {_quote(table_name)} ({', '.join(_quote(column) for column in index_columns)})"
+            )
+
+    def _write_batch(self, batch: List[Tuple[str, Dict]]) -> None:
+        if self._conn is None:
+            self._conn = self._connect()
+        # 同一个表、同样字段的数据合并为一条 executemany
+        groups: Dict[Tuple[str, Tuple[str, ...]], List[Dict]] = {}
+        now = utils.get_current_timestamp()
+        for table_name, save_item in batch:
+            if "add_ts" not in save_item:
+                save_item = {**save_item, "add_ts": now}
+            groups.setdefault((table_name, tuple(save_item.keys())), []).append(save_item)
+        self._conn.execute("BEGIN")
+        try:
+            for (table_name, keys), items in groups.items():
+                self._ensure_table(table_name, keys)
+                self._conn.executemany(self._upsert_sql(table_name, keys),
+                                       [[_to_value(item.get(key)) for key in keys] for item in items])
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            # 建表、加列在事务中执行，回滚后需要重新读取表结构
+            self._table_columns.clear()
+            raise
+
+    @staticmethod
+    def _upsert_sql(table_name: str, keys: Tuple[str, ...]) -> str:
+        unique_keys = UNIQUE_KEYS[table_name]
+        updates = [
+            f"{_quote(key)} = excluded.{_quote(key)}"
+            for key in keys if key not in unique_keys and key not in _INSERT_ONLY_COLUMNS
+        ]
+        conflict = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+        return (
+            f"INSERT INTO {_quote(table_name)} ({', '.join(_quote(key) for key in keys)}) "
+            f"VALUES ({', '.join('?' * len(keys))}) "
+            f"ON CONFLICT ({', '.join(_quote(key) for key in unique_keys)}) {conflict}"
+        )
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only=ON")
+            self._readers.conn = conn
+            with self._reader_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    def _query(self, sql: str, params: Sequence[Any]) -> List[Dict]:
+        return [dict(row) for row in self._reader().execute(sql, params).fetchall()]
+
+    async def query(self, sql: str, *params: Any) -> List[Dict]:
+        """
+        查询已写入(已提交)的数据，在线程池中执行，不阻塞写入
+        Args:
+            sql: 查询语句
+            *params: 参数
+
+        Returns:
+            行列表
+
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self._query, sql, params)
+
+    async def flush(self) -> None:
+        """等待已放入队列的数据提交"""
+        if self._writer_task is not None and not self._writer_task.done():
+            await self._queue.put(_FLUSH)
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """
+        等待当前任务的数据写入，没有其他任务在写入时停止写入任务并关闭连接，之后再写入时重新打开
+        当前任务有数据写入失败时抛出 SqliteWriteError
+        """
+        writes = sqlite_writes_var.get() or self._default_writes
+        if writes.pending > 0:
+            await self._queue.put(_FLUSH)
+            await writes.wait_written()
+        if writes.registered:
+            writes.registered = False
+            self._users -= 1
+        if self._users == 0 and self._stopping is None:
+            self._stopping = asyncio.create_task(self._stop())
+            try:
+                await self._stopping
+            finally:
+                self._stopping = None
+        writes.raise_failures(self.db_path)
+
+    async def _stop(self) -> None:
+        if self._writer_task is not None and not self._writer_task.done():
+            await self._queue.put(_STOP)
+            await self._writer_task
+        self._writer_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._table_columns.clear()
+        with self._reader_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
+        self._readers = threading.local()
+
+
+_sqlite_sink: Optional[SqliteSink] = None
+
+
+def get_sqlite_sink() -> SqliteSink:
+    """
+    获取进程内共享的 SQLite 写入
+    Returns:
+
+    """
+    global _sqlite_sink
+    if _sqlite_sink is None:
+        _sqlite_sink = SqliteSink()
+    return _sqlite_sink
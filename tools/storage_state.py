@@ -0,0 +1,80 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 免浏览器模式使用的登录态：浏览器登录后保存 Playwright storage state，下次运行直接读取其中的 cookies
+
+import os
+import pathlib
+from typing import Any, Dict, List, Optional
+
+from config.settings import crawl_settings
+from tools import json_codec, utils
+
+
+class StoredBrowserState:
+    """
+    保存的登录态，代替 BrowserContext 提供客户端创建和 update_cookies 时调用的 cookies()
+    """
+
+    def __init__(self, cookies: List[Dict[str, Any]]) -> None:
+        self._cookies = cookies
+
+    async def cookies(self, urls: Any = None) -> List[Dict[str, Any]]:
+        return list(self._cookies)
+
+    async def close(self) -> None:
+        pass
+
+
+def storage_state_path(platform: str) -> str:
+    return os.path.join(os.getcwd(), crawl_settings.storage_state_file % platform)
+
+
+def load_storage_state(platform: str, cookie_str: str = "") -> Optional[StoredBrowserState]:
+    """
+    读取平台保存的登录态，没有保存过时使用配置的 cookie 字符串
+    Args:
+        platform: 平台
+        cookie_str: 配置的 COOKIES
+
+    Returns:
+        登录态，都没有时返回 None
+
+    """
+    file_path = storage_state_path(platform)
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                state = json_codec.loads(f.read())
+            return StoredBrowserState(state.get("cookies", []))
+        except ValueError as e:
+            utils.logger.warning(f"[load_storage_state] invalid storage state file {file_path}, ignored: {e}")
+    if cookie_str:
+        cookie_dict = utils.convert_str_cookie_to_dict(cookie_str)
+        return StoredBrowserState([{"name": name, "value": value} for name, value in cookie_dict.items()])
+    return None
+
+
+async def save_storage_state(platform: str, browser_context: Any) -> None:
+    """
+    保存浏览器上下文的 cookies 和 localStorage，供下次免浏览器运行使用
+    Args:
+        platform: 平台
+        browser_context: 已登录的浏览器上下文
+
+    Returns:
+
+    """
+    file_path = storage_state_path(platform)
+    pathlib.Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+    await browser_context.storage_state(path=file_path)
+    utils.logger.info(f"[save_storage_state] {platform} login state saved to {file_path}")
@@ -0,0 +1,124 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 解析 schema/tables.sql 中的表结构(CREATE TABLE 和 ALTER TABLE ADD COLUMN)和索引，
+#            供 db 以外的存储方式(parquet、sqlite)使用和 mysql 一致的字段类型
+
+import functools
+import os
+import re
+from typing import Dict, List, Tuple
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema", "tables.sql")
+
+# 字段类型归为两类
+INTEGER = "integer"
+TEXT = "text"
+
+_INTEGER_TYPES = {"tinyint", "smallint", "mediumint", "int", "integer", "bigint"}
+
+# 表定义中不是字段的行
+_NON_COLUMN_WORDS = {"primary", "key", "unique", "index", "constraint", "fulltext", "foreign"}
+
+_CREATE_PATTERN = re.compile(r"create\s+table\s+`?(\w+)`?\s*\((.*)\)", re.I | re.S)
+_ADD_COLUMN_PATTERN = re.compile(r"alter\s+table\s+`?(\w+)`?\s+add\s+column\s+`?(\w+)`?\s+(\w+)", re.I | re.S)
+_COLUMN_PATTERN = re.compile(r"^\s*`?(\w+)`?\s+(\w+)")
+_INDEX_PATTERN = re.compile(r"^\s*(?:key|index)\s+`?(\w+)`?\s*\(([^)]*)\)", re.I)
+
+
+def _column_type(sql_type: str) -> str:
+    return INTEGER if sql_type.lower() in _INTEGER_TYPES else TEXT
+
+
+def _strip_sql(sql: str) -> str:
+    # 去掉注释和字符串(COMMENT '...')，剩下的内容里分号只用于分隔语句
+    sql = re.sub(r"--[^\n]*", "", sql)
+    return re.sub(r"'(?:[^'\\]|\\.|'')*'", "''", sql)
+
+
+def parse_tables(sql: str) -> Dict[str, Dict[str, str]]:
+    """
+    解析建表语句
+    Args:
+        sql: sql 文件内容
+
+    Returns:
+        表名 -> {字段名: INTEGER | TEXT}，字段按定义顺序排列
+
+    """
+    tables: Dict[str, Dict[str, str]] = {}
+    for statement in _strip_sql(sql).split(";"):
+        create_match = _CREATE_PATTERN.search(statement)
+        if create_match:
+            columns: Dict[str, str] = {}
+            for line in create_match.group(2).split(",\n"):
+                column_match = _COLUMN_PATTERN.match(line)
+                if column_match and column_match.group(1).lower() not in _NON_COLUMN_WORDS:
+                    columns[column_match.group(1)] = _column_type(column_match.group(2))
+            tables[create_match.group(1)] = columns
+            continue
+        add_match = _ADD_COLUMN_PATTERN.search(statement)
+        if add_match and add_match.group(1) in tables:
+            tables[add_match.group(1)][add_match.group(2)] = _column_type(add_match.group(3))
+    return tables
+
+
+def parse_table_indexes(sql: str) -> Dict[str, List[Tuple[str, List[str]]]]:
+    """
+    解析建表语句中的普通索引(KEY、INDEX)，主键和唯一索引由使用方根据数据的唯一标识自行建立
+    Args:
+        sql: sql 文件内容
+
+    Returns:
+        表名 -> [(索引名, [字段名])]
+
+    """
+    indexes: Dict[str, List[Tuple[str, List[str]]]] = {}
+    for statement in _strip_sql(sql).split(";"):
+        create_match = _CREATE_PATTERN.search(statement)
+        if not create_match:
+            continue
+        table_indexes = indexes.setdefault(create_match.group(1), [])
+        for line in create_match.group(2).split(",\n"):
+            index_match = _INDEX_PATTERN.match(line)
+            if index_match:
+                table_indexes.append((index_match.group(1), re.findall(r"\w+", index_match.group(2))))
+    return indexes
+
+
+@functools.lru_cache(maxsize=1)
+def _read_schema_file(schema_file: str = SCHEMA_FILE) -> str:
+    with open(schema_file, encoding="utf-8") as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=1)
+def load_tables() -> Dict[str, Dict[str, str]]:
+    return parse_tables(_read_schema_file())
+
+
+@functools.lru_cache(maxsize=1)
+def load_table_indexes() -> Dict[str, List[Tuple[str, List[str]]]]:
+    return parse_table_indexes(_read_schema_file())
+
+
+def get_table_columns(table_name: str) -> Dict[str, str]:
+    """
+    获取 schema/tables.sql 中表的字段类型
+    Args:
+        table_name: 表名，如 xhs_note
+
+    Returns:
+        {字段名: INTEGER | TEXT}
+
+    """
+    return load_tables()[table_name]
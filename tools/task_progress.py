@@ -0,0 +1,205 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 存储层写入统计：写入耗时，以及 api 任务的进度和抓取记录(每写入一条数据就计数一次，并追加到任务自己的 jsonl 记录文件)
+
+import asyncio
+import os
+import re
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import aiofiles
+
+import config
+from config.settings import crawl_settings
+from tools import json_codec
+from tools.metrics import metrics
+from var import task_progress_var
+
+# 任务状态回写函数，签名为 report(status=..., progress=..., result=...)
+StatusReporter = Callable[..., None]
+
+# 数据类型只允许字母和下划线，避免拼接出任务目录以外的路径
+_KIND_PATTERN = re.compile(r"^[a-z_]+$")
+
+
+def get_task_records_dir(task_id: str) -> str:
+    return os.path.join(config.TASK_RECORDS_DIR, os.path.basename(task_id))
+
+
+def get_task_records_file(task_id: str, kind: str) -> str:
+    if not _KIND_PATTERN.match(kind):
+        raise ValueError(f"invalid record kind: {kind}")
+    return os.path.join(get_task_records_dir(task_id), f"{kind}.jsonl")
+
+
+class TaskProgress:
+    """
+    单个 api 任务的进度
+    - 按数据类型(contents、comments、creators...)计数
+    - 每条数据追加写入 {TASK_RECORDS_DIR}/{task_id}/{kind}.jsonl，结果接口直接从文件分页读取，不需要把结果放进内存
+    - 进度按最小间隔通过 report 回写到任务状态，进度值为已抓取内容数 / 最大抓取数量，完成前最多到 0.99
+    """
+
+    def __init__(
+        self,
+        task_id: str,
+        report: StatusReporter,
+        max_notes_count: int,
+        report_interval_sec: float = config.TASK_PROGRESS_REPORT_INTERVAL_SEC,
+    ) -> None:
+        self.task_id = task_id
+        self.report = report
+        self.max_notes_count = max_notes_count
+        self.report_interval_sec = report_interval_sec
+        self.counts: Dict[str, int] = {}
+        self._files: Dict[str, Any] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._last_report = 0.0
+
+    @property
+    def progress(self) -> float:
+        if self.max_notes_count <= 0:
+            return 0.0
+        return min(self.counts.get("contents", 0) / self.max_notes_count, 0.99)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "counts": dict(self.counts),
+            "records": sorted(self.counts),
+        }
+
+    async def record(self, kind: str, item: Any) -> None:
+        """
+        记录一条存储层写入的数据
+        Args:
+            kind: 数据类型，如 contents、comments
+            item: 写入的数据
+
+        Returns:
+
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if kind not in self._files:
+                os.makedirs(get_task_records_dir(self.task_id), exist_ok=True)
+                self._files[kind] = await aiofiles.open(get_task_records_file(self.task_id, kind), 'a', encoding='utf-8')
+            await self._files[kind].write(json_codec.dumps(item, default=str) + "\n")
+            await self._files[kind].flush()
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+        self.report_progress()
+
+    def report_progress(self, force: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._last_report < self.report_interval_sec:
+            return
+        self._last_report = now
+        self.report(progress=self.progress, result=self.summary())
+
+    async def close(self) -> None:
+        for file in self._files.values():
+            await file.close()
+        self._files.clear()
+
+
+class _TrackedStore:
+    """
+    存储实现的包装，调用 store_xxx 写入数据时统计写入耗时，api 任务中同时计入任务进度
+    """
+
+    def __init__(self, store: Any, progress: Optional[TaskProgress]) -> None:
+        self._store = store
+        self._progress = progress
+        self._platform = crawl_settings.platform
+        self._backend = crawl_settings.save_data_option
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._store, name)
+        if not name.startswith("store_") or not asyncio.iscoroutinefunction(attr):
+            return attr
+        # store_content -> contents, store_comment -> comments ...
+        kind = name[len("store_"):] + "s"
+
+        async def tracked(*args, **kwargs):
+            with metrics.timer("store_write_seconds", platform=self._platform, backend=self._backend, kind=kind):
+                result = await attr(*args, **kwargs)
+            if self._progress is not None:
+                item = args[0] if args else next(iter(kwargs.values()), None)
+                await self._progress.record(kind, item)
+            return result
+
+        return tracked
+
+
+def track_store(store: Any) -> Any:
+    """
+    为存储实现加上写入耗时统计，api 任务中同时统计任务进度
+    Args:
+        store: 各平台 StoreFactory 创建的存储实现
+
+    Returns:
+
+    """
+    return _TrackedStore(store, task_progress_var.get())
+
+
+def read_task_records(task_id: str, kind: str, cursor: int = 0, limit: int = 100) -> Tuple[List[Dict], int, bool]:
+    """
+    从任务记录文件按游标分页读取，游标为文件字节偏移
+    Args:
+        task_id: 任务ID
+        kind: 数据类型
+        cursor: 上一页返回的 next_cursor，首页为 0
+        limit: 每页条数
+
+    Returns:
+        (记录列表, 下一页游标, 是否还有更多)
+
+    """
+    records_file = get_task_records_file(task_id, kind)
+    if not os.path.exists(records_file):
+        return [], cursor, False
+    records: List[Dict] = []
+    with open(records_file, 'rb') as f:
+        f.seek(cursor)
+        while len(records) < limit:
+            line = f.readline()
+            # 写入中的最后一行还不完整，留到下一次读取
+            if not line.endswith(b"\n"):
+                break
+            records.append(json_codec.loads(line))
+            cursor = f.tell()
+        has_more = f.readline().endswith(b"\n")
+    return records, cursor, has_more
+
+
+def iter_task_records(task_id: str, kind: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    逐块读取任务记录文件，用于 NDJSON 流式输出
+    """
+    records_file = get_task_records_file(task_id, kind)
+    if not os.path.exists(records_file):
+        return
+    with open(records_file, 'rb') as f:
+        pending = b""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            # 只输出完整的行，写入中的最后一行不输出
+            pending += chunk
+            end = pending.rfind(b"\n") + 1
+            if end:
+                yield pending[:end]
+                pending = pending[end:]
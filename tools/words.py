@@ -10,22 +10,28 @@
 
 
 import asyncio
-import json
 import logging
+import multiprocessing
+import os
+import sys
+import time
 from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
 
 import aiofiles
-import jieba
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
 
 import config
-from tools import utils
+from tools import json_codec, utils
+from var import word_prefixes_var
 
+# jieba、matplotlib、wordcloud 导入较慢，只在开启词云时才导入
 plot_lock = asyncio.Lock()
 
 class AsyncWordCloudGenerator:
     def __init__(self):
+        import jieba
+
         logging.getLogger('jieba').setLevel(logging.WARNING)
         self.stop_words_file = config.STOP_WORDS_FILE
         self.lock = asyncio.Lock()
@@ -39,6 +45,8 @@ class AsyncWordCloudGenerator:
             return set(f.read().strip().split('\n'))
 
     async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
+        import jieba
+
         all_text = ' '.join(item['content'] for item in data)
         words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
         word_freq = Counter(words)
@@ -46,7 +54,7 @@ class AsyncWordCloudGenerator:
         # Save word frequency to file
         freq_file = f"{save_words_prefix}_word_freq.json"
         async with aiofiles.open(freq_file, 'w', encoding='utf-8') as file:
-            await file.write(json.dumps(word_freq, ensure_ascii=False, indent=4))
+            await file.write(json_codec.dumps(word_freq, indent=True))
 
         # Try to acquire the plot lock without waiting
         if plot_lock.locked():
@@ -56,28 +64,246 @@ class AsyncWordCloudGenerator:
         await self.generate_word_cloud(word_freq, save_words_prefix)
 
     async def generate_word_cloud(self, word_freq, save_words_prefix):
-        await plot_lock.acquire()
-        top_20_word_freq = {word: freq for word, freq in
-                            sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
-        wordcloud = WordCloud(
-            font_path=config.FONT_PATH,
-            width=800,
-            height=400,
-            background_color='white',
-            max_words=200,
-            stopwords=self.stop_words,
-            colormap='viridis',
-            contour_color='steelblue',
-            contour_width=1
-        ).generate_from_frequencies(top_20_word_freq)
-
-        # Save word cloud image
-        plt.figure(figsize=(10, 5), facecolor='white')
-        plt.imshow(wordcloud, interpolation='bilinear')
-
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
-        plt.close()
-
-        plot_lock.release()
\ No newline at end of file
+        import matplotlib.pyplot as plt
+        from wordcloud import WordCloud
+
+        async with plot_lock:
+            top_20_word_freq = {word: freq for word, freq in
+                                sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
+            wordcloud = WordCloud(
+                font_path=config.FONT_PATH,
+                width=800,
+                height=400,
+                background_color='white',
+                max_words=200,
+                stopwords=self.stop_words,
+                colormap='viridis',
+                contour_color='steelblue',
+                contour_width=1
+            ).generate_from_frequencies(top_20_word_freq)
+
+            # Save word cloud image
+            plt.figure(figsize=(10, 5), facecolor='white')
+            plt.imshow(wordcloud, interpolation='bilinear')
+
+            plt.axis('off')
+            plt.tight_layout(pad=0)
+            plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
+            plt.close()
+
+
+_word_cloud_generator = None
+
+
+def get_word_cloud_generator() -> AsyncWordCloudGenerator:
+    """
+    获取进程内共享的词云生成器，首次调用时才加载停用词和分词词典
+    Returns:
+
+    """
+    global _word_cloud_generator
+    if _word_cloud_generator is None:
+        _word_cloud_generator = AsyncWordCloudGenerator()
+    return _word_cloud_generator
+
+
+# 分词进程内的停用词，由 _init_tokenizer 在进程启动时加载
+_tokenizer_stop_words: Set[str] = set()
+
+
+def _init_tokenizer(stop_words_file: str, custom_words: Dict[str, str]) -> None:
+    global _tokenizer_stop_words
+    import jieba
+
+    logging.getLogger('jieba').setLevel(logging.WARNING)
+    with open(stop_words_file, 'r', encoding='utf-8') as f:
+        _tokenizer_stop_words = set(f.read().strip().split('\n'))
+    for word in custom_words:
+        jieba.add_word(word)
+
+
+def _tokenize(text: str) -> Counter:
+    import jieba
+
+    return Counter(word for word in jieba.lcut(text) if word not in _tokenizer_stop_words and len(word.strip()) > 0)
+
+
+class WordFrequencyEngine:
+    """
+    增量词频统计
+    - 每条新评论只在分词进程池中分词一次，按输出前缀累加到各自的 Counter
+    - 词频每累计 WORDCLOUD_CHECKPOINT_ITEMS 条或间隔 WORDCLOUD_CHECKPOINT_INTERVAL_SEC 秒写一次 checkpoint
+    - 词云图只在爬取结束时(finalize)或手动调用 render_word_cloud 时生成
+    - 进程内共享，finalize 后释放前缀的词频，没有其他任务在统计该前缀时从内存中移除
+    """
+
+    def __init__(
+        self,
+        max_workers: int = config.WORDCLOUD_TOKENIZE_WORKERS,
+        checkpoint_items: int = config.WORDCLOUD_CHECKPOINT_ITEMS,
+        checkpoint_interval_sec: float = config.WORDCLOUD_CHECKPOINT_INTERVAL_SEC,
+    ) -> None:
+        self.max_workers = max_workers
+        self.checkpoint_items = checkpoint_items
+        self.checkpoint_interval_sec = checkpoint_interval_sec
+        self._executor: Optional[Executor] = None
+        self._counters: Dict[str, Counter] = {}
+        # 每个前缀自上次 checkpoint 以来新增的条数
+        self._pending: Dict[str, int] = {}
+        self._last_checkpoint: Dict[str, float] = {}
+        # 每个前缀正在统计的任务数
+        self._users: Dict[str, int] = {}
+        self._checkpoint_lock: Optional[asyncio.Lock] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            init_args = (config.STOP_WORDS_FILE, config.CUSTOM_WORDS)
+            if self.max_workers > 0 and not multiprocessing.current_process().daemon:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=_init_tokenizer, initargs=init_args
+                )
+            else:
+                # api worker 是守护进程，不能再创建子进程，退化为在线程中分词
+                _init_tokenizer(*init_args)
+                self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor
+
+    def _get_counter(self, save_words_prefix: str) -> Counter:
+        """
+        获取前缀对应的词频，首次使用时从已有的 checkpoint 继续累加
+        """
+        if save_words_prefix not in self._counters:
+            word_freq = Counter()
+            freq_file = f"{save_words_prefix}_word_freq.json"
+            if os.path.exists(freq_file):
+                with open(freq_file, 'r', encoding='utf-8') as f:
+                    word_freq.update(json_codec.loads(f.read()))
+            self._counters[save_words_prefix] = word_freq
+            self._pending[save_words_prefix] = 0
+            self._last_checkpoint[save_words_prefix] = time.time()
+        return self._counters[save_words_prefix]
+
+    async def add_item(self, save_item: Dict, save_words_prefix: str) -> None:
+        """
+        统计一条新数据的词频，没有 content 字段的数据(如帖子)会被忽略
+        Args:
+            save_item: 存储的数据
+            save_words_prefix: 词频和词云文件前缀
+
+        Returns:
+
+        """
+        text = save_item.get('content')
+        if not text:
+            return
+        task_prefixes = word_prefixes_var.get()
+        if task_prefixes is not None and save_words_prefix not in task_prefixes:
+            task_prefixes.add(save_words_prefix)
+            self._users[save_words_prefix] = self._users.get(save_words_prefix, 0) + 1
+        loop = asyncio.get_running_loop()
+        word_freq = await loop.run_in_executor(self._get_executor(), _tokenize, text)
+        self._get_counter(save_words_prefix).update(word_freq)
+        self._pending[save_words_prefix] += 1
+
+        if (self._pending[save_words_prefix] >= self.checkpoint_items
+                or time.time() - self._last_checkpoint[save_words_prefix] >= self.checkpoint_interval_sec):
+            await self.checkpoint(save_words_prefix)
+
+    async def checkpoint(self, save_words_prefix: str) -> None:
+        """
+        把词频写入 {prefix}_word_freq.json，先写临时文件再替换，避免中断时留下不完整的文件
+        """
+        if self._checkpoint_lock is None:
+            self._checkpoint_lock = asyncio.Lock()
+        async with self._checkpoint_lock:
+            word_freq = self._get_counter(save_words_prefix)
+            self._pending[save_words_prefix] = 0
+            self._last_checkpoint[save_words_prefix] = time.time()
+            freq_file = f"{save_words_prefix}_word_freq.json"
+            tmp_file = f"{freq_file}.tmp"
+            async with aiofiles.open(tmp_file, 'w', encoding='utf-8') as file:
+                await file.write(json_codec.dumps(word_freq, indent=True))
+            os.replace(tmp_file, freq_file)
+
+    async def render_word_cloud(self, save_words_prefix: str) -> None:
+        """
+        按当前词频生成词云图
+        """
+        await get_word_cloud_generator().generate_word_cloud(self._get_counter(save_words_prefix), save_words_prefix)
+
+    async def finalize(self, prefixes: Optional[Iterable[str]] = None) -> None:
+        """
+        爬取结束时调用，写入最终词频并生成词云图，然后释放这些前缀的词频
+        Args:
+            prefixes: 需要处理的前缀，默认为当前任务统计过的前缀，不在任务中调用时为本进程统计过的全部前缀
+
+        Returns:
+
+        """
+        if prefixes is None:
+            prefixes = word_prefixes_var.get()
+        for save_words_prefix in list(prefixes if prefixes is not None else self._counters):
+            try:
+                await self.checkpoint(save_words_prefix)
+                await self.render_word_cloud(save_words_prefix)
+            except Exception as e:
+                utils.logger.error(f"[WordFrequencyEngine.finalize] generate word cloud for {save_words_prefix} error: {e}")
+            finally:
+                self.release(save_words_prefix)
+
+    def release(self, save_words_prefix: str) -> None:
+        """
+        当前任务不再统计该前缀，没有其他任务在统计时从内存中移除词频，之后再统计时从 checkpoint 继续累加
+        """
+        task_prefixes = word_prefixes_var.get()
+        if task_prefixes is not None:
+            if save_words_prefix not in task_prefixes:
+                return
+            task_prefixes.discard(save_words_prefix)
+        users = self._users.pop(save_words_prefix, 0) - 1
+        if users > 0:
+            self._users[save_words_prefix] = users
+            return
+        self._counters.pop(save_words_prefix, None)
+        self._pending.pop(save_words_prefix, None)
+        self._last_checkpoint.pop(save_words_prefix, None)
+
+    def release_task(self) -> None:
+        """任务失败、没有执行 finalize 时释放当前任务统计过的全部前缀"""
+        for save_words_prefix in list(word_prefixes_var.get() or ()):
+            self.release(save_words_prefix)
+
+    @property
+    def prefixes(self) -> List[str]:
+        return list(self._counters)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_word_frequency_engine: Optional[WordFrequencyEngine] = None
+
+
+def get_word_frequency_engine() -> WordFrequencyEngine:
+    """
+    获取进程内共享的增量词频统计
+    Returns:
+
+    """
+    global _word_frequency_engine
+    if _word_frequency_engine is None:
+        _word_frequency_engine = WordFrequencyEngine()
+    return _word_frequency_engine
+
+
+async def _render_from_checkpoint(save_words_prefix: str) -> None:
+    engine = WordFrequencyEngine()
+    await engine.render_word_cloud(save_words_prefix)
+
+
+if __name__ == '__main__':
+    # 按已保存的词频手动生成词云图: python -m tools.words data/xhs/words/search_comments_2024-01-01
+    for prefix in sys.argv[1:]:
+        asyncio.get_event_loop().run_until_complete(_render_from_checkpoint(prefix))
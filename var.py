@@ -9,17 +9,26 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
-from asyncio.tasks import Task
 from contextvars import ContextVar
-from typing import List
+from typing import TYPE_CHECKING, Optional, Set
 
 import aiomysql
 
 from async_db import AsyncMysqlDB
 
+if TYPE_CHECKING:
+    from tools.sqlite_sink import SqliteTaskWrites
+    from tools.task_progress import TaskProgress
+
 request_keyword_var: ContextVar[str] = ContextVar("request_keyword", default="")
 crawler_type_var: ContextVar[str] = ContextVar("crawler_type", default="")
-comment_tasks_var: ContextVar[List[Task]] = ContextVar("comment_tasks", default=[])
 media_crawler_db_var: ContextVar[AsyncMysqlDB] = ContextVar("media_crawler_db_var")
 db_conn_pool_var: ContextVar[aiomysql.Pool] = ContextVar("db_conn_pool_var")
-source_keyword_var: ContextVar[str] = ContextVar("source_keyword", default="")
\ No newline at end of file
+source_keyword_var: ContextVar[str] = ContextVar("source_keyword", default="")
+task_progress_var: ContextVar[Optional["TaskProgress"]] = ContextVar("task_progress", default=None)
+# 当前爬虫任务统计过词频的文件前缀，进程内同时运行多个任务时结束时只处理本任务的前缀
+word_prefixes_var: ContextVar[Optional[Set[str]]] = ContextVar("word_prefixes", default=None)
+# 当前爬虫任务写入的 parquet 文件，任务结束时只关闭本任务写入、且没有其他任务在写的文件
+parquet_files_var: ContextVar[Optional[Set[str]]] = ContextVar("parquet_files", default=None)
+# 当前爬虫任务写入 sqlite 的数据，任务结束时只等待本任务的数据写入
+sqlite_writes_var: ContextVar[Optional["SqliteTaskWrites"]] = ContextVar("sqlite_writes", default=None)
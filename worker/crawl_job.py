@@ -0,0 +1,178 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 单个爬虫任务的执行流程，api 进程内执行和 worker 进程执行共用
+
+from typing import Any, Callable, Dict, Optional
+
+import config
+import db
+from config.settings import CrawlSettings, set_crawl_settings
+from store import check_store_dependencies, close_store_sinks
+from tools import words
+from tools.sqlite_sink import SqliteTaskWrites
+from tools.task_progress import TaskProgress
+from var import parquet_files_var, sqlite_writes_var, task_progress_var, word_prefixes_var
+
+# 任务状态回写函数，签名为 report(status=..., error=..., ...)
+StatusReporter = Callable[..., None]
+
+SPECIFIED_ID_FIELDS = {
+    "xhs": "xhs_specified_note_url_list",
+    "dy": "dy_specified_id_list",
+    "ks": "ks_specified_id_list",
+    "bili": "bili_specified_id_list",
+    "wb": "weibo_specified_id_list",
+    "tieba": "tieba_specified_id_list",
+    "zhihu": "zhihu_specified_id_list",
+}
+
+
+def build_crawl_settings(params: Dict[str, Any], cookies: str = "") -> CrawlSettings:
+    """
+    根据请求参数生成本次任务独立的爬虫配置，不修改全局config
+    Args:
+        params: api_server.CrawlerRequest 的字典形式
+        cookies: 登录会话中取到的cookie字符串，优先级高于请求中的cookies
+
+    Returns:
+
+    """
+    settings = CrawlSettings.from_config(
+        platform=params["platform"],
+        login_type=params.get("login_type", "qrcode"),
+        crawler_type=params.get("crawler_type", "search"),
+        keywords=params.get("keywords") or "",
+        start_page=params.get("start_page", 1),
+        enable_get_comments=params.get("get_comments", True),
+        enable_get_sub_comments=params.get("get_sub_comments", False),
+        save_data_option=params.get("save_data_option", "json"),
+        crawler_max_notes_count=params.get("max_notes_count", 200),
+        enable_get_images=params.get("enable_images", False),
+        enable_ip_proxy=params.get("use_proxy", False),
+        proxy_strategy=params.get("proxy_strategy", "round_robin"),
+        cookies=cookies or params.get("cookies") or "",
+        use_browser_pool=config.API_USE_BROWSER_POOL,
+    )
+    # 设置指定ID列表
+    specified_ids = params.get("specified_ids")
+    if specified_ids and params["platform"] in SPECIFIED_ID_FIELDS:
+        setattr(settings, SPECIFIED_ID_FIELDS[params["platform"]], list(specified_ids))
+    return settings
+
+
+async def resolve_login_cookies(params: Dict[str, Any], report: StatusReporter) -> Any:
+    """
+    检查登录状态并取出会话cookie
+    Returns: cookie字符串；需要登录或验证时返回None，并已通过report回写任务状态
+    """
+    from login_manager import login_manager
+
+    platform = params["platform"]
+    session_id = params.get("session_id")
+    if session_id:
+        # 使用指定的会话ID
+        session = await login_manager.check_login_status(platform, session_id)
+        if session.status.value == "not_logged_in" or session.status.value == "expired":
+            # 需要重新登录
+            report(status="need_login", error="需要重新登录")
+            return None
+        elif session.status.value == "need_verification":
+            # 需要验证
+            report(status="need_verification", error="需要手动验证")
+            return None
+        elif session.status.value == "logged_in":
+            # 已登录，获取cookies
+            cookies = await login_manager.get_session_cookies(session_id)
+            if cookies:
+                # 将cookies转换为字符串格式
+                return "; ".join([f"{k}={v}" for k, v in cookies.items()])
+    else:
+        # 查找平台的最新会话
+        session = await login_manager.check_login_status(platform)
+        if session.status.value == "logged_in":
+            # 已登录，获取cookies
+            cookies = await login_manager.get_session_cookies(session.session_id)
+            if cookies:
+                return "; ".join([f"{k}={v}" for k, v in cookies.items()])
+        elif session.status.value in ["not_logged_in", "expired", "need_verification"]:
+            # 需要登录或验证
+            report(status="need_login", error="需要登录", session_id=session.session_id)
+            return None
+    return ""
+
+
+async def execute_crawl_job(params: Dict[str, Any], report: StatusReporter, task_id: Optional[str] = None) -> None:
+    """
+    执行一个爬虫任务，任务状态通过report回写
+    Args:
+        params: api_server.CrawlerRequest 的字典形式
+        report: 状态回写函数
+        task_id: 任务ID，传入时统计存储层写入的数据量并记录到任务记录文件
+
+    Returns:
+
+    """
+    from main import CrawlerFactory
+
+    try:
+        # 更新任务状态
+        report(status="running")
+
+        # 检查登录状态
+        cookie_str = await resolve_login_cookies(params, report)
+        if cookie_str is None:
+            return
+
+        # 配置爬虫参数，每个任务持有独立的配置对象，通过上下文变量传递给爬虫、客户端和存储
+        settings = build_crawl_settings(params, cookies=cookie_str)
+        set_crawl_settings(settings)
+        check_store_dependencies(settings.save_data_option)
+
+        # 初始化数据库
+        if settings.save_data_option == "db":
+            await db.init_db()
+
+        # 存储层写入的数据计入任务进度
+        progress = TaskProgress(task_id, report, settings.crawler_max_notes_count) if task_id else None
+        task_progress_var.set(progress)
+        # 记录本任务统计过词频的前缀和写入 parquet、sqlite 的数据，结束时只处理本任务的部分
+        word_prefixes_var.set(set())
+        parquet_files_var.set(set())
+        sqlite_writes_var.set(SqliteTaskWrites())
+
+        # 创建爬虫实例并运行
+        crawler = CrawlerFactory.create_crawler(platform=settings.platform)
+        try:
+            await crawler.start()
+        finally:
+            if progress is not None:
+                await progress.close()
+            # csv、parquet、sqlite 存储中还在缓冲的数据写入文件
+            await close_store_sinks(settings.save_data_option)
+
+        # 词频在爬取过程中增量统计，结束时统一生成词云图
+        if settings.enable_get_wordcloud:
+            await words.get_word_frequency_engine().finalize(word_prefixes_var.get())
+
+        # 更新任务状态为完成，结果数据通过任务记录接口分页读取
+        report(status="completed", progress=1.0, result=progress.summary() if progress else {})
+
+        # 关闭数据库连接
+        if settings.save_data_option == "db":
+            await db.close()
+
+    except Exception as e:
+        words.get_word_frequency_engine().release_task()
+        # 更新任务状态为失败
+        progress = task_progress_var.get()
+        report(status="failed", error=str(e), result=progress.summary() if progress else None)
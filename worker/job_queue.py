@@ -0,0 +1,310 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬虫任务的持久化队列，api 进程投递任务，worker 进程领取任务并回写状态
+
+import json
+import os
+import pathlib
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config import db_config
+
+JOB_STATUS_PENDING = "pending"
+JOB_STATUS_RUNNING = "running"
+
+# 任务字段，与 api_server.TaskStatusResponse 保持一致
+JOB_STATUS_FIELDS = ("status", "progress", "result", "error", "session_id")
+
+
+class AbstractJobQueue(ABC):
+
+    @abstractmethod
+    def put(self, task_id: str, payload: Dict) -> Dict:
+        """
+        投递一个任务
+        :param task_id: 任务ID
+        :param payload: 任务参数
+        :return: 任务状态
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """
+        领取一个待执行的任务，多个进程同时领取时同一任务只会被领取一次
+        :param worker_id: worker标识
+        :return: 任务(包含payload)，没有任务时返回None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, task_id: str, **fields: Any) -> None:
+        """
+        更新任务状态字段
+        :param task_id: 任务ID
+        :param fields: status | progress | result | error | session_id
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict]:
+        """
+        获取任务状态
+        :param task_id: 任务ID
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, task_id: str) -> None:
+        """
+        删除任务
+        :param task_id: 任务ID
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def requeue_running(self) -> int:
+        """
+        将上次进程退出时仍处于running状态的任务重新放回队列
+        :return: 重新入队的任务数量
+        """
+        raise NotImplementedError
+
+    def pending_count(self) -> int:
+        """
+        待执行任务数量
+        :return:
+        """
+        return 0
+
+
+class SqliteJobQueue(AbstractJobQueue):
+    """
+    基于sqlite的本地持久化队列，多进程通过 BEGIN IMMEDIATE 事务互斥领取任务
+    """
+
+    def __init__(self, db_path: str = db_config.TASK_QUEUE_SQLITE_PATH) -> None:
+        self._db_path = db_path
+        pathlib.Path(os.path.dirname(db_path) or ".").mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS crawler_job (
+                task_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                session_id TEXT,
+                worker_id TEXT,
+                enqueued_at REAL NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_crawler_job_status ON crawler_job (status, enqueued_at)"
+        )
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def put(self, task_id: str, payload: Dict) -> Dict:
+        now = datetime.now().isoformat()
+        self._conn.execute(
+            "INSERT INTO crawler_job (task_id, payload, status, progress, enqueued_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, 0, ?, ?, ?)",
+            (task_id, json.dumps(payload, ensure_ascii=False), JOB_STATUS_PENDING, time.time(), now, now),
+        )
+        return self.get(task_id)
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        cursor = self._conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            row = cursor.execute(
+                "SELECT * FROM crawler_job WHERE status = ? ORDER BY enqueued_at LIMIT 1",
+                (JOB_STATUS_PENDING,),
+            ).fetchone()
+            if row is None:
+                cursor.execute("COMMIT")
+                return None
+            cursor.execute(
+                "UPDATE crawler_job SET status = ?, worker_id = ?, updated_at = ? WHERE task_id = ?",
+                (JOB_STATUS_RUNNING, worker_id, datetime.now().isoformat(), row["task_id"]),
+            )
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        job = self._row_to_job(row)
+        job["status"] = JOB_STATUS_RUNNING
+        job["worker_id"] = worker_id
+        return job
+
+    def update(self, task_id: str, **fields: Any) -> None:
+        columns, values = [], []
+        for key, value in fields.items():
+            if key not in JOB_STATUS_FIELDS:
+                continue
+            if key == "result" and value is not None:
+                value = json.dumps(value, ensure_ascii=False)
+            columns.append(f"{key} = ?")
+            values.append(value)
+        if not columns:
+            return
+        columns.append("updated_at = ?")
+        values.append(datetime.now().isoformat())
+        values.append(task_id)
+        self._conn.execute(f"UPDATE crawler_job SET {', '.join(columns)} WHERE task_id = ?", values)
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        row = self._conn.execute("SELECT * FROM crawler_job WHERE task_id = ?", (task_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def delete(self, task_id: str) -> None:
+        self._conn.execute("DELETE FROM crawler_job WHERE task_id = ?", (task_id,))
+
+    def requeue_running(self) -> int:
+        cursor = self._conn.execute(
+            "UPDATE crawler_job SET status = ?, worker_id = NULL WHERE status = ?",
+            (JOB_STATUS_PENDING, JOB_STATUS_RUNNING),
+        )
+        return cursor.rowcount
+
+    def pending_count(self) -> int:
+        row = self._conn.execute(
+            "SELECT COUNT(*) FROM crawler_job WHERE status = ?", (JOB_STATUS_PENDING,)
+        ).fetchone()
+        return row[0]
+
+
+class RedisJobQueue(AbstractJobQueue):
+    """
+    基于redis的任务队列，pending 列表保存待执行任务ID，任务详情保存在 hash 中
+    """
+    PENDING_KEY = "mediacrawler:job:pending"
+    RUNNING_KEY = "mediacrawler:job:running"
+    JOB_KEY_PREFIX = "mediacrawler:job:"
+
+    def __init__(self) -> None:
+        from cache.redis_cache import RedisCache
+        self._redis_client = RedisCache._connet_redis()
+
+    def _job_key(self, task_id: str) -> str:
+        return f"{self.JOB_KEY_PREFIX}{task_id}"
+
+    def _load(self, task_id: str) -> Optional[Dict]:
+        raw = self._redis_client.hgetall(self._job_key(task_id))
+        if not raw:
+            return None
+        job = {key.decode(): value.decode() for key, value in raw.items()}
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job.get("result") else None
+        job["progress"] = float(job.get("progress") or 0)
+        for key in ("error", "session_id", "worker_id"):
+            job[key] = job.get(key) or None
+        return job
+
+    def put(self, task_id: str, payload: Dict) -> Dict:
+        now = datetime.now().isoformat()
+        self._redis_client.hset(self._job_key(task_id), mapping={
+            "task_id": task_id,
+            "payload": json.dumps(payload, ensure_ascii=False),
+            "status": JOB_STATUS_PENDING,
+            "progress": 0,
+            "created_at": now,
+            "updated_at": now,
+        })
+        self._redis_client.rpush(self.PENDING_KEY, task_id)
+        return self._load(task_id)
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        # LMOVE 保证同一任务只会被一个worker领取
+        task_id = self._redis_client.lmove(self.PENDING_KEY, self.RUNNING_KEY, "LEFT", "RIGHT")
+        if task_id is None:
+            return None
+        task_id = task_id.decode()
+        self._redis_client.hset(self._job_key(task_id), mapping={
+            "status": JOB_STATUS_RUNNING,
+            "worker_id": worker_id,
+            "updated_at": datetime.now().isoformat(),
+        })
+        return self._load(task_id)
+
+    def update(self, task_id: str, **fields: Any) -> None:
+        mapping = {}
+        for key, value in fields.items():
+            if key not in JOB_STATUS_FIELDS:
+                continue
+            if key == "result" and value is not None:
+                value = json.dumps(value, ensure_ascii=False)
+            mapping[key] = "" if value is None else value
+        if not mapping:
+            return
+        mapping["updated_at"] = datetime.now().isoformat()
+        self._redis_client.hset(self._job_key(task_id), mapping=mapping)
+        if mapping.get("status") not in (None, JOB_STATUS_PENDING, JOB_STATUS_RUNNING):
+            self._redis_client.lrem(self.RUNNING_KEY, 0, task_id)
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        return self._load(task_id)
+
+    def delete(self, task_id: str) -> None:
+        self._redis_client.lrem(self.PENDING_KEY, 0, task_id)
+        self._redis_client.lrem(self.RUNNING_KEY, 0, task_id)
+        self._redis_client.delete(self._job_key(task_id))
+
+    def requeue_running(self) -> int:
+        count = 0
+        while self._redis_client.lmove(self.RUNNING_KEY, self.PENDING_KEY, "RIGHT", "LEFT") is not None:
+            count += 1
+        return count
+
+    def pending_count(self) -> int:
+        return self._redis_client.llen(self.PENDING_KEY)
+
+
+class JobQueueFactory:
+    """
+    任务队列工厂类
+    """
+
+    @staticmethod
+    def create_queue(queue_type: str = db_config.TASK_QUEUE_TYPE) -> AbstractJobQueue:
+        """
+        创建任务队列对象
+        :param queue_type: sqlite | redis
+        :return:
+        """
+        if queue_type == "sqlite":
+            return SqliteJobQueue()
+        elif queue_type == "redis":
+            return RedisJobQueue()
+        else:
+            raise ValueError(f"Unknown job queue type: {queue_type}")
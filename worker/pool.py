@@ -0,0 +1,125 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 多进程爬虫 worker 池，每个 worker 进程独立运行事件循环和浏览器实例
+
+import asyncio
+import glob
+import multiprocessing
+import os
+from multiprocessing.process import BaseProcess
+from typing import List
+
+import config
+from config import db_config
+from tools import utils, words
+from tools.metrics import dump_snapshot
+from tools.browser_pool import browser_pool
+
+from .crawl_job import execute_crawl_job
+from .job_queue import AbstractJobQueue, JobQueueFactory
+
+# worker 空闲时轮询队列的间隔，单位秒
+WORKER_POLL_INTERVAL = 1.0
+
+
+async def _dump_metrics_periodically(worker_id: str) -> None:
+    """定期把本进程的指标快照写到 METRICS_SNAPSHOT_DIR，由 api 进程的 /metrics 汇总"""
+    snapshot_file = os.path.join(config.METRICS_SNAPSHOT_DIR, f"worker-{worker_id}.json")
+    while True:
+        await asyncio.sleep(config.METRICS_SNAPSHOT_INTERVAL_SEC)
+        try:
+            dump_snapshot(snapshot_file)
+        except OSError as e:
+            utils.logger.warning(f"[CrawlerWorkerPool.worker] dump metrics snapshot error: {e}")
+
+
+async def _worker_loop(worker_id: str, queue: AbstractJobQueue, stop_event) -> None:
+    asyncio.get_event_loop().create_task(_dump_metrics_periodically(worker_id))
+    while not stop_event.is_set():
+        job = queue.claim(worker_id)
+        if job is None:
+            await asyncio.sleep(WORKER_POLL_INTERVAL)
+            continue
+
+        task_id = job["task_id"]
+        utils.logger.info(f"[CrawlerWorkerPool.worker] worker {worker_id} claimed task {task_id}")
+
+        def report(**fields) -> None:
+            queue.update(task_id, **fields)
+
+        await execute_crawl_job(job["payload"], report, task_id=task_id)
+        utils.logger.info(f"[CrawlerWorkerPool.worker] worker {worker_id} finished task {task_id}")
+
+    # 关闭本 worker 进程持有的常驻浏览器和分词线程
+    await browser_pool.close()
+    words.get_word_frequency_engine().close()
+
+
+def _worker_main(worker_index: int, queue_type: str, stop_event) -> None:
+    """
+    worker 进程入口，每个进程独立创建队列连接和事件循环
+    """
+    worker_id = f"{os.getpid()}-{worker_index}"
+    queue = JobQueueFactory.create_queue(queue_type)
+    utils.logger.info(f"[CrawlerWorkerPool.worker] worker {worker_id} started")
+    try:
+        asyncio.get_event_loop().run_until_complete(_worker_loop(worker_id, queue, stop_event))
+    except KeyboardInterrupt:
+        pass
+    utils.logger.info(f"[CrawlerWorkerPool.worker] worker {worker_id} exited")
+
+
+class CrawlerWorkerPool:
+    """
+    爬虫 worker 进程池，任务通过持久化队列分发，状态由 worker 回写到队列
+    """
+
+    def __init__(self, num_workers: int, queue_type: str = db_config.TASK_QUEUE_TYPE) -> None:
+        self.num_workers = num_workers
+        self.queue_type = queue_type
+        # spawn 方式启动，避免子进程继承 api 进程的事件循环和连接
+        self._mp_context = multiprocessing.get_context("spawn")
+        self._stop_event = self._mp_context.Event()
+        self._processes: List[BaseProcess] = []
+
+    def start(self) -> None:
+        # 清理上次运行留下的 worker 指标快照
+        for snapshot_file in glob.glob(os.path.join(config.METRICS_SNAPSHOT_DIR, "worker-*.json")):
+            os.remove(snapshot_file)
+        queue = JobQueueFactory.create_queue(self.queue_type)
+        requeued = queue.requeue_running()
+        if requeued:
+            utils.logger.info(f"[CrawlerWorkerPool.start] requeue {requeued} unfinished tasks")
+        for index in range(self.num_workers):
+            process = self._mp_context.Process(
+                target=_worker_main,
+                args=(index, self.queue_type, self._stop_event),
+                name=f"crawler-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        utils.logger.info(f"[CrawlerWorkerPool.start] started {self.num_workers} crawler workers")
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
+        utils.logger.info("[CrawlerWorkerPool.stop] crawler workers stopped")
+
+    @property
+    def alive_count(self) -> int:
+        return sum(1 for process in self._processes if process.is_alive())
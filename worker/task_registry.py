@@ -0,0 +1,204 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : api_server 的任务登记表，持久化到sqlite，按状态和创建时间建索引，已结束的任务按TTL和数量上限淘汰
+
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import db_config
+
+# 不会再变化的任务状态，只有这些状态的任务会被淘汰
+TASK_FINISHED_STATUSES = ("completed", "failed", "need_login", "need_verification")
+
+# 可更新的任务字段
+TASK_FIELDS = ("status", "progress", "result", "error", "session_id")
+
+
+class SqliteTaskRegistry:
+    """
+    基于sqlite的任务登记表
+    - 按 task_id 主键查询
+    - (status, created_at)、created_at 索引支持按状态过滤和按创建时间倒序的游标分页
+    - evict 淘汰超过 TTL 的已结束任务，以及超过数量上限的最早的已结束任务
+    """
+
+    def __init__(self, db_path: str = db_config.TASK_REGISTRY_SQLITE_PATH) -> None:
+        pathlib.Path(os.path.dirname(db_path) or ".").mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS crawler_task (
+                task_id TEXT PRIMARY KEY,
+                platform TEXT,
+                status TEXT NOT NULL,
+                progress REAL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                session_id TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_crawler_task_status ON crawler_task (status, created_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_crawler_task_created_at ON crawler_task (created_at)"
+        )
+
+    @staticmethod
+    def _row_to_task(row: sqlite3.Row) -> Dict:
+        task = dict(row)
+        task["result"] = json.loads(task["result"]) if task["result"] else None
+        return task
+
+    def create(self, task_id: str, platform: Optional[str] = None, status: str = "pending") -> Dict:
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO crawler_task (task_id, platform, status, progress, created_at, updated_at) "
+                "VALUES (?, ?, ?, 0, ?, ?)",
+                (task_id, platform, status, now, now),
+            )
+        return self.get(task_id)
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM crawler_task WHERE task_id = ?", (task_id,)).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def update(self, task_id: str, updated_at: Optional[str] = None, **fields: Any) -> None:
+        """
+        更新任务字段
+        :param task_id: 任务ID
+        :param updated_at: 更新时间，默认为当前时间；从任务队列同步状态时沿用队列中的时间
+        :param fields: status | progress | result | error | session_id
+        :return:
+        """
+        columns, values = [], []
+        for key, value in fields.items():
+            if key not in TASK_FIELDS:
+                continue
+            if key == "result" and value is not None:
+                value = json.dumps(value, ensure_ascii=False)
+            columns.append(f"{key} = ?")
+            values.append(value)
+        if not columns:
+            return
+        columns.append("updated_at = ?")
+        values.append(updated_at or datetime.now().isoformat())
+        values.append(task_id)
+        with self._lock:
+            self._conn.execute(f"UPDATE crawler_task SET {', '.join(columns)} WHERE task_id = ?", values)
+
+    def fail_unfinished(self, error: str) -> int:
+        """
+        将未结束的任务标记为失败，用于 api 进程内执行的任务在进程重启后收尾
+        :param error: 错误信息
+        :return: 标记的任务数量
+        """
+        placeholders = ", ".join("?" * len(TASK_FINISHED_STATUSES))
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE crawler_task SET status = 'failed', error = ?, updated_at = ? WHERE status NOT IN ({placeholders})",
+                (error, datetime.now().isoformat(), *TASK_FINISHED_STATUSES),
+            )
+        return cursor.rowcount
+
+    def unfinished_task_ids(self) -> List[str]:
+        """未结束的任务ID，worker 模式下用于从任务队列同步状态"""
+        placeholders = ", ".join("?" * len(TASK_FINISHED_STATUSES))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT task_id FROM crawler_task WHERE status NOT IN ({placeholders})", TASK_FINISHED_STATUSES,
+            ).fetchall()
+        return [row["task_id"] for row in rows]
+
+    def delete(self, task_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM crawler_task WHERE task_id = ?", (task_id,))
+        return cursor.rowcount > 0
+
+    def list(
+        self, status: Optional[str] = None, cursor: Optional[str] = None, limit: int = 20
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        按创建时间倒序分页列出任务
+        :param status: 只列出该状态的任务
+        :param cursor: 上一页返回的 next_cursor，首页为 None
+        :param limit: 每页条数
+        :return: (任务列表, 下一页游标)，没有下一页时游标为 None
+        """
+        conditions, values = [], []
+        if status:
+            conditions.append("status = ?")
+            values.append(status)
+        if cursor:
+            created_at, _, task_id = cursor.partition("|")
+            conditions.append("(created_at < ? OR (created_at = ? AND task_id < ?))")
+            values.extend([created_at, created_at, task_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        values.append(limit + 1)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM crawler_task {where} ORDER BY created_at DESC, task_id DESC LIMIT ?", values
+            ).fetchall()
+        tasks = [self._row_to_task(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = f"{tasks[-1]['created_at']}|{tasks[-1]['task_id']}"
+        return tasks, next_cursor
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            if status:
+                row = self._conn.execute("SELECT COUNT(*) FROM crawler_task WHERE status = ?", (status,)).fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM crawler_task").fetchone()
+        return row[0]
+
+    def evict(self, ttl_sec: float, max_tasks: int = 0) -> List[str]:
+        """
+        淘汰已结束的任务
+        :param ttl_sec: 已结束任务最后更新时间超过该秒数后淘汰
+        :param max_tasks: 任务总数上限，超过时从最早创建的已结束任务开始淘汰，0 表示不限制
+        :return: 被淘汰的任务ID
+        """
+        placeholders = ", ".join("?" * len(TASK_FINISHED_STATUSES))
+        expired_before = (datetime.now() - timedelta(seconds=ttl_sec)).isoformat()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT task_id FROM crawler_task WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*TASK_FINISHED_STATUSES, expired_before),
+            ).fetchall()
+            evicted = [row["task_id"] for row in rows]
+            if max_tasks > 0:
+                overflow = self._conn.execute("SELECT COUNT(*) FROM crawler_task").fetchone()[0] - len(evicted) - max_tasks
+                if overflow > 0:
+                    rows = self._conn.execute(
+                        f"SELECT task_id FROM crawler_task WHERE status IN ({placeholders}) AND updated_at >= ? "
+                        f"ORDER BY created_at LIMIT ?",
+                        (*TASK_FINISHED_STATUSES, expired_before, overflow),
+                    ).fetchall()
+                    evicted.extend(row["task_id"] for row in rows)
+            self._conn.executemany("DELETE FROM crawler_task WHERE task_id = ?", [(task_id,) for task_id in evicted])
+        return evicted